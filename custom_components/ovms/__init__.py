@@ -15,10 +15,14 @@ from .const import (
     CONF_CONFIG_ENTRY_ID,
     CONF_TOPIC_STRUCTURE,
     CONF_TOPIC_BLACKLIST,
+    CONF_FLEET_AGGREGATES,
+    DEFAULT_FLEET_AGGREGATES,
     get_platforms_loaded_signal,
 )
 
+from .fleet import async_get_fleet_aggregator, async_remove_fleet_member
 from .mqtt import OVMSMQTTClient
+from .mqtt.discovery_snapshot import async_remove_discovery_snapshot
 from .migrations import (
     async_cleanup_stale_device_associations,
     async_migrate_entity_identity,
@@ -163,6 +167,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.info("All platforms loaded, notifying MQTT client")
         async_dispatcher_send(hass, get_platforms_loaded_signal(entry.entry_id))
 
+        if config.get(CONF_FLEET_AGGREGATES, DEFAULT_FLEET_AGGREGATES):
+            async_get_fleet_aggregator(hass).async_add_member(
+                entry.entry_id, mqtt_client
+            )
+
         return True
     except Exception as ex:
         _LOGGER.exception("Error setting up OVMS integration: %s", ex)
@@ -363,6 +372,10 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             mqtt_client = hass.data[DOMAIN][entry.entry_id]["mqtt_client"]
             await mqtt_client.async_shutdown()
 
+            # Take the vehicle out of the fleet; the fleet sensors move to
+            # another member if this entry hosted them
+            async_remove_fleet_member(hass, entry.entry_id)
+
             # Remove config entry from hass.data
             hass.data[DOMAIN].pop(entry.entry_id)
 
@@ -380,6 +393,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 if "mqtt_client" in hass.data[DOMAIN][entry.entry_id]:
                     mqtt_client = hass.data[DOMAIN][entry.entry_id]["mqtt_client"]
                     await mqtt_client.async_shutdown()
+                async_remove_fleet_member(hass, entry.entry_id)
                 hass.data[DOMAIN].pop(entry.entry_id, None)
 
                 # Unload services if this is the last config entry
@@ -389,3 +403,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             _LOGGER.exception("Error during cleanup after failed unload: %s", ex2)
 
         return False
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove data stored for a deleted config entry."""
+    await async_remove_discovery_snapshot(hass, entry.entry_id)
@@ -1,6 +1,5 @@
 """Attribute manager for OVMS integration."""
 
-import json
 import logging
 from typing import Dict, Any, Optional, List
 
@@ -11,7 +10,8 @@ from .const import (
     GPS_ACCURACY_MIN_METERS,
     GPS_ACCURACY_MAX_METERS,
 )
-from .metrics import get_metric_by_path, get_metric_by_pattern
+from .metrics import MetricDescriptor, get_metric_descriptor
+from .payload import decode_payload
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
@@ -28,7 +28,7 @@ class AttributeManager:
         topic: str,
         category: str,
         parts: List[str],
-        metric_info: Optional[Dict] = None,
+        metric: Optional[MetricDescriptor | Dict] = None,
     ) -> Dict[str, Any]:
         """Prepare entity attributes."""
         try:
@@ -38,18 +38,11 @@ class AttributeManager:
                 "parts": parts,
             }
 
-            # Add additional attributes from metric definition
-            if metric_info:
-                # Only add attributes that are useful context for the user;
-                # filter out entity-level properties handled by HA natively
-                for key, value in metric_info.items():
-                    if key not in [
-                        "name",
-                        "device_class",
-                        "state_class",
-                        "unit",
-                    ]:
-                        attributes[key] = value
+            # Add additional attributes from metric definition. Only keys
+            # that are useful context for the user; entity-level properties
+            # handled by HA natively are filtered out once by the descriptor
+            if metric:
+                attributes.update(get_metric_descriptor(metric).extra_attributes)
 
             return attributes
         except Exception as ex:
@@ -57,27 +50,19 @@ class AttributeManager:
             return {"topic": topic, "category": category}
 
     def process_json_payload(
-        self, payload: str, attributes: Dict[str, Any]
+        self, payload: Any, attributes: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Process JSON payload to extract additional attributes."""
-        try:
-            json_data = json.loads(payload)
-            if isinstance(json_data, dict):
-                # Add useful attributes from the data
-                for key, value in json_data.items():
-                    if (
-                        key not in ["value", "state", "status"]
-                        and key not in attributes
-                    ):
-                        attributes[key] = value
-
-                # If there's a timestamp in the JSON, use it
-                if "timestamp" in json_data:
-                    attributes["device_timestamp"] = json_data["timestamp"]
-
-        except (ValueError, json.JSONDecodeError):
-            # Not JSON, that's fine
-            pass
+        json_data = decode_payload(payload).json
+        if isinstance(json_data, dict):
+            # Add useful attributes from the data
+            for key, value in json_data.items():
+                if key not in ["value", "state", "status"] and key not in attributes:
+                    attributes[key] = value
+
+            # If there's a timestamp in the JSON, use it
+            if "timestamp" in json_data:
+                attributes["device_timestamp"] = json_data["timestamp"]
 
         return attributes
 
@@ -0,0 +1,459 @@
+"""Charge session detection for OVMS integration."""
+
+import logging
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    PERCENTAGE,
+    UnitOfEnergy,
+    UnitOfPower,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CHARGE_LOG_FILENAME_TEMPLATE,
+    CHARGE_MIN_ENERGY_KWH,
+    CHARGE_QUERY_DEFAULT_LIMIT,
+    CHARGE_UNIQUE_ID_MARKER,
+    CONF_CLIENT_ID,
+    CONF_CONFIG_ENTRY_ID,
+    CONF_VEHICLE_ID,
+    LOGGER_NAME,
+    SIGNAL_UPDATE_ENTITY,
+    get_add_entities_signal,
+)
+from .energy_sessions import EnergySessionTracker
+from .session_log import SessionLog
+from .trip_tracker import counter_delta
+from .utils import get_namespaced_ovms_unique_id, get_ovms_device_info, safe_float
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Metric paths the charge tracker consumes; sessions and the integrated
+# energy come from the EnergySessionTracker
+METRIC_TYPE = "v.c.type"
+METRIC_KWH = "v.c.kwh"
+METRIC_POWER = "v.c.power"
+METRIC_SOC = "v.b.soc"
+
+# v.c.type values by current; anything else is recorded without a current
+CHARGE_DC_TYPES = frozenset(("chademo", "ccs", "ccs1", "ccs2", "gbt-dc", "dc"))
+CHARGE_AC_TYPES = frozenset(("type1", "type2", "roadster", "gbt-ac", "ac"))
+
+# Last-charge sensors: session record key -> sensor description.
+CHARGE_SENSOR_TYPES = {
+    "energy_kwh": {
+        "name": "Last Charge Energy",
+        "icon": "mdi:lightning-bolt",
+        "device_class": SensorDeviceClass.ENERGY,
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        # HA allows only totals for energy, and the last charge's energy is
+        # neither a measurement nor a running total
+        "state_class": None,
+    },
+    "soc_delta": {
+        "name": "Last Charge SOC Added",
+        "icon": "mdi:battery-plus",
+        "device_class": None,
+        "unit": PERCENTAGE,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
+    "duration_s": {
+        "name": "Last Charge Duration",
+        "icon": "mdi:timer-outline",
+        "device_class": SensorDeviceClass.DURATION,
+        "unit": UnitOfTime.SECONDS,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
+    "peak_power_kw": {
+        "name": "Last Charge Peak Power",
+        "icon": "mdi:flash",
+        "device_class": SensorDeviceClass.POWER,
+        "unit": UnitOfPower.KILO_WATT,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
+    "mean_power_kw": {
+        "name": "Last Charge Mean Power",
+        "icon": "mdi:flash-outline",
+        "device_class": SensorDeviceClass.POWER,
+        "unit": UnitOfPower.KILO_WATT,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
+}
+
+# Session record keys exposed as attributes on every last-charge sensor.
+CHARGE_ATTRIBUTE_KEYS = (
+    "start_time",
+    "end_time",
+    "soc_start",
+    "soc_end",
+    "latitude",
+    "longitude",
+    "charge_type",
+    "current",
+    "energy_source",
+    "end_state",
+)
+
+
+def charge_current(charge_type: Optional[str]) -> Optional[str]:
+    """Return "AC" or "DC" for an OVMS v.c.type value, None if unknown."""
+    if not charge_type:
+        return None
+    charge_type = charge_type.lower()
+    if charge_type in CHARGE_DC_TYPES:
+        return "DC"
+    if charge_type in CHARGE_AC_TYPES:
+        return "AC"
+    return None
+
+
+class _OpenCharge:
+    """Running summary of the charge session in progress (fixed size)."""
+
+    __slots__ = (
+        "start_time",
+        "soc_start",
+        "kwh_start",
+        "latitude",
+        "longitude",
+        "peak_power",
+        "power_sum",
+        "power_samples",
+        "integrated_start",
+    )
+
+    def __init__(self, start_time: datetime, tracker: "ChargeTracker") -> None:
+        """Seed the session from the tracker's latest readings."""
+        self.start_time = start_time
+        self.soc_start = tracker.soc
+        self.kwh_start = tracker.kwh
+        self.latitude = tracker.latitude
+        self.longitude = tracker.longitude
+        self.peak_power = 0.0
+        self.power_sum = 0.0
+        self.power_samples = 0
+        # Charge energy integrated from v.c.power so far, for vehicles
+        # without v.c.kwh; the session's share is the increase from here
+        self.integrated_start = tracker.energy_sessions.energy["charge"]
+
+
+class ChargeTracker:
+    """Summarise the charge sessions of the live metric stream and persist them.
+
+    Sessions start and end with the EnergySessionTracker's charge session,
+    whose integrated energy is used when v.c.kwh is not published.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config: Dict[str, Any],
+        energy_sessions: EnergySessionTracker,
+    ) -> None:
+        """Initialize the charge tracker."""
+        self.hass = hass
+        self.energy_sessions = energy_sessions
+        self._client_id = config.get(CONF_CLIENT_ID)
+        self._config_entry_id = config.get(CONF_CONFIG_ENTRY_ID)
+        self._vehicle_id = config.get(CONF_VEHICLE_ID, "unknown")
+        self._add_entities_signal = get_add_entities_signal(
+            self._config_entry_id, "sensor"
+        )
+
+        safe_vehicle_id = re.sub(r"[^a-zA-Z0-9_-]", "_", str(self._vehicle_id))
+        self.log_path = hass.config.path(
+            CHARGE_LOG_FILENAME_TEMPLATE.format(vehicle_id=safe_vehicle_id)
+        )
+        self._log = SessionLog(self.log_path)
+
+        # Latest readings
+        self.charge_type: Optional[str] = None
+        self.kwh: Optional[float] = None
+        self.soc: Optional[float] = None
+        self.latitude: Optional[float] = None
+        self.longitude: Optional[float] = None
+
+        self.current_session: Optional[_OpenCharge] = None
+        self.last_session: Optional[Dict[str, Any]] = None
+        self.session_count = 0
+        self._sensor_ids: List[str] = []
+        self._sensors_created = False
+
+        # Topic -> handler cache, as in the trip tracker
+        self._topic_handlers: Dict[str, Optional[Callable[[Any], None]]] = {}
+        self._metric_handlers: Dict[str, Callable[[Any], None]] = {
+            METRIC_TYPE: self._handle_type,
+            METRIC_KWH: self._handle_kwh,
+            METRIC_POWER: self._handle_power,
+            METRIC_SOC: self._handle_soc,
+        }
+        energy_sessions.add_session_listener(self._handle_session)
+
+    async def async_setup(self) -> None:
+        """Load the most recent completed session from the charge log."""
+        try:
+            self.last_session = await self.hass.async_add_executor_job(
+                self._log.read_last
+            )
+        except OSError as ex:
+            _LOGGER.warning("Could not read charge log %s: %s", self.log_path, ex)
+
+    @callback
+    def process_message(self, topic: str, payload: Any) -> None:
+        """Feed one MQTT message into the session detector."""
+        handler = self._topic_handlers.get(topic, False)
+        if handler is False:
+            handler = self._resolve_handler(topic)
+            self._topic_handlers[topic] = handler
+        if handler is not None:
+            handler(payload)
+
+    @callback
+    def process_location(self, latitude: float, longitude: float) -> None:
+        """Feed one coalesced GPS fix (from the UpdateDispatcher flush)."""
+        self.latitude = latitude
+        self.longitude = longitude
+        session = self.current_session
+        if session is not None and session.latitude is None:
+            session.latitude = latitude
+            session.longitude = longitude
+
+    def _resolve_handler(self, topic: str) -> Optional[Callable[[Any], None]]:
+        """Map a topic to its metric handler, or None if not charge-relevant."""
+        _, sep, suffix = topic.partition("/metric/")
+        if not sep:
+            return None
+        return self._metric_handlers.get(suffix.replace("/", "."))
+
+    @callback
+    def _handle_session(self, session: str, active: bool) -> None:
+        """Open or close a session with the energy tracker's charge session."""
+        if session != "charge":
+            return
+        if active and self.current_session is None:
+            self.current_session = _OpenCharge(dt_util.utcnow(), self)
+            _LOGGER.debug("Charge session started for %s", self._vehicle_id)
+        elif not active and self.current_session is not None:
+            self._close_session()
+
+    def _handle_type(self, payload: Any) -> None:
+        """Track the connector type."""
+        self.charge_type = str(payload).strip().lower() or None
+
+    def _handle_kwh(self, payload: Any) -> None:
+        """Track the session energy counter."""
+        value = safe_float(payload)
+        if value is None:
+            return
+        previous = self.kwh
+        self.kwh = value
+        session = self.current_session
+        if session is None:
+            return
+        if session.kwh_start is None:
+            session.kwh_start = value
+        elif previous is not None and value < previous:
+            # OVMS restarts the counter from zero when charging begins; a
+            # reset after our start sample counts from there
+            session.kwh_start = 0.0
+
+    def _handle_power(self, payload: Any) -> None:
+        """Track the peak and mean charge power."""
+        power = safe_float(payload)
+        session = self.current_session
+        if power is None or session is None:
+            return
+        session.peak_power = max(session.peak_power, power)
+        session.power_sum += power
+        session.power_samples += 1
+
+    def _handle_soc(self, payload: Any) -> None:
+        """Track the state of charge."""
+        value = safe_float(payload)
+        if value is None:
+            return
+        self.soc = value
+        if self.current_session is not None and self.current_session.soc_start is None:
+            self.current_session.soc_start = value
+
+    def _close_session(self) -> None:
+        """Summarise the open session, persist it and publish it."""
+        session = self.current_session
+        self.current_session = None
+        if session is None:
+            return
+
+        end_time = dt_util.utcnow()
+        energy = counter_delta(session.kwh_start, self.kwh)
+        energy_source = "counter"
+        if energy is None or energy <= 0:
+            energy = max(
+                self.energy_sessions.energy["charge"] - session.integrated_start, 0.0
+            )
+            energy_source = "power"
+
+        soc_delta = None
+        if session.soc_start is not None and self.soc is not None:
+            soc_delta = round(self.soc - session.soc_start, 1)
+
+        if energy < CHARGE_MIN_ENERGY_KWH and not (soc_delta and soc_delta > 0):
+            _LOGGER.debug(
+                "Discarding charge session of %.3f kWh for %s",
+                energy,
+                self._vehicle_id,
+            )
+            return
+
+        record = {
+            "start_time": session.start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+            "duration_s": round((end_time - session.start_time).total_seconds()),
+            "soc_start": session.soc_start,
+            "soc_end": self.soc,
+            "soc_delta": soc_delta,
+            "energy_kwh": round(energy, 3),
+            "energy_source": energy_source,
+            "peak_power_kw": round(session.peak_power, 2),
+            "mean_power_kw": (
+                round(session.power_sum / session.power_samples, 2)
+                if session.power_samples
+                else None
+            ),
+            "latitude": session.latitude,
+            "longitude": session.longitude,
+            "charge_type": self.charge_type,
+            "current": charge_current(self.charge_type),
+            "end_state": self.energy_sessions.charge_state,
+        }
+
+        self.last_session = record
+        self.session_count += 1
+        _LOGGER.info(
+            "Charge session completed for %s: %.2f kWh",
+            self._vehicle_id,
+            record["energy_kwh"],
+        )
+
+        self._log.async_schedule_append(self.hass, record)
+        for unique_id in self._sensor_ids:
+            async_dispatcher_send(
+                self.hass, f"{SIGNAL_UPDATE_ENTITY}_{unique_id}", record
+            )
+
+    async def async_query_charges(
+        self,
+        limit: int = CHARGE_QUERY_DEFAULT_LIMIT,
+        since: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` completed sessions, newest first."""
+        await self._log.async_flush()
+        return await self.hass.async_add_executor_job(self._log.read, limit, since)
+
+    async def async_shutdown(self) -> None:
+        """Wait for the completed sessions still being written to the log."""
+        await self._log.async_flush()
+
+    @callback
+    def async_create_sensors(self) -> None:
+        """Create the last-charge sensors once the platforms are loaded."""
+        if self._sensors_created:
+            return
+        self._sensors_created = True
+
+        device_info = get_ovms_device_info(self._client_id, self._vehicle_id)
+        batch = []
+        for key, description in CHARGE_SENSOR_TYPES.items():
+            unique_id = get_namespaced_ovms_unique_id(
+                f"ovms_{self._vehicle_id}_{CHARGE_UNIQUE_ID_MARKER}_{key}",
+                self._config_entry_id,
+            )
+            self._sensor_ids.append(unique_id)
+            sensor = OVMSChargeSessionSensor(
+                self, key, description, unique_id, device_info
+            )
+            batch.append(
+                {
+                    "entity_type": "sensor",
+                    "name": description["name"],
+                    "diagnostic_sensor": sensor,
+                }
+            )
+        async_dispatcher_send(self.hass, self._add_entities_signal, batch)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return a diagnostics snapshot of the charge tracker."""
+        return {
+            "session_in_progress": self.current_session is not None,
+            "sessions_completed": self.session_count,
+            "log_path": self.log_path,
+        }
+
+
+class OVMSChargeSessionSensor(SensorEntity):
+    """Sensor exposing one value of the last completed charge session."""
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        tracker: ChargeTracker,
+        key: str,
+        description: Dict[str, Any],
+        unique_id: str,
+        device_info: Dict[str, Any],
+    ) -> None:
+        """Initialize the sensor."""
+        self._tracker = tracker
+        self._key = key
+        self._attr_name = description["name"]
+        self._attr_icon = description["icon"]
+        self._attr_device_class = description["device_class"]
+        self._attr_native_unit_of_measurement = description["unit"]
+        self._attr_state_class = description["state_class"]
+        self._attr_unique_id = unique_id
+        self._attr_device_info = device_info
+
+    @property
+    def native_value(self) -> Optional[float]:
+        """Return the value from the last completed session."""
+        session = self._tracker.last_session
+        return session.get(self._key) if session else None
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        """Return start/end details of the last completed session."""
+        session = self._tracker.last_session
+        if not session:
+            return {}
+        return {key: session.get(key) for key in CHARGE_ATTRIBUTE_KEYS}
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to session completion updates."""
+        await super().async_added_to_hass()
+
+        @callback
+        def update_state(_record: Dict[str, Any]) -> None:
+            """Refresh from the tracker's last session."""
+            self.async_write_ha_state()
+
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                f"{SIGNAL_UPDATE_ENTITY}_{self.unique_id}",
+                update_state,
+            )
+        )
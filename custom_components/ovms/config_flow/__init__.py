@@ -68,6 +68,21 @@ class OVMSConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self.mqtt_config = {}
         self.debug_info = {}
         self.discovered_topics = set()
+        # Broker connection opened by the connection test and reused by
+        # topic discovery and the availability test
+        self._probe = None
+
+    @callback
+    def async_remove(self):
+        """Close the shared probe connection when the flow ends."""
+        self._async_close_probe()
+
+    @callback
+    def _async_close_probe(self):
+        """Close and forget the shared probe connection, if any."""
+        if self._probe is not None:
+            self.hass.async_create_task(self._probe.async_close())
+            self._probe = None
 
     def is_matching(self, _user_input):
         """Check if a host + vehicle_id combo is unique."""
@@ -166,9 +181,11 @@ class OVMSConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 if "verify_ssl_certificate" in user_input:
                     del user_input["verify_ssl_certificate"]
 
-            # Test MQTT connection
+            # Test MQTT connection, keeping it open for the following steps
             _LOGGER.debug("Testing MQTT connection")
-            result = await test_mqtt_connection(self.hass, user_input)
+            self._async_close_probe()
+            result = await test_mqtt_connection(self.hass, user_input, keep_probe=True)
+            self._probe = result.pop("probe", None)
 
             self.debug_info["broker_setup_end"] = time.time()
             self.debug_info["broker_setup_duration"] = (
@@ -339,7 +356,9 @@ class OVMSConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         # Discover topics using the broad wildcard
         _LOGGER.debug("Starting topic discovery")
-        discovery_result = await discover_topics(self.hass, self.mqtt_config)
+        discovery_result = await discover_topics(
+            self.hass, self.mqtt_config, probe=self._probe
+        )
 
         if discovery_result and discovery_result.get("success", False):
             self.discovered_topics = discovery_result.get("discovered_topics", set())
@@ -469,7 +488,9 @@ class OVMSConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             self.debug_info["structure_prefix"] = structure_prefix
 
             # Test topic availability with the specific vehicle ID
-            result = await test_topic_availability(self.hass, self.mqtt_config)
+            result = await test_topic_availability(
+                self.hass, self.mqtt_config, probe=self._probe
+            )
 
             self.debug_info["topic_test_end"] = time.time()
             self.debug_info["topic_test_duration"] = (
@@ -4,16 +4,13 @@ import asyncio
 import logging
 import socket
 import ssl
-import time
 import traceback
 import uuid
-from typing import Dict, Any, Optional
 
 import paho.mqtt.client as mqtt
 
 from homeassistant.const import (
     CONF_HOST,
-    CONF_PASSWORD,
     CONF_PORT,
     CONF_USERNAME,
     CONF_PROTOCOL,
@@ -22,9 +19,7 @@ from homeassistant.core import HomeAssistant
 
 from ..const import (
     CONF_QOS,
-    CONF_VERIFY_SSL,
     DEFAULT_QOS,
-    DEFAULT_VERIFY_SSL,
     LOGGER_NAME,
     ERROR_CANNOT_CONNECT,
     ERROR_INVALID_AUTH,
@@ -33,8 +28,9 @@ from ..const import (
     ERROR_TLS_ERROR,
     ERROR_UNKNOWN,
     PORT_PROBE_TIMEOUT,
+    PROBE_CONNECT_TIMEOUT,
 )
-from ..utils import uses_tls_transport, uses_websocket_transport
+from .probe import MQTTProbe
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
@@ -78,9 +74,13 @@ def ensure_serializable(obj):
 
 
 async def test_mqtt_connection(
-    hass: HomeAssistant, config
+    hass: HomeAssistant, config, keep_probe: bool = False
 ):  # pylint: disable=too-many-locals,too-many-branches,too-many-statements,too-many-return-statements
-    """Test if we can connect to the MQTT broker."""
+    """Test if we can connect to the MQTT broker.
+
+    With ``keep_probe`` a successful result carries the still-open probe
+    connection under "probe", for the following config-flow steps to reuse.
+    """
     log_prefix = f"MQTT connection test to {config[CONF_HOST]}:{config[CONF_PORT]}"
     _LOGGER.debug("%s - Starting", log_prefix)
 
@@ -91,108 +91,32 @@ async def test_mqtt_connection(
         "protocol": config[CONF_PROTOCOL],
         "has_username": bool(config.get(CONF_USERNAME)),
         "test_start_time": asyncio.get_event_loop().time(),
+        "mqtt_protocol_version": "MQTTv5",
     }
 
     # Generate a random client ID for this connection test
     client_id = f"ha_ovms_{uuid.uuid4().hex[:8]}"
-    protocol = mqtt.MQTTv5 if hasattr(mqtt, "MQTTv5") else mqtt.MQTTv311
-
-    debug_info["mqtt_protocol_version"] = (
-        "MQTTv5" if hasattr(mqtt, "MQTTv5") else "MQTTv311"
-    )
-
-    _LOGGER.debug(
-        "%s - Creating client with ID: %s and protocol: %s",
-        log_prefix,
-        client_id,
-        debug_info["mqtt_protocol_version"],
-    )
-
-    transport = "websockets" if uses_websocket_transport(config) else "tcp"
-    mqttc = mqtt.Client(client_id=client_id, protocol=protocol, transport=transport)
-    debug_info["transport"] = transport
-
-    # Set up connection status for debugging
-    connection_status = {"connected": False, "rc": None, "flags": None}
-
-    # Define callback for debugging
-    def on_connect(_, __, flags, rc, _properties=None):
-        """Handle connection result."""
-        connection_status["connected"] = rc == 0
-        connection_status["rc"] = rc
-        connection_status["flags"] = flags
-        # Using time.time() instead of asyncio.get_event_loop().time()
-        connection_status["timestamp"] = time.time()
-
-        _LOGGER.debug(
-            "%s - Connection callback: rc=%s, flags=%s", log_prefix, rc, flags
-        )
-
-    def on_disconnect(_, __, rc, _properties=None):
-        """Handle disconnection."""
-        connection_status["connected"] = False
-        connection_status["disconnect_rc"] = rc
-        # Using time.time() instead of asyncio.get_event_loop().time()
-        connection_status["disconnect_timestamp"] = time.time()
-        _LOGGER.debug("%s - Disconnected with result code: %s", log_prefix, rc)
-
-    def on_log(_, __, ___, buf):
-        """Log MQTT client internal messages."""
-        _LOGGER.debug("%s - MQTT Log: %s", log_prefix, buf)
-
-    # Configure client callbacks
-    if hasattr(mqtt, "MQTTv5"):
-        mqttc.on_connect = on_connect
-    else:
-        # For MQTT v3.1.1
-        def on_connect_v311(client, userdata, flags, rc):
-            on_connect(client, userdata, flags, rc, None)
-
-        mqttc.on_connect = on_connect_v311
-
-    mqttc.on_disconnect = on_disconnect
-    mqttc.on_log = on_log
-
-    if CONF_USERNAME in config and config[CONF_USERNAME]:
-        _LOGGER.debug("%s - Setting username: %s", log_prefix, config[CONF_USERNAME])
-        mqttc.username_pw_set(
-            username=config[CONF_USERNAME],
-            password=config[CONF_PASSWORD] if CONF_PASSWORD in config else None,
-        )
-
-    if uses_tls_transport(config):
-        _LOGGER.debug(
-            "%s - Enabling SSL/TLS for configured secure transport", log_prefix
-        )
-        verify_ssl = config.get(CONF_VERIFY_SSL, DEFAULT_VERIFY_SSL)
-        try:
-            # Use executor to avoid blocking the event loop
-            context = await hass.async_add_executor_job(ssl.create_default_context)
-            # Allow self-signed certificates if insecure is allowed
-            if not verify_ssl:
-                _LOGGER.debug(
-                    "%s - SSL certificate verification disabled (insecure TLS/SSL allowed)",
-                    log_prefix,
-                )
-                context.check_hostname = False
-                context.verify_mode = ssl.CERT_NONE
-            mqttc.tls_set_context(context)
-            debug_info["tls_enabled"] = True
-            debug_info["tls_verify"] = verify_ssl
-        except ssl.SSLError as ssl_err:
-            _LOGGER.error("%s - SSL/TLS setup error: %s", log_prefix, ssl_err)
-            debug_info["ssl_error"] = str(ssl_err)
-            return {
-                "success": False,
-                "error_type": ERROR_TLS_ERROR,
-                "message": f"SSL/TLS Error: {ssl_err}",
-                "details": f"SSL configuration failed: {ssl_err}",
-            }
+    probe = MQTTProbe(hass, config, client_id)
+    debug_info["transport"] = probe.transport
+    _LOGGER.debug("%s - Creating client with ID: %s", log_prefix, client_id)
 
-    # Set up connection timeout
-    mqttc.connect_timeout = 5.0
-    debug_info["connect_timeout"] = 5.0
+    try:
+        verify_ssl = await probe.async_configure_tls()
+    except ssl.SSLError as ssl_err:
+        _LOGGER.error("%s - SSL/TLS setup error: %s", log_prefix, ssl_err)
+        debug_info["ssl_error"] = str(ssl_err)
+        return {
+            "success": False,
+            "error_type": ERROR_TLS_ERROR,
+            "message": f"SSL/TLS Error: {ssl_err}",
+            "details": f"SSL configuration failed: {ssl_err}",
+        }
+    if verify_ssl is not None:
+        debug_info["tls_enabled"] = True
+        debug_info["tls_verify"] = verify_ssl
+    debug_info["connect_timeout"] = PROBE_CONNECT_TIMEOUT
 
+    keep_open = False
     try:
         # DNS resolution check
         _LOGGER.debug("%s - Resolving hostname", log_prefix)
@@ -224,65 +148,56 @@ async def test_mqtt_connection(
                 ),
             }
 
-        # Port check (socket calls block, so probe in an executor thread).
-        _LOGGER.debug("%s - Checking if port is open", log_prefix)
-        port_check_start = asyncio.get_event_loop().time()
-        port_open = await hass.async_add_executor_job(
-            _probe_tcp_port, config[CONF_HOST], config[CONF_PORT], PORT_PROBE_TIMEOUT
-        )
-        port_check_time = asyncio.get_event_loop().time() - port_check_start
-
-        debug_info["port_check"] = {
-            "success": port_open,
-            "time_taken": port_check_time,
-        }
-
-        if not port_open:
-            _LOGGER.error(
-                "%s - Port check failed, port %d is closed",
-                log_prefix,
+        # The port probe and the MQTT handshake run concurrently: a CONNACK
+        # makes the probe moot, a closed port fails fast with a clear message
+        _LOGGER.debug("%s - Checking port and connecting to broker", log_prefix)
+        connect_start = asyncio.get_event_loop().time()
+        port_task = asyncio.ensure_future(
+            hass.async_add_executor_job(
+                _probe_tcp_port,
+                config[CONF_HOST],
                 config[CONF_PORT],
+                PORT_PROBE_TIMEOUT,
             )
-            debug_info["port_check"]["error"] = f"Port {config[CONF_PORT]} is closed"
-            return {
-                "success": False,
-                "error_type": ERROR_CANNOT_CONNECT,
-                "message": f"Port {config[CONF_PORT]} is closed",
-                "details": (
-                    f"Port {config[CONF_PORT]} on host '{config[CONF_HOST]}' "
-                    f"is not open."
-                ),
-            }
-
-        # Now try the actual MQTT connection
-        _LOGGER.debug("%s - Connecting to broker", log_prefix)
-        connect_start = asyncio.get_event_loop().time()
-
-        # Connect using the executor to avoid blocking
-        await hass.async_add_executor_job(
-            mqttc.connect,
-            config[CONF_HOST],
-            config[CONF_PORT],
-            60,  # Keep alive timeout
         )
+        connect_task = asyncio.ensure_future(probe.async_connect())
+        done, _pending = await asyncio.wait(
+            {port_task, connect_task}, return_when=asyncio.FIRST_COMPLETED
+        )
+        if connect_task not in done or connect_task.exception() is not None:
+            port_open = await port_task
+            debug_info["port_check"] = {
+                "success": port_open,
+                "time_taken": asyncio.get_event_loop().time() - connect_start,
+            }
+            if not port_open:
+                if not connect_task.done():
+                    connect_task.cancel()
+                await asyncio.gather(connect_task, return_exceptions=True)
+                _LOGGER.error(
+                    "%s - Port check failed, port %d is closed",
+                    log_prefix,
+                    config[CONF_PORT],
+                )
+                debug_info["port_check"][
+                    "error"
+                ] = f"Port {config[CONF_PORT]} is closed"
+                return {
+                    "success": False,
+                    "error_type": ERROR_CANNOT_CONNECT,
+                    "message": f"Port {config[CONF_PORT]} is closed",
+                    "details": (
+                        f"Port {config[CONF_PORT]} on host '{config[CONF_HOST]}' "
+                        f"is not open."
+                    ),
+                }
+        else:
+            # Not needed any more; the executor job finishes on its own
+            port_task.add_done_callback(lambda task: task.exception())
 
-        # Start the loop in a separate thread
-        mqttc.loop_start()
-
-        # Wait for connection to establish
-        connected = False
-        for i in range(10):  # Try for up to 5 seconds
-            _LOGGER.debug("%s - Waiting for connection (%d/10)", log_prefix, i + 1)
-            if connection_status.get("connected"):
-                connected = True
-                break
-            if (
-                connection_status.get("rc") is not None
-                and connection_status.get("rc") != 0
-            ):
-                # Connection failed with specific error code
-                break
-            await asyncio.sleep(0.5)
+        await connect_task
+        connection_status = probe.status
+        connected = probe.connected
 
         connect_time = asyncio.get_event_loop().time() - connect_start
         debug_info["mqtt_connect"] = {
@@ -291,21 +206,14 @@ async def test_mqtt_connection(
             "status": ensure_serializable(connection_status),
         }
 
-        mqttc.loop_stop()
-
         if connected:
             _LOGGER.debug("%s - Connection successful", log_prefix)
             # Test subscribing to a topic as a further check
             _LOGGER.debug("%s - Testing topic subscription", log_prefix)
-            sub_result = await test_subscription(hass, mqttc, config, client_id)
+            sub_result = await test_subscription(hass, probe.client, config, client_id)
             debug_info["subscription_test"] = ensure_serializable(sub_result)
 
             if not sub_result["success"]:
-                try:
-                    mqttc.disconnect()
-                except Exception:  # pylint: disable=broad-except
-                    pass
-
                 # Prepare detailed error message
                 error_topic = sub_result.get("topic", "unknown")
                 error_details_text = sub_result.get(
@@ -325,15 +233,15 @@ async def test_mqtt_connection(
                     ),
                 }
 
-            try:
-                mqttc.disconnect()
-            except Exception:  # pylint: disable=broad-except
-                pass
-            return {
+            result = {
                 "success": True,
                 "details": "Connection and subscription tests passed successfully",
                 "debug_info": debug_info,
             }
+            if keep_probe:
+                keep_open = True
+                result["probe"] = probe
+            return result
 
         error_message = "Failed to connect"
         error_type = ERROR_CANNOT_CONNECT
@@ -364,7 +272,7 @@ async def test_mqtt_connection(
         _LOGGER.error("%s - %s (rc=%s)", log_prefix, error_message, rc)
         debug_info["error"] = {
             "message": error_message,
-            "rc": rc,
+            "rc": str(rc),
         }
 
         return {
@@ -387,7 +295,7 @@ async def test_mqtt_connection(
             "message": "Connection timeout",
             "details": (
                 f"Connection to {config[CONF_HOST]}:{config[CONF_PORT]} "
-                f"timed out after {mqttc.connect_timeout} seconds"
+                f"timed out after {PROBE_CONNECT_TIMEOUT} seconds"
             ),
             "debug_info": debug_info,
         }
@@ -463,70 +371,44 @@ async def test_mqtt_connection(
             "details": f"An unexpected error occurred: {ex}",
             "debug_info": debug_info,
         }
+    finally:
+        if not keep_open:
+            await probe.async_close()
 
 
 async def test_subscription(
     hass, mqtt_client, config, client_id
-):  # pylint: disable=too-many-locals
-    """Test if we can subscribe to a topic."""
+):  # pylint: disable=unused-argument
+    """Test if we can subscribe to a topic.
+
+    The subscription counts as working once the request is sent; ACL denials
+    show up later, when discovery receives no messages.
+    """
     log_prefix = f"MQTT subscription test for {config[CONF_HOST]}:{config[CONF_PORT]}"
 
     # Use a test topic that should be accessible to all users
     test_topic = f"homeassistant/{client_id}/test"
     qos = config.get(CONF_QOS, DEFAULT_QOS)
 
-    subscription_result = {"success": False, "topic": test_topic}
-
-    # Define callback for subscription
-    def on_subscribe(_, __, mid, granted_qos, _properties=None):
-        """Handle subscription result."""
-        _LOGGER.debug(
-            "%s - Subscription callback: mid=%s, qos=%s", log_prefix, mid, granted_qos
-        )
-        subscription_result["success"] = True
-        subscription_result["granted_qos"] = granted_qos
-
-    # Configure client callback
-    if hasattr(mqtt, "MQTTv5"):
-        mqtt_client.on_subscribe = on_subscribe
-    else:
-        # For MQTT v3.1.1
-        def on_subscribe_v311(client, userdata, mid, granted_qos):
-            on_subscribe(client, userdata, mid, granted_qos, None)
-
-        mqtt_client.on_subscribe = on_subscribe_v311
-
     try:
         _LOGGER.debug("%s - Subscribing to test topic: %s", log_prefix, test_topic)
         result = mqtt_client.subscribe(test_topic, qos=qos)
-        subscription_result["subscribe_result"] = ensure_serializable(result)
 
-        # Check if subscription was initiated successfully
-        if result and result[0] == 0:  # MQTT_ERR_SUCCESS
-            # Successful subscription initiation, assume it worked
+        if result and result[0] == mqtt.MQTT_ERR_SUCCESS:
             _LOGGER.debug("%s - Subscription initiated successfully", log_prefix)
+            # Nothing should arrive on the test topic; keep the connection quiet
+            # for the steps that reuse it
+            mqtt_client.unsubscribe(test_topic)
             return {"success": True, "topic": test_topic}
 
-        # Wait for subscription confirmation via callback
-        subscription_confirmed = False
-        for i in range(5):  # Try for up to 2.5 seconds
-            if subscription_result.get("success"):
-                subscription_confirmed = True
-                break
-            await asyncio.sleep(0.5)
-            _LOGGER.debug(
-                "%s - Waiting for subscription confirmation (%d/5)", log_prefix, i + 1
-            )
-
-        if subscription_confirmed:
-            _LOGGER.debug("%s - Subscription successful", log_prefix)
-            return {"success": True, "topic": test_topic}
-
-        _LOGGER.error("%s - Subscription not confirmed", log_prefix)
+        _LOGGER.error(
+            "%s - Subscription request could not be sent: %s", log_prefix, result
+        )
         return {
             "success": False,
             "message": "Subscription request was not confirmed by the broker",
             "topic": test_topic,
+            "subscribe_result": ensure_serializable(result),
             "details": (
                 "The MQTT broker did not confirm the subscription request. "
                 "This may be due to ACL rules on the broker preventing subscription to the "
@@ -22,6 +22,8 @@ from ..const import (
     CONF_TOPIC_BLACKLIST,
     CONF_ENTITY_STALENESS_MANAGEMENT,
     CONF_DELETE_STALE_HISTORY,
+    CONF_RESYNC_PRIORITY,
+    CONF_FLEET_AGGREGATES,
     DEFAULT_QOS,
     DEFAULT_TOPIC_PREFIX,
     DEFAULT_TOPIC_STRUCTURE,
@@ -29,14 +31,18 @@ from ..const import (
     DEFAULT_TOPIC_BLACKLIST,
     DEFAULT_DELETE_STALE_HISTORY,
     DEFAULT_LOCK_PIN,
+    DEFAULT_RESYNC_PRIORITY,
+    DEFAULT_FLEET_AGGREGATES,
     TOPIC_STRUCTURES,
     LOGGER_NAME,
     SENSITIVE_LOG_REDACTION,
 )
 from ..utils import (
+    format_resync_priority,
     is_secure_pin_connection,
     lock_pin_contains_whitespace,
     normalize_lock_pin,
+    parse_resync_priority,
 )
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
@@ -184,6 +190,12 @@ class OVMSOptionsFlow(OptionsFlow):
                 ]
                 user_input[CONF_TOPIC_BLACKLIST] = list(dict.fromkeys(blacklist_items))
 
+            # Resync priority: "v.p.*,v.b.soc; v.c.*" -> list of pattern stages
+            if CONF_RESYNC_PRIORITY in user_input:
+                user_input[CONF_RESYNC_PRIORITY] = parse_resync_priority(
+                    user_input[CONF_RESYNC_PRIORITY]
+                )
+
             # Process entity staleness management - convert string selection to proper value
             if CONF_ENTITY_STALENESS_MANAGEMENT in user_input:
                 staleness_selection = user_input[CONF_ENTITY_STALENESS_MANAGEMENT]
@@ -291,6 +303,16 @@ class OVMSOptionsFlow(OptionsFlow):
                     ),
                     description="Topic patterns to filter out. You can add, remove, or modify any patterns including system defaults. Comma-separated list (e.g. log,gear,custom_pattern)",
                 ): str,
+                vol.Optional(
+                    CONF_RESYNC_PRIORITY,
+                    default=format_resync_priority(
+                        parse_resync_priority(
+                            current_config.get(
+                                CONF_RESYNC_PRIORITY, DEFAULT_RESYNC_PRIORITY
+                            )
+                        )
+                    ),
+                ): str,
             }
         )
 
@@ -353,6 +375,12 @@ class OVMSOptionsFlow(OptionsFlow):
                         ),
                     ),
                 ): bool,
+                vol.Optional(
+                    CONF_FLEET_AGGREGATES,
+                    default=current_config.get(
+                        CONF_FLEET_AGGREGATES, DEFAULT_FLEET_AGGREGATES
+                    ),
+                ): bool,
             }
         )
 
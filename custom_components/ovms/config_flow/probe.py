@@ -0,0 +1,292 @@
+"""Shared MQTT probe connection for the OVMS config flow."""
+
+import asyncio
+import logging
+import ssl
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import paho.mqtt.client as mqtt
+
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_USERNAME,
+    CONF_PROTOCOL,
+)
+from homeassistant.core import HomeAssistant
+
+from ..const import (
+    CONF_VERIFY_SSL,
+    DEFAULT_VERIFY_SSL,
+    LOGGER_NAME,
+    PROBE_CONNECT_TIMEOUT,
+    PROBE_IDLE_TIMEOUT,
+)
+from ..utils import uses_tls_transport, uses_websocket_transport
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+MessageListener = Callable[[str, bytes, bool], None]
+
+
+def _connection_key(config: Dict[str, Any]) -> Tuple:
+    """Return the settings that identify a broker connection."""
+    return (
+        config.get(CONF_HOST),
+        config.get(CONF_PORT),
+        config.get(CONF_PROTOCOL),
+        config.get(CONF_USERNAME),
+        config.get(CONF_PASSWORD),
+        config.get(CONF_VERIFY_SSL, DEFAULT_VERIFY_SSL),
+    )
+
+
+def _set_result(future: Optional[asyncio.Future], value: Any) -> None:
+    """Complete a future unless it is already done (runs on the loop)."""
+    if future is not None and not future.done():
+        future.set_result(value)
+
+
+class MQTTProbe:
+    """One MQTT connection driven by futures completed from paho callbacks.
+
+    The connection test opens it, and topic discovery and the availability
+    test reuse it, so adding a vehicle costs one handshake. Callbacks run in
+    paho's network thread and hand their results to the event loop; callers
+    await those results instead of polling the connection state.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, config: Dict[str, Any], client_id: str
+    ) -> None:
+        """Initialize the probe (does not connect)."""
+        self.hass = hass
+        self.client_id = client_id
+        self._key = _connection_key(config)
+        self._config = config
+        self.transport = "websockets" if uses_websocket_transport(config) else "tcp"
+        self.client = mqtt.Client(
+            client_id=client_id, protocol=mqtt.MQTTv5, transport=self.transport
+        )
+        self.client.connect_timeout = PROBE_CONNECT_TIMEOUT
+        self.connected = False
+        self.status: Dict[str, Any] = {"connected": False, "rc": None, "flags": None}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connect_future: Optional[asyncio.Future] = None
+        self._suback_futures: Dict[int, asyncio.Future] = {}
+        self._listeners: List[MessageListener] = []
+        self._idle_handle: Optional[asyncio.TimerHandle] = None
+        self._closed = False
+
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_subscribe = self._on_subscribe
+        self.client.on_message = self._on_message
+        self.client.on_log = self._on_log
+
+        if config.get(CONF_USERNAME):
+            self.client.username_pw_set(
+                username=config[CONF_USERNAME],
+                password=config.get(CONF_PASSWORD),
+            )
+
+    def matches(self, config: Dict[str, Any]) -> bool:
+        """Return True if this open probe can serve the given settings."""
+        if not self.connected or self._closed:
+            return False
+        return self._key == _connection_key(config)
+
+    async def async_configure_tls(self) -> Optional[bool]:
+        """Enable TLS when the transport needs it.
+
+        Returns the verification setting, or None for plain transports.
+        Raises ssl.SSLError if the context cannot be created.
+        """
+        if not uses_tls_transport(self._config):
+            return None
+        verify_ssl = self._config.get(CONF_VERIFY_SSL, DEFAULT_VERIFY_SSL)
+        # Loading the CA bundle reads files, so create the context off the loop
+        context = await self.hass.async_add_executor_job(ssl.create_default_context)
+        if not verify_ssl:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        self.client.tls_set_context(context)
+        return verify_ssl
+
+    async def async_connect(self) -> Any:
+        """Connect and wait for the CONNACK.
+
+        Returns the CONNACK reason code, or None if none arrived within
+        PROBE_CONNECT_TIMEOUT. Socket errors from the connect call propagate.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._connect_future = self._loop.create_future()
+        # connect() resolves the host and opens the socket, which blocks
+        await self.hass.async_add_executor_job(
+            self.client.connect,
+            self._config[CONF_HOST],
+            self._config[CONF_PORT],
+            60,  # Keep alive timeout
+        )
+        self.client.loop_start()
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(self._connect_future), PROBE_CONNECT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.touch()
+
+    async def async_subscribe(
+        self, topics: List[str], qos: int, timeout: float = PROBE_CONNECT_TIMEOUT
+    ) -> Optional[list]:
+        """Subscribe and wait for the SUBACK.
+
+        Returns the granted reason codes, or None if the request could not be
+        sent or was not acknowledged in time.
+        """
+        result, mid = self.client.subscribe([(topic, qos) for topic in topics])
+        if result != mqtt.MQTT_ERR_SUCCESS:
+            return None
+        # The SUBACK is handed to the loop via call_soon_threadsafe, so it
+        # cannot be processed before the future is registered here
+        future = self._loop.create_future()
+        self._suback_futures[mid] = future
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._suback_futures.pop(mid, None)
+
+    def unsubscribe(self, topics: List[str]) -> None:
+        """Drop subscriptions so the shared connection stays quiet."""
+        if self.connected and topics:
+            self.client.unsubscribe(topics)
+
+    def add_listener(self, listener: MessageListener) -> Callable[[], None]:
+        """Register a loop-side callback for every message; returns a remover."""
+        self._listeners.append(listener)
+
+        def _remove() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return _remove
+
+    def touch(self) -> None:
+        """Restart the idle timer that closes a probe left by an abandoned flow."""
+        if self._loop is None or self._closed:
+            return
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+        self._idle_handle = self._loop.call_later(
+            PROBE_IDLE_TIMEOUT,
+            lambda: self._loop.create_task(self.async_close()),
+        )
+
+    async def async_close(self) -> None:
+        """Disconnect and stop the network thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self.connected = False
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+        self._listeners.clear()
+        # loop_stop() joins paho's thread
+        await self.hass.async_add_executor_job(self._shutdown)
+
+    def _shutdown(self) -> None:
+        """Disconnect and join the network thread (executor)."""
+        try:
+            self.client.disconnect()
+        except Exception as ex:  # pylint: disable=broad-except
+            _LOGGER.debug("Probe %s disconnect error: %s", self.client_id, ex)
+        self.client.loop_stop()
+
+    def _call_on_loop(self, func: Callable, *args: Any) -> None:
+        """Run func on the event loop (called from paho's thread)."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(func, *args)
+
+    def _on_connect(self, _client, _userdata, flags, rc, _properties=None) -> None:
+        """Handle the CONNACK (paho thread)."""
+        self.connected = rc == 0
+        self.status.update(
+            {"connected": rc == 0, "rc": rc, "flags": flags, "timestamp": time.time()}
+        )
+        _LOGGER.debug("Probe %s connect callback: rc=%s", self.client_id, rc)
+        self._call_on_loop(_set_result, self._connect_future, rc)
+
+    def _on_disconnect(self, _client, _userdata, rc, _properties=None) -> None:
+        """Handle a disconnect (paho thread)."""
+        self.connected = False
+        self.status.update(
+            {
+                "connected": False,
+                "disconnect_rc": rc,
+                "disconnect_timestamp": time.time(),
+            }
+        )
+        _LOGGER.debug("Probe %s disconnected: rc=%s", self.client_id, rc)
+        # A connection dropped before the CONNACK ends the wait for it
+        self._call_on_loop(_set_result, self._connect_future, self.status["rc"])
+
+    def _on_subscribe(self, _client, _userdata, mid, granted, _properties=None):
+        """Handle a SUBACK (paho thread)."""
+        self._call_on_loop(self._handle_suback, mid, list(granted))
+
+    def _handle_suback(self, mid: int, granted: list) -> None:
+        """Complete the waiting subscribe (loop)."""
+        _set_result(self._suback_futures.get(mid), granted)
+
+    def _on_message(self, _client, _userdata, msg) -> None:
+        """Hand a message to the loop (paho thread)."""
+        self._call_on_loop(self._handle_message, msg.topic, msg.payload, msg.retain)
+
+    def _handle_message(self, topic: str, payload: bytes, retain: bool) -> None:
+        """Pass a message to the registered listeners (loop)."""
+        for listener in list(self._listeners):
+            try:
+                listener(topic, payload, retain)
+            except Exception as ex:  # pylint: disable=broad-except
+                _LOGGER.exception("Error in probe message listener: %s", ex)
+
+    def _on_log(self, _client, _userdata, _level, buf) -> None:
+        """Log MQTT client internal messages."""
+        _LOGGER.debug("Probe %s - MQTT Log: %s", self.client_id, buf)
+
+
+async def async_get_probe(
+    hass: HomeAssistant,
+    config: Dict[str, Any],
+    shared: Optional[MQTTProbe] = None,
+    client_prefix: str = "ha_ovms",
+) -> Tuple[MQTTProbe, bool]:
+    """Return a connected probe for config.
+
+    Reuses ``shared`` when it is still connected with the same settings.
+    Otherwise opens a new probe, which the caller owns and must close; check
+    ``probe.connected`` for the outcome. Socket and TLS errors propagate.
+
+    Returns:
+        Tuple of (probe, owned)
+    """
+    if shared is not None and shared.matches(config):
+        shared.touch()
+        return shared, False
+
+    probe = MQTTProbe(hass, config, f"{client_prefix}_{uuid.uuid4().hex[:8]}")
+    try:
+        await probe.async_configure_tls()
+        await probe.async_connect()
+    except BaseException:
+        await probe.async_close()
+        raise
+    return probe, True
@@ -8,18 +8,11 @@ import ssl
 import time
 import traceback
 import uuid
-from typing import Dict, Any, Optional, Set
+from typing import Any, Callable, Dict, Optional, Set, Tuple
 
 import paho.mqtt.client as mqtt
 from paho.mqtt import MQTTException
 
-from homeassistant.const import (
-    CONF_HOST,
-    CONF_PASSWORD,
-    CONF_PORT,
-    CONF_USERNAME,
-    CONF_PROTOCOL,
-)
 from homeassistant.core import HomeAssistant
 
 from ..const import (
@@ -28,11 +21,9 @@ from ..const import (
     CONF_TOPIC_STRUCTURE,
     CONF_VEHICLE_ID,
     CONF_QOS,
-    CONF_VERIFY_SSL,
     DEFAULT_QOS,
     DEFAULT_TOPIC_PREFIX,
     DEFAULT_TOPIC_STRUCTURE,
-    DEFAULT_VERIFY_SSL,
     DISCOVERY_TOPIC,
     # Import outside toplevel fixed by importing here
     TOPIC_TEMPLATE as CONST_TOPIC_TEMPLATE,
@@ -40,6 +31,13 @@ from ..const import (
     RESPONSE_TOPIC_TEMPLATE as CONST_RESPONSE_TOPIC_TEMPLATE,
     METRIC_REQUEST_TOPIC_TEMPLATE,
     ACTIVE_DISCOVERY_TIMEOUT,
+    AVAILABILITY_MESSAGE_TIMEOUT,
+    AVAILABILITY_RESPONSE_TIMEOUT,
+    DISCOVERY_MAX_TARGETS,
+    DISCOVERY_MAX_VEHICLES,
+    DISCOVERY_QUIET_PERIOD,
+    DISCOVERY_RETAINED_TIMEOUT,
+    DISCOVERY_TOPIC_SAMPLE_SIZE,
     LEGACY_DISCOVERY_TIMEOUT,
     MINIMUM_DISCOVERY_PERCENT,
     GOOD_DISCOVERY_PERCENT,
@@ -50,9 +48,13 @@ from ..const import (
     ERROR_TIMEOUT,
     ERROR_UNKNOWN,
 )
-from ..metrics import METRIC_DEFINITIONS
+from ..metrics import (
+    METRIC_DEFINITIONS,
+    async_load_vehicle_metrics,
+    get_vehicle_prefix_for_type,
+)
 from ..metrics.vehicles import VEHICLE_TYPE_PREFIXES, VEHICLE_TYPE_NAMES
-from ..utils import uses_tls_transport, uses_websocket_transport
+from .probe import MQTTProbe, async_get_probe
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
@@ -94,6 +96,17 @@ def detect_vehicle_type(topics: Set[str]) -> tuple[str, str]:
     return GENERIC_VEHICLE_TYPE, GENERIC_VEHICLE_NAME
 
 
+async def _async_load_detected_vehicle(hass: HomeAssistant, vehicle_type: str) -> None:
+    """Load the metric definitions of a detected vehicle type.
+
+    Vehicle definitions load on demand; the expected-metric count below
+    needs them in METRIC_DEFINITIONS to count the vehicle-specific metrics.
+    """
+    prefix = get_vehicle_prefix_for_type(vehicle_type)
+    if prefix:
+        await async_load_vehicle_metrics(hass, prefix)
+
+
 def get_expected_metric_count(vehicle_type: str) -> int:
     """Get the expected number of metrics for a vehicle type.
 
@@ -345,112 +358,263 @@ def extract_vehicle_ids(topics, config):
     return potential_ids
 
 
-# pylint: disable=too-many-locals,too-many-branches,too-many-statements,too-many-return-statements
-async def discover_topics(hass: HomeAssistant, config):
-    """Discover available OVMS topics on the broker."""
-    topic_prefix = config.get(CONF_TOPIC_PREFIX, DEFAULT_TOPIC_PREFIX)
-    log_prefix = f"Topic discovery for prefix {topic_prefix}"
-    _LOGGER.debug("%s - Starting", log_prefix)
+def _structure_pattern(config) -> Optional["re.Pattern"]:
+    """Compile the configured topic structure into a vehicle-id matcher.
 
-    # Initialize debug info for this test
-    debug_info = {
-        "topic_prefix": topic_prefix,
-        "test_start_time": asyncio.get_event_loop().time(),
-    }
+    The pattern matches the base of a vehicle's topics and captures its
+    vehicle id ("vid") and, if the structure has one, the username ("user").
+    """
+    structure = config.get(CONF_TOPIC_STRUCTURE, DEFAULT_TOPIC_STRUCTURE)
+    if "{vehicle_id}" not in structure:
+        return None
+    prefix = config.get(CONF_TOPIC_PREFIX, DEFAULT_TOPIC_PREFIX) or DEFAULT_TOPIC_PREFIX
+    pattern_str = re.escape(structure)
+    for placeholder, group in (
+        ("{prefix}", re.escape(prefix)),
+        ("{mqtt_username}", "(?P<user>[^/]+)"),
+        ("{vehicle_id}", "(?P<vid>[^/]+)"),
+    ):
+        pattern_str = pattern_str.replace(re.escape(placeholder), group, 1)
+    try:
+        return re.compile(f"^{pattern_str}/")
+    except re.error:
+        return None
 
-    # Format the discovery topic
-    discovery_topic = DISCOVERY_TOPIC.format(prefix=topic_prefix)
-    _LOGGER.debug("%s - Using discovery topic: %s", log_prefix, discovery_topic)
-    debug_info["discovery_topic"] = discovery_topic
 
-    # Set up a test client
-    client_id = f"ha_ovms_discovery_{uuid.uuid4().hex[:8]}"
-    protocol = mqtt.MQTTv5 if hasattr(mqtt, "MQTTv5") else mqtt.MQTTv311
+def format_vehicle_subscription(config, vehicle_id: str) -> str:
+    """Return the wildcard subscription for one vehicle's topics, under any
+    username ({prefix}/+/{vehicle_id}/# for the default structure)."""
+    structure = config.get(CONF_TOPIC_STRUCTURE, DEFAULT_TOPIC_STRUCTURE)
+    prefix = config.get(CONF_TOPIC_PREFIX, DEFAULT_TOPIC_PREFIX) or DEFAULT_TOPIC_PREFIX
+    base = structure.format(prefix=prefix, vehicle_id=vehicle_id, mqtt_username="+")
+    return f"{base}/#"
 
-    _LOGGER.debug("%s - Creating client with ID: %s", log_prefix, client_id)
-    transport = "websockets" if uses_websocket_transport(config) else "tcp"
-    mqttc = mqtt.Client(client_id=client_id, protocol=protocol, transport=transport)
 
-    discovered_topics = set()
-    retained_topics = set()  # Track topics received with retain flag
-    connection_status = {"connected": False, "rc": None}
+class DiscoveryAggregator:
+    """Bounded summary of the topics seen during discovery.
 
-    # Define callbacks
-    def on_connect(_, __, flags, rc, _properties=None):
-        """Handle connection result."""
-        connection_status["connected"] = rc == 0
-        connection_status["rc"] = rc
-        # Using time.time() instead of asyncio.get_event_loop().time()
-        connection_status["timestamp"] = time.time()
+    On a shared OVMS server {prefix}/# carries every vehicle on the broker.
+    Messages are attributed to vehicle ids through the configured topic
+    structure. Every topic of the target vehicles and of the vehicles under
+    the configured username is kept, of the others only the first
+    DISCOVERY_TOPIC_SAMPLE_SIZE, and message counts are kept for up to
+    DISCOVERY_MAX_VEHICLES other vehicle ids. Memory therefore stays bounded
+    however many vehicles the broker carries. Doubles as the probe
+    message listener and wakes waiters when a new topic arrives.
+    """
 
-        _LOGGER.debug(
-            "%s - Connection callback: rc=%s, flags=%s", log_prefix, rc, flags
+    def __init__(self, config, log_prefix: str) -> None:
+        """Initialize the aggregator."""
+        self._pattern = _structure_pattern(config)
+        structure = config.get(CONF_TOPIC_STRUCTURE, DEFAULT_TOPIC_STRUCTURE)
+        self._username = (
+            config.get(CONF_MQTT_USERNAME, "") if "{mqtt_username}" in structure else ""
+        )
+        vehicle_id = config.get(CONF_VEHICLE_ID)
+        self.targets: Set[str] = {vehicle_id} if vehicle_id else set()
+        # topic -> vehicle id (None for topics outside any vehicle)
+        self._topics: Dict[str, Optional[str]] = {}
+        self.retained: Set[str] = set()
+        self.vehicles: Dict[str, Dict[str, Any]] = {}
+        self.metric_count = 0
+        self.sampled_others = 0
+        self.unsampled_messages = 0
+        self.uncounted_messages = 0
+        # Set once select_targets() narrowed discovery to the targets
+        self._selected = False
+        self._log_prefix = log_prefix
+        self._new_topic = asyncio.Event()
+
+    @property
+    def topics(self) -> Set[str]:
+        """Return the kept topics."""
+        return set(self._topics)
+
+    def _vehicle_of(self, topic: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return (vehicle id, username) of a topic, or (None, None)."""
+        match = self._pattern.match(topic) if self._pattern else None
+        if match is None:
+            return None, None
+        vehicle_id = match.group("vid")
+        if vehicle_id in ("client", "rr"):
+            return None, None
+        return vehicle_id, match.groupdict().get("user")
+
+    def counts_as_metric(self, topic: str) -> bool:
+        """Return True if a kept topic adds to metric_count.
+
+        Only metric topics count, not command/response echoes - and once
+        the targets are known, only theirs.
+        """
+        return "/metric/" in topic and (
+            not self.targets or self._topics.get(topic) in self.targets
         )
 
-        if rc == 0:
+    def __call__(self, topic: str, payload: bytes, retain: bool) -> None:
+        """Record a message (probe listener, runs on the loop)."""
+        vehicle_id, username = self._vehicle_of(topic)
+        own = vehicle_id is not None and (
+            vehicle_id in self.targets
+            or (bool(self._username) and username == self._username)
+        )
+        if vehicle_id is not None:
+            stats = self.vehicles.get(vehicle_id)
+            if stats is None and (own or len(self.vehicles) < DISCOVERY_MAX_VEHICLES):
+                stats = self.vehicles[vehicle_id] = {
+                    "username": username,
+                    "messages": 0,
+                    "retained": 0,
+                }
+                self._new_topic.set()
+            if stats is None:
+                self.uncounted_messages += 1
+            else:
+                stats["messages"] += 1
+                stats["retained"] += bool(retain)
+
+        if topic not in self._topics:
+            if not own and self._selected and vehicle_id is not None:
+                # Still in flight from before the subscription was narrowed
+                return
+            if not own:
+                if self.sampled_others >= DISCOVERY_TOPIC_SAMPLE_SIZE:
+                    self.unsampled_messages += 1
+                    return
+                self.sampled_others += 1
             _LOGGER.debug(
-                "%s - Subscribing to discovery topic: %s", log_prefix, discovery_topic
+                "%s - New topic: %s (payload len: %d, retained: %s)",
+                self._log_prefix,
+                topic,
+                len(payload),
+                retain,
             )
-            mqttc.subscribe(discovery_topic, qos=config.get(CONF_QOS, DEFAULT_QOS))
+            self._topics[topic] = vehicle_id
+            if self.counts_as_metric(topic):
+                self.metric_count += 1
+            self._new_topic.set()
+        if retain:
+            self.retained.add(topic)
+
+    def select_targets(self) -> Set[str]:
+        """Pick the vehicles discovery should concentrate on.
+
+        The configured vehicle, else the vehicles under the configured
+        username, else every vehicle seen - provided there are at most
+        DISCOVERY_MAX_TARGETS of them. Topics of other vehicles are dropped.
+        Returns the targets (empty if none could be chosen).
+        """
+        if not self.targets:
+            own = {
+                vehicle_id
+                for vehicle_id, stats in self.vehicles.items()
+                if self._username and stats["username"] == self._username
+            }
+            candidates = own or set(self.vehicles)
+            if not candidates or len(candidates) > DISCOVERY_MAX_TARGETS:
+                return set()
+            if self.uncounted_messages and not own:
+                # Vehicles beyond the counting cap could be the user's
+                return set()
+            self.targets = candidates
+
+        self._selected = True
+        self._topics = {
+            topic: vehicle_id
+            for topic, vehicle_id in self._topics.items()
+            if vehicle_id is None or vehicle_id in self.targets
+        }
+        self.retained &= self._topics.keys()
+        self.sampled_others = sum(
+            1 for vehicle_id in self._topics.values() if vehicle_id is None
+        )
+        self.metric_count = sum(
+            1 for topic in self._topics if self.counts_as_metric(topic)
+        )
+        return self.targets
 
-    def on_message(_, __, msg):
-        """Handle incoming messages."""
-        _LOGGER.debug(
-            "%s - Message received on topic: %s (payload len: %d, retained: %s)",
-            log_prefix,
-            msg.topic,
-            len(msg.payload),
-            msg.retain,
+    def is_confident(self, expected_count: int) -> bool:
+        """Return True once the targets are known and cover enough metrics."""
+        return bool(self.targets) and (
+            self.metric_count * 100 >= GOOD_DISCOVERY_PERCENT * expected_count
         )
-        discovered_topics.add(msg.topic)
-        if msg.retain:
-            retained_topics.add(msg.topic)
-
-    def on_disconnect(_, __, rc, _properties=None):
-        """Handle disconnection."""
-        connection_status["connected"] = False
-        connection_status["disconnect_rc"] = rc
-        # Using time.time() instead of asyncio.get_event_loop().time()
-        connection_status["disconnect_timestamp"] = time.time()
-        _LOGGER.debug("%s - Disconnected with result code: %s", log_prefix, rc)
-
-    def on_log(_, __, ___, buf):
-        """Log MQTT client internal messages."""
-        _LOGGER.debug("%s - MQTT Log: %s", log_prefix, buf)
-
-    # Configure the client
-    if hasattr(mqtt, "MQTTv5"):
-        mqttc.on_connect = on_connect
-    else:
-        # For MQTT v3.1.1
-        def on_connect_v311(client, userdata, flags, rc):
-            on_connect(client, userdata, flags, rc, None)
 
-        mqttc.on_connect = on_connect_v311
+    def get_vehicle_summary(self, limit: int = 10) -> Dict[str, Any]:
+        """Return the busiest vehicle ids and the sampling counters."""
+        busiest = sorted(
+            self.vehicles.items(), key=lambda item: item[1]["messages"], reverse=True
+        )[:limit]
+        return {
+            "vehicles_seen": len(self.vehicles),
+            "targets": sorted(self.targets),
+            "top_vehicles": {vehicle_id: dict(stats) for vehicle_id, stats in busiest},
+            "unsampled_messages": self.unsampled_messages,
+            "uncounted_messages": self.uncounted_messages,
+        }
 
-    mqttc.on_message = on_message
-    mqttc.on_disconnect = on_disconnect
-    mqttc.on_log = on_log
+    async def async_wait(
+        self,
+        timeout: float,
+        quiet: Optional[float] = None,
+        done: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        """Wait until done() holds, no new topic arrived for quiet seconds,
+        or timeout elapsed - whichever comes first."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while done is None or not done():
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            self._new_topic.clear()
+            try:
+                await asyncio.wait_for(
+                    self._new_topic.wait(),
+                    remaining if quiet is None else min(quiet, remaining),
+                )
+            except asyncio.TimeoutError:
+                if quiet is not None:
+                    return
 
-    if CONF_USERNAME in config and config[CONF_USERNAME]:
-        _LOGGER.debug("%s - Setting username: %s", log_prefix, config[CONF_USERNAME])
-        mqttc.username_pw_set(
-            username=config[CONF_USERNAME],
-            password=config[CONF_PASSWORD] if CONF_PASSWORD in config else None,
-        )
 
-    if uses_tls_transport(config):
-        verify_ssl = config.get(CONF_VERIFY_SSL, DEFAULT_VERIFY_SSL)
+# pylint: disable=too-many-locals,too-many-branches,too-many-statements,too-many-return-statements
+async def discover_topics(
+    hass: HomeAssistant, config, probe: Optional[MQTTProbe] = None
+):
+    """Discover available OVMS topics on the broker.
+
+    Reuses ``probe`` (the connection opened by the connection test) when it
+    still matches the settings, and stops as soon as enough metrics arrived.
+    """
+    topic_prefix = config.get(CONF_TOPIC_PREFIX, DEFAULT_TOPIC_PREFIX)
+    log_prefix = f"Topic discovery for prefix {topic_prefix}"
+    _LOGGER.debug("%s - Starting", log_prefix)
+
+    # Initialize debug info for this test
+    debug_info = {
+        "topic_prefix": topic_prefix,
+        "test_start_time": asyncio.get_event_loop().time(),
+    }
+
+    # Format the discovery topic
+    discovery_topic = DISCOVERY_TOPIC.format(prefix=topic_prefix)
+    _LOGGER.debug("%s - Using discovery topic: %s", log_prefix, discovery_topic)
+    debug_info["discovery_topic"] = discovery_topic
+    qos = config.get(CONF_QOS, DEFAULT_QOS)
+
+    aggregator = DiscoveryAggregator(config, log_prefix)
+    # A known vehicle gets a narrow subscription from the start
+    subscriptions = [
+        format_vehicle_subscription(config, vehicle_id)
+        for vehicle_id in sorted(aggregator.targets)
+    ] or [discovery_topic]
+    owned = False
+    remove_listener = None
+
+    try:
         try:
-            # Use executor to avoid blocking the event loop
-            context = await hass.async_add_executor_job(ssl.create_default_context)
-            # Allow self-signed certificates if verification is disabled
-            if not verify_ssl:
-                context.check_hostname = False
-                context.verify_mode = ssl.CERT_NONE
-            mqttc.tls_set_context(context)
-            debug_info["tls_enabled"] = True
-            debug_info["tls_verify"] = verify_ssl
+            probe, owned = await async_get_probe(
+                hass, config, probe, "ha_ovms_discovery"
+            )
         except ssl.SSLError as ssl_err:
             _LOGGER.error("%s - SSL/TLS setup error: %s", log_prefix, ssl_err)
             debug_info["ssl_error"] = str(ssl_err)
@@ -459,35 +623,10 @@ async def discover_topics(hass: HomeAssistant, config):
                 "error_type": ERROR_CANNOT_CONNECT,
                 "message": f"SSL/TLS Error: {ssl_err}",
             }
+        debug_info["shared_connection"] = not owned
 
-    # Set up connection timeout
-    mqttc.connect_timeout = 5.0
-
-    try:
-        # Connect to the broker
-        _LOGGER.debug("%s - Connecting to broker", log_prefix)
-        await hass.async_add_executor_job(
-            mqttc.connect,
-            config[CONF_HOST],
-            config[CONF_PORT],
-            60,  # Keep alive timeout
-        )
-
-        # Start the loop in a separate thread
-        mqttc.loop_start()
-
-        # Wait for connection to establish
-        connected = False
-        for i in range(10):  # Try for up to 5 seconds
-            if connection_status.get("connected"):
-                connected = True
-                break
-            await asyncio.sleep(0.5)
-            _LOGGER.debug("%s - Waiting for connection (%d/10)", log_prefix, i + 1)
-
-        if not connected:
-            mqttc.loop_stop()
-            rc = connection_status.get("rc", "unknown")
+        if not probe.connected:
+            rc = probe.status.get("rc") or "unknown"
             _LOGGER.error("%s - Connection failed, rc=%s", log_prefix, rc)
             return {
                 "success": False,
@@ -495,26 +634,56 @@ async def discover_topics(hass: HomeAssistant, config):
                 "message": f"Failed to connect to MQTT broker (rc={rc})",
             }
 
+        # Listen before subscribing: retained messages follow the SUBACK
+        remove_listener = probe.add_listener(aggregator)
+        _LOGGER.debug(
+            "%s - Subscribing to discovery topics: %s", log_prefix, subscriptions
+        )
+        if await probe.async_subscribe(subscriptions, qos) is None:
+            _LOGGER.debug("%s - Discovery subscription not acknowledged", log_prefix)
+
         # Hybrid discovery strategy:
         # 1. If retained messages (msg.retain=True) already provided enough metrics, skip active/legacy
-        # 2. Otherwise try active metric request (OVMS edge firmware) with short timeout
-        # 3. If no/few topics found, fall back to legacy passive discovery
+        # 2. Otherwise try active metric request (OVMS edge firmware) and wait
+        #    for its burst of metrics to end
+        # 3. If no metrics answer the request, fall back to passive discovery
+        #    until enough metrics arrived
+
+        # The broker sends retained messages right after the SUBACK; the
+        # burst is over once no new topic arrived for a moment, or once the
+        # known vehicle already covers enough metrics
+        expected_generic = get_expected_metric_count(GENERIC_VEHICLE_TYPE)
+        await aggregator.async_wait(
+            DISCOVERY_RETAINED_TIMEOUT,
+            quiet=DISCOVERY_QUIET_PERIOD,
+            done=lambda: aggregator.is_confident(expected_generic),
+        )
 
-        # Helper to count only metric topics (excludes /client/ command/response topics)
-        def count_metric_topics(topics):
-            """Count topics that are actual metrics, not command/response echoes."""
-            return sum(1 for t in topics if "/metric/" in t)
+        # On a shared broker, follow only the user's vehicles from here on
+        if subscriptions == [discovery_topic] and aggregator.select_targets():
+            narrowed = [
+                format_vehicle_subscription(config, vehicle_id)
+                for vehicle_id in sorted(aggregator.targets)
+            ]
+            _LOGGER.debug("%s - Narrowing subscription to: %s", log_prefix, narrowed)
+            await probe.async_subscribe(narrowed, qos)
+            probe.unsubscribe([discovery_topic])
+            subscriptions = narrowed
+        debug_info["subscriptions"] = subscriptions
 
         # Track whether active discovery succeeded
         active_discovery_succeeded = False
         # Count only retained metric topics (messages with MQTT retain flag set)
-        retained_metric_count = count_metric_topics(retained_topics)
+        retained_metric_count = sum(
+            1 for t in aggregator.retained if aggregator.counts_as_metric(t)
+        )
         # Store count before active request to measure new topics received
-        metric_topics_before = count_metric_topics(discovered_topics)
+        metric_topics_before = aggregator.metric_count
 
         # Get expected metrics for percentage calculation
         # We detect vehicle type early to calculate thresholds
-        vehicle_type_early, _ = detect_vehicle_type(discovered_topics)
+        vehicle_type_early, _ = detect_vehicle_type(aggregator.topics)
+        await _async_load_detected_vehicle(hass, vehicle_type_early)
         expected_count_early = get_expected_metric_count(vehicle_type_early)
         retained_percentage = (
             int((retained_metric_count / expected_count_early) * 100)
@@ -552,20 +721,28 @@ async def discover_topics(hass: HomeAssistant, config):
                 "%s - Attempting active metric request (OVMS edge firmware)", log_prefix
             )
             try:
-                if request_all_metrics(
-                    mqttc, config, client_id, config.get(CONF_QOS, DEFAULT_QOS)
-                ):
-                    # Wait for active discovery timeout
+                if request_all_metrics(probe.client, config, probe.client_id, qos):
+                    loop = asyncio.get_running_loop()
+                    active_deadline = loop.time() + ACTIVE_DISCOVERY_TIMEOUT
                     _LOGGER.debug(
-                        "%s - Waiting %d seconds for active discovery response",
+                        "%s - Waiting up to %d seconds for active discovery response",
                         log_prefix,
                         ACTIVE_DISCOVERY_TIMEOUT,
                     )
-                    await asyncio.sleep(ACTIVE_DISCOVERY_TIMEOUT)
+                    # Wait for the first answering metric, then for the
+                    # burst to end
+                    await aggregator.async_wait(
+                        ACTIVE_DISCOVERY_TIMEOUT,
+                        done=lambda: aggregator.metric_count > metric_topics_before,
+                    )
+                    if aggregator.metric_count > metric_topics_before:
+                        await aggregator.async_wait(
+                            active_deadline - loop.time(),
+                            quiet=DISCOVERY_QUIET_PERIOD,
+                        )
 
                     # Count only metric topics to avoid false success from echoed requests
-                    metric_topics_after = count_metric_topics(discovered_topics)
-                    new_metric_topics = metric_topics_after - metric_topics_before
+                    new_metric_topics = aggregator.metric_count - metric_topics_before
 
                     if new_metric_topics > 0:
                         _LOGGER.info(
@@ -580,45 +757,49 @@ async def discover_topics(hass: HomeAssistant, config):
                         _LOGGER.debug(
                             "%s - No metric topics from active request (got %d total topics, may be echoes), firmware may be older",
                             log_prefix,
-                            len(discovered_topics) - metric_topics_before,
+                            len(aggregator.topics) - metric_topics_before,
                         )
             except (MQTTException, OSError, ValueError) as ex:
                 _LOGGER.debug("%s - Active metric request failed: %s", log_prefix, ex)
 
         # Phase 2: Passive discovery fallback
-        # If active discovery didn't work (older firmware), just wait for passive publishes
+        # If active discovery didn't work (older firmware), wait for passive
+        # publishes until enough metrics arrived
         # Note: The old "stat" command workaround was removed - it only returns text
         # to the response topic, it doesn't publish metrics to their normal topics
         if not active_discovery_succeeded:
             _LOGGER.debug("%s - Falling back to passive discovery", log_prefix)
             debug_info["discovery_method"] = "passive"
 
-            # Calculate remaining wait time
             # Retained messages already arrived, passive publishes fill gaps
             remaining_wait = max(0, LEGACY_DISCOVERY_TIMEOUT - ACTIVE_DISCOVERY_TIMEOUT)
             if remaining_wait > 0:
                 _LOGGER.debug(
-                    "%s - Waiting %d seconds for passive metric publishes",
+                    "%s - Waiting up to %d seconds for passive metric publishes",
                     log_prefix,
                     remaining_wait,
                 )
-                await asyncio.sleep(remaining_wait)
+                await aggregator.async_wait(
+                    remaining_wait,
+                    done=lambda: aggregator.metric_count * 100
+                    >= GOOD_DISCOVERY_PERCENT * expected_count_early,
+                )
 
-        # Clean up
-        mqttc.loop_stop()
-        try:
-            mqttc.disconnect()
-        except (MQTTException, OSError) as ex:
-            _LOGGER.debug("%s - Error disconnecting: %s", log_prefix, ex)
+        debug_info["discovery_time"] = (
+            asyncio.get_event_loop().time() - debug_info["test_start_time"]
+        )
 
         # Process discovery results
+        discovered_topics = aggregator.topics
+        retained_topics = aggregator.retained
         topics_count = len(discovered_topics)
-        metric_topics = [t for t in discovered_topics if "/metric/" in t]
-        metric_count = len(metric_topics)
+        metric_count = aggregator.metric_count
 
         # Calculate retained message statistics
         retained_count = len(retained_topics)
-        retained_metric_topics = [t for t in retained_topics if "/metric/" in t]
+        retained_metric_topics = [
+            t for t in retained_topics if aggregator.counts_as_metric(t)
+        ]
         retained_metric_final = len(retained_metric_topics)
         retained_percentage_of_total = (
             int((retained_count / topics_count) * 100) if topics_count > 0 else 0
@@ -641,6 +822,7 @@ async def discover_topics(hass: HomeAssistant, config):
 
         # Detect vehicle type and calculate expected metrics
         vehicle_type, vehicle_name = detect_vehicle_type(discovered_topics)
+        await _async_load_detected_vehicle(hass, vehicle_type)
         expected_count = get_expected_metric_count(vehicle_type)
         discovery_percentage, quality_indicator = calculate_discovery_percentage(
             metric_count, expected_count
@@ -653,6 +835,7 @@ async def discover_topics(hass: HomeAssistant, config):
         debug_info["retained_percentage_of_total"] = retained_percentage_of_total
         debug_info["retained_metric_percentage"] = retained_metric_percentage
         debug_info["vehicle_type"] = vehicle_type
+        debug_info["vehicles"] = aggregator.get_vehicle_summary()
         debug_info["vehicle_name"] = vehicle_name
         debug_info["expected_count"] = expected_count
         debug_info["discovery_percentage"] = discovery_percentage
@@ -752,11 +935,25 @@ async def discover_topics(hass: HomeAssistant, config):
             "error_type": ERROR_UNKNOWN,
             "message": f"Error during topic discovery: {ex}",
         }
+    finally:
+        if remove_listener is not None:
+            remove_listener()
+        if owned:
+            await probe.async_close()
+        elif probe is not None:
+            probe.unsubscribe(subscriptions)
 
 
 # pylint: disable=too-many-locals,too-many-branches,too-many-statements,too-many-return-statements
-async def test_topic_availability(hass: HomeAssistant, config):
-    """Test if the OVMS topics are available for a specific vehicle."""
+async def test_topic_availability(
+    hass: HomeAssistant, config, probe: Optional[MQTTProbe] = None
+):
+    """Test if the OVMS topics are available for a specific vehicle.
+
+    Reuses ``probe`` when it still matches the settings. The test command is
+    sent right after the subscription is acknowledged, and the waits for a
+    first message and for the command response run concurrently.
+    """
     vehicle_id = config[CONF_VEHICLE_ID]
     log_prefix = f"Topic availability test for vehicle {vehicle_id}"
     _LOGGER.debug("%s - Starting", log_prefix)
@@ -791,83 +988,44 @@ async def test_topic_availability(hass: HomeAssistant, config):
     debug_info["command_topic"] = command_topic
     debug_info["response_topic"] = response_topic
 
-    # Set up a test client
-    client_id = f"ha_ovms_topic_test_{uuid.uuid4().hex[:8]}"
-    protocol = mqtt.MQTTv5 if hasattr(mqtt, "MQTTv5") else mqtt.MQTTv311
-
-    _LOGGER.debug("%s - Creating client with ID: %s", log_prefix, client_id)
-    transport = "websockets" if uses_websocket_transport(config) else "tcp"
-    mqttc = mqtt.Client(client_id=client_id, protocol=protocol, transport=transport)
+    # Subscribe to general topics and response topic
+    subscriptions = [topic, response_topic]
+    # Also try a direct subscription to known topic patterns
+    prefix = config.get(CONF_TOPIC_PREFIX, DEFAULT_TOPIC_PREFIX)
+    if prefix:
+        # Try with the actual username instead of placeholder
+        mqtt_username = config.get(CONF_MQTT_USERNAME, "")
+        if mqtt_username:
+            subscriptions.append(f"{prefix}/{mqtt_username}/{vehicle_id}/#")
+        # Also try with the pattern matching any username
+        subscriptions.append(f"{prefix}/+/{vehicle_id}/#")
+    qos = config.get(CONF_QOS, DEFAULT_QOS)
 
     messages_received = []
     topics_found = set()
-    connection_status = {"connected": False, "rc": None}
     responses_received = []
+    loop = asyncio.get_running_loop()
+    first_message = loop.create_future()
+    response_future = loop.create_future()
 
-    # Define callbacks
-    def on_connect(_, __, flags, rc, _properties=None):
-        """Handle connection result."""
-        connection_status["connected"] = rc == 0
-        connection_status["rc"] = rc
-        # Using time.time() instead of asyncio.get_event_loop().time()
-        connection_status["timestamp"] = time.time()
-
-        _LOGGER.debug(
-            "%s - Connection callback: rc=%s, flags=%s", log_prefix, rc, flags
-        )
-
-        if rc == 0:
-            # Subscribe to general topics and response topic
-            _LOGGER.debug("%s - Subscribing to general topic: %s", log_prefix, topic)
-            mqttc.subscribe(topic, qos=config.get(CONF_QOS, DEFAULT_QOS))
-
-            _LOGGER.debug(
-                "%s - Subscribing to response topic: %s", log_prefix, response_topic
-            )
-            mqttc.subscribe(response_topic, qos=config.get(CONF_QOS, DEFAULT_QOS))
-
-            # Also try a direct subscription to known topic patterns
-            prefix = config.get(CONF_TOPIC_PREFIX, DEFAULT_TOPIC_PREFIX)
-            if prefix:
-                # Try with the actual username instead of placeholder
-                mqtt_username = config.get(CONF_MQTT_USERNAME, "")
-                if mqtt_username:
-                    direct_topic = f"{prefix}/{mqtt_username}/{vehicle_id}/#"
-                    _LOGGER.debug(
-                        "%s - Also subscribing to direct topic: %s",
-                        log_prefix,
-                        direct_topic,
-                    )
-                    mqttc.subscribe(direct_topic, qos=config.get(CONF_QOS, DEFAULT_QOS))
-
-                # Also try with the pattern matching any username
-                alt_topic = f"{prefix}/+/{vehicle_id}/#"
-                _LOGGER.debug(
-                    "%s - Also subscribing to alternative topic: %s",
-                    log_prefix,
-                    alt_topic,
-                )
-                mqttc.subscribe(alt_topic, qos=config.get(CONF_QOS, DEFAULT_QOS))
-
-    def on_message(_, __, msg):
+    def on_message(msg_topic: str, payload: bytes, _retain: bool) -> None:
         """Handle incoming messages."""
         _LOGGER.debug(
             "%s - Message received on topic: %s (payload len: %d)",
             log_prefix,
-            msg.topic,
-            len(msg.payload),
+            msg_topic,
+            len(payload),
         )
 
         message_info = {
-            "topic": msg.topic,
-            "payload_length": len(msg.payload),
-            # Using time.time() instead of asyncio.get_event_loop().time()
+            "topic": msg_topic,
+            "payload_length": len(payload),
             "timestamp": time.time(),
         }
 
         # Try to decode payload for logging
         try:
-            payload_str = msg.payload.decode("utf-8")
+            payload_str = payload.decode("utf-8")
             message_info["payload"] = payload_str
             _LOGGER.debug("%s - Payload: %s", log_prefix, payload_str)
         except UnicodeDecodeError:
@@ -876,64 +1034,25 @@ async def test_topic_availability(hass: HomeAssistant, config):
 
         # Track all messages
         messages_received.append(message_info)
-        topics_found.add(msg.topic)
+        topics_found.add(msg_topic)
+        if not first_message.done():
+            first_message.set_result(True)
 
         # Check if this is a response to our command
-        if msg.topic == response_topic:
+        if msg_topic == response_topic:
             _LOGGER.debug("%s - Response received for command!", log_prefix)
             responses_received.append(message_info)
+            if not response_future.done():
+                response_future.set_result(True)
 
-    def on_disconnect(_, __, rc, _properties=None):
-        """Handle disconnection."""
-        connection_status["connected"] = False
-        connection_status["disconnect_rc"] = rc
-        # Using time.time() instead of asyncio.get_event_loop().time()
-        connection_status["disconnect_timestamp"] = time.time()
-        _LOGGER.debug("%s - Disconnected with result code: %s", log_prefix, rc)
-
-    def on_log(_, __, ___, buf):
-        """Log MQTT client internal messages."""
-        _LOGGER.debug("%s - MQTT Log: %s", log_prefix, buf)
-
-    # Configure the client
-    if hasattr(mqtt, "MQTTv5"):
-        mqttc.on_connect = on_connect
-    else:
-        # For MQTT v3.1.1
-        def on_connect_v311(client, userdata, flags, rc):
-            on_connect(client, userdata, flags, rc, None)
-
-        mqttc.on_connect = on_connect_v311
-
-    mqttc.on_message = on_message
-    mqttc.on_disconnect = on_disconnect
-    mqttc.on_log = on_log
-
-    if CONF_USERNAME in config and config[CONF_USERNAME]:
-        _LOGGER.debug("%s - Setting username: %s", log_prefix, config[CONF_USERNAME])
-        mqttc.username_pw_set(
-            username=config[CONF_USERNAME],
-            password=config[CONF_PASSWORD] if CONF_PASSWORD in config else None,
-        )
-
-    # Configure TLS if needed
-    if uses_tls_transport(config):
-        _LOGGER.debug(
-            "%s - Enabling SSL/TLS for configured secure transport", log_prefix
-        )
-        verify_ssl = config.get(CONF_VERIFY_SSL, DEFAULT_VERIFY_SSL)
+    owned = False
+    remove_listener = None
 
+    try:
         try:
-            # Use executor to avoid blocking the event loop
-            context = await hass.async_add_executor_job(ssl.create_default_context)
-            # Allow self-signed certificates if verification is disabled
-            if not verify_ssl:
-                _LOGGER.debug("%s - SSL certificate verification disabled", log_prefix)
-                context.check_hostname = False
-                context.verify_mode = ssl.CERT_NONE
-            mqttc.tls_set_context(context)
-            debug_info["tls_enabled"] = True
-            debug_info["tls_verify"] = verify_ssl
+            probe, owned = await async_get_probe(
+                hass, config, probe, "ha_ovms_topic_test"
+            )
         except ssl.SSLError as ssl_err:
             _LOGGER.error("%s - SSL/TLS setup error: %s", log_prefix, ssl_err)
             debug_info["ssl_error"] = str(ssl_err)
@@ -944,35 +1063,10 @@ async def test_topic_availability(hass: HomeAssistant, config):
                 "details": f"SSL configuration failed: {ssl_err}",
                 "debug_info": debug_info,
             }
+        debug_info["shared_connection"] = not owned
 
-    # Set up connection timeout
-    mqttc.connect_timeout = 5.0
-
-    try:
-        # Connect to the broker
-        _LOGGER.debug("%s - Connecting to broker", log_prefix)
-        await hass.async_add_executor_job(
-            mqttc.connect,
-            config[CONF_HOST],
-            config[CONF_PORT],
-            60,  # Keep alive timeout
-        )
-
-        # Start the loop in a separate thread
-        mqttc.loop_start()
-
-        # Wait for connection to establish
-        connected = False
-        for i in range(10):  # Try for up to 5 seconds
-            if connection_status.get("connected"):
-                connected = True
-                break
-            await asyncio.sleep(0.5)
-            _LOGGER.debug("%s - Waiting for connection (%d/10)", log_prefix, i + 1)
-
-        if not connected:
-            mqttc.loop_stop()
-            rc = connection_status.get("rc", "unknown")
+        if not probe.connected:
+            rc = probe.status.get("rc") or "unknown"
             _LOGGER.error("%s - Connection failed, rc=%s", log_prefix, rc)
             return {
                 "success": False,
@@ -982,50 +1076,34 @@ async def test_topic_availability(hass: HomeAssistant, config):
                 "debug_info": debug_info,
             }
 
-        # Wait for some initial messages
-        _LOGGER.debug("%s - Waiting for initial messages", log_prefix)
-        for i in range(5):  # Wait for up to 2.5 seconds
-            if messages_received:
-                break
-            _LOGGER.debug("%s - No messages yet (%d/5)", log_prefix, i + 1)
-            await asyncio.sleep(0.5)
+        remove_listener = probe.add_listener(on_message)
+        _LOGGER.debug("%s - Subscribing to: %s", log_prefix, subscriptions)
+        if await probe.async_subscribe(subscriptions, qos) is None:
+            _LOGGER.debug("%s - Subscription not acknowledged", log_prefix)
 
         # Send a command to test request-response
         _LOGGER.debug("%s - Sending test command to: %s", log_prefix, command_topic)
-
         try:
             # Use 'stat' command - returns vehicle status, works with all firmware
-            mqttc.publish(command_topic, "stat", qos=config.get(CONF_QOS, DEFAULT_QOS))
-
-            # Wait for a response
-            _LOGGER.debug("%s - Waiting for command response", log_prefix)
-            for i in range(10):  # Wait for up to 5 seconds
-                if responses_received:
-                    break
-                _LOGGER.debug("%s - No response yet (%d/10)", log_prefix, i + 1)
-                await asyncio.sleep(0.5)
-
-            if responses_received:
-                _LOGGER.debug("%s - Command response received!", log_prefix)
-            else:
-                _LOGGER.debug("%s - No command response received", log_prefix)
+            probe.client.publish(command_topic, "stat", qos=qos)
         except (MQTTException, OSError, ValueError) as ex:
             _LOGGER.warning("%s - Error sending command: %s", log_prefix, ex)
             _LOGGER.debug(
                 "%s - Command error details: %s", log_prefix, traceback.format_exc()
             )
+            response_future.cancel()
 
-        # Wait a bit longer for more messages to arrive
-        if not messages_received:
-            _LOGGER.debug("%s - No messages received, waiting longer", log_prefix)
-            await asyncio.sleep(3)
+        # Wait for a first message and for the command response together
+        _LOGGER.debug("%s - Waiting for messages and command response", log_prefix)
+        await asyncio.gather(
+            asyncio.wait({first_message}, timeout=AVAILABILITY_MESSAGE_TIMEOUT),
+            asyncio.wait({response_future}, timeout=AVAILABILITY_RESPONSE_TIMEOUT),
+        )
 
-        # Clean up
-        mqttc.loop_stop()
-        try:
-            mqttc.disconnect()
-        except (MQTTException, OSError) as ex:
-            _LOGGER.debug("%s - Disconnect error (ignorable): %s", log_prefix, ex)
+        if responses_received:
+            _LOGGER.debug("%s - Command response received!", log_prefix)
+        else:
+            _LOGGER.debug("%s - No command response received", log_prefix)
 
         # Check if we received any messages
         messages_count = len(messages_received)
@@ -1130,3 +1208,13 @@ async def test_topic_availability(hass: HomeAssistant, config):
             "details": f"An unexpected error occurred during topic testing: {ex}",
             "debug_info": debug_info,
         }
+    finally:
+        if remove_listener is not None:
+            remove_listener()
+        if owned:
+            await probe.async_close()
+        elif probe is not None:
+            probe.unsubscribe(subscriptions)
+        for future in (first_message, response_future):
+            if not future.done():
+                future.cancel()
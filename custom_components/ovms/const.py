@@ -1,5 +1,9 @@
 """Constants for the OVMS integration."""
 
+from typing import Any
+
+from homeassistant.util.signal_type import SignalType
+
 # Re-exported constants from Home Assistant for convenience
 from homeassistant.const import (  # noqa: W0611
     CONF_HOST,
@@ -39,6 +43,8 @@ CONF_ENTITY_STALENESS_MANAGEMENT = "entity_staleness_management"  # Hours after
 CONF_DELETE_STALE_HISTORY = (
     "delete_stale_history"  # Delete history when hiding stale entities
 )
+CONF_RESYNC_PRIORITY = "resync_priority"  # Ordered metric request stages
+CONF_FLEET_AGGREGATES = "fleet_aggregates"  # Include the vehicle in fleet sensors
 
 # Defaults
 DEFAULT_PORT = 1883
@@ -191,13 +197,34 @@ DEFAULT_TOPIC_BLACKLIST = SYSTEM_TOPIC_BLACKLIST
 
 DEFAULT_ENTITY_STALENESS_MANAGEMENT = None  # Disabled by default - None means disabled, any number means enabled with that many hours
 DEFAULT_DELETE_STALE_HISTORY = False  # Preserve history by default
+DEFAULT_FLEET_AGGREGATES = False  # No fleet device unless a vehicle opts in
+# Metric request stages sent after (re)connecting, most important first:
+# position and SOC, then charging and climate, then the rest of the vehicle,
+# then module diagnostics and vehicle-specific (x*) metrics. The vehicle
+# stage names the remaining v.* namespaces rather than v.*, which would
+# make the module resend everything the first two stages fetched. A request
+# pattern cannot leave out a single metric, so v.b.* still resends v.b.soc.
+DEFAULT_RESYNC_PRIORITY = [
+    ["v.p.*", "v.b.soc"],
+    ["v.c.*", "v.e.*"],
+    ["v.b.*", "v.d.*", "v.g.*", "v.i.*", "v.m.*", "v.t.*", "v.vin", "v.type"],
+    ["m.*", "s.*", "x*"],
+]
 
 # Entity staleness manager timing constants (seconds)
-STALENESS_INITIAL_CACHE_DELAY = 5
 STALENESS_DIAGNOSTIC_SENSOR_DELAY = 30
-STALENESS_CLEANUP_START_DELAY = 120
-STALENESS_CLEANUP_INTERVAL = 1800  # 30 minutes
-STALENESS_FIRST_RUN_EXTRA_WAIT = 180  # 3 minutes
+# Registry entities not seen by then start their staleness countdown from
+# this point; later-discovered entities start it when first seen.
+STALENESS_SEED_DELAY = 120
+
+# Platforms whose entities are tracked for staleness (unique_id lookups)
+STALENESS_ENTITY_DOMAINS = (
+    "sensor",
+    "binary_sensor",
+    "switch",
+    "lock",
+    "device_tracker",
+)
 
 # Staleness diagnostic sensor identity marker (used to skip itself during scans)
 STALENESS_UNIQUE_ID_MARKER = "staleness_status"
@@ -258,13 +285,102 @@ CONFIG_RESPONSE_TOPIC_TEMPLATE = (
     "{structure_prefix}/client/{client_id}/config/{param}/{instance}"
 )
 
+# Subscription planning
+# The first connection subscribes to the whole vehicle tree so every subtree
+# is seen once (the on-demand metric request republishes all metrics). After
+# this delay the discovered tree and the blacklist are turned into narrower
+# subscriptions, so subtrees that are entirely blacklisted (event/, notify/,
+# other clients under client/) are no longer delivered by the broker at all.
+SUBSCRIPTION_PLAN_SETTLE_DELAY = 60  # seconds
+# A newly seen subtree that the current plan could exclude triggers a
+# re-plan; the delay coalesces the burst of topics such a subtree arrives with.
+SUBSCRIPTION_REPLAN_DELAY = 10  # seconds
+# A narrowed plan cannot deliver a subtree it has never seen: a new root
+# (notify/ once unblacklisted), a new vehicle namespace under a split
+# metric/ node. After each reconnect and every SUBSCRIPTION_WIDEN_INTERVAL
+# the whole tree is subscribed again for SUBSCRIPTION_PLAN_SETTLE_DELAY, so
+# the retained snapshot (and the resync after a reconnect) maps it afresh.
+SUBSCRIPTION_WIDEN_INTERVAL = 3600  # seconds
+# Our own command responses are the only part of client/ we consume.
+SUBSCRIPTION_RESPONSE_FILTER = "client/rr/response/#"
+# MQTT v5 Subscription Identifiers. The broker echoes the identifier of every
+# matching subscription on each delivery, so the ingest path can route a
+# message without inspecting its topic. Higher routes are more specific and
+# win when several subscriptions match.
+SUBSCRIPTION_ROUTE_TREE = 1  # whole vehicle tree, still needs string routing
+SUBSCRIPTION_ROUTE_METRIC = 2  # planned vehicle filters, never client/
+SUBSCRIPTION_ROUTE_STATUS = 3  # module status topic
+SUBSCRIPTION_ROUTE_RESPONSE = 4  # our command responses
+# Added to the identifier of subscriptions on the username-agnostic
+# {prefix}/+/{vehicle_id} base, which overlaps the structure prefix.
+SUBSCRIPTION_ID_ALT_BASE_OFFSET = 16
+
 # Discovery timing constants
 # Active discovery uses on-demand metric requests (OVMS edge firmware) for faster setup
 # Legacy discovery passively waits for OVMS to publish metrics (older firmware)
 ACTIVE_DISCOVERY_TIMEOUT = 10  # seconds to wait after requesting metrics
 LEGACY_DISCOVERY_TIMEOUT = 60  # fallback timeout for older firmware
+# Config-flow probe connection, shared by the connection test, topic
+# discovery and the availability test. Waits end on broker events; these
+# are only upper bounds.
+PROBE_CONNECT_TIMEOUT = 5.0  # seconds to wait for the CONNACK
+PROBE_IDLE_TIMEOUT = 300  # seconds before an abandoned flow's probe is closed
+# A burst (retained topics, the answer to a metric request) is over once no
+# new topic has arrived for DISCOVERY_QUIET_PERIOD
+DISCOVERY_QUIET_PERIOD = 1.0  # seconds
+DISCOVERY_RETAINED_TIMEOUT = 3.0  # upper bound for the retained burst
+AVAILABILITY_MESSAGE_TIMEOUT = 5.5  # seconds to wait for a first vehicle message
+AVAILABILITY_RESPONSE_TIMEOUT = 5.0  # seconds to wait for the test command response
+# Discovery on a shared broker sees every vehicle under {prefix}/#. Topics
+# of the target vehicles are all kept; of the others only a sample, and
+# per-vehicle counts for a bounded number of vehicle ids.
+DISCOVERY_TOPIC_SAMPLE_SIZE = 500  # topics kept from non-target vehicles
+DISCOVERY_MAX_VEHICLES = 1000  # vehicle ids counted individually
+# Once the retained burst is in, discovery narrows to {prefix}/+/{vehicle_id}/#
+# for the user's vehicles - if there are at most this many of them
+DISCOVERY_MAX_TARGETS = 5
 # Delay before requesting metrics after reconnection to ensure subscriptions are established
 RECONNECT_METRIC_REQUEST_DELAY = ACTIVE_DISCOVERY_TIMEOUT / 2  # 5 seconds
+# Staged resync pacing: after each stage the arrival rate is sampled every
+# RESYNC_PACE_INTERVAL; the next stage goes out once a sample sees no more
+# than RESYNC_QUIET_MESSAGES (the module has finished dumping the stage), or
+# after RESYNC_STAGE_TIMEOUT when unrelated traffic keeps the rate up.
+RESYNC_PACE_INTERVAL = 0.5  # seconds
+RESYNC_QUIET_MESSAGES = 2
+RESYNC_STAGE_TIMEOUT = 5.0  # seconds
+# Quiet samples only count once the reply has started arriving: a module on
+# a cellular link often needs more than one pace interval to answer. A stage
+# nothing answers within RESYNC_REPLY_GRACE is treated as done.
+RESYNC_REPLY_GRACE = 3.0  # seconds, below RESYNC_STAGE_TIMEOUT
+# A stage is skipped when every known topic it covers arrived this recently
+RESYNC_FRESH_AGE = 60  # seconds
+
+# Load shedding: when Home Assistant's event loop falls behind, updates of
+# low-priority metrics are conflated to their latest value and delayed.
+# Priority classes, from never delayed to first delayed:
+LOAD_PRIORITY_CRITICAL = "critical"
+LOAD_PRIORITY_NORMAL = "normal"
+LOAD_PRIORITY_LOW = "low"
+# Always dispatched immediately, on top of location metrics and locks
+LOAD_CRITICAL_METRICS = (
+    "v.b.soc",
+    "v.c.charging",
+    "v.c.state",
+    "v.c.substate",
+    "v.c.mode",
+)
+# Loop lag is sampled by a timer firing this often
+LOAD_LAG_PROBE_INTERVAL = 0.25  # seconds
+# Weight of a new sample when the lag is falling; rises apply at once
+LOAD_LAG_SMOOTHING = 0.2
+# Lag from which low-priority updates are delayed, and from which normal
+# ones are too. Each level is left again below half its threshold.
+LOAD_SHED_LAG_THRESHOLD = 0.1  # seconds
+LOAD_SHED_SEVERE_LAG = 0.5  # seconds
+# A delayed update is dispatched after this long even under pressure
+LOAD_SHED_MAX_DELAY = 30  # seconds
+# Delayed updates dispatched per probe, so a backlog does not re-spike the loop
+LOAD_SHED_FLUSH_BATCH = 50
 
 # Discovery thresholds (percentage-based)
 # These are percentages of expected metrics for the detected vehicle type
@@ -315,15 +431,20 @@ SIGNAL_UPDATE_ENTITY = f"{DOMAIN}_update_entity"
 SIGNAL_PLATFORMS_LOADED = f"{DOMAIN}_platforms_loaded"
 
 
-def get_add_entities_signal(config_entry_id: str | None = None) -> str:
-    """Return the add-entities signal.
+def get_add_entities_signal(
+    config_entry_id: str | None, entity_type: str
+) -> SignalType[list[dict[str, Any]]]:
+    """Return the add-entities signal of one platform.
 
+    Each platform (sensor, binary_sensor, switch, lock, device_tracker) has its
+    own signal carrying a list of discovery dicts, so a platform only wakes up
+    for its own entities and adds a whole batch with one async_add_entities.
     Falls back to the canonical base signal when no config entry is available.
     """
     if not config_entry_id:
-        return SIGNAL_ADD_ENTITIES
+        return SignalType(f"{SIGNAL_ADD_ENTITIES}_{entity_type}")
 
-    return f"{SIGNAL_ADD_ENTITIES}_{config_entry_id}"
+    return SignalType(f"{SIGNAL_ADD_ENTITIES}_{entity_type}_{config_entry_id}")
 
 
 def get_platforms_loaded_signal(config_entry_id: str | None = None) -> str:
@@ -367,6 +488,23 @@ MAX_STATE_LENGTH = 255
 # MAX_STATE_LENGTH and render as a truncated raw string.
 VECTOR_MIN_VALUES = 4
 
+# Formatted durations are memoized per (value, unit, style). Duration metrics
+# (charge ETAs, park and drive times) step through a handful of recent values,
+# and every update formats the short form; a few hundred entries cover all
+# duration sensors of several vehicles at a few tens of kB.
+DURATION_FORMAT_CACHE_SIZE = 512
+
+# Decoded timestamp payloads are memoized per (format, value, local zone).
+# Retained and unchanged timestamps (service dates, timer starts) repeat
+# verbatim, while clock metrics produce a new value per message, so a small
+# cache suffices.
+TIMESTAMP_CACHE_SIZE = 256
+# Numeric timestamp payloads are taken as Unix epoch seconds only within this
+# range (1973-03-03 .. 2286-11-20). Smaller numbers are relative values such
+# as v.c.timerstart (seconds since midnight), not dates.
+TIMESTAMP_EPOCH_MIN = 100_000_000
+TIMESTAMP_EPOCH_MAX = 9_999_999_999
+
 # GPS accuracy calculation constants
 # Used to convert GPS signal quality (v.p.gpssq) to meters accuracy
 # Source: OVMS firmware v.p.gpssq is 0-100% where <30 unusable, >50 good, >80 excellent
@@ -394,11 +532,149 @@ GPS_ACCURACY_MAX_METERS = 100  # Maximum accuracy value (poorest quality)
 # latency is irrelevant for a vehicle tracker.
 GPS_COALESCE_WINDOW = 1.0  # seconds
 
+# Entities discovered within this window are handed to their platform as one
+# batch (one dispatcher call and one async_add_entities per platform). A
+# startup burst of retained messages arrives within a few tens of ms, and the
+# delay is invisible for an entity that is being created for the first time.
+ENTITY_BATCH_WINDOW = 0.1  # seconds
+
 # Minimum coordinate delta (degrees) before a position counts as moved.
 # 0.00001 deg ~= 1.1 m at the equator; smaller deltas are GPS jitter and would
 # only add redundant history points that make the map track look noisy.
 GPS_COORDINATE_DEADBAND = 0.00001
 
+# Trip segmentation
+# Trips are cut on v.e.on transitions and summarised from the running counters
+# OVMS already publishes (v.p.odometer, v.b.energy.used/recd), so each open trip
+# only holds a fixed handful of scalars regardless of how long it lasts.
+# Completed trips are appended as one JSON line each to this file in the HA
+# config directory; one file per vehicle keeps the query service a plain scan.
+TRIP_LOG_FILENAME_TEMPLATE = "ovms_trips_{vehicle_id}.jsonl"
+# Ignition cycles shorter than this are not trips (moving the car out of the
+# garage, unlocking to fetch something). 0.1 km is below any real journey but
+# above odometer rounding noise (most vehicles report 0.1 km resolution).
+TRIP_MIN_DISTANCE_KM = 0.1
+# Mean Earth radius used for the GPS fallback distance (haversine) when a
+# vehicle module does not publish v.p.odometer.
+TRIP_EARTH_RADIUS_KM = 6371.0088
+# Default and maximum number of trips returned by the ovms.query_trips service.
+# The cap bounds the service response size (each trip is ~400 bytes of JSON).
+TRIP_QUERY_DEFAULT_LIMIT = 10
+TRIP_QUERY_MAX_LIMIT = 500
+# Unique-ID marker for the last-trip sensors (kept out of topic-derived IDs).
+TRIP_UNIQUE_ID_MARKER = "last_trip"
+
+# Charge sessions
+# Sessions are cut on v.c.charging (or v.c.state) transitions and summarised
+# on the fly like trips: start/end, SOC delta, energy, peak and mean power,
+# the coalesced GPS fix and the connector type. Completed sessions are
+# appended as one JSON line each, one file per vehicle.
+CHARGE_LOG_FILENAME_TEMPLATE = "ovms_charges_{vehicle_id}.jsonl"
+# Sessions that added less than this and no SOC are aborted starts (cable
+# plugged in, charge refused or stopped by a timer) rather than charges.
+CHARGE_MIN_ENERGY_KWH = 0.1
+# Default and maximum number of sessions returned by ovms.query_charges.
+CHARGE_QUERY_DEFAULT_LIMIT = 10
+CHARGE_QUERY_MAX_LIMIT = 500
+# Unique-ID marker for the last-charge sensors.
+CHARGE_UNIQUE_ID_MARKER = "last_charge"
+
+# Derived metrics
+# Values computed from other metrics (efficiency, charge ETA, ...) are
+# declared in metrics/derived.py and compiled into a dependency graph, so a
+# message only re-evaluates the formulas that read its metric, and only when
+# the value actually changed.
+# Unique-ID marker for the derived-metric sensors.
+DERIVED_UNIQUE_ID_MARKER = "derived"
+# Trip efficiency is meaningless over the first few hundred metres: the energy
+# counters have kWh resolution on some vehicles and start-up loads dominate.
+DERIVED_MIN_TRIP_KM = 1.0
+# Range is extrapolated from the current SOC; below this the estimate is
+# mostly rounding noise (and division by zero at 0%).
+DERIVED_MIN_SOC = 5.0
+
+# Session energy
+# Charge and drive energy are integrated from v.c.power / v.b.power (kW) with
+# the trapezoidal rule as the messages arrive, for vehicles without the
+# v.b.energy.* counters. OVMS only publishes a metric when it changes, so
+# a flat charge can leave v.c.power silent for a long time. An interval
+# longer than this between two power samples is not interpolated but held
+# at the earlier sample's power, for at most ENERGY_MAX_HELD_GAP: a longer
+# silence means the module went offline or to sleep (cellular loss), and
+# the rest of it is skipped like a disconnect or a session change.
+ENERGY_MAX_SAMPLE_GAP = 300  # seconds
+ENERGY_MAX_HELD_GAP = 1800  # seconds
+# Unique-ID marker for the session energy sensors.
+ENERGY_UNIQUE_ID_MARKER = "session_energy"
+
+# Fleet aggregates
+# Vehicles that opt in (CONF_FLEET_AGGREGATES) feed running fleet totals -
+# sums, counts, min/max and vehicle sets - updated in place from each
+# client's message stream, so one message costs the same however many cars
+# there are. The sensors sit on one fleet device, hosted by whichever member
+# config entry is loaded. The aggregator lives outside hass.data[DOMAIN],
+# which holds only config entries.
+FLEET_DATA_KEY = f"{DOMAIN}_fleet"
+FLEET_DEVICE_IDENTIFIER = "fleet"
+FLEET_DEVICE_NAME = "OVMS Fleet"
+FLEET_DEVICE_MODEL = "Fleet"
+# Vehicles below this SOC (%) are listed by the fleet low-SOC sensor.
+FLEET_LOW_SOC = 20.0
+# Unique-ID marker for the fleet sensors.
+FLEET_UNIQUE_ID_MARKER = "fleet"
+
+# Unique-ID markers of entities that are not fed by topic updates but by
+# their own signals (trackers, derived metrics, fleet, the staleness sensor
+# itself). The UpdateDispatcher never marks them as seen, so the staleness
+# manager must not track them.
+NON_TOPIC_UNIQUE_ID_MARKERS = (
+    STALENESS_UNIQUE_ID_MARKER,
+    TRIP_UNIQUE_ID_MARKER,
+    CHARGE_UNIQUE_ID_MARKER,
+    DERIVED_UNIQUE_ID_MARKER,
+    ENERGY_UNIQUE_ID_MARKER,
+    FLEET_UNIQUE_ID_MARKER,
+)
+
+# Discovery snapshot
+# Every discovered entity is recorded (topic, unique_id, type, metric path,
+# related IDs) in a per-entry HA Store so the next start can recreate the
+# whole entity set before the broker connects instead of waiting for each
+# topic to be published again. Discovery bursts at startup touch hundreds of
+# entities, so writes are debounced rather than issued per entity.
+DISCOVERY_SNAPSHOT_STORAGE_VERSION = 1
+DISCOVERY_SNAPSHOT_STORAGE_KEY_TEMPLATE = DOMAIN + ".discovery_{entry_id}"
+DISCOVERY_SNAPSHOT_SAVE_DELAY = 30  # seconds
+
+# Ingest profiling (ovms.profile service)
+# cProfile is switched on only while OVMS ingest and entity-update callbacks
+# run, so the report shows this integration's cost rather than the whole HA
+# process. A run ends after the duration or the message count, whichever
+# comes first; the duration cap keeps a forgotten run from profiling (and
+# slowing) the integration indefinitely.
+PROFILE_FILENAME_TEMPLATE = "ovms_profile_{vehicle_id}_{timestamp}"
+PROFILE_DEFAULT_DURATION = 30  # seconds
+PROFILE_MAX_DURATION = 600  # seconds
+PROFILE_MAX_MESSAGES = 1_000_000
+# Functions listed in the text summary; the .prof file always has all of them
+PROFILE_DEFAULT_TOP = 25
+PROFILE_MAX_TOP = 200
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "ncalls")
+
+# ovms.memory_report: structural size estimates per vehicle and entity, plus
+# an optional tracemalloc window filtered to this package. tracemalloc slows
+# every allocation in the process while it runs, so the window is capped;
+# a duration of 0 skips it. One frame per trace is enough to attribute an
+# allocation to a source line and keeps the tracing overhead low.
+MEMORY_TRACE_DEFAULT_DURATION = 10  # seconds
+MEMORY_TRACE_MAX_DURATION = 300  # seconds
+MEMORY_TRACE_FRAMES = 1
+# Entities (per vehicle) and source lines listed in the report
+MEMORY_DEFAULT_TOP = 10
+MEMORY_MAX_TOP = 100
+# Top entities per vehicle included in config entry diagnostics
+MEMORY_DIAGNOSTICS_TOP = 5
+
 
 def truncate_state_value(
     value: object, max_length: int = MAX_STATE_LENGTH
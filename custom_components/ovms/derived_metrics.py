@@ -0,0 +1,278 @@
+"""Incremental derived metrics for OVMS integration."""
+
+import heapq
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from homeassistant.components.sensor import SensorEntity
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
+
+from .const import (
+    CONF_CLIENT_ID,
+    CONF_CONFIG_ENTRY_ID,
+    CONF_VEHICLE_ID,
+    DERIVED_UNIQUE_ID_MARKER,
+    LOGGER_NAME,
+    SIGNAL_UPDATE_ENTITY,
+    get_add_entities_signal,
+)
+from .entity_state import BOOLEAN_FALSE_STATES, BOOLEAN_TRUE_STATES
+from .metrics.derived import DERIVED_METRICS
+from .payload import PAYLOAD_BOOLEAN, PAYLOAD_NUMERIC, PAYLOAD_TEXT, decode_payload
+from .utils import get_namespaced_ovms_unique_id, get_ovms_device_info
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+
+class _DerivedMetric:
+    """One compiled formula with its inputs and dependent formulas."""
+
+    __slots__ = ("key", "definition", "inputs", "formula", "order", "dependents")
+
+    def __init__(self, key: str, definition: Dict[str, Any]) -> None:
+        """Initialize from a DERIVED_METRICS entry."""
+        self.key = key
+        self.definition = definition
+        self.inputs: Tuple[str, ...] = tuple(definition["inputs"])
+        self.formula: Callable[..., Any] = definition["formula"]
+        # Position in evaluation order; every input comes first
+        self.order = 0
+        self.dependents: List["_DerivedMetric"] = []
+
+
+def compile_derived_metrics(
+    definitions: Dict[str, Dict[str, Any]],
+) -> Tuple[List[_DerivedMetric], Dict[str, List[_DerivedMetric]]]:
+    """Compile definitions into evaluation order and a metric -> formulas map.
+
+    Inputs naming another definition become edges between formulas; all
+    other inputs are metric paths. Raises ValueError on a dependency cycle.
+    """
+    metrics = {
+        key: _DerivedMetric(key, definition) for key, definition in definitions.items()
+    }
+    consumers: Dict[str, List[_DerivedMetric]] = {}
+    pending = {}
+    for metric in metrics.values():
+        pending[metric.key] = 0
+        for name in metric.inputs:
+            source = metrics.get(name)
+            if source is None:
+                consumers.setdefault(name, []).append(metric)
+            else:
+                source.dependents.append(metric)
+                pending[metric.key] += 1
+
+    # Kahn's algorithm: a formula is ready once all its inputs are ordered
+    ordered: List[_DerivedMetric] = []
+    ready = [metric for metric in metrics.values() if not pending[metric.key]]
+    while ready:
+        metric = ready.pop(0)
+        metric.order = len(ordered)
+        ordered.append(metric)
+        for dependent in metric.dependents:
+            pending[dependent.key] -= 1
+            if not pending[dependent.key]:
+                ready.append(dependent)
+
+    if len(ordered) != len(metrics):
+        cycle = sorted(key for key, count in pending.items() if count)
+        raise ValueError(f"Derived metrics depend on each other: {cycle}")
+    return ordered, consumers
+
+
+def input_value(payload: Any) -> Any:
+    """Return a payload as a formula input: float, bool or None."""
+    payload = decode_payload(payload)
+    if payload.kind == PAYLOAD_BOOLEAN:
+        return payload.value
+    if payload.kind == PAYLOAD_NUMERIC:
+        return float(payload.value)
+    if payload.kind == PAYLOAD_TEXT and isinstance(payload.value, str):
+        state = payload.value.strip().lower()
+        if state in BOOLEAN_TRUE_STATES:
+            return True
+        if state in BOOLEAN_FALSE_STATES:
+            return False
+    return None
+
+
+class DerivedMetricsEngine:
+    """Evaluate derived metrics as their input metrics change."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config: Dict[str, Any],
+        definitions: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        """Initialize the engine and compile the formulas."""
+        self.hass = hass
+        self._client_id = config.get(CONF_CLIENT_ID)
+        self._config_entry_id = config.get(CONF_CONFIG_ENTRY_ID)
+        self._vehicle_id = config.get(CONF_VEHICLE_ID, "unknown")
+        self._add_entities_signal = get_add_entities_signal(
+            self._config_entry_id, "sensor"
+        )
+
+        self._ordered, self._consumers = compile_derived_metrics(
+            DERIVED_METRICS if definitions is None else definitions
+        )
+        # Latest value of every input metric and derived metric by name
+        self.values: Dict[str, Any] = {}
+        self.evaluations = 0
+        self._sensor_ids: Dict[str, str] = {}
+        self._sensors_created = False
+
+        # Topic -> input metric path (None when no formula reads it), so a
+        # message for an unrelated topic costs one dict lookup
+        self._topic_inputs: Dict[str, Optional[str]] = {}
+
+    @callback
+    def process_message(self, topic: str, payload: Any) -> None:
+        """Feed one MQTT message; re-evaluate the formulas reading it."""
+        path = self._topic_inputs.get(topic, False)
+        if path is False:
+            path = self._resolve_input(topic)
+            self._topic_inputs[topic] = path
+        if path is None:
+            return
+
+        value = input_value(payload)
+        if path in self.values and self.values[path] == value:
+            return
+        self.values[path] = value
+        self._propagate(self._consumers[path])
+
+    def _resolve_input(self, topic: str) -> Optional[str]:
+        """Map a topic to the metric path it carries, if a formula reads it."""
+        _, sep, suffix = topic.partition("/metric/")
+        if not sep:
+            return None
+        path = suffix.replace("/", ".")
+        return path if path in self._consumers else None
+
+    def _propagate(self, metrics: List[_DerivedMetric]) -> None:
+        """Evaluate metrics, then the dependents of those that changed."""
+        heap = [(metric.order, metric.key, metric) for metric in metrics]
+        heapq.heapify(heap)
+        done = set()
+        while heap:
+            _, key, metric = heapq.heappop(heap)
+            if key in done:
+                continue
+            done.add(key)
+            if self._evaluate(metric):
+                for dependent in metric.dependents:
+                    heapq.heappush(heap, (dependent.order, dependent.key, dependent))
+
+    def _evaluate(self, metric: _DerivedMetric) -> bool:
+        """Evaluate one formula; return True if its value changed."""
+        self.evaluations += 1
+        args = [self.values.get(name) for name in metric.inputs]
+        try:
+            value = metric.formula(*args)
+        except (ArithmeticError, TypeError, ValueError) as ex:
+            _LOGGER.debug("Derived metric %s failed for %s: %s", metric.key, args, ex)
+            value = None
+
+        if metric.key in self.values and self.values[metric.key] == value:
+            return False
+        self.values[metric.key] = value
+
+        unique_id = self._sensor_ids.get(metric.key)
+        if unique_id is not None:
+            async_dispatcher_send(
+                self.hass, f"{SIGNAL_UPDATE_ENTITY}_{unique_id}", value
+            )
+        return True
+
+    @callback
+    def async_create_sensors(self) -> None:
+        """Create the derived-metric sensors once the platforms are loaded."""
+        if self._sensors_created:
+            return
+        self._sensors_created = True
+
+        device_info = get_ovms_device_info(self._client_id, self._vehicle_id)
+        batch = []
+        for metric in self._ordered:
+            unique_id = get_namespaced_ovms_unique_id(
+                f"ovms_{self._vehicle_id}_{DERIVED_UNIQUE_ID_MARKER}_{metric.key}",
+                self._config_entry_id,
+            )
+            self._sensor_ids[metric.key] = unique_id
+            sensor = OVMSDerivedSensor(self, metric, unique_id, device_info)
+            batch.append(
+                {
+                    "entity_type": "sensor",
+                    "name": metric.definition["name"],
+                    "diagnostic_sensor": sensor,
+                }
+            )
+        async_dispatcher_send(self.hass, self._add_entities_signal, batch)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return a diagnostics snapshot of the derived metrics."""
+        return {
+            "evaluations": self.evaluations,
+            "metrics": {
+                metric.key: self.values.get(metric.key) for metric in self._ordered
+            },
+        }
+
+
+class OVMSDerivedSensor(SensorEntity):
+    """Sensor exposing one derived metric."""
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        engine: DerivedMetricsEngine,
+        metric: _DerivedMetric,
+        unique_id: str,
+        device_info: Dict[str, Any],
+    ) -> None:
+        """Initialize the sensor."""
+        definition = metric.definition
+        self._engine = engine
+        self._key = metric.key
+        self._attr_name = definition["name"]
+        self._attr_icon = definition.get("icon")
+        self._attr_device_class = definition.get("device_class")
+        self._attr_state_class = definition.get("state_class")
+        self._attr_native_unit_of_measurement = definition.get("unit")
+        self._attr_unique_id = unique_id
+        self._attr_device_info = device_info
+        self._attr_extra_state_attributes = {
+            "category": definition.get("category"),
+            "description": definition.get("description"),
+            "inputs": list(metric.inputs),
+        }
+
+    @property
+    def native_value(self) -> Any:
+        """Return the current value of the derived metric."""
+        return self._engine.values.get(self._key)
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to value changes."""
+        await super().async_added_to_hass()
+
+        @callback
+        def update_state(_value: Any) -> None:
+            """Refresh from the engine's current value."""
+            self.async_write_ha_state()
+
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                f"{SIGNAL_UPDATE_ENTITY}_{self.unique_id}",
+                update_state,
+            )
+        )
@@ -2,7 +2,7 @@
 
 import logging
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from homeassistant.components.device_tracker import SourceType, TrackerEntity
 from homeassistant.config_entries import ConfigEntry
@@ -15,12 +15,12 @@ from .const import (
     DOMAIN,
     GPS_COORDINATE_DEADBAND,
     LOGGER_NAME,
-    SIGNAL_UPDATE_ENTITY,
     get_add_entities_signal,
 )
 from .naming_service import EntityNamingService
 from .attribute_manager import AttributeManager
-from .utils import get_merged_config
+from .payload import raw_payload
+from .utils import async_connect_entity_updates, get_merged_config
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
@@ -31,36 +31,36 @@ async def async_setup_entry(
     """Set up OVMS device tracker based on a config entry."""
 
     @callback
-    def async_add_device_tracker(data: Dict[str, Any]) -> None:
-        """Add device tracker based on discovery data."""
+    def async_add_device_trackers(batch: List[Dict[str, Any]]) -> None:
+        """Add a batch of device trackers based on discovery data."""
         try:
-            if data["entity_type"] != "device_tracker":
-                return
-
-            _LOGGER.info(
-                "Adding device tracker: %s",
-                data.get("friendly_name", data.get("name", "unknown")),
-            )
-
             # Create naming and attribute services - merge options with data
             config = get_merged_config(entry)
             naming_service = EntityNamingService(config)
             attribute_manager = AttributeManager(config)
 
-            tracker = OVMSDeviceTracker(
-                data.get("unique_id", ""),
-                data.get("name", ""),
-                data.get("topic", ""),
-                data.get("payload", {}),
-                data.get("device_info", {}),
-                data.get("attributes", {}),
-                hass,
-                data.get("friendly_name"),
-                naming_service,
-                attribute_manager,
-            )
-
-            async_add_entities([tracker])
+            trackers = []
+            for data in batch:
+                _LOGGER.info(
+                    "Adding device tracker: %s",
+                    data.get("friendly_name", data.get("name", "unknown")),
+                )
+                trackers.append(
+                    OVMSDeviceTracker(
+                        data.get("unique_id", ""),
+                        data.get("name", ""),
+                        data.get("topic", ""),
+                        data.get("payload", {}),
+                        data.get("device_info", {}),
+                        data.get("attributes", {}),
+                        hass,
+                        data.get("friendly_name"),
+                        naming_service,
+                        attribute_manager,
+                    )
+                )
+
+            async_add_entities(trackers)
         except Exception as ex:
             _LOGGER.exception("Error adding device tracker: %s", ex)
 
@@ -68,8 +68,8 @@ async def async_setup_entry(
     entry.async_on_unload(
         async_dispatcher_connect(
             hass,
-            get_add_entities_signal(entry.entry_id),
-            async_add_device_tracker,
+            get_add_entities_signal(entry.entry_id, "device_tracker"),
+            async_add_device_trackers,
         )
     )
 
@@ -171,6 +171,7 @@ class OVMSDeviceTracker(TrackerEntity, RestoreEntity):
         @callback
         def update_state(payload: Any) -> None:
             """Update the tracker state."""
+            payload = raw_payload(payload)
             state_changed = self._process_payload(payload)
 
             # Process any JSON attributes if applicable
@@ -187,13 +188,7 @@ class OVMSDeviceTracker(TrackerEntity, RestoreEntity):
             if state_changed:
                 self.async_write_ha_state()
 
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass,
-                f"{SIGNAL_UPDATE_ENTITY}_{self.unique_id}",
-                update_state,
-            )
-        )
+        self.async_on_remove(async_connect_entity_updates(self, update_state))
 
     def _process_payload(self, payload: Any) -> bool:
         """Process the payload and update coordinates.
@@ -7,7 +7,8 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN
+from .const import DOMAIN, MEMORY_DIAGNOSTICS_TOP
+from .memory_accounting import measure_vehicle
 
 # Fields to redact from diagnostic data
 REDACT_FIELDS = {
@@ -55,6 +56,25 @@ async def async_get_config_entry_diagnostics(
             "total": len(mqtt_client.entity_registry.get_all_entities()),
             "by_type": mqtt_client.entity_registry.get_entity_stats(),
         },
+        "trip_tracker": mqtt_client.trip_tracker.get_status(),
+        "derived_metrics": mqtt_client.derived_metrics.get_status(),
+        "energy_sessions": mqtt_client.energy_sessions.get_status(),
+        "charge_tracker": mqtt_client.charge_tracker.get_status(),
+        "fleet": (
+            mqtt_client.fleet_member.fleet.get_status()
+            if mqtt_client.fleet_member is not None
+            else None
+        ),
+        "resync": mqtt_client.resync_planner.get_status(),
+        "load_shedding": mqtt_client.load_shedder.get_status(),
+        "discovery_snapshot": mqtt_client.discovery_snapshot.get_status(),
+        "firmware": mqtt_client.update_dispatcher.version_tracker.get_status(),
+        "subscriptions": {
+            **mqtt_client.subscription_planner.get_status(),
+            "identifiers": mqtt_client.connection_manager.subscription_ids_available,
+            "duplicate_deliveries": mqtt_client.connection_manager.duplicate_deliveries,
+        },
+        "memory": measure_vehicle(mqtt_client, MEMORY_DIAGNOSTICS_TOP),
     }
 
     # Include sample topics (without values)
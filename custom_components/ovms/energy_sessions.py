@@ -0,0 +1,423 @@
+"""Streaming charge and drive energy integration for OVMS integration."""
+
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
+from homeassistant.helpers.restore_state import RestoreEntity
+
+from .const import (
+    CONF_CLIENT_ID,
+    CONF_CONFIG_ENTRY_ID,
+    CONF_VEHICLE_ID,
+    ENERGY_MAX_HELD_GAP,
+    ENERGY_MAX_SAMPLE_GAP,
+    ENERGY_UNIQUE_ID_MARKER,
+    LOGGER_NAME,
+    SIGNAL_UPDATE_ENTITY,
+    get_add_entities_signal,
+)
+from .entity_state import (
+    BOOLEAN_FALSE_STATES,
+    BOOLEAN_TRUE_STATES,
+    parse_boolean_state,
+)
+from .utils import get_namespaced_ovms_unique_id, get_ovms_device_info, safe_float
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Metric paths the session tracker consumes
+METRIC_CHARGING = "v.c.charging"
+METRIC_CHARGE_STATE = "v.c.state"
+METRIC_VEHICLE_ON = "v.e.on"
+METRIC_CHARGE_POWER = "v.c.power"
+METRIC_BATTERY_POWER = "v.b.power"
+
+# v.c.state values that start or end a charge session, for vehicles that do
+# not publish v.c.charging; the others (prepare, timerwait, heating) keep
+# the current one
+CHARGE_ACTIVE_STATES = frozenset(("charging", "topoff"))
+CHARGE_ENDED_STATES = frozenset(("done", "stopped"))
+
+# Published energy is rounded to Wh; finer steps would only add state writes
+ENERGY_PRECISION = 3
+
+# Session energy sensors: energy key -> sensor description. Each counter
+# restarts from zero with its session, which HA's TOTAL_INCREASING state
+# class records as a meter reset.
+ENERGY_SENSOR_TYPES = {
+    "charge": {
+        "name": "Charge Session Energy",
+        "icon": "mdi:battery-charging",
+        "session": "charge",
+    },
+    "drive": {
+        "name": "Drive Energy",
+        "icon": "mdi:car-electric",
+        "session": "drive",
+    },
+    "drive_recovered": {
+        "name": "Drive Energy Recovered",
+        "icon": "mdi:battery-plus",
+        "session": "drive",
+    },
+}
+
+
+class TrapezoidIntegrator:
+    """Integrate a stream of power samples (kW) into energy (kWh).
+
+    Each new sample adds the trapezoid between it and the previous one.
+    Positive and negative power are accumulated separately: an interval
+    whose power changes sign is split where it crosses zero. An interval
+    longer than max_gap is integrated at the earlier sample's power (left
+    Riemann sum, like max_sub_interval of HA's integral helper): OVMS only
+    publishes a changed value, so a long silence means steady power. Power
+    is held for at most max_hold, though; beyond that the module was offline
+    and the rest of the interval is skipped, as after interrupt() (a
+    disconnect) or restart() (a new session).
+    """
+
+    __slots__ = ("max_gap", "max_hold", "last_time", "last_power", "gaps")
+
+    def __init__(
+        self,
+        max_gap: float = ENERGY_MAX_SAMPLE_GAP,
+        max_hold: float = ENERGY_MAX_HELD_GAP,
+    ) -> None:
+        """Initialize the integrator without a sample."""
+        self.max_gap = max_gap
+        self.max_hold = max_hold
+        self.last_time: Optional[float] = None
+        self.last_power: Optional[float] = None
+        self.gaps = 0
+
+    def add(self, timestamp: float, power: float) -> Tuple[float, float]:
+        """Add a sample; return the (positive, negative) kWh since the last."""
+        last_time = self.last_time
+        last_power = self.last_power
+        self.last_time = timestamp
+        self.last_power = power
+        if last_time is None:
+            return 0.0, 0.0
+
+        elapsed = timestamp - last_time
+        if elapsed <= 0:
+            return 0.0, 0.0
+        hours = elapsed / 3600
+        if elapsed > self.max_gap:
+            self.gaps += 1
+            hours = min(elapsed, self.max_hold) / 3600
+            if last_power >= 0:
+                return last_power * hours, 0.0
+            return 0.0, -last_power * hours
+
+        if last_power >= 0 and power >= 0:
+            return (last_power + power) / 2 * hours, 0.0
+        if last_power <= 0 and power <= 0:
+            return 0.0, -(last_power + power) / 2 * hours
+
+        # Sign change: two triangles meeting at the zero crossing
+        crossing = last_power / (last_power - power)
+        first = last_power * crossing * hours / 2
+        second = power * (1 - crossing) * hours / 2
+        if first > 0:
+            return first, -second
+        return second, -first
+
+    def interrupt(self) -> None:
+        """Forget the last sample; the next one starts a new interval."""
+        self.last_time = None
+        self.last_power = None
+
+    def restart(self, timestamp: float) -> None:
+        """Start integrating at timestamp, from the last power if recent."""
+        if self.last_time is not None and timestamp - self.last_time <= self.max_gap:
+            self.last_time = max(self.last_time, timestamp)
+        else:
+            self.last_time = None
+            self.last_power = None
+
+
+class EnergySessionTracker:
+    """Integrate charge and drive energy per session from the power topics.
+
+    This is the one charge session detector of the client: the charge
+    tracker follows its sessions (add_session_listener) and reads the
+    charge energy from it, so both agree on where a session starts and ends.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config: Dict[str, Any],
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the tracker."""
+        self.hass = hass
+        self._clock = clock
+        self._client_id = config.get(CONF_CLIENT_ID)
+        self._config_entry_id = config.get(CONF_CONFIG_ENTRY_ID)
+        self._vehicle_id = config.get(CONF_VEHICLE_ID, "unknown")
+        self._add_entities_signal = get_add_entities_signal(
+            self._config_entry_id, "sensor"
+        )
+
+        # None until the first flag arrives; only an off -> on transition
+        # starts a new session, so a restart mid-session continues the
+        # restored counter
+        self.sessions: Dict[str, Optional[bool]] = {"charge": None, "drive": None}
+        self.charge_state: Optional[str] = None
+        self._session_listeners: List[Callable[[str, bool], None]] = []
+        self.energy: Dict[str, float] = {key: 0.0 for key in ENERGY_SENSOR_TYPES}
+        self.charge_integrator = TrapezoidIntegrator()
+        self.drive_integrator = TrapezoidIntegrator()
+        self._published: Dict[str, float] = dict(self.energy)
+        self._sensor_ids: Dict[str, str] = {}
+        self._sensors_created = False
+
+        # Topic -> handler cache, as in the trip tracker
+        self._topic_handlers: Dict[str, Optional[Callable[[Any], None]]] = {}
+        self._metric_handlers: Dict[str, Callable[[Any], None]] = {
+            METRIC_CHARGING: self._handle_charging,
+            METRIC_CHARGE_STATE: self._handle_charge_state,
+            METRIC_VEHICLE_ON: self._handle_vehicle_on,
+            METRIC_CHARGE_POWER: self._handle_charge_power,
+            METRIC_BATTERY_POWER: self._handle_battery_power,
+        }
+
+    @callback
+    def process_message(self, topic: str, payload: Any) -> None:
+        """Feed one MQTT message into the integrators."""
+        handler = self._topic_handlers.get(topic, False)
+        if handler is False:
+            handler = self._resolve_handler(topic)
+            self._topic_handlers[topic] = handler
+        if handler is not None:
+            handler(payload)
+
+    def _resolve_handler(self, topic: str) -> Optional[Callable[[Any], None]]:
+        """Map a topic to its metric handler, or None if not relevant."""
+        _, sep, suffix = topic.partition("/metric/")
+        if not sep:
+            return None
+        return self._metric_handlers.get(suffix.replace("/", "."))
+
+    def add_session_listener(self, listener: Callable[[str, bool], None]) -> None:
+        """Register a callback for each session start (True) and end (False)."""
+        self._session_listeners.append(listener)
+
+    def _set_session(
+        self, session: str, active: Optional[bool], integrator: TrapezoidIntegrator
+    ) -> None:
+        """Track a session flag; reset its counters when a session starts.
+
+        Listeners are told after the reset, so a listener sees the counters
+        of the session that starts.
+        """
+        was_active = self.sessions[session]
+        self.sessions[session] = active
+        if active and not was_active:
+            # Integrate from the session start, not from the last sample
+            integrator.restart(self._clock())
+            if was_active is False:
+                for key, description in ENERGY_SENSOR_TYPES.items():
+                    if description["session"] == session:
+                        self.energy[key] = 0.0
+                self._publish()
+                _LOGGER.debug("%s session started for %s", session, self._vehicle_id)
+        if bool(active) != bool(was_active):
+            for listener in self._session_listeners:
+                listener(session, bool(active))
+
+    def _handle_charging(self, payload: Any) -> None:
+        """Start or end a charge session."""
+        self._set_session(
+            "charge",
+            parse_boolean_state(payload, (BOOLEAN_TRUE_STATES, BOOLEAN_FALSE_STATES)),
+            self.charge_integrator,
+        )
+
+    def _handle_charge_state(self, payload: Any) -> None:
+        """Track the charge state; it also starts and ends charge sessions."""
+        state = str(payload).strip().lower()
+        self.charge_state = state
+        if state in CHARGE_ACTIVE_STATES:
+            self._set_session("charge", True, self.charge_integrator)
+        elif state in CHARGE_ENDED_STATES:
+            self._set_session("charge", False, self.charge_integrator)
+
+    def _handle_vehicle_on(self, payload: Any) -> None:
+        """Start or end a drive."""
+        self._set_session(
+            "drive",
+            parse_boolean_state(payload, (BOOLEAN_TRUE_STATES, BOOLEAN_FALSE_STATES)),
+            self.drive_integrator,
+        )
+
+    def _handle_charge_power(self, payload: Any) -> None:
+        """Integrate charger input power (positive while charging)."""
+        power = safe_float(payload)
+        if power is None:
+            return
+        charged, _ = self.charge_integrator.add(self._clock(), power)
+        if self.sessions["charge"] and charged:
+            self.energy["charge"] += charged
+            self._publish()
+
+    def _handle_battery_power(self, payload: Any) -> None:
+        """Integrate battery power: output is drive energy, input recovered."""
+        power = safe_float(payload)
+        if power is None:
+            return
+        used, recovered = self.drive_integrator.add(self._clock(), power)
+        if self.sessions["drive"] and (used or recovered):
+            self.energy["drive"] += used
+            self.energy["drive_recovered"] += recovered
+            self._publish()
+
+    @callback
+    def async_interrupt(self) -> None:
+        """Stop integrating across a disconnect.
+
+        Power samples missed while disconnected are unknown, so the held
+        power is not carried over the outage.
+        """
+        self.charge_integrator.interrupt()
+        self.drive_integrator.interrupt()
+
+    def _publish(self) -> None:
+        """Signal the sensors whose rounded energy changed."""
+        for key, value in self.energy.items():
+            value = round(value, ENERGY_PRECISION)
+            if value == self._published[key]:
+                continue
+            self._published[key] = value
+            unique_id = self._sensor_ids.get(key)
+            if unique_id is not None:
+                async_dispatcher_send(
+                    self.hass, f"{SIGNAL_UPDATE_ENTITY}_{unique_id}", value
+                )
+
+    def get_energy(self, key: str) -> float:
+        """Return the published (rounded) energy of a counter in kWh."""
+        return self._published[key]
+
+    @callback
+    def restore_energy(self, key: str, value: float) -> None:
+        """Continue a counter from its restored sensor state.
+
+        Only applied while nothing has been integrated yet, so a restored
+        value never overwrites live data.
+        """
+        if not self.energy[key] and value > 0:
+            self.energy[key] = value
+            self._published[key] = round(value, ENERGY_PRECISION)
+
+    @callback
+    def async_create_sensors(self) -> None:
+        """Create the session energy sensors once the platforms are loaded."""
+        if self._sensors_created:
+            return
+        self._sensors_created = True
+
+        device_info = get_ovms_device_info(self._client_id, self._vehicle_id)
+        batch = []
+        for key, description in ENERGY_SENSOR_TYPES.items():
+            unique_id = get_namespaced_ovms_unique_id(
+                f"ovms_{self._vehicle_id}_{ENERGY_UNIQUE_ID_MARKER}_{key}",
+                self._config_entry_id,
+            )
+            self._sensor_ids[key] = unique_id
+            sensor = OVMSSessionEnergySensor(
+                self, key, description, unique_id, device_info
+            )
+            batch.append(
+                {
+                    "entity_type": "sensor",
+                    "name": description["name"],
+                    "diagnostic_sensor": sensor,
+                }
+            )
+        async_dispatcher_send(self.hass, self._add_entities_signal, batch)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return a diagnostics snapshot of the session energy."""
+        return {
+            "sessions": dict(self.sessions),
+            "energy_kwh": dict(self._published),
+            "held_gaps": {
+                "charge": self.charge_integrator.gaps,
+                "drive": self.drive_integrator.gaps,
+            },
+        }
+
+
+class OVMSSessionEnergySensor(SensorEntity, RestoreEntity):
+    """Energy of the current (or last) charge session or drive."""
+
+    _attr_has_entity_name = True
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+    _attr_suggested_display_precision = 2
+
+    def __init__(
+        self,
+        tracker: EnergySessionTracker,
+        key: str,
+        description: Dict[str, Any],
+        unique_id: str,
+        device_info: Dict[str, Any],
+    ) -> None:
+        """Initialize the sensor."""
+        self._tracker = tracker
+        self._key = key
+        self._session = description["session"]
+        self._attr_name = description["name"]
+        self._attr_icon = description["icon"]
+        self._attr_unique_id = unique_id
+        self._attr_device_info = device_info
+
+    @property
+    def native_value(self) -> float:
+        """Return the energy integrated in the session so far."""
+        return self._tracker.get_energy(self._key)
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        """Return whether the session is running."""
+        return {"session_active": bool(self._tracker.sessions[self._session])}
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the counter and subscribe to energy updates."""
+        await super().async_added_to_hass()
+
+        if (state := await self.async_get_last_state()) is not None:
+            value = safe_float(state.state)
+            if value is not None:
+                self._tracker.restore_energy(self._key, value)
+
+        @callback
+        def update_state(_value: float) -> None:
+            """Refresh from the tracker's energy."""
+            self.async_write_ha_state()
+
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                f"{SIGNAL_UPDATE_ENTITY}_{self.unique_id}",
+                update_state,
+            )
+        )
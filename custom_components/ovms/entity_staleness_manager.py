@@ -1,15 +1,16 @@
 """Entity staleness manager for OVMS integration."""
 
-import asyncio
+import heapq
 import logging
-from typing import Dict, Optional, List, Any
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_registry import RegistryEntryHider
 from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.event import async_call_later
-from homeassistant.const import EntityCategory
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN, EntityCategory
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.util import dt as dt_util
@@ -24,12 +25,11 @@ from .const import (
     DEFAULT_ENTITY_STALENESS_MANAGEMENT,
     DEFAULT_DELETE_STALE_HISTORY,
     LOGGER_NAME,
-    STALENESS_INITIAL_CACHE_DELAY,
+    NON_TOPIC_UNIQUE_ID_MARKERS,
     STALENESS_DIAGNOSTIC_SENSOR_DELAY,
-    STALENESS_CLEANUP_START_DELAY,
-    STALENESS_CLEANUP_INTERVAL,
-    STALENESS_FIRST_RUN_EXTRA_WAIT,
+    STALENESS_ENTITY_DOMAINS,
     STALENESS_MAX_DISPLAY_ENTITIES,
+    STALENESS_SEED_DELAY,
     STALENESS_STATUS_ENTITY_NAME,
     STALENESS_UNIQUE_ID_MARKER,
     get_add_entities_signal,
@@ -48,6 +48,8 @@ class OVMSStalenessStatusSensor(SensorEntity, RestoreEntity):
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_unit_of_measurement = "entities"
     _attr_entity_registry_enabled_default = True
+    # Pushed by the staleness manager whenever the stale set changes
+    _attr_should_poll = False
 
     def __init__(
         self,
@@ -106,27 +108,52 @@ class OVMSStalenessStatusSensor(SensorEntity, RestoreEntity):
 
 
 class EntityStalenessManager:
-    """Manager for cleaning up stale entities based on Home Assistant's built-in availability."""
+    """Manager for hiding or removing entities that stay unavailable.
+
+    Staleness is driven by the ingest path: every update the UpdateDispatcher
+    sends marks its entity as seen, and each tracked entity has one entry in
+    a min-heap of expiry deadlines. A single timer fires at the earliest
+    deadline; entities seen since then are pushed back with their new
+    deadline. OVMS only publishes on change, so a quiet entity is not stale
+    by itself: only those that are also unavailable/unknown (or orphaned)
+    for the whole threshold are hidden or removed, the others are checked
+    again one threshold later. Work therefore scales with changes, not with
+    the entity count.
+    """
 
     def __init__(self, hass: HomeAssistant, config: Dict[str, Any]) -> None:
         """Initialize the staleness manager."""
         self.hass = hass
         self.config = config
-        self._cleanup_task: Optional[asyncio.Task] = None
         self._shutting_down = False
         self._client_id = config.get(CONF_CLIENT_ID)
         self._config_entry_id = config.get(CONF_CONFIG_ENTRY_ID)
         self._vehicle_id = config.get(CONF_VEHICLE_ID, "unknown")
-        self._add_entities_signal = get_add_entities_signal(self._config_entry_id)
+        self._add_entities_signal = get_add_entities_signal(
+            self._config_entry_id, "sensor"
+        )
+
+        # Last update time (epoch seconds) per unique_id
+        self._last_seen: Dict[str, float] = {}
+        # (deadline, unique_id); one entry per tracked, non-stale entity.
+        # Entries are not updated on every sighting: an expired entry whose
+        # entity was seen since is pushed back with its new deadline.
+        self._deadlines: List[Tuple[float, str]] = []
+        # unique_id -> display label of entities past the threshold
+        self._stale: Dict[str, str] = {}
+        self._cancel_expiry_timer: Optional[Callable[[], None]] = None
+        self._cancel_seed_timer: Optional[Callable[[], None]] = None
+        self._sensor: Optional[OVMSStalenessStatusSensor] = None
 
         # Simple cache - gets populated immediately when enabled
         self._cache = {
             "count": 0,
             "pending_entities": "Waiting...",
+            "tracked_entities": 0,
             "staleness_enabled": False,
             "staleness_threshold_hours": 0,
             "action": "hide",
-            "last_check": "Not yet checked",
+            "last_change": "No changes yet",
             "errors": 0,  # Error counter for debugging
             "last_error": None,  # Last error message
         }
@@ -153,30 +180,25 @@ class EntityStalenessManager:
         if self._enabled:
             _LOGGER.info("Staleness threshold: %dh", self._staleness_hours)
 
-        # Schedule background tasks (non-blocking) - only if enabled
+        # Schedule background work (non-blocking) - only if enabled
         if self._enabled:
-            async_call_later(
-                self.hass,
-                STALENESS_CLEANUP_START_DELAY,
-                lambda _: self._schedule_cleanup_task(),
-            )
+            self._schedule_seed()
             async_call_later(
                 self.hass,
                 STALENESS_DIAGNOSTIC_SENSOR_DELAY,
                 lambda _: self._schedule_diagnostic_sensor(),
             )
-            # Do an immediate cache update (non-blocking) to show current status right away
-            async_call_later(
-                self.hass,
-                STALENESS_INITIAL_CACHE_DELAY,
-                lambda _: self._update_cache_immediately(),
-            )
 
-    def _schedule_cleanup_task(self) -> None:
-        """Schedule the cleanup task to start (called by async_call_later)."""
-        if not self._shutting_down and self._enabled:
-            # Use call_soon_threadsafe to get back to the event loop
-            self.hass.loop.call_soon_threadsafe(self._start_cleanup_task)
+    @property
+    def _threshold(self) -> float:
+        """Return the staleness threshold in seconds."""
+        return self._staleness_hours * 3600
+
+    def _schedule_seed(self) -> None:
+        """Schedule seeding the heap from the entity registry."""
+        self._cancel_seed_timer = async_call_later(
+            self.hass, STALENESS_SEED_DELAY, self._seed_from_registry
+        )
 
     def _schedule_diagnostic_sensor(self) -> None:
         """Schedule diagnostic sensor creation (called by async_call_later)."""
@@ -188,12 +210,6 @@ class EntityStalenessManager:
                 )
             )
 
-    def _update_cache_immediately(self) -> None:
-        """Update cache immediately on startup to show current status (called by async_call_later)."""
-        if not self._shutting_down and self._enabled:
-            # Safe to call from thread since it's synchronous
-            self.get_staleness_info()
-
     async def _async_create_diagnostic_sensor(self) -> None:
         """Create a simple diagnostic sensor asynchronously."""
         # No additional delay needed here since call_later already handled the timing
@@ -213,30 +229,16 @@ class EntityStalenessManager:
             ),
             device_info,
         )
+        self._sensor = sensor
 
         sensor_data = {"entity_type": "sensor", "diagnostic_sensor": sensor}
 
         # Send to sensor platform
-        async_dispatcher_send(self.hass, self._add_entities_signal, sensor_data)
+        async_dispatcher_send(self.hass, self._add_entities_signal, [sensor_data])
         _LOGGER.debug("Diagnostic sensor creation signal sent")
 
-    def _start_cleanup_task(self) -> None:
-        """Start the cleanup task."""
-        if self._cleanup_task is None or self._cleanup_task.done():
-            # Use a background task: this loop runs for the lifetime of the
-            # integration and never completes on its own. A normal
-            # async_create_task is tracked by HA's bootstrap, so the forever
-            # loop blocks "wrapping up the start up phase" (see issue #254).
-            # Background tasks are exempt from that wait and are auto-cancelled
-            # on shutdown.
-            self._cleanup_task = self.hass.async_create_background_task(
-                self._async_cleanup_stale_entities(),
-                name=f"ovms_staleness_cleanup_{self._vehicle_id}",
-            )
-            _LOGGER.debug("Started entity staleness cleanup task")
-
     def update_config(self, config: Dict[str, Any]) -> None:
-        """Update configuration and restart cleanup task if needed."""
+        """Update configuration and restart tracking if needed."""
         old_enabled = self._enabled
 
         self._staleness_hours = config.get(
@@ -252,7 +254,6 @@ class EntityStalenessManager:
             {
                 "staleness_enabled": self._enabled,
                 "action": "delete" if self._delete_history else "hide",
-                "pending_entities": "Config updated - waiting...",
             }
         )
 
@@ -266,264 +267,269 @@ class EntityStalenessManager:
             self._cache["staleness_threshold_hours"] = "disabled"
             _LOGGER.info("Staleness config updated: enabled=False")
 
-        # Restart cleanup task if needed
-        if old_enabled != self._enabled:
-            if self._cleanup_task and not self._cleanup_task.done():
-                self._cleanup_task.cancel()
-            if self._enabled:
-                self._start_cleanup_task()
+        # Deadlines depend on the threshold, so rebuild them
+        self._cancel_timers()
+        self._deadlines = []
+        self._stale.clear()
+        if self._enabled:
+            self._deadlines = [
+                (last_seen + self._threshold, unique_id)
+                for unique_id, last_seen in self._last_seen.items()
+            ]
+            heapq.heapify(self._deadlines)
+            self._schedule_expiry()
+            if not old_enabled:
+                self._schedule_seed()
+        else:
+            self._last_seen.clear()
+        self._update_cache()
 
-    def get_staleness_info(self) -> Dict[str, Any]:
-        """Update cache with current staleness information (called from background task)."""
-        # Don't process if staleness management is disabled
+    @callback
+    def async_mark_seen(self, unique_id: str) -> None:
+        """Record an update for an entity (hot path, O(1) unless it revives)."""
         if not self._enabled:
-            self._cache.update(
-                {
-                    "count": 0,
-                    "pending_entities": "Staleness management is disabled",
-                    "last_check": dt_util.utcnow().isoformat(),
-                }
-            )
-            return self._cache
+            return
+        now = time.time()
+        previous = self._last_seen.get(unique_id)
+        self._last_seen[unique_id] = now
+        if previous is not None and unique_id not in self._stale:
+            return
+
+        # New or revived entity: (re)enter the heap. Either may have been
+        # hidden by this manager, in this run or before a restart.
+        heapq.heappush(self._deadlines, (now + self._threshold, unique_id))
+        self._schedule_expiry()
+        self._async_unhide_entity(unique_id)
+        if self._stale.pop(unique_id, None) is not None:
+            _LOGGER.debug("Stale entity %s is updating again", unique_id)
+            self._update_cache()
+        elif previous is None:
+            self._cache["tracked_entities"] = len(self._last_seen)
+
+    @callback
+    def _seed_from_registry(self, _now=None) -> None:
+        """Start the countdown for registry entities that have not been seen.
+
+        Runs once per enable: entities left over from earlier runs whose topic
+        is no longer published are never seen by the dispatcher, so they would
+        otherwise never expire.
+        """
+        self._cancel_seed_timer = None
+        if self._shutting_down or not self._enabled or not self._config_entry_id:
+            return
+
+        now = time.time()
+        entity_registry = er.async_get(self.hass)
+        seeded = 0
+        for entity_entry in er.async_entries_for_config_entry(
+            entity_registry, self._config_entry_id
+        ):
+            unique_id = entity_entry.unique_id
+            if (
+                entity_entry.platform != DOMAIN
+                or not unique_id
+                or unique_id in self._last_seen
+                or self._is_exempt(unique_id)
+            ):
+                continue
+            self._last_seen[unique_id] = now
+            heapq.heappush(self._deadlines, (now + self._threshold, unique_id))
+            seeded += 1
+
+        _LOGGER.debug("Staleness tracking seeded %d registry entities", seeded)
+        self._schedule_expiry()
+        self._update_cache()
+
+    @staticmethod
+    def _is_exempt(unique_id: str) -> bool:
+        """Return True for entities that are not fed by topic updates."""
+        return any(marker in unique_id for marker in NON_TOPIC_UNIQUE_ID_MARKERS)
+
+    @callback
+    def _schedule_expiry(self) -> None:
+        """Arm the timer for the earliest deadline, if not already armed."""
+        if (
+            self._cancel_expiry_timer is not None
+            or not self._deadlines
+            or self._shutting_down
+        ):
+            return
+        delay = max(0.0, self._deadlines[0][0] - time.time())
+        self._cancel_expiry_timer = async_call_later(
+            self.hass, delay, self._async_process_expired
+        )
 
+    @callback
+    def _async_process_expired(self, _now=None) -> None:
+        """Handle deadlines that have passed."""
+        self._cancel_expiry_timer = None
+        if self._shutting_down or not self._enabled:
+            return
+
+        now = time.time()
+        expired = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _deadline, unique_id = heapq.heappop(self._deadlines)
+            last_seen = self._last_seen.get(unique_id)
+            if last_seen is None or unique_id in self._stale:
+                continue
+            deadline = last_seen + self._threshold
+            if deadline > now:
+                # Seen since the entry was pushed
+                heapq.heappush(self._deadlines, (deadline, unique_id))
+                continue
+            expired.append((unique_id, last_seen))
+
+        stale = [
+            (unique_id, last_seen)
+            for unique_id, last_seen in expired
+            if self._is_unavailable(unique_id, now)
+        ]
+        if stale:
+            self.hass.async_create_task(self._async_handle_stale(stale))
+        self._schedule_expiry()
+
+    def _is_unavailable(self, unique_id: str, now: float) -> bool:
+        """Return True if a quiet entity has been unavailable for the threshold.
+
+        Entities with a valid state (static metrics, a parked car) and ones
+        that only just became unavailable are re-armed instead. Entities
+        already gone from the registry are forgotten.
+        """
+        entity_id = self._resolve_entity_id(unique_id)
+        if entity_id is None:
+            self._last_seen.pop(unique_id, None)
+            return False
+
+        state = self.hass.states.get(entity_id)
+        if state is None:
+            # No backing platform entity (e.g. the topic was blacklisted)
+            return True
+        if state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            deadline = state.last_changed.timestamp() + self._threshold
+            if deadline <= now:
+                return True
+        else:
+            deadline = now + self._threshold
+        heapq.heappush(self._deadlines, (deadline, unique_id))
+        return False
+
+    def _resolve_entity_id(self, unique_id: str) -> Optional[str]:
+        """Map a unique_id to its entity_id."""
+        entity_registry = er.async_get(self.hass)
+        for domain in STALENESS_ENTITY_DOMAINS:
+            entity_id = entity_registry.async_get_entity_id(domain, DOMAIN, unique_id)
+            if entity_id:
+                return entity_id
+        return None
+
+    async def _async_handle_stale(self, expired: List[Tuple[str, float]]) -> None:
+        """Hide or remove entities that crossed the threshold."""
         try:
             entity_registry = er.async_get(self.hass)
-            current_time = dt_util.utcnow()
-            stale_entities = []
-
-            # Use HA's built-in API to get entities for this config entry
-            if self._config_entry_id:
-                registry_entries = er.async_entries_for_config_entry(
-                    entity_registry, self._config_entry_id
-                )
-            else:
-                registry_entries = []
-
-            for entity_entry in registry_entries:
-                if entity_entry.platform != DOMAIN:
-                    continue
-
-                # Skip the staleness diagnostic sensor itself
-                if (
-                    entity_entry.unique_id
-                    and STALENESS_UNIQUE_ID_MARKER in entity_entry.unique_id
-                ):
+            entity_ids = []
+            for unique_id, last_seen in expired:
+                entity_id = self._resolve_entity_id(unique_id)
+                if entity_id is None:
+                    # Already removed from the registry; stop tracking it
+                    self._last_seen.pop(unique_id, None)
                     continue
+                entry = entity_registry.async_get(entity_id)
+                name = (entry.name if entry and entry.name else None) or entity_id
+                last_seen_str = dt_util.utc_from_timestamp(last_seen).isoformat()
+                self._stale[unique_id] = f"{name} (last update {last_seen_str})"
+                entity_ids.append(entity_id)
+                _LOGGER.debug(
+                    "%s has been unavailable for more than %dh",
+                    entity_id,
+                    self._staleness_hours,
+                )
 
-                state = self.hass.states.get(entity_entry.entity_id)
-
-                # Entity in registry with no state object = orphaned (no
-                # backing platform entity, e.g. topic was blacklisted).
-                # These will never recover on their own.
-                if state is None:
-                    friendly_name = (
-                        entity_entry.name
-                        if entity_entry.name
-                        else entity_entry.entity_id
+            if entity_ids:
+                if self._delete_history:
+                    _LOGGER.info(
+                        "Found %d stale OVMS entities (unavailable for >%d hours), removing them completely",
+                        len(entity_ids),
+                        self._staleness_hours,
                     )
-                    if len(stale_entities) < STALENESS_MAX_DISPLAY_ENTITIES:
-                        stale_entities.append(f"{friendly_name} (eligible for removal)")
-                    continue
-
-                if (
-                    state.state in ["unavailable", "unknown"]
-                    and hasattr(state, "last_updated")
-                    and state.last_updated
-                ):
-                    hours_stale = (
-                        current_time - state.last_updated
-                    ).total_seconds() / 3600
-
-                    friendly_name = (
-                        entity_entry.name
-                        if entity_entry.name
-                        else entity_entry.entity_id
+                    await self._async_remove_entities(entity_ids)
+                    for unique_id, _last_seen in expired:
+                        self._last_seen.pop(unique_id, None)
+                        self._stale.pop(unique_id, None)
+                else:
+                    _LOGGER.info(
+                        "Found %d stale OVMS entities (unavailable for >%d hours), hiding them from UI",
+                        len(entity_ids),
+                        self._staleness_hours,
                     )
-
-                    if len(stale_entities) < STALENESS_MAX_DISPLAY_ENTITIES:
-                        if hours_stale > self._staleness_hours:
-                            stale_entities.append(
-                                f"{friendly_name} (eligible for removal)"
-                            )
-                        else:
-                            remaining = round(self._staleness_hours - hours_stale, 1)
-                            stale_entities.append(f"{friendly_name} ({remaining}h)")
-
-            # Update cache
+                    await self._async_hide_entities(entity_ids)
+        except Exception as ex:
+            _LOGGER.exception("Error handling stale entities: %s", ex)
+            self._cache["errors"] = self._cache.get("errors", 0) + 1
+            self._cache["last_error"] = str(ex)
+        self._update_cache()
+
+    @callback
+    def _async_unhide_entity(self, unique_id: str) -> None:
+        """Show an entity again that was hidden for being stale.
+
+        Stale entities are hidden by INTEGRATION, which survives restarts
+        and keeps them apart from entities the user hid, which stay hidden.
+        """
+        entity_id = self._resolve_entity_id(unique_id)
+        if entity_id is None:
+            return
+        entity_registry = er.async_get(self.hass)
+        entry = entity_registry.async_get(entity_id)
+        if entry and entry.hidden_by == RegistryEntryHider.INTEGRATION:
+            entity_registry.async_update_entity(entity_id, hidden_by=None)
+            _LOGGER.info("Unhid %s, it is updating again", entity_id)
+
+    @callback
+    def _update_cache(self) -> None:
+        """Refresh the diagnostic cache and push it to the sensor."""
+        if not self._enabled:
+            self._cache.update(
+                {
+                    "count": 0,
+                    "tracked_entities": 0,
+                    "pending_entities": "Staleness management is disabled",
+                }
+            )
+        else:
+            labels = list(self._stale.values())[:STALENESS_MAX_DISPLAY_ENTITIES]
             self._cache.update(
                 {
-                    "count": len(stale_entities),
+                    "count": len(self._stale),
+                    "tracked_entities": len(self._last_seen),
                     "pending_entities": (
-                        "\n".join(stale_entities)
-                        if stale_entities
-                        else "No stale entities"
+                        "\n".join(labels) if labels else "No stale entities"
                     ),
-                    "last_check": current_time.isoformat(),
                 }
             )
-
-            if len(stale_entities) >= STALENESS_MAX_DISPLAY_ENTITIES:
+            if len(self._stale) > STALENESS_MAX_DISPLAY_ENTITIES:
                 self._cache["entities_note"] = (
                     f"Showing first {STALENESS_MAX_DISPLAY_ENTITIES} entities"
                 )
             else:
                 self._cache.pop("entities_note", None)
+        self._cache["last_change"] = dt_util.utcnow().isoformat()
 
-            return self._cache
+        if self._sensor is not None and self._sensor.hass is not None:
+            self._sensor.async_write_ha_state()
 
-        except Exception as ex:
-            _LOGGER.exception("Error getting staleness info: %s", ex)
-            self._cache.update(
-                {
-                    "count": 0,
-                    "pending_entities": f"Error: {str(ex)}",
-                    "last_check": dt_util.utcnow().isoformat(),
-                    "errors": self._cache.get("errors", 0) + 1,
-                    "last_error": str(ex),
-                }
-            )
-            return self._cache
-
-    async def _async_cleanup_stale_entities(self) -> None:
-        """Periodically clean up entities that Home Assistant marks as unavailable."""
-        _LOGGER.debug("Entity staleness cleanup task started")
-
-        # Since call_later already handled the initial delay, we can start with a cleanup
-        # Give a bit more time for HA to be fully ready, but don't block initialization
-        try:
-            if self._enabled:
-                _LOGGER.debug(
-                    "Waiting additional %d seconds for HA to fully stabilize before first cleanup",
-                    STALENESS_FIRST_RUN_EXTRA_WAIT,
-                )
-                await asyncio.sleep(STALENESS_FIRST_RUN_EXTRA_WAIT)
-                if not self._shutting_down:
-                    _LOGGER.debug("Running initial staleness cleanup")
-                    await self._cleanup_unavailable_entities()
-                    # Update cache after initial cleanup
-                    self.get_staleness_info()
-        except Exception as ex:  # pylint: disable=broad-except
-            _LOGGER.exception("Error in initial staleness cleanup: %s", ex)
-
-        while not self._shutting_down:
-            try:
-                # Wait between cleanups
-                await asyncio.sleep(STALENESS_CLEANUP_INTERVAL)
-
-                if not self._enabled:
-                    continue
-
-                await self._cleanup_unavailable_entities()
-                # Update cache after cleanup
-                self.get_staleness_info()
-
-            except asyncio.CancelledError:
-                _LOGGER.debug("Entity staleness cleanup task cancelled")
-                break
-            except Exception as ex:  # pylint: disable=broad-except
-                _LOGGER.exception("Error in entity staleness cleanup: %s", ex)
-                # Wait a bit before retrying to avoid tight loop
-                await asyncio.sleep(300)  # 5 minutes
-
-        _LOGGER.debug("Entity staleness cleanup task stopped")
-
-    async def _cleanup_unavailable_entities(self) -> None:
-        """Clean up entities that Home Assistant has marked as unavailable."""
-        try:
-            entity_registry = er.async_get(self.hass)
-            unavailable_entities = []
-            current_time = dt_util.utcnow()
-
-            # Use HA's built-in API to get entities for this config entry
-            if self._config_entry_id:
-                registry_entries = er.async_entries_for_config_entry(
-                    entity_registry, self._config_entry_id
-                )
-            else:
-                registry_entries = []
-
-            for entity_entry in registry_entries:
-                if entity_entry.platform != DOMAIN:
-                    continue
-
-                # Never clean up the staleness diagnostic sensor itself
-                if (
-                    entity_entry.unique_id
-                    and STALENESS_UNIQUE_ID_MARKER in entity_entry.unique_id
-                ):
-                    continue
-
-                state = self.hass.states.get(entity_entry.entity_id)
-
-                # Entity in registry with no state object = orphaned (no
-                # backing platform entity).  Immediately eligible for cleanup.
-                if state is None:
-                    unavailable_entities.append(
-                        (entity_entry.entity_id, self._staleness_hours + 1, None)
-                    )
-                    continue
-
-                if state.state in ["unavailable", "unknown"]:
-                    if hasattr(state, "last_updated") and state.last_updated:
-                        hours_unavailable = (
-                            current_time - state.last_updated
-                        ).total_seconds() / 3600
-
-                        if hours_unavailable > self._staleness_hours:
-                            unavailable_entities.append(
-                                (
-                                    entity_entry.entity_id,
-                                    hours_unavailable,
-                                    state.last_updated,
-                                )
-                            )
-
-            if unavailable_entities:
-                entity_ids = [entity_id for entity_id, _, _ in unavailable_entities]
-
-                if self._delete_history:
-                    _LOGGER.info(
-                        "Found %d unavailable OVMS entities (unavailable for >%d hours), removing them completely",
-                        len(unavailable_entities),
-                        self._staleness_hours,
-                    )
-                    # Log details for debugging
-                    for entity_id, hours, last_updated in unavailable_entities:
-                        updated_str = (
-                            last_updated.isoformat()
-                            if last_updated
-                            else "orphaned (no state)"
-                        )
-                        _LOGGER.debug(
-                            "Removing %s: last updated %s (%.1f hours ago)",
-                            entity_id,
-                            updated_str,
-                            hours,
-                        )
-                    await self._async_remove_entities(entity_ids)
-                else:
-                    _LOGGER.info(
-                        "Found %d unavailable OVMS entities (unavailable for >%d hours), hiding them from UI",
-                        len(unavailable_entities),
-                        self._staleness_hours,
-                    )
-                    # Log details for debugging
-                    for entity_id, hours, last_updated in unavailable_entities:
-                        updated_str = (
-                            last_updated.isoformat()
-                            if last_updated
-                            else "orphaned (no state)"
-                        )
-                        _LOGGER.debug(
-                            "Hiding %s: last updated %s (%.1f hours ago)",
-                            entity_id,
-                            updated_str,
-                            hours,
-                        )
-                    await self._async_hide_entities(entity_ids)
-
-        except Exception as ex:
-            _LOGGER.exception("Error cleaning up unavailable entities: %s", ex)
+    def get_staleness_info(self) -> Dict[str, Any]:
+        """Return the current staleness information."""
+        return self._cache
+
+    def _cancel_timers(self) -> None:
+        """Cancel pending seed and expiry timers."""
+        if self._cancel_expiry_timer is not None:
+            self._cancel_expiry_timer()
+            self._cancel_expiry_timer = None
+        if self._cancel_seed_timer is not None:
+            self._cancel_seed_timer()
+            self._cancel_seed_timer = None
 
     async def _async_hide_entities(self, entity_ids: List[str]) -> None:
         """Hide entities from UI while preserving their history."""
@@ -536,12 +542,10 @@ class EntityStalenessManager:
                     entity_entry = entity_registry.async_get(entity_id)
                     if entity_entry and not entity_entry.hidden_by:
                         entity_registry.async_update_entity(
-                            entity_id, hidden_by=RegistryEntryHider.USER
+                            entity_id, hidden_by=RegistryEntryHider.INTEGRATION
                         )
                         hidden_count += 1
-                        _LOGGER.debug(
-                            "Hidden unavailable entity from UI: %s", entity_id
-                        )
+                        _LOGGER.debug("Hidden stale entity from UI: %s", entity_id)
 
                     elif entity_entry and entity_entry.hidden_by:
                         _LOGGER.debug("Entity %s already hidden", entity_id)
@@ -553,7 +557,7 @@ class EntityStalenessManager:
 
             if hidden_count > 0:
                 _LOGGER.info(
-                    "Successfully hidden %d unavailable entities from UI", hidden_count
+                    "Successfully hidden %d stale entities from UI", hidden_count
                 )
 
         except Exception as ex:
@@ -571,9 +575,7 @@ class EntityStalenessManager:
                     if entity_entry:
                         entity_registry.async_remove(entity_id)
                         removed_count += 1
-                        _LOGGER.debug(
-                            "Permanently removed unavailable entity: %s", entity_id
-                        )
+                        _LOGGER.debug("Permanently removed stale entity: %s", entity_id)
                     else:
                         _LOGGER.debug("Entity %s not found in registry", entity_id)
 
@@ -582,7 +584,7 @@ class EntityStalenessManager:
 
             if removed_count > 0:
                 _LOGGER.info(
-                    "Successfully removed %d unavailable entities completely",
+                    "Successfully removed %d stale entities completely",
                     removed_count,
                 )
 
@@ -593,12 +595,6 @@ class EntityStalenessManager:
         """Shutdown the staleness manager."""
         _LOGGER.debug("Shutting down entity staleness manager")
         self._shutting_down = True
-
-        if self._cleanup_task and not self._cleanup_task.done():
-            self._cleanup_task.cancel()
-            try:
-                await self._cleanup_task
-            except asyncio.CancelledError:
-                pass
+        self._cancel_timers()
 
         _LOGGER.debug("Entity staleness manager shut down complete")
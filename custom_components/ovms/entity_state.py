@@ -1,10 +1,10 @@
 """State parsing helpers for OVMS entities."""
 
-import json
 from collections.abc import Iterable
 from typing import TypeAlias
 
-from .const import truncate_state_value
+from .const import MAX_STATE_LENGTH, truncate_state_value
+from .payload import NOT_JSON, DecodedPayload, decode_payload
 
 StateValues: TypeAlias = Iterable[str]
 StatePair: TypeAlias = tuple[StateValues, StateValues]
@@ -21,25 +21,34 @@ SWITCH_TRUE_STATES = BOOLEAN_TRUE_STATES | frozenset(("enabled", "active"))
 SWITCH_FALSE_STATES = BOOLEAN_FALSE_STATES | frozenset(("disabled", "inactive"))
 
 
+def _decode_truncated(value: object) -> DecodedPayload:
+    """Decode a payload, truncated first when it exceeds the state length.
+
+    value is a raw payload or a DecodedPayload. Payloads within the state
+    length, i.e. all real boolean states, keep their shared decoding.
+    """
+    payload = decode_payload(value)
+    if isinstance(payload.raw, str) and len(payload.raw) > MAX_STATE_LENGTH:
+        payload = decode_payload(truncate_state_value(payload.raw))
+    return payload
+
+
 def normalize_state_value(value: object) -> object:
     """Normalize a payload value for boolean parsing."""
-    if isinstance(value, str):
-        truncated_value = truncate_state_value(value)
-        value = truncated_value if truncated_value is not None else value
-
-        try:
-            data = json.loads(value)
-        except (TypeError, ValueError, json.JSONDecodeError):
-            return value
+    payload = _decode_truncated(value)
+    if not isinstance(payload.raw, str):
+        return payload.raw
 
-        if isinstance(data, dict):
-            for key in ("state", "value", "status"):
-                if key in data:
-                    return data[key]
+    data = payload.json
+    if data is NOT_JSON:
+        return payload.raw
 
-        return data
+    if isinstance(data, dict):
+        for key in ("state", "value", "status"):
+            if key in data:
+                return data[key]
 
-    return value
+    return data
 
 
 def is_boolean_state(value: object, states: StatePair) -> bool:
@@ -107,17 +116,11 @@ def parse_boolean_state(value: object, states: StatePair, flip: bool = False) ->
 
 def update_attributes_from_json(payload: object, attributes: dict[str, object]) -> None:
     """Update attributes with additional keys from a JSON payload."""
-    if not isinstance(payload, str):
-        return
-
-    truncated_payload = truncate_state_value(payload)
-    payload = truncated_payload if truncated_payload is not None else payload
-
-    try:
-        json_data = json.loads(payload)
-    except (TypeError, ValueError, json.JSONDecodeError):
+    payload = _decode_truncated(payload)
+    if not isinstance(payload.raw, str):
         return
 
+    json_data = payload.json
     if not isinstance(json_data, dict):
         return
 
@@ -0,0 +1,499 @@
+"""Fleet-level aggregate sensors for OVMS integration."""
+
+import logging
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import PERCENTAGE, UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_VEHICLE_ID,
+    DOMAIN,
+    FLEET_DATA_KEY,
+    FLEET_DEVICE_IDENTIFIER,
+    FLEET_DEVICE_MODEL,
+    FLEET_DEVICE_NAME,
+    FLEET_LOW_SOC,
+    FLEET_UNIQUE_ID_MARKER,
+    LOGGER_NAME,
+    OVMS_DEVICE_MANUFACTURER,
+    SIGNAL_UPDATE_ENTITY,
+    get_add_entities_signal,
+)
+from .entity_state import (
+    BOOLEAN_FALSE_STATES,
+    BOOLEAN_TRUE_STATES,
+    parse_boolean_state,
+)
+from .trip_tracker import counter_delta
+from .utils import safe_float
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Metric paths the fleet aggregates consume
+METRIC_SOC = "v.b.soc"
+METRIC_CHARGING = "v.c.charging"
+METRIC_PILOT = "v.c.pilot"
+METRIC_KWH = "v.c.kwh"
+
+# Charged energy is rounded to Wh, like the session energy sensors
+FLEET_ENERGY_PRECISION = 3
+
+# Fleet sensors: aggregate key -> sensor description.
+FLEET_SENSOR_TYPES = {
+    "vehicles": {
+        "name": "Vehicles",
+        "icon": "mdi:car-multiple",
+        "device_class": None,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "unit": None,
+    },
+    "charging": {
+        "name": "Vehicles Charging",
+        "icon": "mdi:ev-station",
+        "device_class": None,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "unit": None,
+    },
+    "plugged_in": {
+        "name": "Vehicles Plugged In",
+        "icon": "mdi:ev-plug-type2",
+        "device_class": None,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "unit": None,
+    },
+    "low_soc": {
+        "name": "Vehicles Low SOC",
+        "icon": "mdi:battery-alert",
+        "device_class": None,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "unit": None,
+    },
+    "average_soc": {
+        "name": "Average SOC",
+        "icon": "mdi:battery-50",
+        "device_class": SensorDeviceClass.BATTERY,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "unit": PERCENTAGE,
+    },
+    "charged_today": {
+        "name": "Energy Charged Today",
+        "icon": "mdi:lightning-bolt",
+        "device_class": SensorDeviceClass.ENERGY,
+        "state_class": SensorStateClass.TOTAL_INCREASING,
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+    },
+}
+
+# Aggregate key -> the vehicle set it counts. Sets hold config entry IDs:
+# several entries may share a vehicle ID, and each is a vehicle of its own.
+FLEET_SET_KEYS = ("charging", "plugged_in", "low_soc")
+
+
+def get_fleet_device_info() -> Dict[str, Any]:
+    """Build the device info of the fleet device."""
+    return {
+        "identifiers": {(DOMAIN, FLEET_DEVICE_IDENTIFIER)},
+        "name": FLEET_DEVICE_NAME,
+        "manufacturer": OVMS_DEVICE_MANUFACTURER,
+        "model": FLEET_DEVICE_MODEL,
+    }
+
+
+class FleetMember:
+    """One vehicle's contribution to the fleet aggregates."""
+
+    def __init__(
+        self, fleet: "FleetAggregator", entry_id: str, vehicle_id: str
+    ) -> None:
+        """Initialize the member without readings."""
+        self.fleet = fleet
+        self.entry_id = entry_id
+        self.vehicle_id = vehicle_id
+        self.soc: Optional[float] = None
+        self.kwh: Optional[float] = None
+        self.charging = False
+        self.plugged_in = False
+
+        # Topic -> handler cache, as in the trip tracker
+        self._topic_handlers: Dict[str, Optional[Callable[[Any], None]]] = {}
+        self._metric_handlers: Dict[str, Callable[[Any], None]] = {
+            METRIC_SOC: self._handle_soc,
+            METRIC_CHARGING: self._handle_charging,
+            METRIC_PILOT: self._handle_pilot,
+            METRIC_KWH: self._handle_kwh,
+        }
+
+    @callback
+    def process_message(self, topic: str, payload: Any) -> None:
+        """Feed one MQTT message of this vehicle into the fleet aggregates."""
+        handler = self._topic_handlers.get(topic, False)
+        if handler is False:
+            handler = self._resolve_handler(topic)
+            self._topic_handlers[topic] = handler
+        if handler is not None:
+            handler(payload)
+
+    def _resolve_handler(self, topic: str) -> Optional[Callable[[Any], None]]:
+        """Map a topic to its metric handler, or None if not aggregated."""
+        _, sep, suffix = topic.partition("/metric/")
+        if not sep:
+            return None
+        return self._metric_handlers.get(suffix.replace("/", "."))
+
+    def _handle_soc(self, payload: Any) -> None:
+        """Move this vehicle's SOC within the fleet SOC aggregates."""
+        soc = safe_float(payload)
+        if soc is None or soc == self.soc:
+            return
+        previous = self.soc
+        self.soc = soc
+        self.fleet.update_soc(self.entry_id, previous, soc)
+
+    def _handle_charging(self, payload: Any) -> None:
+        """Track membership of the charging set."""
+        charging = bool(
+            parse_boolean_state(payload, (BOOLEAN_TRUE_STATES, BOOLEAN_FALSE_STATES))
+        )
+        if charging != self.charging:
+            self.charging = charging
+            self.fleet.update_set("charging", self.entry_id, charging)
+
+    def _handle_pilot(self, payload: Any) -> None:
+        """Track membership of the plugged-in set."""
+        plugged_in = bool(
+            parse_boolean_state(payload, (BOOLEAN_TRUE_STATES, BOOLEAN_FALSE_STATES))
+        )
+        if plugged_in != self.plugged_in:
+            self.plugged_in = plugged_in
+            self.fleet.update_set("plugged_in", self.entry_id, plugged_in)
+
+    def _handle_kwh(self, payload: Any) -> None:
+        """Add the charge counter's increase while charging."""
+        kwh = safe_float(payload)
+        if kwh is None:
+            return
+        previous = self.kwh
+        self.kwh = kwh
+        if self.charging:
+            charged = counter_delta(previous, kwh)
+            if charged:
+                self.fleet.add_charged(charged)
+
+
+class FleetAggregator:
+    """Running aggregates over the member vehicles of all config entries."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize an empty fleet."""
+        self.hass = hass
+        self.members: Dict[str, FleetMember] = {}
+
+        self.sets: Dict[str, Set[str]] = {key: set() for key in FLEET_SET_KEYS}
+        self.soc_sum = 0.0
+        self.soc_count = 0
+        self.soc_min: Optional[float] = None
+        self.soc_min_entry: Optional[str] = None
+        self.soc_max: Optional[float] = None
+        self.soc_max_entry: Optional[str] = None
+        self.charged_today = 0.0
+        self.rescans = 0
+
+        self._host_entry_id: Optional[str] = None
+        self._sensor_ids: Dict[str, str] = {}
+        self._restored = False
+        self._cancel_midnight: Optional[Callable[[], None]] = None
+
+    @callback
+    def async_add_member(self, entry_id: str, client: Any) -> FleetMember:
+        """Add a config entry's vehicle and attach it to the client stream."""
+        member = FleetMember(
+            self, entry_id, client.config.get(CONF_VEHICLE_ID, "unknown")
+        )
+        self.members[entry_id] = member
+        client.fleet_member = member
+        self._publish("vehicles")
+        if self._host_entry_id is None:
+            self._async_create_sensors(entry_id)
+        if self._cancel_midnight is None:
+            self._schedule_midnight()
+        return member
+
+    @callback
+    def async_remove_member(self, entry_id: str) -> None:
+        """Take a vehicle's values out of the aggregates."""
+        member = self.members.get(entry_id)
+        if member is None:
+            return
+        for key in FLEET_SET_KEYS:
+            if entry_id in self.sets[key]:
+                self.update_set(key, entry_id, False)
+        if member.soc is not None:
+            previous, member.soc = member.soc, None
+            self.update_soc(entry_id, previous, None)
+        del self.members[entry_id]
+        self._publish("vehicles")
+
+        if entry_id == self._host_entry_id:
+            # The host's platforms are gone; the sensors move to another member
+            self._host_entry_id = None
+            self._sensor_ids.clear()
+            if self.members:
+                self._restored = True
+                self._async_create_sensors(next(iter(self.members)))
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop the midnight reset."""
+        if self._cancel_midnight is not None:
+            self._cancel_midnight()
+            self._cancel_midnight = None
+
+    def update_set(self, key: str, entry_id: str, member: bool) -> None:
+        """Add a vehicle to, or remove it from, one of the vehicle sets."""
+        if member:
+            self.sets[key].add(entry_id)
+        else:
+            self.sets[key].discard(entry_id)
+        self._publish(key)
+
+    def update_soc(
+        self, entry_id: str, previous: Optional[float], soc: Optional[float]
+    ) -> None:
+        """Replace a vehicle's SOC (None: no SOC) in the SOC aggregates."""
+        if previous is not None:
+            self.soc_sum -= previous
+            self.soc_count -= 1
+        if soc is not None:
+            self.soc_sum += soc
+            self.soc_count += 1
+
+        low = soc is not None and soc < FLEET_LOW_SOC
+        if low != (entry_id in self.sets["low_soc"]):
+            self.update_set("low_soc", entry_id, low)
+
+        # A new extreme is O(1); only the vehicle holding an extreme moving
+        # away from it needs a scan of the members' SOCs
+        rescan = False
+        if soc is not None and (self.soc_min is None or soc <= self.soc_min):
+            self.soc_min, self.soc_min_entry = soc, entry_id
+        elif entry_id == self.soc_min_entry:
+            rescan = True
+        if soc is not None and (self.soc_max is None or soc >= self.soc_max):
+            self.soc_max, self.soc_max_entry = soc, entry_id
+        elif entry_id == self.soc_max_entry:
+            rescan = True
+        if rescan:
+            self._rescan_soc()
+        self._publish("average_soc")
+
+    def _rescan_soc(self) -> None:
+        """Recompute the SOC extremes from the members."""
+        self.rescans += 1
+        self.soc_min = self.soc_min_entry = None
+        self.soc_max = self.soc_max_entry = None
+        for entry_id, member in self.members.items():
+            soc = member.soc
+            if soc is None:
+                continue
+            if self.soc_min is None or soc < self.soc_min:
+                self.soc_min, self.soc_min_entry = soc, entry_id
+            if self.soc_max is None or soc > self.soc_max:
+                self.soc_max, self.soc_max_entry = soc, entry_id
+
+    def add_charged(self, kwh: float) -> None:
+        """Add energy charged by any member today."""
+        self.charged_today += kwh
+        self._publish("charged_today")
+
+    @callback
+    def restore_charged_today(self, value: float) -> None:
+        """Continue today's total from its restored state, once per fleet."""
+        if not self._restored:
+            self._restored = True
+            self.charged_today += value
+
+    def get_value(self, key: str) -> Optional[float]:
+        """Return the current value of an aggregate."""
+        if key == "vehicles":
+            return len(self.members)
+        if key == "average_soc":
+            if not self.soc_count:
+                return None
+            return round(self.soc_sum / self.soc_count, 1)
+        if key == "charged_today":
+            return round(self.charged_today, FLEET_ENERGY_PRECISION)
+        return len(self.sets[key])
+
+    def get_attributes(self, key: str) -> Dict[str, Any]:
+        """Return the attributes of an aggregate's sensor."""
+        if key in self.sets:
+            attributes: Dict[str, Any] = {"vehicles": self._vehicle_ids(self.sets[key])}
+            if key == "low_soc":
+                attributes["threshold"] = FLEET_LOW_SOC
+            return attributes
+        if key == "average_soc":
+            return {
+                "min_soc": self.soc_min,
+                "min_soc_vehicle": self._vehicle_id(self.soc_min_entry),
+                "max_soc": self.soc_max,
+                "max_soc_vehicle": self._vehicle_id(self.soc_max_entry),
+            }
+        if key == "vehicles":
+            return {"vehicles": self._vehicle_ids(self.members)}
+        return {}
+
+    def _vehicle_id(self, entry_id: Optional[str]) -> Optional[str]:
+        """Return the vehicle ID of a member entry."""
+        member = self.members.get(entry_id) if entry_id is not None else None
+        return member.vehicle_id if member is not None else None
+
+    def _vehicle_ids(self, entry_ids: Iterable[str]) -> List[str]:
+        """Return the sorted vehicle IDs of member entries."""
+        return sorted(self.members[entry_id].vehicle_id for entry_id in entry_ids)
+
+    def _publish(self, key: str) -> None:
+        """Signal the sensor of an aggregate that changed."""
+        unique_id = self._sensor_ids.get(key)
+        if unique_id is not None:
+            async_dispatcher_send(self.hass, f"{SIGNAL_UPDATE_ENTITY}_{unique_id}", key)
+
+    def _schedule_midnight(self) -> None:
+        """Arm the reset of today's charged energy at local midnight."""
+        now = dt_util.now()
+        midnight = dt_util.start_of_local_day(now.date() + timedelta(days=1))
+        self._cancel_midnight = async_call_later(
+            self.hass, (midnight - now).total_seconds(), self._async_midnight
+        )
+
+    @callback
+    def _async_midnight(self, _now: Any) -> None:
+        """Start a new day of charged energy."""
+        self.charged_today = 0.0
+        self._publish("charged_today")
+        self._schedule_midnight()
+
+    @callback
+    def _async_create_sensors(self, entry_id: str) -> None:
+        """Create the fleet sensors on a member entry's sensor platform."""
+        self._host_entry_id = entry_id
+        device_info = get_fleet_device_info()
+        batch = []
+        for key, description in FLEET_SENSOR_TYPES.items():
+            unique_id = f"ovms_{FLEET_UNIQUE_ID_MARKER}_{key}"
+            self._sensor_ids[key] = unique_id
+            sensor = OVMSFleetSensor(self, key, description, unique_id, device_info)
+            batch.append(
+                {
+                    "entity_type": "sensor",
+                    "name": description["name"],
+                    "diagnostic_sensor": sensor,
+                }
+            )
+        async_dispatcher_send(
+            self.hass, get_add_entities_signal(entry_id, "sensor"), batch
+        )
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return a diagnostics snapshot of the fleet aggregates."""
+        return {
+            "vehicles": self._vehicle_ids(self.members),
+            "host_entry_id": self._host_entry_id,
+            "aggregates": {key: self.get_value(key) for key in FLEET_SENSOR_TYPES},
+            "extreme_rescans": self.rescans,
+        }
+
+
+@callback
+def async_get_fleet_aggregator(hass: HomeAssistant) -> FleetAggregator:
+    """Return the fleet aggregator, creating it for the first member."""
+    fleet = hass.data.get(FLEET_DATA_KEY)
+    if fleet is None:
+        fleet = hass.data[FLEET_DATA_KEY] = FleetAggregator(hass)
+    return fleet
+
+
+@callback
+def async_remove_fleet_member(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove an entry's vehicle from the fleet; drop the fleet when empty."""
+    fleet: Optional[FleetAggregator] = hass.data.get(FLEET_DATA_KEY)
+    if fleet is None:
+        return
+    fleet.async_remove_member(entry_id)
+    if not fleet.members:
+        fleet.async_shutdown()
+        hass.data.pop(FLEET_DATA_KEY, None)
+
+
+class OVMSFleetSensor(SensorEntity, RestoreEntity):
+    """One aggregate over the fleet's vehicles."""
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        fleet: FleetAggregator,
+        key: str,
+        description: Dict[str, Any],
+        unique_id: str,
+        device_info: Dict[str, Any],
+    ) -> None:
+        """Initialize the sensor."""
+        self._fleet = fleet
+        self._key = key
+        self._attr_name = description["name"]
+        self._attr_icon = description["icon"]
+        self._attr_device_class = description["device_class"]
+        self._attr_state_class = description["state_class"]
+        self._attr_native_unit_of_measurement = description["unit"]
+        self._attr_unique_id = unique_id
+        self._attr_device_info = device_info
+
+    @property
+    def native_value(self) -> Optional[float]:
+        """Return the aggregate's current value."""
+        return self._fleet.get_value(self._key)
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        """Return the vehicles behind the aggregate."""
+        return self._fleet.get_attributes(self._key)
+
+    async def async_added_to_hass(self) -> None:
+        """Restore today's charged energy and subscribe to fleet updates."""
+        await super().async_added_to_hass()
+
+        if self._key == "charged_today":
+            state = await self.async_get_last_state()
+            if state is not None and dt_util.as_local(state.last_updated).date() == (
+                dt_util.now().date()
+            ):
+                value = safe_float(state.state)
+                if value is not None:
+                    self._fleet.restore_charged_today(value)
+
+        @callback
+        def update_state(_key: str) -> None:
+            """Refresh from the fleet aggregates."""
+            self.async_write_ha_state()
+
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                f"{SIGNAL_UPDATE_ENTITY}_{self.unique_id}",
+                update_state,
+            )
+        )
@@ -0,0 +1,248 @@
+"""Memory accounting for OVMS vehicles and their entities."""
+
+import asyncio
+import logging
+import os
+import sys
+import tracemalloc
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_VEHICLE_ID,
+    DOMAIN,
+    LOGGER_NAME,
+    MEMORY_DEFAULT_TOP,
+    MEMORY_TRACE_DEFAULT_DURATION,
+    MEMORY_TRACE_FRAMES,
+)
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+_PACKAGE = __name__.rpartition(".")[0]
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Containers whose items are retained by their owner
+_CONTAINERS = (list, tuple, set, frozenset, deque)
+
+# One tracemalloc window at a time; tracing is process-wide
+_TRACE_LOCK = asyncio.Lock()
+
+
+class MemoryTraceBusyError(Exception):
+    """Raised when a memory trace cannot be started."""
+
+
+def estimate_size(obj: Any, seen: set) -> int:
+    """Estimate the bytes retained by obj, skipping objects already in seen.
+
+    Containers are followed, and so are objects of this package through
+    their __dict__. Anything else (Home Assistant, paho, callables) counts
+    with its own size only. seen holds the ids counted so far, so an object
+    shared by several owners is attributed to the first one measured.
+    """
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item, 0)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, _CONTAINERS):
+            stack.extend(item)
+        elif type(item).__module__.startswith(_PACKAGE) and hasattr(item, "__dict__"):
+            stack.append(vars(item))
+    return total
+
+
+def _entity_attributes(entity: Any) -> Dict[str, Any]:
+    """Return the attribute dict an entity keeps (not a computed copy)."""
+    attributes = getattr(entity, "_attr_extra_state_attributes", None)
+    return attributes if isinstance(attributes, dict) else {}
+
+
+def _largest_attributes(attributes: Dict[str, Any], count: int = 3) -> Dict[str, int]:
+    """Return the largest attributes of an entity, e.g. cell vectors."""
+    sizes = {key: estimate_size(value, set()) for key, value in attributes.items()}
+    largest = sorted(sizes.items(), key=lambda item: item[1], reverse=True)
+    return dict(largest[:count])
+
+
+def measure_vehicle(client: Any, top: int = MEMORY_DEFAULT_TOP) -> Dict[str, Any]:
+    """Estimate the memory one vehicle's client retains, by subsystem and entity.
+
+    Runs on the event loop, which owns these structures; the cost grows with
+    the number of topics and entities.
+    """
+    # Shared with everything else in the process or by every component
+    seen = {id(client), id(client.hass), id(client.config)}
+    factory = client.entity_factory
+    subsystems = {
+        "topic_cache": estimate_size(client.topic_cache, seen),
+        "discovered_topics": estimate_size(client.discovered_topics, seen),
+        "entity_registry": estimate_size(client.entity_registry, seen),
+        "entity_factory.created_entities": estimate_size(
+            factory.created_entities, seen
+        ),
+        "entity_factory.queue": estimate_size(factory.get_queued_entities(), seen),
+        "pending_commands": estimate_size(
+            client.command_handler.pending_commands, seen
+        ),
+        "staleness_cache": estimate_size(client.staleness_manager, seen),
+    }
+
+    # Entities before the remaining components: the update dispatcher
+    # references every entity and would otherwise be charged for them
+    entities = []
+    for unique_id, entity in list(client.update_dispatcher.entities.items()):
+        attributes = _entity_attributes(entity)
+        attribute_bytes = estimate_size(attributes, seen)
+        entities.append(
+            {
+                "unique_id": unique_id,
+                "entity_id": getattr(entity, "entity_id", None),
+                "topic": getattr(entity, "_topic", None),
+                "bytes": attribute_bytes + estimate_size(entity, seen),
+                "attribute_bytes": attribute_bytes,
+                "attributes": len(attributes),
+            }
+        )
+    subsystems["entity_attributes"] = sum(item["attribute_bytes"] for item in entities)
+    subsystems["entities"] = (
+        sum(item["bytes"] for item in entities) - subsystems["entity_attributes"]
+    )
+
+    # Whatever else the client holds (trip tracker, planners, ...)
+    for name, value in vars(client).items():
+        if isinstance(value, (dict, *_CONTAINERS)) or type(value).__module__.startswith(
+            _PACKAGE
+        ):
+            size = estimate_size(value, seen)
+            if size:
+                subsystems[name.lstrip("_")] = size
+
+    entities.sort(key=lambda item: item["bytes"], reverse=True)
+    top_entities = entities[:top]
+    for item in top_entities:
+        entity = client.update_dispatcher.entities.get(item["unique_id"])
+        item["largest_attributes"] = _largest_attributes(_entity_attributes(entity))
+
+    return {
+        "vehicle_id": client.config.get(CONF_VEHICLE_ID, "unknown"),
+        "total_bytes": sum(subsystems.values()),
+        "subsystems": dict(
+            sorted(subsystems.items(), key=lambda item: item[1], reverse=True)
+        ),
+        "entity_count": len(entities),
+        "top_entities": top_entities,
+    }
+
+
+def iter_clients(hass: HomeAssistant) -> Iterable[Any]:
+    """Yield the MQTT client of every loaded OVMS config entry."""
+    for data in hass.data.get(DOMAIN, {}).values():
+        if isinstance(data, dict) and "mqtt_client" in data:
+            yield data["mqtt_client"]
+
+
+def measure_vehicles(
+    clients: Iterable[Any], top: int = MEMORY_DEFAULT_TOP
+) -> Dict[str, Any]:
+    """Measure several vehicles; vehicles and entities are sorted largest first."""
+    vehicles = [measure_vehicle(client, top) for client in clients]
+    vehicles.sort(key=lambda vehicle: vehicle["total_bytes"], reverse=True)
+    top_entities = sorted(
+        (
+            {"vehicle_id": vehicle["vehicle_id"], **entity}
+            for vehicle in vehicles
+            for entity in vehicle["top_entities"]
+        ),
+        key=lambda entity: entity["bytes"],
+        reverse=True,
+    )[:top]
+    return {
+        "total_bytes": sum(vehicle["total_bytes"] for vehicle in vehicles),
+        "vehicles": vehicles,
+        "top_entities": top_entities,
+    }
+
+
+async def async_trace_allocations(
+    hass: HomeAssistant,
+    duration: float = MEMORY_TRACE_DEFAULT_DURATION,
+    top: int = MEMORY_DEFAULT_TOP,
+) -> Dict[str, Any]:
+    """Report memory allocated by this package and still alive, by source line.
+
+    If tracemalloc is not running, it is started for duration seconds and
+    the report covers allocations made in that window. If something else
+    already traces (e.g. PYTHONTRACEMALLOC), it is left running and the
+    report covers everything since tracing started. Tracing is process-wide,
+    so allocations are not split by vehicle.
+    """
+    if _TRACE_LOCK.locked():
+        raise MemoryTraceBusyError("A memory trace is already running")
+    async with _TRACE_LOCK:
+        started = not tracemalloc.is_tracing()
+        if started:
+            _LOGGER.info("Tracing OVMS memory allocations for %ss", duration)
+            tracemalloc.start(MEMORY_TRACE_FRAMES)
+        try:
+            if started:
+                await asyncio.sleep(duration)
+            snapshot = await hass.async_add_executor_job(tracemalloc.take_snapshot)
+        finally:
+            if started:
+                tracemalloc.stop()
+    report = await hass.async_add_executor_job(_summarize_snapshot, snapshot, top)
+    report["window"] = duration if started else None
+    return report
+
+
+def _summarize_snapshot(snapshot: tracemalloc.Snapshot, top: int) -> Dict[str, Any]:
+    """Filter a snapshot to this package and list the top lines and files."""
+    snapshot = snapshot.filter_traces(
+        (tracemalloc.Filter(True, os.path.join(_PACKAGE_DIR, "*")),)
+    )
+    root = os.path.dirname(_PACKAGE_DIR)
+
+    def _rows(stats: List[tracemalloc.Statistic], lineno: bool) -> List[Dict[str, Any]]:
+        rows = []
+        for stat in stats[:top]:
+            frame = stat.traceback[0]
+            location = os.path.relpath(frame.filename, root)
+            if lineno:
+                location = f"{location}:{frame.lineno}"
+            rows.append(
+                {"location": location, "bytes": stat.size, "blocks": stat.count}
+            )
+        return rows
+
+    by_line = snapshot.statistics("lineno")
+    return {
+        "total_bytes": sum(stat.size for stat in by_line),
+        "blocks": sum(stat.count for stat in by_line),
+        "top_lines": _rows(by_line, True),
+        "top_files": _rows(snapshot.statistics("filename"), False),
+    }
+
+
+async def async_memory_report(
+    hass: HomeAssistant,
+    clients: Iterable[Any],
+    trace_duration: float = MEMORY_TRACE_DEFAULT_DURATION,
+    top: int = MEMORY_DEFAULT_TOP,
+) -> Dict[str, Any]:
+    """Return structural estimates and, optionally, traced allocations."""
+    allocations: Optional[Dict[str, Any]] = None
+    if trace_duration:
+        allocations = await async_trace_allocations(hass, trace_duration, top)
+    # Measured after the trace so the estimates describe the current state
+    report = measure_vehicles(clients, top)
+    report["allocations"] = allocations
+    return report
@@ -40,24 +40,16 @@ from .common import (
     TIRE_METRICS,
 )
 
-# Import vehicle-specific metrics
+# Vehicle-specific metrics are loaded on demand, see load_vehicle_metrics()
 from .vehicles import (
-    VW_EUP_METRICS,
-    SMART_FORTWO_METRICS,
-    SMART_ED_METRICS,
-    MG_ZS_EV_METRICS,
-    NISSAN_LEAF_METRICS,
-    RENAULT_TWIZY_METRICS,
+    VEHICLE_MODULES,
+    VEHICLE_TYPE_PREFIXES,
+    import_vehicle_metrics,
 )
 
-# Import patterns and utils
+# Import patterns; utils and descriptor are imported at the end, once the
+# tables they read are defined
 from .patterns import TOPIC_PATTERNS
-from .utils import (
-    get_metric_by_path,
-    get_metric_by_pattern,
-    determine_category_from_topic,
-    create_friendly_name,
-)
 
 # Import category constants from const.py to maintain single source of truth
 from ..const import (
@@ -82,7 +74,9 @@ from ..const import (
     CATEGORY_RENAULT_TWIZY,
 )
 
-# Combine all metrics into the master dictionary
+# Combine the common metrics into the master dictionary. Vehicle-specific
+# definitions are merged in by load_vehicle_metrics() the first time their
+# prefix is seen, so a Leaf install never pays for parsing the eUP! tables.
 METRIC_DEFINITIONS = {
     **BATTERY_METRICS,
     **CHARGING_METRICS,
@@ -97,103 +91,39 @@ METRIC_DEFINITIONS = {
     **NETWORK_METRICS,
     **SYSTEM_METRICS,
     **TIRE_METRICS,
-    **VW_EUP_METRICS,
-    **SMART_FORTWO_METRICS,
-    **SMART_ED_METRICS,
-    **MG_ZS_EV_METRICS,
-    **NISSAN_LEAF_METRICS,
-    **RENAULT_TWIZY_METRICS,
 }
 
 # Group metrics by categories
 METRIC_CATEGORIES = {
-    CATEGORY_BATTERY: [
-        k
-        for k, v in METRIC_DEFINITIONS.items()
-        if v.get("category") == CATEGORY_BATTERY
-    ],
-    CATEGORY_CHARGING: [
-        k
-        for k, v in METRIC_DEFINITIONS.items()
-        if v.get("category") == CATEGORY_CHARGING
-    ],
-    CATEGORY_CLIMATE: [
-        k
-        for k, v in METRIC_DEFINITIONS.items()
-        if v.get("category") == CATEGORY_CLIMATE
-    ],
-    CATEGORY_DOOR: [
-        k for k, v in METRIC_DEFINITIONS.items() if v.get("category") == CATEGORY_DOOR
-    ],
-    CATEGORY_LOCATION: [
-        k
-        for k, v in METRIC_DEFINITIONS.items()
-        if v.get("category") == CATEGORY_LOCATION
-    ],
-    CATEGORY_MOTOR: [
-        k for k, v in METRIC_DEFINITIONS.items() if v.get("category") == CATEGORY_MOTOR
-    ],
-    CATEGORY_TRIP: [
-        k for k, v in METRIC_DEFINITIONS.items() if v.get("category") == CATEGORY_TRIP
-    ],
-    CATEGORY_DEVICE: [
-        k for k, v in METRIC_DEFINITIONS.items() if v.get("category") == CATEGORY_DEVICE
-    ],
-    CATEGORY_DIAGNOSTIC: [
-        k
-        for k, v in METRIC_DEFINITIONS.items()
-        if v.get("category") == CATEGORY_DIAGNOSTIC
-    ],
-    CATEGORY_POWER: [
-        k for k, v in METRIC_DEFINITIONS.items() if v.get("category") == CATEGORY_POWER
-    ],
-    CATEGORY_NETWORK: [
-        k
-        for k, v in METRIC_DEFINITIONS.items()
-        if v.get("category") == CATEGORY_NETWORK
-    ],
-    CATEGORY_SYSTEM: [
-        k for k, v in METRIC_DEFINITIONS.items() if v.get("category") == CATEGORY_SYSTEM
-    ],
-    CATEGORY_TIRE: [
-        k for k, v in METRIC_DEFINITIONS.items() if v.get("category") == CATEGORY_TIRE
-    ],
-    CATEGORY_VW_EUP: [
-        k for k, v in METRIC_DEFINITIONS.items() if v.get("category") == CATEGORY_VW_EUP
-    ],
-    CATEGORY_SMART_FORTWO: [
-        k
-        for k, v in METRIC_DEFINITIONS.items()
-        if v.get("category") == CATEGORY_SMART_FORTWO
-    ],
-    CATEGORY_SMART_ED: [
-        k
-        for k, v in METRIC_DEFINITIONS.items()
-        if v.get("category") == CATEGORY_SMART_ED
-    ],
-    CATEGORY_MG_ZS_EV: [
-        k
-        for k, v in METRIC_DEFINITIONS.items()
-        if v.get("category") == CATEGORY_MG_ZS_EV
-    ],
-    CATEGORY_NISSAN_LEAF: [
-        k
-        for k, v in METRIC_DEFINITIONS.items()
-        if v.get("category") == CATEGORY_NISSAN_LEAF
-    ],
-    CATEGORY_RENAULT_TWIZY: [
-        k
-        for k, v in METRIC_DEFINITIONS.items()
-        if v.get("category") == CATEGORY_RENAULT_TWIZY
-    ],
+    category: []
+    for category in (
+        CATEGORY_BATTERY,
+        CATEGORY_CHARGING,
+        CATEGORY_CLIMATE,
+        CATEGORY_DOOR,
+        CATEGORY_LOCATION,
+        CATEGORY_MOTOR,
+        CATEGORY_TRIP,
+        CATEGORY_DEVICE,
+        CATEGORY_DIAGNOSTIC,
+        CATEGORY_POWER,
+        CATEGORY_NETWORK,
+        CATEGORY_SYSTEM,
+        CATEGORY_TIRE,
+        CATEGORY_VW_EUP,
+        CATEGORY_SMART_FORTWO,
+        CATEGORY_SMART_ED,
+        CATEGORY_MG_ZS_EV,
+        CATEGORY_NISSAN_LEAF,
+        CATEGORY_RENAULT_TWIZY,
+    )
 }
 
 # Binary metrics that should be boolean - includes only actual binary metrics
-BINARY_METRICS = [
-    k
-    for k, v in METRIC_DEFINITIONS.items()
-    if v.get("device_class")
-    in [
+BINARY_METRICS = set()
+
+BINARY_DEVICE_CLASSES = frozenset(
+    (
         BinarySensorDeviceClass.DOOR,
         BinarySensorDeviceClass.LOCK,
         BinarySensorDeviceClass.BATTERY_CHARGING,
@@ -204,9 +134,88 @@ BINARY_METRICS = [
         BinarySensorDeviceClass.PROBLEM,
         BinarySensorDeviceClass.RUNNING,
         BinarySensorDeviceClass.UPDATE,
-    ]
-    or k.endswith((".on", ".charging", ".alarm", ".alert", ".locked", ".hvac"))
-]
+    )
+)
+BINARY_METRIC_SUFFIXES = (".on", ".charging", ".alarm", ".alert", ".locked", ".hvac")
+
+
+def _index_metrics(definitions):
+    """Add definitions to METRIC_CATEGORIES and BINARY_METRICS in one pass."""
+    for metric_path, metric_info in definitions.items():
+        category_metrics = METRIC_CATEGORIES.get(metric_info.get("category"))
+        if category_metrics is not None:
+            category_metrics.append(metric_path)
+        if metric_info.get(
+            "device_class"
+        ) in BINARY_DEVICE_CLASSES or metric_path.endswith(BINARY_METRIC_SUFFIXES):
+            BINARY_METRICS.add(metric_path)
+
+
+_index_metrics(METRIC_DEFINITIONS)
+
+# Vehicle prefixes whose definitions are not merged yet, keyed by the forms the
+# prefix takes inside a metric path (".xvu.") and an MQTT topic ("/xvu/").
+# Entries are removed as vehicles load, so once the installed vehicle's module
+# is in, the per-topic check below only scans the remaining few prefixes.
+_PENDING_PATH_PREFIXES = {f".{prefix}": prefix for prefix in VEHICLE_MODULES}
+_PENDING_TOPIC_PREFIXES = {f"/{prefix[:-1]}/": prefix for prefix in VEHICLE_MODULES}
+
+
+def register_vehicle_metrics(prefix, definitions):
+    """Merge imported vehicle definitions into the shared tables.
+
+    Must run on the event loop (or before it starts): readers iterate
+    METRIC_DEFINITIONS there, so it must not change size from another thread.
+    """
+    if f".{prefix}" not in _PENDING_PATH_PREFIXES:
+        return
+    METRIC_DEFINITIONS.update(definitions)
+    _index_metrics(definitions)
+    del _PENDING_PATH_PREFIXES[f".{prefix}"]
+    del _PENDING_TOPIC_PREFIXES[f"/{prefix[:-1]}/"]
+
+
+def load_vehicle_metrics(prefix):
+    """Import and register the definitions for a metric prefix (e.g. "xvu.").
+
+    Returns True if the vehicle was loaded by this call.
+    """
+    if f".{prefix}" not in _PENDING_PATH_PREFIXES:
+        return False
+    register_vehicle_metrics(prefix, import_vehicle_metrics(prefix))
+    return True
+
+
+async def async_load_vehicle_metrics(hass, prefix):
+    """Load a vehicle's definitions without importing on the event loop."""
+    if f".{prefix}" not in _PENDING_PATH_PREFIXES:
+        return False
+    definitions = await hass.async_add_executor_job(import_vehicle_metrics, prefix)
+    register_vehicle_metrics(prefix, definitions)
+    return True
+
+
+def get_pending_vehicle_prefix(metric_path=None, topic=None):
+    """Return the unloaded vehicle prefix a metric path or topic belongs to."""
+    if metric_path is not None:
+        dotted = f".{metric_path}"
+        for marker, prefix in _PENDING_PATH_PREFIXES.items():
+            if marker in dotted:
+                return prefix
+    if topic is not None:
+        for marker, prefix in _PENDING_TOPIC_PREFIXES.items():
+            if marker in topic:
+                return prefix
+    return None
+
+
+def get_vehicle_prefix_for_type(vehicle_type):
+    """Return the metric prefix for a vehicle type, or None for generic."""
+    for prefix, prefix_type in VEHICLE_TYPE_PREFIXES.items():
+        if prefix_type == vehicle_type:
+            return prefix
+    return None
+
 
 # Prefix patterns to detect entity categories
 PREFIX_CATEGORIES = {
@@ -310,3 +319,18 @@ PREFIX_CATEGORIES = {
     "xrt.s": CATEGORY_RENAULT_TWIZY,
     "xrt.v": CATEGORY_RENAULT_TWIZY,
 }
+
+# pylint: disable=wrong-import-position
+from .utils import (  # noqa: E402
+    get_metric_by_path,
+    get_metric_by_pattern,
+    determine_category_from_topic,
+    create_friendly_name,
+)
+from .descriptor import (  # noqa: E402
+    MetricDescriptor,
+    UNKNOWN_METRIC,
+    get_metric_descriptor,
+    resolve_metric,
+    resolve_metric_for_topic,
+)
@@ -0,0 +1,126 @@
+"""Derived metrics for OVMS integration.
+
+Each entry is declared like a metric definition and adds the metric paths
+it reads (``inputs``) and a ``formula`` called with their latest values in
+that order. An input may also name another derived metric. A value is None
+until its metric has been received; formulas return None when they cannot
+compute a meaningful result.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    UnitOfEnergyDistance,
+    UnitOfLength,
+)
+from homeassistant.util import dt as dt_util
+
+from ..const import DERIVED_MIN_SOC, DERIVED_MIN_TRIP_KM
+
+# SOC percent gained per hour of charging
+UNIT_PERCENT_PER_HOUR = "%/h"
+
+
+def trip_efficiency(
+    used: Optional[float], recd: Optional[float], trip: Optional[float]
+) -> Optional[float]:
+    """Return the net energy per distance of the current trip in Wh/km."""
+    if used is None or trip is None or trip < DERIVED_MIN_TRIP_KM:
+        return None
+    return round((used - (recd or 0.0)) * 1000 / trip, 1)
+
+
+def charge_eta(
+    charging: Optional[bool],
+    to_limit: Optional[float],
+    to_full: Optional[float],
+) -> Optional[datetime]:
+    """Return when the running charge reaches its SOC limit (or full).
+
+    Rounded down to the minute, like the OVMS estimates it is based on, so
+    repeated estimates within a minute do not produce a new state.
+    """
+    if not charging:
+        return None
+    minutes = to_limit if to_limit and to_limit > 0 else to_full
+    if not minutes or minutes <= 0:
+        return None
+    eta = dt_util.utcnow() + timedelta(minutes=minutes)
+    return eta.replace(second=0, microsecond=0)
+
+
+def charge_rate(power: Optional[float], capacity: Optional[float]) -> Optional[float]:
+    """Return the SOC percent gained per hour at the current charge power.
+
+    This is the charge power in kW divided by the energy one SOC percent
+    holds (usable capacity / 100).
+    """
+    if power is None or not capacity or capacity <= 0:
+        return None
+    return round(power * 100 / capacity, 1)
+
+
+def range_at_limit(
+    range_est: Optional[float], soc: Optional[float], limit: Optional[float]
+) -> Optional[float]:
+    """Return the estimated range once the charge reaches its SOC limit.
+
+    OVMS reports a limit of 0 when none is set, i.e. the charge runs to full.
+    """
+    if range_est is None or soc is None or soc < DERIVED_MIN_SOC:
+        return None
+    target = limit if limit and limit > 0 else 100.0
+    return round(range_est * target / soc)
+
+
+DERIVED_METRICS = {
+    "trip_efficiency": {
+        "name": "Trip Efficiency",
+        "description": "Net battery energy per distance on the current trip",
+        "icon": "mdi:gauge",
+        "device_class": SensorDeviceClass.ENERGY_DISTANCE,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "unit": UnitOfEnergyDistance.WATT_HOUR_PER_KM,
+        "category": "trip",
+        "inputs": ("v.b.energy.used", "v.b.energy.recd", "v.p.trip"),
+        "formula": trip_efficiency,
+    },
+    "charge_eta": {
+        "name": "Charge Finish Time",
+        "description": "When the running charge reaches its SOC limit",
+        "icon": "mdi:clock-end",
+        "device_class": SensorDeviceClass.TIMESTAMP,
+        "state_class": None,
+        "unit": None,
+        "category": "charging",
+        "inputs": ("v.c.charging", "v.c.duration.soc", "v.c.duration.full"),
+        "formula": charge_eta,
+    },
+    "charge_rate": {
+        "name": "Charge Rate",
+        "description": "SOC percent gained per hour at the current charge power",
+        "icon": "mdi:battery-arrow-up",
+        "device_class": None,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "unit": UNIT_PERCENT_PER_HOUR,
+        "category": "charging",
+        "inputs": ("v.c.power", "v.b.capacity"),
+        "formula": charge_rate,
+    },
+    "range_at_limit": {
+        "name": "Range at Charge Limit",
+        "description": "Estimated range once charged to the SOC limit",
+        "icon": "mdi:map-marker-distance",
+        "device_class": SensorDeviceClass.DISTANCE,
+        "state_class": SensorStateClass.MEASUREMENT,
+        "unit": UnitOfLength.KILOMETERS,
+        "category": "charging",
+        "inputs": ("v.b.range.est", "v.b.soc", "v.c.limit.soc"),
+        "formula": range_at_limit,
+    },
+}
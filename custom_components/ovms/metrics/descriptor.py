@@ -0,0 +1,153 @@
+"""Resolved metric descriptors shared by the parser, factory and platforms."""
+
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+from .utils import get_metric_by_path, get_metric_by_pattern
+
+# Definition keys HA handles as entity properties; everything else is
+# exposed to the user as an extra state attribute
+ENTITY_PROPERTY_KEYS = frozenset(("name", "device_class", "state_class", "unit"))
+
+# First topic segment of a metric path when the topic structure is unknown
+_METRIC_ROOTS = ("metric", "status", "notify", "command", "m", "v", "s", "t")
+
+
+class MetricDescriptor:
+    """Immutable, resolved view of one metric definition.
+
+    One descriptor exists per definition and is shared by every topic that
+    resolves to it. TopicParser resolves it once per topic and the creation
+    payload carries it to the entity factory and the platforms, so nothing
+    downstream looks the metric up again.
+    """
+
+    __slots__ = (
+        "definition",
+        "device_class",
+        "state_class",
+        "unit",
+        "suggested_unit",
+        "icon",
+        "entity_category",
+        "suggested_display_precision",
+        "binary_device_class",
+        "extra_attributes",
+    )
+
+    definition: Mapping[str, Any]
+    device_class: Optional[Any]
+    state_class: Optional[Any]
+    unit: Optional[Any]
+    suggested_unit: Optional[Any]
+    icon: Optional[str]
+    entity_category: Optional[Any]
+    suggested_display_precision: Optional[int]
+    binary_device_class: Optional[bool]
+    extra_attributes: Tuple[Tuple[str, Any], ...]
+
+    def __init__(self, definition: Mapping[str, Any]) -> None:
+        """Initialize the descriptor from a metric definition."""
+        init = object.__setattr__
+        init(self, "definition", MappingProxyType(dict(definition)))
+        init(self, "device_class", definition.get("device_class"))
+        init(self, "state_class", definition.get("state_class"))
+        init(self, "unit", definition.get("unit"))
+        init(self, "suggested_unit", definition.get("suggested_unit"))
+        init(self, "icon", definition.get("icon"))
+        init(self, "entity_category", definition.get("entity_category"))
+        init(
+            self,
+            "suggested_display_precision",
+            definition.get("suggested_display_precision"),
+        )
+        # True/False when the declared device class decides binary vs sensor,
+        # None when the definition leaves it to the topic heuristics
+        binary = None
+        if "device_class" in definition and hasattr(
+            definition["device_class"], "__module__"
+        ):
+            binary = "binary_sensor" in definition["device_class"].__module__
+        init(self, "binary_device_class", binary)
+        extras: Tuple[Tuple[str, Any], ...] = tuple(
+            (key, value)
+            for key, value in definition.items()
+            if key not in ENTITY_PROPERTY_KEYS
+        )
+        init(self, "extra_attributes", extras)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Reject changes; descriptors are shared between entities."""
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        """Reject changes; descriptors are shared between entities."""
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __bool__(self) -> bool:
+        """Return True if the descriptor has a metric definition."""
+        return bool(self.definition)
+
+    def __repr__(self) -> str:
+        """Return a short representation for logs."""
+        return f"MetricDescriptor({self.definition.get('name')!r})"
+
+    @property
+    def has_numeric_definition(self) -> bool:
+        """Return True if the definition declares a unit or a state class."""
+        return self.unit is not None or self.state_class is not None
+
+    def attributes(self) -> Dict[str, Any]:
+        """Return the definition keys exposed as entity attributes."""
+        return dict(self.extra_attributes)
+
+
+# Descriptor of topics without a metric definition
+UNKNOWN_METRIC = MetricDescriptor({})
+
+# Descriptors by definition identity; definitions live for the whole process
+_DESCRIPTORS: Dict[int, Tuple[Mapping[str, Any], MetricDescriptor]] = {}
+
+
+def get_metric_descriptor(definition: Optional[Any]) -> MetricDescriptor:
+    """Return the shared descriptor for a definition (or a descriptor)."""
+    if isinstance(definition, MetricDescriptor):
+        return definition
+    if not definition:
+        return UNKNOWN_METRIC
+    entry = _DESCRIPTORS.get(id(definition))
+    if entry is None or entry[0] is not definition:
+        entry = (definition, MetricDescriptor(definition))
+        _DESCRIPTORS[id(definition)] = entry
+    return entry[1]
+
+
+def resolve_metric(
+    metric_path: Optional[str], parts: Sequence[str]
+) -> MetricDescriptor:
+    """Resolve the descriptor of a metric path, falling back to topic patterns."""
+    definition = get_metric_by_path(metric_path) if metric_path else None
+    if not definition and parts:
+        definition = get_metric_by_pattern(list(parts))
+    return get_metric_descriptor(definition)
+
+
+def resolve_metric_for_topic(topic: str, internal_name: str = "") -> MetricDescriptor:
+    """Resolve the descriptor from a full topic.
+
+    For entities created without a descriptor in their payload: the metric
+    path starts at the first metric root segment of the topic, and the
+    entity name is tried as a last pattern source.
+    """
+    topic_parts = topic.split("/")
+    if len(topic_parts) > 3:
+        for index, part in enumerate(topic_parts):
+            if part in _METRIC_ROOTS:
+                topic_parts = topic_parts[index:]
+                break
+    descriptor = resolve_metric(".".join(topic_parts), topic_parts)
+    if not descriptor and internal_name:
+        descriptor = get_metric_descriptor(
+            get_metric_by_pattern(internal_name.split("_"))
+        )
+    return descriptor
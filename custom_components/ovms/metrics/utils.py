@@ -1,15 +1,18 @@
 """Utility functions for OVMS metrics."""
 
+from . import METRIC_DEFINITIONS, PREFIX_CATEGORIES
 from .patterns import TOPIC_PATTERNS
 
 # Note: Category constants are imported directly in functions to avoid circular import issues
 
 
 def get_metric_by_path(metric_path):
-    """Get metric definition by exact path match."""
-    # Import only when needed to avoid circular imports
-    from . import METRIC_DEFINITIONS
+    """Get metric definition by exact path match.
 
+    Vehicle definitions are only found once loaded: the MQTT client and the
+    config flow load them in an executor (async_load_vehicle_metrics) when
+    a vehicle's first topic arrives, never on the event loop from here.
+    """
     # First try exact match
     if metric_path in METRIC_DEFINITIONS:
         return METRIC_DEFINITIONS[metric_path]
@@ -113,9 +116,6 @@ def get_metric_by_path(metric_path):
 
 def get_metric_by_pattern(topic_parts):
     """Try to match a metric by pattern in topic parts."""
-    # Import only when needed to avoid circular imports
-    from . import METRIC_DEFINITIONS
-
     # First, try to find an exact match of the last path component
     if topic_parts:
         last_part = topic_parts[-1].lower()
@@ -274,9 +274,6 @@ def determine_category_from_topic(topic_parts):
         CATEGORY_RENAULT_TWIZY,
     )
 
-    # Import PREFIX_CATEGORIES from current module (still defined here)
-    from . import PREFIX_CATEGORIES
-
     import logging
 
     logger = logging.getLogger(__name__)
@@ -429,8 +426,6 @@ def create_friendly_name(topic_parts, metric_info=None):
 
 def get_cell_data_patterns():
     """Get list of metric patterns that have cell data (comma-separated values)."""
-    from . import METRIC_DEFINITIONS
-
     cell_data_patterns = []
 
     # Go through all metric definitions and find those with has_cell_data: True
@@ -1,69 +1,60 @@
-"""Vehicle-specific metrics for OVMS integration."""
+"""Vehicle-specific metrics for OVMS integration.
 
-from .vw_eup import (
-    VW_EUP_METRICS,
-    VEHICLE_TYPE as VW_EUP_TYPE,
-    VEHICLE_NAME as VW_EUP_NAME,
-    METRIC_PREFIX as VW_EUP_PREFIX,
-)
-from .smart_fortwo import (
-    SMART_FORTWO_METRICS,
-    VEHICLE_TYPE as SMART_FORTWO_TYPE,
-    VEHICLE_NAME as SMART_FORTWO_NAME,
-    METRIC_PREFIX as SMART_FORTWO_PREFIX,
-)
-from .smart_ed import (
-    SMART_ED_METRICS,
-    VEHICLE_TYPE as SMART_ED_TYPE,
-    VEHICLE_NAME as SMART_ED_NAME,
-    METRIC_PREFIX as SMART_ED_PREFIX,
-)
-from .mg_zs_ev import (
-    MG_ZS_EV_METRICS,
-    VEHICLE_TYPE as MG_ZS_EV_TYPE,
-    VEHICLE_NAME as MG_ZS_EV_NAME,
-    METRIC_PREFIX as MG_ZS_EV_PREFIX,
-)
-from .nissan_leaf import (
-    NISSAN_LEAF_METRICS,
-    VEHICLE_TYPE as NISSAN_LEAF_TYPE,
-    VEHICLE_NAME as NISSAN_LEAF_NAME,
-    METRIC_PREFIX as NISSAN_LEAF_PREFIX,
-)
-from .renault_twizy import (
-    RENAULT_TWIZY_METRICS,
-    VEHICLE_TYPE as RENAULT_TWIZY_TYPE,
-    VEHICLE_NAME as RENAULT_TWIZY_NAME,
-    METRIC_PREFIX as RENAULT_TWIZY_PREFIX,
-)
+Vehicle definition modules are large and a given installation only ever
+needs one of them, so they are imported on demand (see
+``metrics.load_vehicle_metrics``) instead of at integration import time.
+"""
 
-# Build lookup dicts from individual vehicle modules
+import importlib
+from typing import Any, Dict
+
+# Metric prefix -> (module name, vehicle type, vehicle name).
+# Mirrors METRIC_PREFIX / VEHICLE_TYPE / VEHICLE_NAME of each module so the
+# lookup tables below exist without importing the definition modules.
+# scripts/tests/test_metrics_lazy_loading.py keeps the two in sync.
+VEHICLE_MODULES = {
+    "xvu.": ("vw_eup", "vw_eup", "VW eUP!"),
+    "xsq.": ("smart_fortwo", "smart_fortwo", "Smart ForTwo"),
+    "xse.": ("smart_ed", "smart_ed", "Smart ED"),
+    "xmg.": ("mg_zs_ev", "mg_zs_ev", "MG ZS-EV"),
+    "xnl.": ("nissan_leaf", "nissan_leaf", "Nissan Leaf"),
+    "xrt.": ("renault_twizy", "renault_twizy", "Renault Twizy"),
+}
+
+# Build lookup dicts from the module registry
 VEHICLE_TYPE_PREFIXES = {
-    VW_EUP_PREFIX: VW_EUP_TYPE,
-    SMART_FORTWO_PREFIX: SMART_FORTWO_TYPE,
-    SMART_ED_PREFIX: SMART_ED_TYPE,
-    MG_ZS_EV_PREFIX: MG_ZS_EV_TYPE,
-    NISSAN_LEAF_PREFIX: NISSAN_LEAF_TYPE,
-    RENAULT_TWIZY_PREFIX: RENAULT_TWIZY_TYPE,
+    prefix: vehicle_type for prefix, (_, vehicle_type, _) in VEHICLE_MODULES.items()
 }
 
 VEHICLE_TYPE_NAMES = {
-    VW_EUP_TYPE: VW_EUP_NAME,
-    SMART_FORTWO_TYPE: SMART_FORTWO_NAME,
-    SMART_ED_TYPE: SMART_ED_NAME,
-    MG_ZS_EV_TYPE: MG_ZS_EV_NAME,
-    NISSAN_LEAF_TYPE: NISSAN_LEAF_NAME,
-    RENAULT_TWIZY_TYPE: RENAULT_TWIZY_NAME,
+    vehicle_type: name for _, vehicle_type, name in VEHICLE_MODULES.values()
 }
 
-# Export all vehicle metrics for use in the main metrics module
+
+def import_vehicle_module(prefix: str) -> Any:
+    """Import and return the definition module for a metric prefix."""
+    module_name = VEHICLE_MODULES[prefix][0]
+    return importlib.import_module(f".{module_name}", __name__)
+
+
+def import_vehicle_metrics(prefix: str) -> Dict[str, Dict[str, Any]]:
+    """Import the metric definitions for a metric prefix (e.g. "xvu.").
+
+    Each module exposes its table as ``<VEHICLE_TYPE>_METRICS`` (for
+    example ``VW_EUP_METRICS``). Importing is the slow part of loading a
+    vehicle and touches no shared state, so it is safe to run in an
+    executor thread.
+    """
+    vehicle_type = VEHICLE_MODULES[prefix][1]
+    module = import_vehicle_module(prefix)
+    return getattr(module, f"{vehicle_type.upper()}_METRICS")
+
+
+# Export the registry for use in the main metrics module
 __all__ = [
-    "VW_EUP_METRICS",
-    "SMART_FORTWO_METRICS",
-    "SMART_ED_METRICS",
-    "MG_ZS_EV_METRICS",
-    "NISSAN_LEAF_METRICS",
-    "RENAULT_TWIZY_METRICS",
+    "VEHICLE_MODULES",
     "VEHICLE_TYPE_PREFIXES",
     "VEHICLE_TYPE_NAMES",
+    "import_vehicle_module",
+    "import_vehicle_metrics",
 ]
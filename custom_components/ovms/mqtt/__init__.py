@@ -2,6 +2,7 @@
 
 import asyncio
 import logging
+from datetime import timedelta
 from typing import Dict, Any, Optional, Set
 
 from homeassistant.core import HomeAssistant, callback
@@ -9,6 +10,7 @@ from homeassistant.helpers.dispatcher import (
     async_dispatcher_connect,
     async_dispatcher_send,
 )
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
 
 from ..const import (
     DOMAIN,
@@ -21,10 +23,19 @@ from ..const import (
     RECONNECT_METRIC_REQUEST_DELAY,
     GPS_ACCURACY_MIN_METERS,
     GPS_ACCURACY_MAX_METERS,
+    SUBSCRIPTION_PLAN_SETTLE_DELAY,
+    SUBSCRIPTION_REPLAN_DELAY,
+    SUBSCRIPTION_WIDEN_INTERVAL,
+    SUBSCRIPTION_ROUTE_RESPONSE,
+    SUBSCRIPTION_ROUTE_TREE,
     get_platforms_loaded_signal,
 )
 
 from .connection import MQTTConnectionManager
+from .discovery_snapshot import DiscoverySnapshot
+from .load_shedder import LoadShedder
+from .resync_planner import ResyncPlanner
+from .subscription_planner import SubscriptionPlanner
 from .topic_parser import TopicParser
 from .entity_factory import EntityFactory
 from .entity_registry import EntityRegistry
@@ -33,6 +44,14 @@ from .command_handler import CommandHandler
 from ..naming_service import EntityNamingService
 from ..attribute_manager import AttributeManager
 from ..entity_staleness_manager import EntityStalenessManager
+from ..profiler import IngestProfiler
+from ..trip_tracker import TripTracker
+from ..derived_metrics import DerivedMetricsEngine
+from ..energy_sessions import EnergySessionTracker
+from ..charge_tracker import ChargeTracker
+from ..fleet import FleetMember
+from ..metrics import async_load_vehicle_metrics, get_pending_vehicle_prefix
+from ..sensor.timestamp_parser import forget_timestamp_topics
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
@@ -57,6 +76,7 @@ class OVMSMQTTClient:
 
         # Initialize components
         self.entity_registry = EntityRegistry()
+        self.discovery_snapshot = DiscoverySnapshot(hass, config)
         self.topic_parser = TopicParser(self.config, self.entity_registry)
         self.update_dispatcher = UpdateDispatcher(
             hass, self.entity_registry, self.attribute_manager, self.config
@@ -68,16 +88,77 @@ class OVMSMQTTClient:
             self.config,
             self.naming_service,
             self.attribute_manager,
+            snapshot=self.discovery_snapshot,
         )
         self.command_handler = CommandHandler(hass, config)
 
+        # Measures ingest and entity updates while an ovms.profile run is active
+        self.profiler = IngestProfiler(hass, config)
+
+        # Holds back low-priority updates while the event loop is lagging.
+        # Deferred updates are flushed later, outside message handling, so
+        # the dispatch itself is a profiled section.
+        self.load_shedder = LoadShedder(
+            hass,
+            self.topic_parser.structure_prefix,
+            self.profiler.wrap(self.update_dispatcher.dispatch_update),
+        )
+
+        # Trip segmentation consumes the raw metric stream plus the coalesced
+        # GPS fixes, so both halves of a position arrive as one point.
+        self.trip_tracker = TripTracker(hass, config)
+        self.update_dispatcher.add_location_listener(self.trip_tracker.process_location)
+
+        # Formulas over other metrics, re-evaluated when one of their inputs
+        # changes
+        self.derived_metrics = DerivedMetricsEngine(hass, config)
+
+        # Charge and drive energy integrated from the power topics
+        self.energy_sessions = EnergySessionTracker(hass, config)
+
+        # Completed charge sessions, summarised into a compact log
+        self.charge_tracker = ChargeTracker(hass, config, self.energy_sessions)
+        self.update_dispatcher.add_location_listener(
+            self.charge_tracker.process_location
+        )
+
+        # Set by the fleet aggregator when the vehicle opts in to the fleet
+        # sensors
+        self.fleet_member: Optional[FleetMember] = None
+
+        # Every dispatched update restarts that entity's staleness countdown
+        self.update_dispatcher.add_update_listener(
+            self.staleness_manager.async_mark_seen
+        )
+
+        # Pushes the blacklist down into the broker subscriptions
+        self.subscription_planner = SubscriptionPlanner(
+            self.topic_parser.structure_prefix,
+            config.get("vehicle_id", ""),
+            self.topic_parser.topic_blacklist,
+        )
+        self._cancel_subscription_plan = None
+
         # Initialize connection manager last as it depends on other components
         self.connection_manager = MQTTConnectionManager(
-            hass, config, self._on_message_received, self._on_connection_change
+            hass,
+            config,
+            self._on_message_received,
+            self._on_connection_change,
+            subscription_planner=self.subscription_planner,
         )
 
         # For tracking metrics and diagnostics
         self.message_count = 0
+
+        # Staged metric requests after (re)connecting, paced by arrival rate
+        self.resync_planner = ResyncPlanner(
+            config,
+            self.connection_manager.structure_prefix,
+            self.topic_cache,
+            self.async_request_metrics,
+            lambda: self.message_count,
+        )
         self.reconnect_count = 0
         self.entity_types = {}  # For diagnostics
 
@@ -92,13 +173,26 @@ class OVMSMQTTClient:
         if not await self.connection_manager.async_setup():
             return False
 
+        await self.trip_tracker.async_setup()
+        await self.charge_tracker.async_setup()
+        self.load_shedder.start()
+
+        # Recreate last run's entities before any message can arrive, so live
+        # updates attach to existing entities instead of rediscovering them
+        await self._async_restore_discovery_snapshot()
+
         # Subscribe to platforms loaded event - Fixed dispatcher usage
         self._cleanup_listeners = [
             async_dispatcher_connect(
                 self.hass,
                 get_platforms_loaded_signal(self.config_entry_id),
                 self._async_platforms_loaded,
-            )
+            ),
+            async_track_time_interval(
+                self.hass,
+                self._async_widen_subscriptions,
+                timedelta(seconds=SUBSCRIPTION_WIDEN_INTERVAL),
+            ),
         ]
 
         # Connection manager handles MQTT connection
@@ -107,13 +201,46 @@ class OVMSMQTTClient:
 
         return True
 
+    async def _async_restore_discovery_snapshot(self) -> None:
+        """Queue the entities recorded in the discovery snapshot."""
+        records = []
+        for record in await self.discovery_snapshot.async_load():
+            topic = record["topic"]
+            # Same exemptions as parse_topic: status and virtual topics
+            # are never blacklisted
+            is_exempt = topic == "combined_location" or topic.endswith("/status")
+            if not is_exempt and self.topic_parser.is_blacklisted_topic(topic):
+                self.discovery_snapshot.async_discard(record["unique_id"])
+                continue
+            records.append(record)
+
+        if not records:
+            return
+
+        # Vehicle-specific definitions are normally loaded on the first topic
+        # of their subtree; restored topics skip that path
+        prefixes = {
+            get_pending_vehicle_prefix(topic=record["topic"]) for record in records
+        }
+        for prefix in prefixes - {None}:
+            await async_load_vehicle_metrics(self.hass, prefix)
+
+        await self.entity_factory.async_restore_entities(records)
+
     async def _async_platforms_loaded(self) -> None:
         """Handle platforms loaded event."""
         _LOGGER.info("All platforms loaded, processing entity discovery")
 
         # Process queued entities from entity factory
+        self.entity_factory.refresh_restored_payloads(self.topic_cache)
         await self.entity_factory.async_process_queued_entities()
 
+        # Last-trip sensors are not topic-derived; create them directly
+        self.trip_tracker.async_create_sensors()
+        self.derived_metrics.async_create_sensors()
+        self.energy_sessions.async_create_sensors()
+        self.charge_tracker.async_create_sensors()
+
         # Try to discover by subscribing again (in case initial subscription failed)
         await self.connection_manager.async_subscribe_topics()
 
@@ -123,12 +250,80 @@ class OVMSMQTTClient:
             _LOGGER.info(
                 "No topics discovered yet, requesting metrics via on-demand feature"
             )
-            await self.async_request_metrics()
+            await self.resync_planner.async_resync()
+
+        # Narrow the subscriptions once the initial burst has mapped the tree
+        self._schedule_subscription_plan(SUBSCRIPTION_PLAN_SETTLE_DELAY)
+
+    @callback
+    def _schedule_subscription_plan(self, delay: float) -> None:
+        """Schedule a (re-)plan of the broker subscriptions."""
+        if self._cancel_subscription_plan is None and not self._shutting_down:
+            self._cancel_subscription_plan = async_call_later(
+                self.hass, delay, self._async_apply_subscription_plan
+            )
+
+    async def _async_apply_subscription_plan(self, _now=None) -> None:
+        """Replace the subscriptions with the planned, narrower set."""
+        self._cancel_subscription_plan = None
+        if not self.subscription_planner.topic_count:
+            # Nothing seen yet (vehicle asleep, no retained topics): planning
+            # now would subscribe to nothing, so keep the full subscription
+            self._schedule_subscription_plan(SUBSCRIPTION_PLAN_SETTLE_DELAY)
+            return
+        self.subscription_planner.plan()
+        if self.connected:
+            await self.connection_manager.async_subscribe_topics(resubscribe=False)
+
+    async def _async_widen_subscriptions(self, _now=None) -> None:
+        """Subscribe to the whole vehicle tree again, then re-plan.
 
-    async def _on_message_received(self, topic: str, payload: str) -> None:
-        """Handle message received from MQTT broker."""
+        Picks up subtrees the applied plan does not cover because they did
+        not exist when it was made.
+        """
+        if self._shutting_down or not self.subscription_planner.widen():
+            return
+        if self._cancel_subscription_plan is not None:
+            self._cancel_subscription_plan()
+            self._cancel_subscription_plan = None
+        self._schedule_subscription_plan(SUBSCRIPTION_PLAN_SETTLE_DELAY)
+        if self.connected:
+            await self.connection_manager.async_subscribe_topics(resubscribe=False)
+
+    async def _on_message_received(
+        self, topic: str, payload: str, route: Optional[int] = None
+    ) -> None:
+        """Handle message received from MQTT broker.
+
+        ``route`` is the subscription route resolved from the MQTT v5
+        subscription identifiers, or None when the broker did not send any
+        (MQTT v3.1.1), in which case the topic string decides.
+        """
         self.message_count += 1
 
+        # Everything up to entity creation is synchronous, so a profile run
+        # measures it without picking up other tasks at an await
+        with self.profiler.measure(message=True):
+            if route == SUBSCRIPTION_ROUTE_RESPONSE:
+                self.command_handler.process_response(topic, payload)
+                return
+
+            if route is None or route == SUBSCRIPTION_ROUTE_TREE:
+                if self._route_by_topic(topic, payload):
+                    return
+
+            if self._record_vehicle_message(topic, payload):
+                return
+
+        await self._async_create_topic_entities(topic, payload)
+
+    def _route_by_topic(self, topic: str, payload: str) -> bool:
+        """Route a message by its topic string.
+
+        Returns:
+            True if the message was consumed and must not be processed as
+            vehicle data.
+        """
         # Check if this is a command response and route it to the command handler
         # This ensures command responses (client/rr/response/*) are properly
         # routed to complete pending command futures instead of being treated
@@ -137,7 +332,7 @@ class OVMSMQTTClient:
         if "client/rr/response" in topic:
             _LOGGER.debug("Routing command response topic: %s", topic)
             self.command_handler.process_response(topic, payload)
-            return
+            return True
 
         # Drop the rest of the /client/ subtree before any state is recorded.
         # Other OVMS clients (the OVMS Connect mobile app, a second HA
@@ -148,17 +343,27 @@ class OVMSMQTTClient:
         # the startup metric-request gate in _async_platforms_loaded honest:
         # `if not self.discovered_topics` must only see real vehicle data.
         # See issue #216.
-        if self.topic_parser.is_per_client_topic(topic):
-            return
+        return self.topic_parser.is_per_client_topic(topic)
+
+    def _record_vehicle_message(self, topic: str, payload: str) -> bool:
+        """Record a vehicle topic and update its existing entities.
 
+        Returns:
+            True if the topic already has entities; False if they still need
+            to be created with _async_create_topic_entities().
+        """
         # Store in topic cache
         self.topic_cache[topic] = {
             "payload": payload,
             "timestamp": asyncio.get_event_loop().time(),
         }
 
-        # Add to discovered topics
-        self.discovered_topics.add(topic)
+        # Add to discovered topics; new topics also extend the subscription
+        # plan's view of the tree
+        if topic not in self.discovered_topics:
+            self.discovered_topics.add(topic)
+            if self.subscription_planner.add_topic(topic):
+                self._schedule_subscription_plan(SUBSCRIPTION_REPLAN_DELAY)
 
         # Track GPS quality topics for location accuracy
         if any(
@@ -167,36 +372,55 @@ class OVMSMQTTClient:
         ):
             self._track_gps_quality_topic(topic, payload)
 
-        # Process message and create/update entities
+        self.trip_tracker.process_message(topic, payload)
+        self.derived_metrics.process_message(topic, payload)
+        self.energy_sessions.process_message(topic, payload)
+        self.charge_tracker.process_message(topic, payload)
+        if self.fleet_member is not None:
+            self.fleet_member.process_message(topic, payload)
+
         # Use get_entities_for_topic to support multiple entities per topic
-        entities_for_topic = self.entity_registry.get_entities_for_topic(topic)
-        if not entities_for_topic:
-            # New topic, create entity
-            parsed_data = self.topic_parser.parse_topic(topic, payload)
-            if parsed_data:
-                # Create the primary entity
-                await self.entity_factory.async_create_entities(
-                    topic, payload, parsed_data
-                )
+        if not self.entity_registry.get_entities_for_topic(topic):
+            return False
 
-                # Create any related entities (e.g., switches for controllable metrics)
-                related_entities = self.topic_parser.get_related_entities(parsed_data)
-                for related_entity in related_entities:
-                    try:
-                        await self.entity_factory.async_create_entities(
-                            topic, payload, related_entity
-                        )
-                    except Exception as ex:
-                        _LOGGER.error(
-                            "Failed to create related entity for topic %s (%s): %s",
-                            topic,
-                            related_entity.get("entity_type", "unknown"),
-                            ex,
-                            exc_info=True,
-                        )
-        else:
-            # Existing topic, update entity
-            self.update_dispatcher.dispatch_update(topic, payload)
+        # Existing topic, update entity (held back under loop pressure
+        # if its priority class allows)
+        self.load_shedder.dispatch(topic, payload)
+        return True
+
+    async def _async_create_topic_entities(self, topic: str, payload: str) -> None:
+        """Create the entities of a newly seen vehicle topic."""
+        # First topic of a vehicle-specific subtree (e.g. .../metric/xvu/...):
+        # load that vehicle's metric definitions before parsing it
+        pending_prefix = get_pending_vehicle_prefix(topic=topic)
+        if pending_prefix:
+            await async_load_vehicle_metrics(self.hass, pending_prefix)
+
+        # New topic, create entity
+        parsed_data = self.topic_parser.parse_topic(topic, payload)
+        if parsed_data:
+            # Create the primary entity
+            await self.entity_factory.async_create_entities(topic, payload, parsed_data)
+
+            # Create any related entities (e.g., switches for controllable metrics)
+            related_entities = self.topic_parser.get_related_entities(parsed_data)
+            for related_entity in related_entities:
+                try:
+                    await self.entity_factory.async_create_entities(
+                        topic, payload, related_entity
+                    )
+                except Exception as ex:
+                    _LOGGER.error(
+                        "Failed to create related entity for topic %s (%s): %s",
+                        topic,
+                        related_entity.get("entity_type", "unknown"),
+                        ex,
+                        exc_info=True,
+                    )
+
+            # The creating message counts as the first sighting
+            for unique_id in self.entity_registry.get_entities_for_topic(topic):
+                self.staleness_manager.async_mark_seen(unique_id)
 
     def _track_gps_quality_topic(self, topic: str, payload: str) -> None:
         """Track GPS quality topics for location accuracy."""
@@ -230,6 +454,9 @@ class OVMSMQTTClient:
 
         if not connected:
             self.reconnect_count += 1
+            self.resync_planner.cancel()
+            # Power missed during the outage is unknown: do not hold it
+            self.hass.loop.call_soon_threadsafe(self.energy_sessions.async_interrupt)
         elif connected and not was_connected:
             # Just connected/reconnected - request all metrics to quickly refresh state
             # This uses the on-demand feature in OVMS edge firmware
@@ -247,17 +474,21 @@ class OVMSMQTTClient:
             )
 
     async def _async_request_metrics_on_reconnect(self) -> None:
-        """Request all metrics after reconnecting to quickly refresh entity states.
+        """Request metrics after reconnecting to quickly refresh entity states.
 
         This is called automatically after a successful reconnection.
-        Uses a small delay to ensure subscriptions are fully established first.
+        Uses a small delay to ensure subscriptions are fully established first,
+        then requests the metrics in priority stages.
         """
         try:
+            # The resync republishes every metric, so let it map the tree
+            await self._async_widen_subscriptions()
+
             # Small delay to ensure subscriptions are active
             await asyncio.sleep(RECONNECT_METRIC_REQUEST_DELAY)
 
             if self.connected:
-                await self.async_request_metrics("*")
+                await self.resync_planner.async_resync()
         except asyncio.CancelledError:
             # Task was cancelled (e.g., during shutdown) - expected, don't log
             pass
@@ -341,6 +572,12 @@ class OVMSMQTTClient:
         for listener_remove in getattr(self, "_cleanup_listeners", []):
             listener_remove()
 
+        if self._cancel_subscription_plan is not None:
+            self._cancel_subscription_plan()
+            self._cancel_subscription_plan = None
+        self.resync_planner.cancel()
+        self.load_shedder.stop()
+
         # Cancel the command handler's background cleanup task
         if hasattr(self, "command_handler"):
             await self.command_handler.async_shutdown()
@@ -353,8 +590,19 @@ class OVMSMQTTClient:
         if hasattr(self, "update_dispatcher"):
             self.update_dispatcher.async_shutdown()
 
+        # Cancel any pending entity batch flush
+        if hasattr(self, "entity_factory"):
+            self.entity_factory.async_shutdown()
+
         await self.connection_manager.async_shutdown()
 
+        await self.discovery_snapshot.async_shutdown()
+        await self.trip_tracker.async_shutdown()
+        await self.charge_tracker.async_shutdown()
+
+        # The timestamp parser is shared; drop what it learned for this vehicle
+        forget_timestamp_topics(self.structure_prefix)
+
     def get_gps_accuracy(self, vehicle_id: Optional[str] = None) -> Optional[float]:
         """Get GPS accuracy in meters from stored GPS quality data.
 
@@ -28,8 +28,15 @@ from ..const import (
     DEFAULT_TOPIC_STRUCTURE,
     DEFAULT_VERIFY_SSL,
     LOGGER_NAME,
-    TOPIC_TEMPLATE,
+    SUBSCRIPTION_ID_ALT_BASE_OFFSET,
+    SUBSCRIPTION_RESPONSE_FILTER,
+    SUBSCRIPTION_ROUTE_METRIC,
+    SUBSCRIPTION_ROUTE_RESPONSE,
+    SUBSCRIPTION_ROUTE_STATUS,
+    SUBSCRIPTION_ROUTE_TREE,
+    TOPIC_WILDCARD,
 )
+from .subscription_planner import STATUS_TOPIC_SUFFIX
 from ..utils import (
     generate_ovms_client_id,
     uses_tls_transport,
@@ -79,8 +86,9 @@ class MQTTConnectionManager:
         self,
         hass: HomeAssistant,
         config: Dict[str, Any],
-        message_callback: Callable[[str, str], None],
+        message_callback: Callable[[str, str, Optional[int]], None],
         connection_callback: Callable[[bool], None],
+        subscription_planner=None,
     ):
         """Initialize the MQTT connection manager."""
         self.hass = hass
@@ -91,6 +99,14 @@ class MQTTConnectionManager:
         self.reconnect_count = 0
         self.message_callback = message_callback
         self.connection_callback = connection_callback
+        self.subscription_planner = subscription_planner
+        # Filters currently subscribed at the broker
+        self.subscriptions: set[str] = set()
+        # MQTT v5 subscription identifiers; only used once the broker has
+        # confirmed support in its CONNACK
+        self.protocol = None
+        self.subscription_ids_available = False
+        self.duplicate_deliveries = 0
 
         # Format the structure prefix
         self.structure_prefix = self._format_structure_prefix()
@@ -153,6 +169,7 @@ class MQTTConnectionManager:
             )
 
         protocol = mqtt.MQTTv5 if hasattr(mqtt, "MQTTv5") else mqtt.MQTTv311
+        self.protocol = protocol
 
         _LOGGER.debug("Creating MQTT client with ID: %s", client_id)
         try:
@@ -277,7 +294,7 @@ class MQTTConnectionManager:
 
             def on_connect(client, userdata, flags, rc, properties=None):
                 """Handle connection result."""
-                self._on_connect_callback(client, userdata, flags, rc)
+                self._on_connect_callback(client, userdata, flags, rc, properties)
 
         else:
 
@@ -338,10 +355,16 @@ class MQTTConnectionManager:
                 except UnicodeDecodeError:
                     payload = "<binary data>"
 
+                route = self._get_message_route(msg)
+                if route is False:
+                    # Second copy of an overlapping subscription
+                    self.duplicate_deliveries += 1
+                    return
+
                 # Process the message
                 if self.message_callback:
                     asyncio.run_coroutine_threadsafe(
-                        self.message_callback(msg.topic, payload),
+                        self.message_callback(msg.topic, payload, route),
                         self.hass.loop,
                     )
             except Exception as ex:
@@ -352,7 +375,28 @@ class MQTTConnectionManager:
         self.client.on_disconnect = on_disconnect
         self.client.on_message = on_message
 
-    def _on_connect_callback(self, client, userdata, flags, rc):
+    def _get_message_route(self, msg) -> Optional[int] | bool:
+        """Resolve a delivery's subscription identifiers to a route.
+
+        Returns the most specific route, None when the delivery carries no
+        identifiers (string routing applies) or False for a duplicate: a
+        copy delivered only for the username-agnostic subscription although
+        the topic is under the structure prefix, whose own subscription
+        delivers it as well.
+        """
+        properties = getattr(msg, "properties", None)
+        identifiers = getattr(properties, "SubscriptionIdentifier", None)
+        if not identifiers:
+            return None
+
+        primary = [i for i in identifiers if i < SUBSCRIPTION_ID_ALT_BASE_OFFSET]
+        if primary:
+            return max(primary)
+        if msg.topic.startswith(f"{self.structure_prefix}/"):
+            return False
+        return max(identifiers) - SUBSCRIPTION_ID_ALT_BASE_OFFSET
+
+    def _on_connect_callback(self, client, userdata, flags, rc, properties=None):
         """Common connection callback for different MQTT versions."""
         try:
             # Get human-readable reason message
@@ -363,6 +407,11 @@ class MQTTConnectionManager:
 
             if rc == 0:
                 self.connected = True
+                # Subscription identifiers are available on v5 unless the
+                # broker says otherwise
+                self.subscription_ids_available = self.protocol == getattr(
+                    mqtt, "MQTTv5", None
+                ) and bool(getattr(properties, "SubscriptionIdentifierAvailable", 1))
                 _LOGGER.info("Connected to MQTT broker: %s", reason_message)
 
                 # Notify the client
@@ -522,35 +571,108 @@ class MQTTConnectionManager:
             if not self._shutting_down:
                 asyncio.create_task(self._async_reconnect())
 
-    async def async_subscribe_topics(self) -> None:
-        """Subscribe to the OVMS topics."""
+    def _get_subscription_filters(self) -> Dict[str, int]:
+        """Return the topic filters the broker should deliver.
+
+        Until the subscription planner has seen the tree this is the whole
+        vehicle subtree; afterwards it is the planned, narrower set. Each
+        filter maps to its subscription identifier.
+        """
+        planned = (
+            self.subscription_planner.filters
+            if self.subscription_planner is not None
+            else None
+        )
+        if planned is None:
+            planned = [TOPIC_WILDCARD]
+
+        bases = [self.structure_prefix]
+        # Add a subscription with vehicle ID but without username
+        # Handle the case where topics might use different username patterns
+        vehicle_id = self.config.get(CONF_VEHICLE_ID, "")
+        prefix = self.config.get(CONF_TOPIC_PREFIX, "")
+        if vehicle_id and prefix:
+            bases.append(f"{prefix}/+/{vehicle_id}")
+
+        filters = {}
+        for index, base in enumerate(bases):
+            offset = SUBSCRIPTION_ID_ALT_BASE_OFFSET if index else 0
+            for relative in planned:
+                filters[f"{base}/{relative}"] = (
+                    self._get_subscription_route(relative) + offset
+                )
+        return filters
+
+    @staticmethod
+    def _get_subscription_route(relative_filter: str) -> int:
+        """Return the route of a filter relative to the vehicle base."""
+        if relative_filter == TOPIC_WILDCARD:
+            return SUBSCRIPTION_ROUTE_TREE
+        if relative_filter == SUBSCRIPTION_RESPONSE_FILTER:
+            return SUBSCRIPTION_ROUTE_RESPONSE
+        if relative_filter == STATUS_TOPIC_SUFFIX:
+            return SUBSCRIPTION_ROUTE_STATUS
+        return SUBSCRIPTION_ROUTE_METRIC
+
+    def _subscribe(self, filters: list[str], wanted: Dict[str, int], qos: int) -> None:
+        """Subscribe filters, tagged with identifiers where supported.
+
+        A SUBSCRIBE packet carries a single identifier, so filters are sent
+        in one packet per identifier. ``no_local`` keeps our own status and
+        command publishes from being delivered back to us.
+        """
+        if not self.subscription_ids_available:
+            self.client.subscribe([(topic, qos) for topic in filters])
+            return
+
+        groups: Dict[int, list[str]] = {}
+        for topic in filters:
+            groups.setdefault(wanted[topic], []).append(topic)
+        for identifier, topics in groups.items():
+            properties = mqtt.Properties(mqtt.PacketTypes.SUBSCRIBE)
+            properties.SubscriptionIdentifier = identifier
+            options = mqtt.SubscribeOptions(qos=qos, noLocal=True)
+            self.client.subscribe(
+                [(topic, options) for topic in topics], properties=properties
+            )
+
+    async def async_subscribe_topics(self, resubscribe: bool = True) -> None:
+        """Subscribe to the OVMS topics.
+
+        Args:
+            resubscribe: Subscribe every filter again, even ones already
+                subscribed (after a (re)connect). When False only the
+                difference to the current subscriptions is sent, so a re-plan
+                does not make the broker replay retained messages.
+        """
         if not self.connected:
             _LOGGER.warning("Cannot subscribe to topics, not connected")
             return
 
         try:
-            # Format the topic
             qos = self.config.get(CONF_QOS, DEFAULT_QOS)
-
-            # Subscribe to all topics under the structure prefix
-            topic = TOPIC_TEMPLATE.format(structure_prefix=self.structure_prefix)
-
-            _LOGGER.info("Subscribing to OVMS topic: %s", topic)
-            await self.hass.async_add_executor_job(self.client.subscribe, topic, qos)
-
-            # Add a subscription with vehicle ID but without username
-            # Handle the case where topics might use different username patterns
-            vehicle_id = self.config.get(CONF_VEHICLE_ID, "")
-            prefix = self.config.get(CONF_TOPIC_PREFIX, "")
-            if vehicle_id and prefix:
-                alternative_topic = f"{prefix}/+/{vehicle_id}/#"
-                _LOGGER.info(
-                    "Also subscribing to alternative topic pattern: %s",
-                    alternative_topic,
+            wanted = self._get_subscription_filters()
+            new_filters = [
+                topic
+                for topic in wanted
+                if resubscribe or topic not in self.subscriptions
+            ]
+            stale_filters = [
+                topic for topic in self.subscriptions if topic not in wanted
+            ]
+
+            # Subscribe before unsubscribing so nothing is missed in between
+            if new_filters:
+                _LOGGER.info("Subscribing to OVMS topics: %s", new_filters)
+                await self.hass.async_add_executor_job(
+                    self._subscribe, new_filters, wanted, qos
                 )
+            if stale_filters:
+                _LOGGER.info("Unsubscribing from OVMS topics: %s", stale_filters)
                 await self.hass.async_add_executor_job(
-                    self.client.subscribe, alternative_topic, qos
+                    self.client.unsubscribe, stale_filters
                 )
+            self.subscriptions = set(wanted)
         except Exception as ex:
             _LOGGER.exception("Error subscribing to topics: %s", ex)
 
@@ -0,0 +1,132 @@
+"""Persisted discovery snapshot for OVMS integration."""
+
+import logging
+from typing import Any, Dict, List
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
+
+from ..const import (
+    CONF_CONFIG_ENTRY_ID,
+    DISCOVERY_SNAPSHOT_SAVE_DELAY,
+    DISCOVERY_SNAPSHOT_STORAGE_KEY_TEMPLATE,
+    DISCOVERY_SNAPSHOT_STORAGE_VERSION,
+    DOMAIN,
+    LOGGER_NAME,
+)
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+
+def _create_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Create the Store holding the snapshot of one config entry."""
+    return Store(
+        hass,
+        DISCOVERY_SNAPSHOT_STORAGE_VERSION,
+        DISCOVERY_SNAPSHOT_STORAGE_KEY_TEMPLATE.format(entry_id=entry_id),
+    )
+
+
+async def async_remove_discovery_snapshot(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete the stored snapshot of a removed config entry."""
+    await _create_store(hass, entry_id).async_remove()
+
+
+class DiscoverySnapshot:
+    """Remember discovered entities between restarts.
+
+    Each record describes one entity the EntityFactory created: its topic,
+    unique_id, entity type, names, the metric path used to look up its
+    definition, and related entity IDs (the lat/lon sources of the combined
+    device tracker). Payloads and resolved metric definitions are not stored;
+    states come back through RestoreEntity and definitions are looked up again
+    from the metric path, so changes to the metric tables still apply.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: Dict[str, Any]):
+        """Initialize the discovery snapshot."""
+        self.hass = hass
+        self._store = _create_store(hass, config.get(CONF_CONFIG_ENTRY_ID))
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self.loaded_count = 0
+        self.pruned_count = 0
+
+    async def async_load(self) -> List[Dict[str, Any]]:
+        """Load the stored records that still have a registry entry.
+
+        Entities the user deleted, or that the staleness manager removed, are
+        dropped here so they are not resurrected on the next start.
+        """
+        try:
+            data = await self._store.async_load()
+        except Exception as ex:
+            _LOGGER.warning("Could not load discovery snapshot: %s", ex)
+            return []
+
+        if not isinstance(data, dict):
+            return []
+
+        registry = er.async_get(self.hass)
+        records = []
+        for record in data.get("entities", []):
+            unique_id = record.get("unique_id")
+            entity_type = record.get("entity_type")
+            if not unique_id or not entity_type or not record.get("topic"):
+                continue
+            if registry.async_get_entity_id(entity_type, DOMAIN, unique_id) is None:
+                self.pruned_count += 1
+                continue
+            self._records[unique_id] = record
+            records.append(record)
+
+        self.loaded_count = len(records)
+        if self.pruned_count:
+            _LOGGER.debug(
+                "Pruned %d snapshot entries without a registry entry",
+                self.pruned_count,
+            )
+            self._async_schedule_save()
+
+        return records
+
+    @callback
+    def async_record(self, record: Dict[str, Any]) -> None:
+        """Record (or refresh) the description of a created entity."""
+        unique_id = record["unique_id"]
+        if self._records.get(unique_id) == record:
+            return
+        self._records[unique_id] = record
+        self._async_schedule_save()
+
+    @callback
+    def async_discard(self, unique_id: str) -> None:
+        """Forget an entity that should no longer be recreated."""
+        if self._records.pop(unique_id, None) is not None:
+            self._async_schedule_save()
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Coalesce writes from a discovery burst into one save."""
+        self._dirty = True
+        self._store.async_delay_save(self._data_to_save, DISCOVERY_SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> Dict[str, Any]:
+        """Return the data to persist."""
+        self._dirty = False
+        return {"entities": list(self._records.values())}
+
+    async def async_shutdown(self) -> None:
+        """Write pending changes now so a reload starts from them."""
+        if self._dirty:
+            await self._store.async_save(self._data_to_save())
+
+    def get_status(self) -> Dict[str, int]:
+        """Return snapshot counters for diagnostics."""
+        return {
+            "records": len(self._records),
+            "restored": self.loaded_count,
+            "pruned": self.pruned_count,
+        }
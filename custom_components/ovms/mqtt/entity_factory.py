@@ -14,12 +14,13 @@ from ..const import (
     CONF_CLIENT_ID,
     CONF_CONFIG_ENTRY_ID,
     CONF_VEHICLE_ID,
+    ENTITY_BATCH_WINDOW,
     LOGGER_NAME,
     get_add_entities_signal,
 )
 from ..naming_service import EntityNamingService
 from ..attribute_manager import AttributeManager
-from ..metrics import get_metric_by_path, get_metric_by_pattern
+from ..metrics import resolve_metric
 from ..utils import get_namespaced_ovms_unique_id, get_ovms_device_info
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
@@ -36,6 +37,7 @@ class EntityFactory:
         config: Dict[str, Any],
         naming_service: EntityNamingService,
         attribute_manager: AttributeManager,
+        snapshot=None,
     ):
         """Initialize the entity factory."""
         self.hass = hass
@@ -44,6 +46,7 @@ class EntityFactory:
         self.config = config
         self.naming_service = naming_service
         self.attribute_manager = attribute_manager
+        self.snapshot = snapshot
         self.entity_queue = asyncio.Queue()
         self.platforms_loaded = False
         self.created_entities = set()
@@ -53,7 +56,12 @@ class EntityFactory:
         )
         self._client_id = config.get(CONF_CLIENT_ID)
         self._config_entry_id = config.get(CONF_CONFIG_ENTRY_ID)
-        self._add_entities_signal = get_add_entities_signal(self._config_entry_id)
+        # Entities waiting for the batch window, grouped by platform
+        self._pending_batches: Dict[str, List[Dict[str, Any]]] = {}
+        self._batch_flush_handle = None
+        # Entities recreated from the snapshot that are still queued; their
+        # payload is filled from the topic cache once platforms load
+        self._restored_queue: List[Dict[str, Any]] = []
 
     async def async_create_entities(
         self, topic: str, payload: str, entity_data: Dict[str, Any]
@@ -89,16 +97,16 @@ class EntityFactory:
                         unique_id,
                     )
 
-            # Get parts and metric info
+            # Get parts and the metric resolved by the topic parser
             parts = entity_data.get("parts", [])
             raw_name = entity_data.get("raw_name", "")
-            metric_info = entity_data.get("metric_info")
+            metric = entity_data.get("metric")
 
             # Create friendly name using the naming service
             friendly_name = entity_data.get("friendly_name")
             if not friendly_name:
                 friendly_name = self.naming_service.create_friendly_name(
-                    parts, metric_info, topic, raw_name
+                    parts, metric.definition if metric else None, topic, raw_name
                 )
 
             # Reduce logging frequency - only log entity creation for important entities or during setup
@@ -121,7 +129,7 @@ class EntityFactory:
             attributes = entity_data.get("attributes", {})
             category = attributes.get("category", "unknown")
             attributes = self.attribute_manager.prepare_attributes(
-                topic, category, parts, metric_info
+                topic, category, parts, metric
             )
 
             # Create entity data for dispatcher
@@ -135,6 +143,8 @@ class EntityFactory:
                 "device_info": self._get_device_info(),
                 "attributes": attributes,
             }
+            if metric is not None:
+                dispatcher_data["metric"] = metric
 
             # Add switch-specific config if this is a switch entity
             if entity_type == "switch" and "switch_config" in entity_data:
@@ -143,6 +153,23 @@ class EntityFactory:
             if entity_type == "lock" and "lock_config" in entity_data:
                 dispatcher_data["lock_config"] = entity_data["lock_config"]
 
+            if self.snapshot is not None:
+                record = {
+                    "topic": topic,
+                    "unique_id": unique_id,
+                    "entity_type": entity_type,
+                    "name": entity_data.get("name"),
+                    "friendly_name": friendly_name,
+                    "category": category,
+                    "parts": parts,
+                    "metric_path": entity_data.get("metric_path"),
+                    "priority": priority,
+                }
+                for key in ("switch_config", "lock_config"):
+                    if key in dispatcher_data:
+                        record[key] = dispatcher_data[key]
+                self.snapshot.async_record(record)
+
             # Check if this is a coordinate entity to track for the device tracker
             is_coordinate = self._is_coordinate_entity(topic, entity_data)
             if is_coordinate:
@@ -150,11 +177,7 @@ class EntityFactory:
 
             # Send to platform or queue for later
             if self.platforms_loaded:
-                async_dispatcher_send(
-                    self.hass,
-                    self._add_entities_signal,
-                    dispatcher_data,
-                )
+                self._add_to_batch(dispatcher_data)
             else:
                 await self.entity_queue.put(dispatcher_data)
 
@@ -294,13 +317,25 @@ class EntityFactory:
                 "combined_location", tracker_id, "device_tracker", priority=10
             )
 
+            if self.snapshot is not None:
+                self.snapshot.async_record(
+                    {
+                        "topic": "combined_location",
+                        "unique_id": tracker_id,
+                        "entity_type": "device_tracker",
+                        "name": tracker_data["name"],
+                        "friendly_name": friendly_name,
+                        "category": "location",
+                        "parts": [],
+                        "metric_path": None,
+                        "priority": 10,
+                        "related": dict(self.location_entities),
+                    }
+                )
+
             # Send to platform or queue for later
             if self.platforms_loaded:
-                async_dispatcher_send(
-                    self.hass,
-                    self._add_entities_signal,
-                    tracker_data,
-                )
+                self._add_to_batch(tracker_data)
             else:
                 await self.entity_queue.put(tracker_data)
 
@@ -354,6 +389,175 @@ class EntityFactory:
                 self.config.get(CONF_VEHICLE_ID, "unknown"),
             )
 
+    async def async_restore_entities(self, records: List[Dict[str, Any]]) -> int:
+        """Recreate entities recorded in the discovery snapshot.
+
+        Runs before the broker connects: every record is registered for its
+        topic (so the first live message is dispatched as an update instead
+        of going through discovery again) and queued for the platforms with
+        no payload; RestoreEntity supplies the last known state.
+
+        Returns:
+            The number of entities restored
+        """
+        restored = 0
+        tracker_record = None
+
+        for record in records:
+            unique_id = record["unique_id"]
+            if unique_id in self.created_entities:
+                continue
+
+            if record["entity_type"] == "device_tracker":
+                # Needs its lat/lon sources tracked first; restored last
+                tracker_record = record
+                continue
+
+            topic = record["topic"]
+            parts = record.get("parts") or []
+            metric_path = record.get("metric_path")
+            # Topics the parser resolves (all but /status) carry a descriptor
+            metric = (
+                resolve_metric(metric_path, parts) if metric_path or parts else None
+            )
+
+            self.created_entities.add(unique_id)
+            self.entity_registry.register_entity(
+                topic, unique_id, record["entity_type"], record.get("priority", 0)
+            )
+
+            dispatcher_data = {
+                "entity_type": record["entity_type"],
+                "unique_id": unique_id,
+                "name": record.get("name"),
+                "friendly_name": record.get("friendly_name"),
+                "topic": topic,
+                "payload": None,
+                "device_info": self._get_device_info(),
+                "attributes": self.attribute_manager.prepare_attributes(
+                    topic, record.get("category", "unknown"), parts, metric
+                ),
+            }
+            if metric is not None:
+                dispatcher_data["metric"] = metric
+            for key in ("switch_config", "lock_config"):
+                if key in record:
+                    dispatcher_data[key] = record[key]
+
+            if self._is_coordinate_entity(topic, record):
+                await self._track_coordinate_entity(topic, unique_id, record)
+
+            self._restored_queue.append(dispatcher_data)
+            await self.entity_queue.put(dispatcher_data)
+            restored += 1
+
+        if tracker_record is not None and "latitude" in self.location_entities:
+            restored += self._restore_combined_device_tracker(tracker_record)
+
+        # Coordinates restored without a tracker record (e.g. it was deleted)
+        if (
+            "latitude" in self.location_entities
+            and "longitude" in self.location_entities
+            and not self.combined_tracker_created
+        ):
+            await self._create_combined_device_tracker()
+
+        _LOGGER.info("Restored %d entities from discovery snapshot", restored)
+        return restored
+
+    def _restore_combined_device_tracker(self, record: Dict[str, Any]) -> int:
+        """Recreate the combined device tracker from its snapshot record."""
+        tracker_id = record["unique_id"]
+        self.combined_tracker_created = True
+        self.created_entities.add(tracker_id)
+
+        attributes = self.attribute_manager.prepare_attributes(
+            "combined_location", "location", []
+        )
+        attributes.update(
+            {
+                "lat_entity_id": self.location_entities.get("latitude"),
+                "lon_entity_id": self.location_entities.get("longitude"),
+            }
+        )
+
+        for coordinate in ("latitude", "longitude"):
+            if coordinate in self.location_entities:
+                self.entity_registry.register_relationship(
+                    self.location_entities[coordinate], tracker_id, "combined_tracker"
+                )
+        self.entity_registry.register_entity(
+            "combined_location", tracker_id, "device_tracker", priority=10
+        )
+
+        self.entity_queue.put_nowait(
+            {
+                "entity_type": "device_tracker",
+                "unique_id": tracker_id,
+                "name": record.get("name"),
+                "friendly_name": record.get("friendly_name"),
+                "topic": "combined_location",
+                "payload": {},
+                "device_info": self._get_device_info(),
+                "attributes": attributes,
+            }
+        )
+        return 1
+
+    @callback
+    def refresh_restored_payloads(self, topic_cache: Dict[str, Dict[str, Any]]) -> None:
+        """Give still-queued restored entities the payloads received meanwhile.
+
+        Messages for restored topics that arrive before the platforms load are
+        dispatched as updates nobody listens to yet; seeding the queued entity
+        with the cached payload keeps that first value.
+        """
+        for dispatcher_data in self._restored_queue:
+            cached = topic_cache.get(dispatcher_data["topic"])
+            if cached is not None:
+                dispatcher_data["payload"] = cached["payload"]
+        self._restored_queue.clear()
+
+    def get_queued_entities(self) -> List[Any]:
+        """Return the containers of entities not created yet, for diagnostics."""
+        # asyncio.Queue keeps its items in a deque
+        return [
+            getattr(self.entity_queue, "_queue", ()),
+            self._pending_batches,
+            self._restored_queue,
+        ]
+
+    @callback
+    def _add_to_batch(self, dispatcher_data: Dict[str, Any]) -> None:
+        """Hold an entity until the batch window closes.
+
+        The first entity of a batch schedules the flush; anything discovered
+        inside the window joins the same per-platform list.
+        """
+        self._pending_batches.setdefault(dispatcher_data["entity_type"], []).append(
+            dispatcher_data
+        )
+        if self._batch_flush_handle is None:
+            self._batch_flush_handle = self.hass.loop.call_later(
+                ENTITY_BATCH_WINDOW, self._flush_batches
+            )
+
+    @callback
+    def _flush_batches(self) -> None:
+        """Send each platform its pending entities as one list."""
+        if self._batch_flush_handle is not None:
+            self._batch_flush_handle.cancel()
+            self._batch_flush_handle = None
+
+        batches, self._pending_batches = self._pending_batches, {}
+        for entity_type, batch in batches.items():
+            _LOGGER.debug("Sending %d %s entities to platform", len(batch), entity_type)
+            async_dispatcher_send(
+                self.hass,
+                get_add_entities_signal(self._config_entry_id, entity_type),
+                batch,
+            )
+
     async def async_process_queued_entities(self) -> None:
         """Process any queued entities."""
         self.platforms_loaded = True
@@ -361,15 +565,19 @@ class EntityFactory:
         queued_count = self.entity_queue.qsize()
         _LOGGER.info("Processing %d queued entities", queued_count)
 
-        # Process all queued entities
+        # Everything discovered before the platforms loaded goes out as one
+        # batch per platform
         while not self.entity_queue.empty():
-            entity_data = await self.entity_queue.get()
-            _LOGGER.debug("Processing queued entity: %s", entity_data.get("name"))
-
-            async_dispatcher_send(
-                self.hass,
-                self._add_entities_signal,
-                entity_data,
+            entity_data = self.entity_queue.get_nowait()
+            self._pending_batches.setdefault(entity_data["entity_type"], []).append(
+                entity_data
             )
-
             self.entity_queue.task_done()
+
+        self._flush_batches()
+
+    def async_shutdown(self) -> None:
+        """Cancel a pending batch flush on teardown."""
+        if self._batch_flush_handle is not None:
+            self._batch_flush_handle.cancel()
+            self._batch_flush_handle = None
@@ -0,0 +1,198 @@
+"""Priority-aware load shedding for OVMS integration."""
+
+import logging
+from typing import Any, Callable, Dict, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+
+from ..const import (
+    CATEGORY_DIAGNOSTIC,
+    CATEGORY_LOCATION,
+    CATEGORY_NETWORK,
+    CATEGORY_SYSTEM,
+    LOAD_CRITICAL_METRICS,
+    LOAD_LAG_PROBE_INTERVAL,
+    LOAD_LAG_SMOOTHING,
+    LOAD_PRIORITY_CRITICAL,
+    LOAD_PRIORITY_LOW,
+    LOAD_PRIORITY_NORMAL,
+    LOAD_SHED_FLUSH_BATCH,
+    LOAD_SHED_LAG_THRESHOLD,
+    LOAD_SHED_MAX_DELAY,
+    LOAD_SHED_SEVERE_LAG,
+    LOCK_TYPES,
+    LOGGER_NAME,
+)
+from ..metrics import determine_category_from_topic, get_metric_by_path
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Pressure level from which updates of each class are delayed
+_DEFER_LEVEL = {LOAD_PRIORITY_LOW: 1, LOAD_PRIORITY_NORMAL: 2}
+_LEVEL_THRESHOLDS = (LOAD_SHED_LAG_THRESHOLD, LOAD_SHED_SEVERE_LAG)
+_LOW_CATEGORIES = (CATEGORY_DIAGNOSTIC, CATEGORY_NETWORK, CATEGORY_SYSTEM)
+
+
+class LoadShedder:
+    """Delay low-priority entity updates while the event loop is lagging.
+
+    A timer measures how late the loop runs it. Above LOAD_SHED_LAG_THRESHOLD
+    low-priority updates (diagnostics, network, per-cell and vehicle-specific
+    metrics) are held back, keeping only the latest value per topic; above
+    LOAD_SHED_SEVERE_LAG normal ones are too. Location, SOC, charging state
+    and locks are always dispatched at once. Held updates are released in
+    batches once the lag drops, or after LOAD_SHED_MAX_DELAY at the latest.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        structure_prefix: str,
+        dispatch: Callable[[str, Any], None],
+    ) -> None:
+        """Initialize the load shedder."""
+        self.hass = hass
+        self._metric_prefix = f"{structure_prefix}/metric/"
+        self._dispatch = dispatch
+        self._priorities: Dict[str, str] = {}
+        # topic -> (latest payload, loop time first held); insertion order
+        # is the order topics were first held
+        self._deferred: Dict[str, Tuple[Any, float]] = {}
+        self._probe_handle = None
+        self._probe_due = 0.0
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.level = 0
+        self.pressure_events = 0
+        self.counts = {"passed": 0, "deferred": 0, "shed": 0, "flushed": 0}
+        self.deferred_by_priority = {LOAD_PRIORITY_NORMAL: 0, LOAD_PRIORITY_LOW: 0}
+
+    def get_priority(self, topic: str) -> str:
+        """Return the priority class of a topic, from its metric definition."""
+        priority = self._priorities.get(topic)
+        if priority is not None:
+            return priority
+
+        priority = LOAD_PRIORITY_NORMAL
+        if topic.startswith(self._metric_prefix):
+            metric_path = topic[len(self._metric_prefix) :].replace("/", ".")
+            metric_info = get_metric_by_path(metric_path) or {}
+            category = metric_info.get("category") or determine_category_from_topic(
+                metric_path.split(".")
+            )
+            if (
+                metric_path in LOAD_CRITICAL_METRICS
+                or metric_path in LOCK_TYPES
+                or metric_path.endswith(".locked")
+                or category == CATEGORY_LOCATION
+            ):
+                priority = LOAD_PRIORITY_CRITICAL
+            elif (
+                metric_path.startswith("x")
+                or metric_info.get("has_cell_data")
+                or category in _LOW_CATEGORIES
+            ):
+                priority = LOAD_PRIORITY_LOW
+        self._priorities[topic] = priority
+        return priority
+
+    @callback
+    def dispatch(self, topic: str, payload: Any) -> None:
+        """Dispatch an update now, or hold it while the loop is lagging."""
+        priority = self.get_priority(topic)
+        if priority == LOAD_PRIORITY_CRITICAL or self.level < _DEFER_LEVEL[priority]:
+            if self._deferred and self._deferred.pop(topic, None) is not None:
+                # The held value is superseded by this one
+                self.counts["shed"] += 1
+            self.counts["passed"] += 1
+            self._dispatch(topic, payload)
+            return
+
+        held = self._deferred.get(topic)
+        if held is not None:
+            self.counts["shed"] += 1
+            held_since = held[1]
+        else:
+            held_since = self.hass.loop.time()
+        self._deferred[topic] = (payload, held_since)
+        self.counts["deferred"] += 1
+        self.deferred_by_priority[priority] += 1
+
+    @callback
+    def start(self) -> None:
+        """Start measuring loop lag."""
+        if self._probe_handle is None:
+            self._schedule_probe()
+
+    @callback
+    def stop(self) -> None:
+        """Stop measuring and drop held updates."""
+        if self._probe_handle is not None:
+            self._probe_handle.cancel()
+            self._probe_handle = None
+        self._deferred.clear()
+        self.level = 0
+
+    def _schedule_probe(self) -> None:
+        """Schedule the next lag sample."""
+        self._probe_due = self.hass.loop.time() + LOAD_LAG_PROBE_INTERVAL
+        self._probe_handle = self.hass.loop.call_at(self._probe_due, self._probe)
+
+    @callback
+    def _probe(self) -> None:
+        """Sample how late this timer ran and adjust the pressure level."""
+        now = self.hass.loop.time()
+        sample = max(0.0, now - self._probe_due)
+        if sample >= self.lag:
+            self.lag = sample
+        else:
+            self.lag += (sample - self.lag) * LOAD_LAG_SMOOTHING
+        self.max_lag = max(self.max_lag, sample)
+
+        level = 0
+        for index, threshold in enumerate(_LEVEL_THRESHOLDS, 1):
+            if self.lag >= (threshold if self.level < index else threshold / 2):
+                level = index
+        if level != self.level:
+            if level > self.level:
+                self.pressure_events += 1
+            _LOGGER.debug(
+                "Event loop lag %.0f ms: load shedding level %d -> %d",
+                self.lag * 1000,
+                self.level,
+                level,
+            )
+            self.level = level
+
+        if self._deferred:
+            self._flush(now)
+        self._schedule_probe()
+
+    def _flush(self, now: float) -> None:
+        """Dispatch held updates whose class is no longer delayed, or too old."""
+        released = []
+        for topic, (payload, held_since) in self._deferred.items():
+            if (
+                self.level < _DEFER_LEVEL[self._priorities[topic]]
+                or now - held_since >= LOAD_SHED_MAX_DELAY
+            ):
+                released.append((topic, payload))
+                if len(released) >= LOAD_SHED_FLUSH_BATCH:
+                    break
+
+        for topic, payload in released:
+            del self._deferred[topic]
+            self.counts["flushed"] += 1
+            self._dispatch(topic, payload)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return load shedding state for diagnostics."""
+        return {
+            "level": self.level,
+            "lag_ms": round(self.lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "pressure_events": self.pressure_events,
+            "held_topics": len(self._deferred),
+            **self.counts,
+            "deferred_by_priority": dict(self.deferred_by_priority),
+        }
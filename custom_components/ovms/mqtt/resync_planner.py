@@ -0,0 +1,153 @@
+"""Staged metric resync for OVMS integration."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..const import (
+    CONF_RESYNC_PRIORITY,
+    DEFAULT_RESYNC_PRIORITY,
+    LOGGER_NAME,
+    RESYNC_FRESH_AGE,
+    RESYNC_PACE_INTERVAL,
+    RESYNC_QUIET_MESSAGES,
+    RESYNC_REPLY_GRACE,
+    RESYNC_STAGE_TIMEOUT,
+)
+from ..utils import parse_resync_priority
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+
+class ResyncPlanner:
+    """Request metrics in priority stages after a (re)connect.
+
+    Requesting ``*`` makes the module dump every metric at once, which loads
+    its cellular link, the broker and the event loop together. Instead each
+    stage's patterns are requested in turn; the next stage waits until the
+    arrival rate shows the module has finished answering, and a stage whose
+    known topics all arrived within RESYNC_FRESH_AGE is skipped.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        structure_prefix: str,
+        topic_cache: Dict[str, Dict[str, Any]],
+        request_metrics: Callable[[str], Awaitable[bool]],
+        get_message_count: Callable[[], int],
+    ) -> None:
+        """Initialize the resync planner."""
+        self.stages = parse_resync_priority(
+            config.get(CONF_RESYNC_PRIORITY, DEFAULT_RESYNC_PRIORITY)
+        )
+        self._metric_prefix = f"{structure_prefix}/metric/"
+        self._topic_cache = topic_cache
+        self._request_metrics = request_metrics
+        self._get_message_count = get_message_count
+        self._running = False
+        self._cancelled = False
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    def _stage_is_fresh(self, patterns: List[str], now: float) -> bool:
+        """Return True if every known topic of the stage arrived recently."""
+        exact = set()
+        prefixes = []
+        for pattern in patterns:
+            path = pattern.replace(".", "/")
+            if path.endswith("*"):
+                prefixes.append(self._metric_prefix + path[:-1])
+            else:
+                exact.add(self._metric_prefix + path)
+        prefixes = tuple(prefixes)
+
+        seen = False
+        for topic, entry in self._topic_cache.items():
+            if topic in exact or topic.startswith(prefixes):
+                if now - entry.get("timestamp", 0) > RESYNC_FRESH_AGE:
+                    return False
+                seen = True
+        return seen
+
+    async def _async_wait_for_quiet(self) -> None:
+        """Wait until the module has finished answering the last stage.
+
+        A quiet sample before the reply has started only means the request
+        is still in flight, so it ends the wait only after RESYNC_REPLY_GRACE.
+        """
+        waited = 0.0
+        replied = False
+        last_count = self._get_message_count()
+        while waited < RESYNC_STAGE_TIMEOUT and not self._cancelled:
+            await asyncio.sleep(RESYNC_PACE_INTERVAL)
+            waited += RESYNC_PACE_INTERVAL
+            count = self._get_message_count()
+            if count - last_count > RESYNC_QUIET_MESSAGES:
+                replied = True
+            elif replied or waited >= RESYNC_REPLY_GRACE:
+                return
+            last_count = count
+
+    async def async_resync(self) -> bool:
+        """Run the staged resync; only one runs at a time.
+
+        Returns:
+            False if a resync was already running or a request failed.
+        """
+        if self._running:
+            _LOGGER.debug("Metric resync already running")
+            return False
+
+        self._running = True
+        self._cancelled = False
+        started = time.monotonic()
+        sent: List[str] = []
+        skipped: List[str] = []
+        success = True
+        try:
+            for index, patterns in enumerate(self.stages):
+                if self._cancelled:
+                    break
+                label = ",".join(patterns)
+                loop_now = asyncio.get_running_loop().time()
+                if self._stage_is_fresh(patterns, loop_now):
+                    _LOGGER.debug("Skipping fresh resync stage %d: %s", index, label)
+                    skipped.append(label)
+                    continue
+
+                for pattern in patterns:
+                    if not await self._request_metrics(pattern):
+                        success = False
+                        break
+                if not success:
+                    break
+                sent.append(label)
+                if index < len(self.stages) - 1:
+                    await self._async_wait_for_quiet()
+        finally:
+            self._running = False
+            self.last_run = {
+                "sent": sent,
+                "skipped": skipped,
+                "duration": round(time.monotonic() - started, 2),
+                "completed": success and not self._cancelled,
+            }
+            _LOGGER.info(
+                "Metric resync: %d stages requested, %d fresh stages skipped",
+                len(sent),
+                len(skipped),
+            )
+        return success
+
+    def cancel(self) -> None:
+        """Stop a running resync after its current step."""
+        self._cancelled = True
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return resync state for diagnostics."""
+        return {
+            "stages": [list(stage) for stage in self.stages],
+            "running": self._running,
+            "last_run": self.last_run,
+        }
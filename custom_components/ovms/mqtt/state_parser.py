@@ -1,55 +1,54 @@
 """State parser for OVMS integration."""
 
-import json
 import logging
-import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List
 
 from homeassistant.components.sensor import SensorDeviceClass
 
 from ..const import LOGGER_NAME
+from ..entity_state import (
+    BINARY_SENSOR_FALSE_STATES,
+    BINARY_SENSOR_TRUE_STATES,
+    parse_boolean_state,
+)
+from ..payload import decode_payload, raw_payload
+from ..sensor import parsers
+from ..sensor.parsers import NUMERIC_DEVICE_CLASSES, SPECIAL_STATE_VALUES
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
-# List of device classes that should have numeric values
-NUMERIC_DEVICE_CLASSES = [
-    SensorDeviceClass.BATTERY,
-    SensorDeviceClass.CURRENT,
-    SensorDeviceClass.DATA_SIZE,
-    SensorDeviceClass.ENERGY,
-    SensorDeviceClass.HUMIDITY,
-    SensorDeviceClass.POWER,
-    SensorDeviceClass.TEMPERATURE,
-    SensorDeviceClass.VOLTAGE,
-    SensorDeviceClass.DISTANCE,
-    SensorDeviceClass.SPEED,
-]
-
-# Special string values that should be converted to None for numeric sensors
-SPECIAL_STATE_VALUES = ["unavailable", "unknown", "none", "", "null", "nan"]
+__all__ = ["NUMERIC_DEVICE_CLASSES", "SPECIAL_STATE_VALUES", "StateParser"]
 
 
 class StateParser:
-    """Parser for OVMS state values."""
+    """Parser for OVMS state values.
+
+    A thin layer over the sensor parsers, which own the value rules. It only
+    adds the topic-level handling of comma-separated payloads: cell data is
+    passed through unchanged, other vectors are averaged.
+    """
 
     @staticmethod
     def parse_value(
         value: Any,
-        device_class: Optional[Any] = None,
-        state_class: Optional[Any] = None,
+        device_class: Any = None,
+        state_class: Any = None,
         topic: str = "",
     ) -> Any:
-        """Parse the value from the payload with enhanced precision and validation."""
+        """Parse the value from the payload with enhanced precision and validation.
+
+        value is a raw payload or a DecodedPayload.
+        """
+        payload = value
+        value = raw_payload(payload)
+        numeric = StateParser.requires_numeric_value(device_class, state_class)
+
         # Handle special state values for numeric sensors
-        if StateParser.requires_numeric_value(
-            device_class, state_class
-        ) and StateParser.is_special_state_value(value):
+        if numeric and StateParser.is_special_state_value(value):
             return None
 
         # Special handling for yes/no values in numeric sensors
-        if StateParser.requires_numeric_value(device_class, state_class) and isinstance(
-            value, str
-        ):
+        if numeric and isinstance(value, str):
             # Convert common boolean strings to numeric values
             if value.lower() in ["no", "off", "false", "disabled"]:
                 return 0
@@ -58,144 +57,42 @@ class StateParser:
 
         # Check if this is a comma-separated list of numbers (including negative numbers)
         if isinstance(value, str) and "," in value:
-            # Check if this is cell data that should NOT be averaged
-            is_cell_data = StateParser._is_cell_data_topic(topic)
-
             _LOGGER.debug(
-                f"StateParser: Processing comma-separated value for topic '{topic}': {value}"
+                "StateParser: Processing comma-separated value for topic '%s': %s",
+                topic,
+                value,
             )
-            _LOGGER.debug(f"StateParser: Is cell data: {is_cell_data}")
 
-            if is_cell_data:
+            if StateParser._is_cell_data_topic(topic):
                 # For cell data, return the raw comma-separated string for processing by sensor entities
                 _LOGGER.debug(
-                    f"StateParser: Returning raw cell data for topic '{topic}': {value}"
+                    "StateParser: Returning raw cell data for topic '%s': %s",
+                    topic,
+                    value,
                 )
                 return value
 
-            try:
-                parts_str = [s.strip() for s in value.split(",") if s.strip()]
-
-                if not parts_str:
-                    # If all parts were empty after splitting,
-                    # raise ValueError to fall through to 'pass'
-                    # This will then correctly result in None for a numeric sensor.
-                    raise ValueError(
-                        "No valid numeric parts found in comma-separated value"
-                    )
-
-                parts = [float(p) for p in parts_str]
-                if parts:
-                    # Calculate and return statistics
-                    avg_value = sum(parts) / len(parts)
-                    # Return the average as the main value, rounded to 6 decimal places for better precision
-                    result = round(avg_value, 6)
-
-                    # Additional validation for power metrics
-                    if device_class == SensorDeviceClass.POWER:
-                        result = StateParser._validate_power_value(result, topic)
-
-                    return result
-            except (ValueError, TypeError):
-                # If any part can't be converted to float, or cleaning fails to produce valid parts
-                pass  # Fall through to other parsing methods or return None
-
-        # Try parsing as JSON first
-        try:
-            json_val = json.loads(value)
-
-            # Handle special JSON values
-            if StateParser.is_special_state_value(json_val):
-                return None
-
-            # If JSON is a dict, extract likely value
-            if isinstance(json_val, dict):
-                result = None
-                if "value" in json_val:
-                    result = json_val["value"]
-                elif "state" in json_val:
-                    result = json_val["state"]
-                else:
-                    # Return first numeric value found
-                    for key, val in json_val.items():
-                        if isinstance(val, (int, float)):
-                            result = val
-                            break
-
-                # Handle special values in result
-                if StateParser.is_special_state_value(result):
-                    return None
-
-                # If we have a result, return it; otherwise fall back to string representation
-                if result is not None:
-                    return result
-
-                # If we need a numeric value but couldn't extract one, return None
-                if StateParser.requires_numeric_value(device_class, state_class):
-                    return None
-                return str(json_val)
-
-            # If JSON is a scalar, use it directly
-            if isinstance(json_val, (int, float)):
-                return json_val
-
-            if isinstance(json_val, str):
-                # Handle special string values
-                if StateParser.is_special_state_value(json_val):
-                    return None
-
-                # If we need a numeric value but got a string, try to convert it
-                if StateParser.requires_numeric_value(device_class, state_class):
-                    try:
-                        # Try to preserve integer type when possible
-                        if "." not in json_val.strip():
-                            return int(json_val)
-                        return float(json_val)
-                    except (ValueError, TypeError):
-                        return None
-                return json_val
-
-            if isinstance(json_val, bool):
-                # If we need a numeric value, convert bool to int
-                if StateParser.requires_numeric_value(device_class, state_class):
-                    return 1 if json_val else 0
-                return json_val
-
-            # For arrays or other types, convert to string if not numeric
-            if StateParser.requires_numeric_value(device_class, state_class):
-                return None
-            return str(json_val)
-
-        except (ValueError, json.JSONDecodeError):
-            # Not JSON, try numeric
-            try:
-                # Check if it's a float first (contains a decimal point)
-                if isinstance(value, str) and "." in value:
-                    return float(value)
-                # Try to parse as integer first to preserve integer type
-                return int(value)
-            except (ValueError, TypeError):
-                # If we need a numeric value but couldn't convert, return None
-                if StateParser.requires_numeric_value(device_class, state_class):
-                    return None
-                # Otherwise return as string
-                return value
+            payload = decode_payload(payload)
+            if payload.numbers:
+                # Return the average as the main value, rounded to 6 decimal places for better precision
+                result = round(sum(payload.numbers) / len(payload.numbers), 6)
+
+                # Additional validation for power metrics
+                if device_class == SensorDeviceClass.POWER:
+                    result = StateParser._validate_power_value(result, topic)
+
+                return result
+            # Not a numeric vector: fall through to the other parsing methods
+
+        return parsers.parse_value(payload, device_class, state_class, False, topic)
 
     @staticmethod
     def parse_binary_state(value: Any) -> bool:
         """Parse the state string to a boolean."""
         try:
-            if isinstance(value, str):
-                if value.lower() in ("true", "on", "yes", "1", "open", "locked"):
-                    return True
-                if value.lower() in ("false", "off", "no", "0", "closed", "unlocked"):
-                    return False
-
-            # Try numeric comparison
-            try:
-                return float(value) > 0
-            except (ValueError, TypeError):
-                return False
+            return parse_boolean_state(
+                value, (BINARY_SENSOR_TRUE_STATES, BINARY_SENSOR_FALSE_STATES)
+            )
         except Exception as ex:
             _LOGGER.exception("Error parsing binary state '%s': %s", value, ex)
             return False
@@ -204,39 +101,27 @@ class StateParser:
     def extract_attributes_from_json(value: Any) -> Dict[str, Any]:
         """Extract attributes from a JSON payload."""
         attributes = {}
-        try:
-            json_data = json.loads(value) if isinstance(value, str) else value
-            if isinstance(json_data, dict):
-                # Add useful attributes from the data
-                for key, val in json_data.items():
-                    if key not in ["value", "state", "data"]:
-                        attributes[key] = val
-
-                # If there's a timestamp in the JSON, use it
-                if "timestamp" in json_data:
-                    attributes["device_timestamp"] = json_data["timestamp"]
-        except (ValueError, json.JSONDecodeError):
-            # Not JSON, that's fine
-            pass
+        json_data = decode_payload(value).json
+        if isinstance(json_data, dict):
+            # Add useful attributes from the data
+            for key, val in json_data.items():
+                if key not in ["value", "state", "data"]:
+                    attributes[key] = val
+
+            # If there's a timestamp in the JSON, use it
+            if "timestamp" in json_data:
+                attributes["device_timestamp"] = json_data["timestamp"]
         return attributes
 
     @staticmethod
     def requires_numeric_value(device_class: Any, state_class: Any) -> bool:
         """Check if this sensor requires a numeric value based on its device class."""
-        return device_class in NUMERIC_DEVICE_CLASSES or state_class in [
-            "measurement",
-            "total",
-            "total_increasing",
-        ]
+        return parsers.requires_numeric_value(device_class, state_class)
 
     @staticmethod
     def is_special_state_value(value: Any) -> bool:
         """Check if a value is a special state value that should be converted to None."""
-        if value is None:
-            return True
-        if isinstance(value, str) and value.lower() in SPECIAL_STATE_VALUES:
-            return True
-        return False
+        return parsers.is_special_state_value(value)
 
     @staticmethod
     def calculate_statistics(values: List[float]) -> Dict[str, float]:
@@ -253,15 +138,7 @@ class StateParser:
                 "count": len(values),
             }
 
-            # Calculate median
-            sorted_values = sorted(values)
-            n = len(sorted_values)
-            if n % 2 == 0:
-                stats["median"] = (
-                    sorted_values[n // 2 - 1] + sorted_values[n // 2]
-                ) / 2
-            else:
-                stats["median"] = sorted_values[n // 2]
+            stats["median"] = parsers.calculate_median(values)
 
             return stats
 
@@ -277,28 +154,25 @@ class StateParser:
             if isinstance(payload, (int, float)):
                 return {"value": float(payload)}
 
-            # Try JSON parsing
-            try:
-                data = json.loads(payload) if isinstance(payload, str) else payload
-                if isinstance(data, dict):
-                    if "latitude" in data and "longitude" in data:
-                        return {
-                            "latitude": float(data["latitude"]),
-                            "longitude": float(data["longitude"]),
-                            "gps_accuracy": data.get("gps_accuracy", 0),
-                        }
-                    else:
-                        # Extract any single value
-                        for key, value in data.items():
-                            if isinstance(value, (int, float)):
-                                return {"value": float(value)}
-            except (ValueError, json.JSONDecodeError):
-                pass
+            payload = decode_payload(payload)
+            data = payload.json
+            if isinstance(data, dict):
+                if "latitude" in data and "longitude" in data:
+                    return {
+                        "latitude": float(data["latitude"]),
+                        "longitude": float(data["longitude"]),
+                        "gps_accuracy": data.get("gps_accuracy", 0),
+                    }
+                else:
+                    # Extract any single value
+                    for key, value in data.items():
+                        if isinstance(value, (int, float)):
+                            return {"value": float(value)}
 
             # Try direct string conversion
-            if isinstance(payload, str):
+            if isinstance(payload.raw, str):
                 try:
-                    return {"value": float(payload.strip())}
+                    return {"value": float(payload.raw.strip())}
                 except (ValueError, TypeError):
                     pass
 
@@ -0,0 +1,183 @@
+"""Subscription planner for OVMS integration."""
+
+import logging
+from typing import Dict, List, Optional
+
+from ..const import LOGGER_NAME, SUBSCRIPTION_RESPONSE_FILTER
+
+# Module status topic; parsed even when blacklisted, so always subscribed
+STATUS_TOPIC_SUFFIX = "status"
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+
+class _TopicNode:
+    """One path segment of the discovered topic tree."""
+
+    __slots__ = ("children", "is_topic")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TopicNode"] = {}
+        self.is_topic = False
+
+
+class SubscriptionPlanner:
+    """Turn the discovered topic tree and the blacklist into subscriptions.
+
+    Blacklist patterns are substring matches on the full topic, so a subtree
+    whose own path already contains a pattern can only ever deliver
+    blacklisted topics. The plan drops such subtrees and covers the rest with
+    as few filters as possible:
+
+    * a subtree without droppable descendants becomes one ``path/#`` filter;
+    * a subtree with droppable descendants is split: its leaf topics are
+      covered by ``path/+`` and every other child is planned recursively;
+    * the top level is always split and its leaves are subscribed by name,
+      which keeps the busy ``event`` topic out while ``status`` stays in;
+    * of ``client/`` only our command responses are subscribed.
+
+    Filters are relative to the structure prefix; the connection manager
+    anchors them on both the structure prefix and the username-agnostic
+    ``{prefix}/+/{vehicle_id}`` base. Subtrees the tree has never seen are
+    not covered, so the client widens back to the whole tree from time to
+    time and plans again once it has settled.
+    """
+
+    def __init__(
+        self, structure_prefix: str, vehicle_id: str, blacklist: List[str]
+    ) -> None:
+        """Initialize the subscription planner."""
+        self.structure_prefix = structure_prefix
+        self._vehicle_marker = f"/{vehicle_id}/" if vehicle_id else None
+        self.blacklist = list(blacklist)
+        self._root = _TopicNode()
+        self.topic_count = 0
+        # Relative filters of the applied plan; None until the first plan
+        self.filters: Optional[List[str]] = None
+
+    def _relative_parts(self, topic: str) -> Optional[List[str]]:
+        """Split a topic into path segments below the vehicle base."""
+        if topic.startswith(f"{self.structure_prefix}/"):
+            suffix = topic[len(self.structure_prefix) + 1 :]
+        elif self._vehicle_marker and self._vehicle_marker in topic:
+            suffix = topic.split(self._vehicle_marker, 1)[1]
+        else:
+            return None
+        parts = [part for part in suffix.split("/") if part]
+        return parts or None
+
+    def _is_blacklisted(self, relative_path: str) -> bool:
+        """Return True if every topic under ``relative_path`` is blacklisted."""
+        full_path = f"{self.structure_prefix}/{relative_path}"
+        return any(pattern in full_path for pattern in self.blacklist)
+
+    def add_topic(self, topic: str) -> bool:
+        """Add a received topic to the tree.
+
+        Returns:
+            True if the applied plan could now exclude more traffic, i.e. the
+            topic opened a blacklisted subtree below a ``#`` filter.
+        """
+        parts = self._relative_parts(topic)
+        if parts is None:
+            return False
+
+        node = self._root
+        path = ""
+        replan = False
+        for index, part in enumerate(parts):
+            path = f"{path}/{part}" if path else part
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = _TopicNode()
+                # A new inner node whose path is blacklisted can be dropped
+                if (
+                    self.filters is not None
+                    and index < len(parts) - 1
+                    and self._is_blacklisted(path)
+                ):
+                    replan = True
+            node = child
+
+        if not node.is_topic:
+            node.is_topic = True
+            self.topic_count += 1
+        return replan
+
+    def widen(self) -> bool:
+        """Drop the applied plan, so the whole vehicle tree is subscribed.
+
+        Returns:
+            True if a plan was applied, i.e. the subscriptions need widening.
+        """
+        if self.filters is None:
+            return False
+        self.filters = None
+        return True
+
+    def plan(self) -> List[str]:
+        """Compute the subscription filters for the current tree."""
+        filters = [STATUS_TOPIC_SUFFIX]
+        for name, child in self._root.children.items():
+            if name == "client":
+                continue
+            if child.children:
+                filters.extend(self._plan_node(child, name))
+            elif not self._is_blacklisted(name):
+                filters.append(name)
+        filters.append(SUBSCRIPTION_RESPONSE_FILTER)
+        self.filters = list(dict.fromkeys(filters))
+        _LOGGER.debug(
+            "Planned %d subscriptions for %d topics: %s",
+            len(self.filters),
+            self.topic_count,
+            self.filters,
+        )
+        return self.filters
+
+    def _plan_children(self, node: _TopicNode, path: str) -> List[str]:
+        """Plan a split node: ``+`` for its leaves, recursion for the rest."""
+        filters = []
+        covers_leaves = False
+        for name, child in node.children.items():
+            child_path = f"{path}/{name}"
+            if not child.children:
+                covers_leaves = covers_leaves or not self._is_blacklisted(child_path)
+                continue
+            filters.extend(self._plan_node(child, child_path))
+
+        if covers_leaves:
+            filters.insert(0, f"{path}/+")
+        return filters
+
+    def _plan_node(self, node: _TopicNode, path: str) -> List[str]:
+        """Plan the subtree rooted at ``path``."""
+        if self._is_blacklisted(path):
+            return []
+        if not self._has_droppable_subtree(node, path):
+            return [f"{path}/#"]
+        filters = self._plan_children(node, path)
+        if node.is_topic:
+            # The node's own topic is not matched by its children's filters
+            filters.insert(0, path)
+        return filters
+
+    def _has_droppable_subtree(self, node: _TopicNode, path: str) -> bool:
+        """Return True if some inner descendant is entirely blacklisted."""
+        for name, child in node.children.items():
+            if not child.children:
+                continue
+            child_path = f"{path}/{name}"
+            if self._is_blacklisted(child_path) or self._has_droppable_subtree(
+                child, child_path
+            ):
+                return True
+        return False
+
+    def get_status(self) -> Dict[str, object]:
+        """Return planner state for diagnostics."""
+        return {
+            "known_topics": self.topic_count,
+            "planned": self.filters is not None,
+            "filters": list(self.filters or []),
+        }
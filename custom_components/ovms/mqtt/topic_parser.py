@@ -17,8 +17,8 @@ from ..const import (
 )
 from ..metrics import (
     BINARY_METRICS,
-    get_metric_by_path,
-    get_metric_by_pattern,
+    MetricDescriptor,
+    resolve_metric,
 )
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
@@ -90,6 +90,16 @@ class TopicParser:
             suffix = topic.split(marker, 1)[1]
         return suffix.startswith("client/") or suffix == "client"
 
+    def is_blacklisted_topic(self, topic: str) -> bool:
+        """Return True if ``topic`` matches a configured blacklist pattern."""
+        for pattern in self.topic_blacklist:
+            if pattern in topic:
+                _LOGGER.debug(
+                    "Skipping blacklisted topic pattern '%s': %s", pattern, topic
+                )
+                return True
+        return False
+
     def parse_topic(self, topic: str, payload: str) -> EntityData | None:
         """Parse a topic to determine the entity type and info."""
         try:
@@ -108,15 +118,8 @@ class TopicParser:
                 }
 
             # Skip blacklisted topics
-            if self.topic_blacklist:
-                for pattern in self.topic_blacklist:
-                    if pattern in topic:
-                        _LOGGER.debug(
-                            "Skipping blacklisted topic pattern '%s': %s",
-                            pattern,
-                            topic,
-                        )
-                        return None
+            if self.is_blacklisted_topic(topic):
+                return None
 
             # Check if topic matches our structure prefix
             if not topic.startswith(self.structure_prefix):
@@ -171,8 +174,12 @@ class TopicParser:
             # Convert the topic parts into a dotted metric-definition path
             metric_path = self._convert_to_metric_path(parts)
 
+            # Resolve the metric once; the descriptor travels with the
+            # creation payload to the factory and the platforms
+            metric = resolve_metric(metric_path, parts)
+
             # Determine entity type and category
-            entity_type = self._determine_entity_type(parts, metric_path, topic)
+            entity_type = self._determine_entity_type(parts, metric_path, topic, metric)
             # Use centralized category determination from metrics module
             category = metrics.determine_category_from_topic(parts)
 
@@ -189,11 +196,6 @@ class TopicParser:
             vehicle_id = self.config.get("vehicle_id", "")
             name = f"ovms_{vehicle_id}_{raw_name}"
 
-            # Get metric info for later use
-            metric_info = get_metric_by_path(metric_path)
-            if not metric_info:
-                metric_info = get_metric_by_pattern(parts)
-
             # Prepare basic attributes
             attributes = {
                 "topic": topic,
@@ -207,7 +209,7 @@ class TopicParser:
                 "raw_name": raw_name,
                 "parts": parts,
                 "metric_path": metric_path,
-                "metric_info": metric_info,
+                "metric": metric,
                 "attributes": attributes,
                 "priority": 5 if "version" in name.lower() else 0,
             }
@@ -304,7 +306,7 @@ class TopicParser:
             "raw_name": entity_raw_name,
             "parts": primary_entity.get("parts", []),
             "metric_path": metric_path,
-            "metric_info": primary_entity.get("metric_info"),
+            "metric": primary_entity.get("metric"),
             "attributes": primary_entity.get("attributes", {}).copy(),
             "priority": primary_entity.get("priority", 0),
             config_key: {
@@ -333,11 +335,15 @@ class TopicParser:
         return ".".join(parts)
 
     def _determine_entity_type(
-        self, parts: list[str], metric_path: str, topic: str
+        self,
+        parts: list[str],
+        metric_path: str,
+        topic: str,
+        metric: MetricDescriptor | None = None,
     ) -> str:
         """Determine the entity type based on topic parts and metric info."""
         # Check if this should be a binary sensor
-        if self._should_be_binary_sensor(parts, metric_path):
+        if self._should_be_binary_sensor(parts, metric_path, metric):
             return "binary_sensor"
 
         # Check for commands/switches.
@@ -355,7 +361,12 @@ class TopicParser:
         # Default to sensor
         return "sensor"
 
-    def _should_be_binary_sensor(self, parts: list[str], metric_path: str) -> bool:
+    def _should_be_binary_sensor(
+        self,
+        parts: list[str],
+        metric_path: str,
+        metric: MetricDescriptor | None = None,
+    ) -> bool:
         """Determine if topic should be a binary sensor."""
         try:
             # Check if this is a known binary metric
@@ -363,23 +374,16 @@ class TopicParser:
                 return True
 
             # Check if the metric info defines it as a binary sensor
-            metric_info = get_metric_by_path(metric_path)
-            if not metric_info:
-                metric_info = get_metric_by_pattern(parts)
-
-            if metric_info and "device_class" in metric_info:
-                # Check if the device class is from binary_sensor
-                if hasattr(metric_info["device_class"], "__module__"):
-                    return "binary_sensor" in metric_info["device_class"].__module__
+            if metric is None:
+                metric = resolve_metric(metric_path, parts)
+            if metric.binary_device_class is not None:
+                return metric.binary_device_class
 
             # An explicit numeric sensor definition (a unit or a sensor
             # state_class) wins over the keyword heuristic below; otherwise a
             # metric whose topic merely contains a binary keyword (e.g. "cool"
             # inside "cooling", or "fan") would be wrongly forced to on/off.
-            if metric_info and (
-                metric_info.get("unit") is not None
-                or metric_info.get("state_class") is not None
-            ):
+            if metric.has_numeric_definition:
                 return False
 
             # Check for binary patterns in name
@@ -1,13 +1,12 @@
 """Update dispatcher for OVMS integration."""
 
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.dispatcher import async_dispatcher_send
 
 from ..const import (
-    CONF_CLIENT_ID,
     CONF_CONFIG_ENTRY_ID,
     CONF_VEHICLE_ID,
     GPS_COALESCE_WINDOW,
@@ -16,7 +15,8 @@ from ..const import (
     DOMAIN,
 )
 from ..attribute_manager import AttributeManager
-from ..utils import get_ovms_device_identifier
+from ..payload import decode_payload, raw_payload
+from .version_tracker import VersionTracker
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
@@ -41,11 +41,20 @@ class UpdateDispatcher:
         # them for GPS_COALESCE_WINDOW so the tracker writes one consistent
         # position instead of a half-updated pair. See issues #203 and #223.
         self._location_flush_handle = None
+        # Callbacks receiving each coalesced (latitude, longitude) fix, for
+        # consumers that need whole GPS fixes rather than single axes.
+        self._location_listeners = []
+        # Callbacks receiving the unique_id of every entity an update is
+        # dispatched to (e.g. staleness tracking)
+        self._update_listeners = []
+        # Update callback of each added entity by unique_id, so an update is
+        # one dict lookup and a direct call instead of a dispatcher signal
+        self._entity_callbacks: Dict[str, Callable[[Any], None]] = {}
+        # The registered entities themselves, for memory accounting
+        self._entities: Dict[str, Any] = {}
         self._config = config or {}
-        self._device_identifier = get_ovms_device_identifier(
-            self._config.get(CONF_CLIENT_ID),
-            self._config.get(CONF_VEHICLE_ID),
-        )
+        # Firmware versions, written to the device registry only on change
+        self.version_tracker = VersionTracker(hass, self._config)
 
     def dispatch_update(self, topic: str, payload: Any) -> None:
         """Dispatch update to entities subscribed to a topic.
@@ -55,6 +64,9 @@ class UpdateDispatcher:
         1. Update all primary entities
         2. Handle special topics once (location, version, GPS)
         3. Update related entities
+
+        The payload is decoded once and the decoded form is shared by every
+        entity of the topic.
         """
         try:
             # Get ALL entities for this topic (supports multiple entities per topic)
@@ -63,18 +75,19 @@ class UpdateDispatcher:
                 _LOGGER.debug("No entities registered for topic: %s", topic)
                 return
 
+            decoded = decode_payload(payload)
+
             # Phase 1: Update all primary entities
             for entity_id in entity_ids:
-                self._update_entity(entity_id, payload)
+                self._update_entity(entity_id, decoded)
 
             # Phase 2: Special topic handling (only once per topic, not per entity)
             if self._is_coordinate_topic(topic):
                 # Use first entity_id for location handling
                 self._handle_location_update(topic, entity_ids[0], payload)
 
-            if "version" in topic.lower() or "m.version" in topic.lower():
-                # Use first entity_id for version handling
-                self._handle_version_update(topic, entity_ids[0], payload)
+            if self.version_tracker.is_version_topic(topic):
+                self.version_tracker.process(topic, payload)
 
             if self._is_gps_quality_topic(topic):
                 self._handle_gps_quality_update(topic, payload)
@@ -90,7 +103,7 @@ class UpdateDispatcher:
 
                     if relationship_type == "location_sensor":
                         # Direct pass-through for location sensor pairs
-                        self._update_entity(related_id, payload)
+                        self._update_entity(related_id, decoded)
                     elif relationship_type == "combined_tracker":
                         # Coordinate topics are batched via _handle_location_update().
                         # Updating the combined tracker here would emit a mixed pair
@@ -98,7 +111,7 @@ class UpdateDispatcher:
                         continue
                     else:
                         # Default behavior for other relationships
-                        self._update_entity(related_id, payload)
+                        self._update_entity(related_id, decoded)
 
         except Exception as ex:
             _LOGGER.exception("Error dispatching update: %s", ex)
@@ -106,18 +119,21 @@ class UpdateDispatcher:
     def _update_entity(self, entity_id: str, payload: Any) -> None:
         """Update a single entity with new data."""
         try:
-            # Dispatch the update signal
-            signal = f"{SIGNAL_UPDATE_ENTITY}_{entity_id}"
-
-            # Reduce excessive logging - only log for critical entities or periodically
-            if (
-                entity_id.endswith("_location")
-                or len(self.hass.data.get("ovms", {}).get("dispatched_updates", set()))
-                < 20
-            ):
-                _LOGGER.debug("Dispatching update for %s", entity_id)
+            target = self._entity_callbacks.get(entity_id)
+            if target is not None:
+                target(payload)
+            else:
+                # Entities not (yet) registered directly, e.g. ones set up
+                # outside a loaded config entry, still listen on the signal
+                # and get the payload as received
+                async_dispatcher_send(
+                    self.hass,
+                    f"{SIGNAL_UPDATE_ENTITY}_{entity_id}",
+                    raw_payload(payload),
+                )
 
-            async_dispatcher_send(self.hass, signal, payload)
+            for listener in self._update_listeners:
+                listener(entity_id)
 
         except Exception as ex:
             _LOGGER.exception("Error updating entity %s: %s", entity_id, ex)
@@ -229,6 +245,47 @@ class UpdateDispatcher:
         self._location_flush_handle = None
         if "latitude" in self.location_values and "longitude" in self.location_values:
             self._update_all_device_trackers()
+            for listener in self._location_listeners:
+                try:
+                    listener(
+                        self.location_values["latitude"],
+                        self.location_values["longitude"],
+                    )
+                except Exception as ex:
+                    _LOGGER.exception("Error in location listener: %s", ex)
+
+    def add_location_listener(self, listener) -> None:
+        """Register a callback for each coalesced (latitude, longitude) fix."""
+        self._location_listeners.append(listener)
+
+    def add_update_listener(self, listener) -> None:
+        """Register a callback for the unique_id of each dispatched update."""
+        self._update_listeners.append(listener)
+
+    @callback
+    def async_register_entity(
+        self,
+        unique_id: str,
+        target: Callable[[Any], None],
+        entity: Optional[Any] = None,
+    ) -> Callable[[], None]:
+        """Register an entity's update callback; return the unregister function."""
+        self._entity_callbacks[unique_id] = target
+        if entity is not None:
+            self._entities[unique_id] = entity
+
+        @callback
+        def _unregister() -> None:
+            if self._entity_callbacks.get(unique_id) is target:
+                del self._entity_callbacks[unique_id]
+                self._entities.pop(unique_id, None)
+
+        return _unregister
+
+    @property
+    def entities(self) -> Dict[str, Any]:
+        """Return the registered entities by unique_id."""
+        return self._entities
 
     def async_shutdown(self) -> None:
         """Cancel any pending location flush on teardown."""
@@ -236,93 +293,6 @@ class UpdateDispatcher:
             self._location_flush_handle.cancel()
             self._location_flush_handle = None
 
-    def _handle_version_update(self, topic: str, entity_id: str, payload: str) -> None:
-        """Handle updates to version topics with special priority."""
-        try:
-            # If this is a version topic, update the device info
-            is_version_topic = any(
-                ver_keyword in topic.lower() for ver_keyword in ["version", "m.version"]
-            )
-
-            # Only update device info for main module version (not vehicle-specific versions)
-            is_main_version = is_version_topic and not any(
-                vehicle_prefix in topic.lower()
-                for vehicle_prefix in [
-                    "xvu",
-                    "xmg",
-                    "xsq",
-                    "xnl",
-                ]  # Vehicle-specific prefixes
-            )
-
-            if is_version_topic:
-                _LOGGER.info("Detected firmware version update: %s", payload)
-
-                # Truncate very long version strings to avoid potential issues
-                if payload and len(payload) > 255:
-                    trimmed_payload = payload[:252] + "..."
-                    _LOGGER.warning(
-                        "Version string too long, truncating: %s -> %s",
-                        payload,
-                        trimmed_payload,
-                    )
-                    payload = trimmed_payload
-
-                # Only update the device firmware version if this is the main module version
-                if is_main_version:
-                    from homeassistant.helpers import device_registry as dr
-
-                    device_registry = dr.async_get(self.hass)
-
-                    # Look up device by its identifier directly
-                    device = device_registry.async_get_device(
-                        identifiers={(DOMAIN, self._device_identifier)}
-                    )
-
-                    if device is None:
-                        # Fallback: try legacy identifier (vehicle_id) for
-                        # setups that haven't restarted since migration.
-                        vehicle_id = self._config.get(CONF_VEHICLE_ID)
-                        if vehicle_id:
-                            device = device_registry.async_get_device(
-                                identifiers={(DOMAIN, str(vehicle_id).lower())}
-                            )
-
-                    # Update device with version information
-                    if device:
-                        try:
-                            device_registry.async_update_device(
-                                device.id, sw_version=payload
-                            )
-                            _LOGGER.debug(
-                                "Updated device %s firmware version to %s",
-                                device.id,
-                                payload,
-                            )
-                        except Exception as ex:
-                            _LOGGER.error(
-                                "Failed to update device with version: %s", ex
-                            )
-                            try:
-                                device_registry.async_update_device(
-                                    device.id,
-                                    sw_version=payload[:100],
-                                )
-                            except Exception:
-                                _LOGGER.error(
-                                    "Failed to update device with shortened version too"
-                                )
-                    else:
-                        _LOGGER.debug(
-                            "No OVMS device found in registry to update version"
-                        )
-
-                # Note: Priority updates are per-entity now with (topic, entity_id) keys
-                # Version topics are already handled with priority in entity creation
-
-        except Exception as ex:
-            _LOGGER.exception("Error handling version update: %s", ex)
-
     def _handle_gps_quality_update(self, topic: str, payload: Any) -> None:
         """Handle updates to GPS quality topics and update device trackers."""
         try:
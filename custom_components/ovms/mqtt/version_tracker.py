@@ -0,0 +1,153 @@
+"""Firmware version tracking for OVMS integration."""
+
+import logging
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+
+from ..const import CONF_CLIENT_ID, CONF_VEHICLE_ID, DOMAIN, LOGGER_NAME
+from ..utils import get_ovms_device_identifier
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Vehicle modules publish under their own namespace (xvu, xmg, xrt, ...);
+# their versions describe the vehicle firmware, not the OVMS module
+_VEHICLE_NAMESPACE = re.compile(r"x[a-z]{2,3}")
+
+# Longest version string written to the device registry
+VERSION_MAX_LENGTH = 255
+
+
+class VersionTracker:
+    """Apply firmware version updates to the device registry on change only.
+
+    The module republishes its version metrics with every metric dump, and
+    each device-registry update is a write plus a scheduled save. The last
+    applied version is cached per device, so the registry is only touched
+    when the version actually changes. Vehicle-specific versions are kept
+    as attributes, keyed by metric path.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: Dict[str, Any]) -> None:
+        """Initialize the version tracker."""
+        self.hass = hass
+        self._config = config
+        self._device_identifier = get_ovms_device_identifier(
+            config.get(CONF_CLIENT_ID), config.get(CONF_VEHICLE_ID)
+        )
+        # topic -> (is_version_topic, vehicle metric path or None)
+        self._topics: Dict[str, Tuple[bool, Optional[str]]] = {}
+        # device id -> last sw_version applied (or found) in the registry
+        self._applied: Dict[str, str] = {}
+        self._device_id: Optional[str] = None
+        self.vehicle_versions: Dict[str, str] = {}
+        self.registry_writes = 0
+
+    def _classify(self, topic: str) -> Tuple[bool, Optional[str]]:
+        """Return (is version topic, vehicle metric path), once per topic."""
+        entry = self._topics.get(topic)
+        if entry is None:
+            lowered = topic.lower()
+            if "version" not in lowered:
+                entry = (False, None)
+            else:
+                path = lowered.split("/metric/", 1)[-1].split("/")
+                vehicle = any(_VEHICLE_NAMESPACE.fullmatch(part) for part in path)
+                entry = (True, ".".join(path) if vehicle else None)
+            self._topics[topic] = entry
+        return entry
+
+    def is_version_topic(self, topic: str) -> bool:
+        """Return True if the topic carries a firmware version."""
+        return self._classify(topic)[0]
+
+    def process(self, topic: str, payload: Any) -> bool:
+        """Record a version update; return True if anything changed."""
+        is_version, vehicle_path = self._classify(topic)
+        if not is_version or payload is None:
+            return False
+
+        version = str(payload).strip()
+        if len(version) > VERSION_MAX_LENGTH:
+            trimmed = version[: VERSION_MAX_LENGTH - 3] + "..."
+            _LOGGER.warning(
+                "Version string too long, truncating: %s -> %s", version, trimmed
+            )
+            version = trimmed
+
+        if vehicle_path is not None:
+            if self.vehicle_versions.get(vehicle_path) == version:
+                return False
+            self.vehicle_versions[vehicle_path] = version
+            _LOGGER.debug("Vehicle firmware %s is %s", vehicle_path, version)
+            return True
+
+        return self._apply_module_version(version)
+
+    def _find_device(self, device_registry) -> Optional[dr.DeviceEntry]:
+        """Look up the OVMS device, falling back to the legacy identifier."""
+        if self._device_id is not None:
+            device = device_registry.async_get(self._device_id)
+            if device is not None:
+                return device
+            self._device_id = None
+
+        device = device_registry.async_get_device(
+            identifiers={(DOMAIN, self._device_identifier)}
+        )
+        if device is None:
+            # Fallback: try legacy identifier (vehicle_id) for setups that
+            # haven't restarted since migration.
+            vehicle_id = self._config.get(CONF_VEHICLE_ID)
+            if vehicle_id:
+                device = device_registry.async_get_device(
+                    identifiers={(DOMAIN, str(vehicle_id).lower())}
+                )
+        if device is not None:
+            self._device_id = device.id
+            if device.sw_version:
+                self._applied.setdefault(device.id, device.sw_version)
+        return device
+
+    def _apply_module_version(self, version: str) -> bool:
+        """Write the module version to the device registry if it changed."""
+        if self._device_id is not None and self._applied.get(self._device_id) == (
+            version
+        ):
+            return False
+
+        device_registry = dr.async_get(self.hass)
+        device = self._find_device(device_registry)
+        if device is None:
+            _LOGGER.debug("No OVMS device found in registry to update version")
+            return False
+        if self._applied.get(device.id) == version:
+            return False
+
+        _LOGGER.info("Detected firmware version update: %s", version)
+        try:
+            device_registry.async_update_device(device.id, sw_version=version)
+        except Exception as ex:  # pylint: disable=broad-except
+            _LOGGER.error("Failed to update device with version: %s", ex)
+            try:
+                device_registry.async_update_device(device.id, sw_version=version[:100])
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.error("Failed to update device with shortened version too")
+                return False
+
+        self.registry_writes += 1
+        self._applied[device.id] = version
+        _LOGGER.debug("Updated device %s firmware version to %s", device.id, version)
+        return True
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return tracked versions for diagnostics."""
+        return {
+            "module_version": (
+                self._applied.get(self._device_id) if self._device_id else None
+            ),
+            "vehicle_versions": dict(self.vehicle_versions),
+            "registry_writes": self.registry_writes,
+        }
@@ -0,0 +1,126 @@
+"""Decoded OVMS payloads shared by every entity of a topic."""
+
+import json
+from typing import Any, Optional, Tuple
+
+# What a payload decodes to
+PAYLOAD_NUMERIC = "numeric"  # int or float
+PAYLOAD_BOOLEAN = "boolean"  # JSON true/false
+PAYLOAD_VECTOR = "vector"  # comma-separated numbers
+PAYLOAD_JSON = "json"  # JSON object
+PAYLOAD_LIST = "list"  # JSON array
+PAYLOAD_EMPTY = "empty"  # JSON null
+PAYLOAD_TEXT = "text"  # anything else, including non-numeric CSV
+
+
+class _NotJson:
+    """Marker for payloads that are not valid JSON."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "NOT_JSON"
+
+
+NOT_JSON = _NotJson()
+
+# First characters of a JSON document, NaN and Infinity included; anything
+# else is text and skips the decode attempt and its exception
+_JSON_START = frozenset('{["-0123456789tfnNI')
+
+
+class DecodedPayload:
+    """One metric payload, decoded once per message.
+
+    The update dispatcher decodes each message before handing it to the
+    entities of its topic, so a sensor, a switch and a lock on the same
+    metric share one JSON decode and one CSV split. The parsers accept a
+    raw payload as well and decode it themselves.
+
+    Attributes other than ``kind`` and ``value`` keep the intermediate
+    results the parsers need to reproduce their per-type rules:
+    ``json`` is the JSON value (``NOT_JSON`` when the payload is not JSON),
+    ``fields`` the stripped CSV fields by position (None without a comma),
+    ``parts`` the non-empty fields and ``numbers`` their float values (None
+    unless every part is numeric). Decoded values are shared; consumers
+    must not modify them.
+    """
+
+    __slots__ = ("raw", "kind", "value", "json", "fields", "parts", "numbers")
+
+    def __init__(self, raw: Any) -> None:
+        """Decode the payload."""
+        self.raw = raw
+        self.fields: Optional[Tuple[str, ...]] = None
+        self.parts: Optional[Tuple[str, ...]] = None
+        self.numbers: Optional[Tuple[float, ...]] = None
+
+        if not isinstance(raw, str):
+            # Values handed over already decoded, e.g. coalesced GPS fixes
+            self.json = raw
+            self.kind, self.value = _classify_json(raw)
+            return
+
+        if "," in raw:
+            self.fields = tuple(field.strip() for field in raw.split(","))
+            self.parts = tuple(field for field in self.fields if field)
+            try:
+                self.numbers = tuple(float(part) for part in self.parts)
+            except ValueError:
+                pass
+
+        # A numeric vector is never JSON: a JSON number has no comma
+        self.json = NOT_JSON
+        if self.numbers is None and raw.lstrip()[:1] in _JSON_START:
+            try:
+                self.json = json.loads(raw)
+            except ValueError:
+                pass
+        if self.json is not NOT_JSON:
+            self.kind, self.value = _classify_json(self.json)
+        elif self.numbers:
+            self.kind, self.value = PAYLOAD_VECTOR, self.numbers
+        else:
+            self.kind, self.value = PAYLOAD_TEXT, raw
+            if self.fields is None:
+                # Same rule as the parsers always used: float only with a
+                # decimal point, so integers keep their type
+                try:
+                    number = float(raw) if "." in raw else int(raw)
+                except ValueError:
+                    pass
+                else:
+                    self.kind, self.value = PAYLOAD_NUMERIC, number
+
+    def __repr__(self) -> str:
+        """Return a debug representation."""
+        return f"DecodedPayload({self.kind}, {self.raw!r})"
+
+
+def _classify_json(value: Any) -> Tuple[str, Any]:
+    """Return the kind and value of a decoded JSON value."""
+    if isinstance(value, bool):
+        return PAYLOAD_BOOLEAN, value
+    if isinstance(value, (int, float)):
+        return PAYLOAD_NUMERIC, value
+    if isinstance(value, dict):
+        return PAYLOAD_JSON, value
+    if isinstance(value, list):
+        return PAYLOAD_LIST, value
+    if value is None:
+        return PAYLOAD_EMPTY, None
+    return PAYLOAD_TEXT, value
+
+
+def decode_payload(payload: Any) -> DecodedPayload:
+    """Return the decoded payload, decoding it only if it is still raw."""
+    if isinstance(payload, DecodedPayload):
+        return payload
+    return DecodedPayload(payload)
+
+
+def raw_payload(payload: Any) -> Any:
+    """Return the payload as received, for code that needs the raw value."""
+    if isinstance(payload, DecodedPayload):
+        return payload.raw
+    return payload
@@ -0,0 +1,234 @@
+"""On-demand profiling of the OVMS ingest path."""
+
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import re
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_VEHICLE_ID,
+    LOGGER_NAME,
+    PROFILE_DEFAULT_DURATION,
+    PROFILE_DEFAULT_TOP,
+    PROFILE_FILENAME_TEMPLATE,
+)
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Returned by measure() while no profile runs; entering it costs nothing
+_IDLE = nullcontext()
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile cannot be started."""
+
+
+class _ProfileSession:
+    """One profiling run: a cProfile switched on around measured sections."""
+
+    def __init__(self, max_messages: Optional[int]) -> None:
+        """Initialize the session."""
+        self.profile = cProfile.Profile()
+        self.max_messages = max_messages
+        self.messages = 0
+        self.sections = 0
+        self.skipped = 0
+        self.done: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._depth = 0
+        self._enabled = False
+
+    def count_message(self) -> None:
+        """Count one ingested message and end the run at the limit."""
+        self.messages += 1
+        if (
+            self.max_messages is not None
+            and self.messages >= self.max_messages
+            and not self.done.done()
+        ):
+            self.done.set_result(None)
+
+    def __enter__(self) -> "_ProfileSession":
+        """Start measuring; nested sections share the outer measurement."""
+        if self._depth == 0:
+            try:
+                self.profile.enable()
+                self._enabled = True
+                self.sections += 1
+            except ValueError:
+                # Another profiler (e.g. HA's profiler integration) is active
+                self.skipped += 1
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop measuring when the outermost section ends."""
+        self._depth -= 1
+        if self._depth == 0 and self._enabled:
+            self.profile.disable()
+            self._enabled = False
+
+
+class IngestProfiler:
+    """Profile only the OVMS ingest path of one vehicle, on demand.
+
+    The client wraps message handling and entity-update dispatch in
+    measure(); while no run is active that is a single attribute check. A
+    run enables cProfile inside those sections only, so awaits and the rest
+    of Home Assistant stay out of the report.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: Dict[str, Any]) -> None:
+        """Initialize the profiler."""
+        self.hass = hass
+        self._vehicle_id = config.get(CONF_VEHICLE_ID, "unknown")
+        self._safe_vehicle_id = re.sub(r"[^a-zA-Z0-9_-]", "_", str(self._vehicle_id))
+        self._session: Optional[_ProfileSession] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    @property
+    def active(self) -> bool:
+        """Return True while a profile is running."""
+        return self._session is not None
+
+    def measure(self, message: bool = False):
+        """Return the context manager measuring one ingest section.
+
+        ``message`` counts the section as one ingested message toward the
+        run's message limit.
+        """
+        session = self._session
+        if session is None or session.done.done():
+            # Messages arriving after the limit, before the run has
+            # collected its report, are not measured
+            return _IDLE
+        if message:
+            session.count_message()
+        return session
+
+    def wrap(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Return func measured as an ingest section while a run is active."""
+
+        def _measured(*args: Any) -> Any:
+            if self._session is None:
+                return func(*args)
+            with self.measure():
+                return func(*args)
+
+        return _measured
+
+    async def async_profile(
+        self,
+        duration: float = PROFILE_DEFAULT_DURATION,
+        max_messages: Optional[int] = None,
+        top: int = PROFILE_DEFAULT_TOP,
+        sort: str = "cumulative",
+    ) -> Dict[str, Any]:
+        """Profile for duration seconds or max_messages messages.
+
+        Writes a .prof file (for snakeviz, pstats, ...) and a text summary
+        of the top functions to the config directory and returns the
+        summary.
+        """
+        if self._session is not None:
+            raise ProfilerBusyError(
+                f"A profile is already running for vehicle {self._vehicle_id}"
+            )
+        session = _ProfileSession(max_messages)
+        # Fail early instead of silently skipping every section
+        probe = cProfile.Profile()
+        try:
+            probe.enable()
+            probe.disable()
+        except ValueError as ex:
+            raise ProfilerBusyError(
+                "Another profiler is active in this process"
+            ) from ex
+
+        started = time.monotonic()
+        self._session = session
+        _LOGGER.info(
+            "Profiling OVMS ingest for %s: %ss or %s messages",
+            self._vehicle_id,
+            duration,
+            max_messages if max_messages is not None else "unlimited",
+        )
+        try:
+            await asyncio.wait_for(asyncio.shield(session.done), duration)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._session = None
+            if not session.done.done():
+                session.done.cancel()
+        elapsed = time.monotonic() - started
+
+        base = self.hass.config.path(
+            PROFILE_FILENAME_TEMPLATE.format(
+                vehicle_id=self._safe_vehicle_id,
+                timestamp=dt_util.utcnow().strftime("%Y%m%dT%H%M%SZ"),
+            )
+        )
+        header = (
+            f"OVMS ingest profile for {self._vehicle_id}: {elapsed:.1f}s, "
+            f"{session.messages} messages, {session.sections} sections"
+        )
+        if session.skipped:
+            header += f", {session.skipped} sections skipped (profiler busy)"
+        summary, functions = await self.hass.async_add_executor_job(
+            _write_report, session.profile, base, header, top, sort
+        )
+        self.last_result = {
+            "vehicle_id": self._vehicle_id,
+            "duration": round(elapsed, 3),
+            "messages": session.messages,
+            "sections": session.sections,
+            "skipped_sections": session.skipped,
+            "profile_path": f"{base}.prof",
+            "summary_path": f"{base}.txt",
+            "top_functions": functions,
+            "summary": summary,
+        }
+        return self.last_result
+
+
+def _write_report(
+    profile: cProfile.Profile, base: str, header: str, top: int, sort: str
+) -> tuple[str, List[Dict[str, Any]]]:
+    """Write the .prof and summary files (runs in the executor)."""
+    profile.create_stats()
+    profile.dump_stats(f"{base}.prof")
+
+    stream = io.StringIO()
+    stream.write(header + "\n")
+    functions: List[Dict[str, Any]] = []
+    stats = None
+    if profile.stats:
+        stats = pstats.Stats(profile, stream=stream)
+        stats.sort_stats(sort).print_stats(top)
+    else:
+        # pstats refuses a profile without entries
+        stream.write("No OVMS ingest was measured.\n")
+    summary = stream.getvalue()
+    with open(f"{base}.txt", "w", encoding="utf-8") as summary_file:
+        summary_file.write(summary)
+
+    for func in stats.fcn_list[:top] if stats is not None else ():
+        _cc, ncalls, tottime, cumtime, _callers = stats.stats[func]
+        filename, line, name = func
+        functions.append(
+            {
+                "function": f"{filename}:{line}({name})",
+                "ncalls": ncalls,
+                "tottime": round(tottime, 6),
+                "cumtime": round(cumtime, 6),
+            }
+        )
+    return summary, functions
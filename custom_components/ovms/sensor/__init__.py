@@ -1,7 +1,7 @@
 """Support for OVMS sensors."""
 
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
@@ -22,72 +22,70 @@ async def async_setup_entry(
     """Set up OVMS sensors based on a config entry."""
 
     @callback
-    def async_add_sensor(data: Dict[str, Any]) -> None:
-        """Add sensor based on discovery data."""
-        if not data or not isinstance(data, dict):
-            _LOGGER.warning("Invalid entity data received: %s", data)
-            return
+    def async_add_sensors(batch: List[Dict[str, Any]]) -> None:
+        """Add a batch of sensors based on discovery data."""
+        _LOGGER.info("Adding %d sensor discovery entries", len(batch))
 
-        # Skip if it's not a sensor
-        if data.get("entity_type") != "sensor":
-            return
+        sensors = []
+        for data in batch:
+            # Prebuilt diagnostic sensors (staleness status, last trip)
+            if "diagnostic_sensor" in data:
+                _LOGGER.debug(
+                    "Adding diagnostic sensor: %s", data.get("name", "unknown")
+                )
+                sensors.append(data["diagnostic_sensor"])
+                continue
 
-        _LOGGER.info("Adding sensor: %s", data.get("name", "unknown"))
+            # Handle cell sensors differently
+            if "cell_sensors" in data:
+                _LOGGER.debug(
+                    "Adding cell sensors from parent entity: %s",
+                    data.get("parent_entity"),
+                )
+                try:
+                    for cell_config in data["cell_sensors"]:
+                        sensors.append(
+                            CellVoltageSensor(
+                                cell_config["unique_id"],
+                                cell_config["name"],
+                                cell_config.get("topic", ""),
+                                cell_config.get("state"),
+                                cell_config.get("device_info", {}),
+                                cell_config.get("attributes", {}),
+                                cell_config.get("friendly_name"),
+                                hass,
+                            )
+                        )
+                except Exception as ex:
+                    _LOGGER.error("Error creating cell sensors: %s", ex)
+                continue
 
-        # Handle diagnostic sensor specially
-        if "diagnostic_sensor" in data:
-            _LOGGER.debug("Adding diagnostic sensor: %s", data.get("name", "unknown"))
             try:
-                async_add_entities([data["diagnostic_sensor"]])
-            except Exception as ex:
-                _LOGGER.error("Error adding diagnostic sensor: %s", ex)
-            return
-
-        # Handle cell sensors differently
-        if "cell_sensors" in data:
-            _LOGGER.debug(
-                "Adding cell sensors from parent entity: %s", data.get("parent_entity")
-            )
-            try:
-                sensors = []
-                for cell_config in data["cell_sensors"]:
-                    sensor = CellVoltageSensor(
-                        cell_config["unique_id"],
-                        cell_config["name"],
-                        cell_config.get("topic", ""),
-                        cell_config.get("state"),
-                        cell_config.get("device_info", {}),
-                        cell_config.get("attributes", {}),
-                        cell_config.get("friendly_name"),
+                sensors.append(
+                    OVMSSensor(
+                        data.get("unique_id", ""),
+                        data.get("name", "unknown"),
+                        data.get("topic", ""),
+                        data.get("payload", ""),
+                        data.get("device_info", {}),
+                        data.get("attributes", {}),
+                        data.get("friendly_name"),
                         hass,
+                        entry.entry_id,
+                        metric=data.get("metric"),
                     )
-                    sensors.append(sensor)
-
-                async_add_entities(sensors)
+                )
             except Exception as ex:
-                _LOGGER.error("Error creating cell sensors: %s", ex)
-            return
-
-        try:
-            sensor = OVMSSensor(
-                data.get("unique_id", ""),
-                data.get("name", "unknown"),
-                data.get("topic", ""),
-                data.get("payload", ""),
-                data.get("device_info", {}),
-                data.get("attributes", {}),
-                data.get("friendly_name"),
-                hass,
-                entry.entry_id,
-            )
+                _LOGGER.error(
+                    "Error creating sensor %s: %s", data.get("name", "unknown"), ex
+                )
 
-            async_add_entities([sensor])
-        except Exception as ex:
-            _LOGGER.error("Error creating sensor: %s", ex)
+        if sensors:
+            async_add_entities(sensors)
 
     # Subscribe to discovery events
     entry.async_on_unload(
         async_dispatcher_connect(
-            hass, get_add_entities_signal(entry.entry_id), async_add_sensor
+            hass, get_add_entities_signal(entry.entry_id, "sensor"), async_add_sensors
         )
     )
@@ -1,6 +1,7 @@
 """Support for OVMS binary sensors."""
 
 import logging
+from typing import Any
 
 from homeassistant.components.binary_sensor import (
     BinarySensorDeviceClass,
@@ -16,7 +17,6 @@ from homeassistant.helpers.restore_state import RestoreEntity
 
 from ..const import (
     LOGGER_NAME,
-    SIGNAL_UPDATE_ENTITY,
     get_add_entities_signal,
 )
 from ..entity_state import (
@@ -24,14 +24,14 @@ from ..entity_state import (
     BINARY_SENSOR_TRUE_STATES,
     parse_boolean_state,
 )
-from ..const import truncate_state_value
+from ..utils import async_connect_entity_updates
 
 from ..metrics import (
     METRIC_DEFINITIONS,
     TOPIC_PATTERNS,
     BINARY_METRICS,
-    get_metric_by_path,
-    get_metric_by_pattern,
+    MetricDescriptor,
+    resolve_metric_for_topic,
 )
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
@@ -71,35 +71,38 @@ async def async_setup_entry(
     """Set up OVMS binary sensors based on a config entry."""
 
     @callback
-    def async_add_binary_sensor(data: DiscoveryData) -> None:
-        """Add binary sensor based on discovery data."""
-        try:
-            if data["entity_type"] != "binary_sensor":
-                return
-
-            _LOGGER.info("Adding binary sensor: %s", data["name"])
-
-            sensor = OVMSBinarySensor(
-                data["unique_id"],
-                data["name"],
-                data["topic"],
-                data["payload"],
-                data["device_info"],
-                data["attributes"],
-                hass,
-                data.get("friendly_name"),
-            )
+    def async_add_binary_sensors(batch: list[DiscoveryData]) -> None:
+        """Add a batch of binary sensors based on discovery data."""
+        _LOGGER.info("Adding %d binary sensors", len(batch))
+
+        sensors = []
+        for data in batch:
+            try:
+                sensors.append(
+                    OVMSBinarySensor(
+                        data["unique_id"],
+                        data["name"],
+                        data["topic"],
+                        data["payload"],
+                        data["device_info"],
+                        data["attributes"],
+                        hass,
+                        data.get("friendly_name"),
+                        metric=data.get("metric"),
+                    )
+                )
+            except Exception as ex:
+                _LOGGER.exception("Error adding binary sensor: %s", ex)
 
-            async_add_entities([sensor])
-        except Exception as ex:
-            _LOGGER.exception("Error adding binary sensor: %s", ex)
+        if sensors:
+            async_add_entities(sensors)
 
     # Subscribe to discovery events
     entry.async_on_unload(
         async_dispatcher_connect(
             hass,
-            get_add_entities_signal(entry.entry_id),
-            async_add_binary_sensor,
+            get_add_entities_signal(entry.entry_id, "binary_sensor"),
+            async_add_binary_sensors,
         )
     )
 
@@ -121,6 +124,7 @@ class OVMSBinarySensor(BinarySensorEntity, RestoreEntity):
         attributes: dict[str, object],
         hass: HomeAssistant | None = None,
         friendly_name: str | None = None,
+        metric: MetricDescriptor | None = None,
     ) -> None:
         """Initialize the binary sensor."""
         self._attr_unique_id = unique_id
@@ -134,6 +138,7 @@ class OVMSBinarySensor(BinarySensorEntity, RestoreEntity):
             self._attr_name = name.replace("_", " ").title()
 
         self._topic = topic
+        self._metric = metric
 
         # Initialize attributes first, before parsing the state
         self._attr_extra_state_attributes = {
@@ -169,38 +174,24 @@ class OVMSBinarySensor(BinarySensorEntity, RestoreEntity):
                     self._attr_extra_state_attributes.update(saved_attributes)
 
             @callback
-            def update_state(payload: str) -> None:
+            def update_state(payload: Any) -> None:
                 """Update the sensor state."""
                 try:
-                    # Truncate over-long string payloads before parsing.
-                    # truncate_state_value enforces MAX_STATE_LENGTH internally,
-                    # so no separate length check / hardcoded limit is needed.
-                    if isinstance(payload, str):
-                        truncated_payload = truncate_state_value(payload)
-                        payload = (
-                            truncated_payload
-                            if truncated_payload is not None
-                            else payload
-                        )
-
+                    # Over-long payloads are truncated by the boolean parser;
+                    # the decoded payload is shared with the topic's other
+                    # entities
                     self._attr_is_on = self._parse_state(payload)
 
                     self.async_write_ha_state()
                 except Exception as ex:
                     _LOGGER.exception("Error updating binary sensor state: %s", ex)
 
-            self.async_on_remove(
-                async_dispatcher_connect(
-                    self.hass,
-                    f"{SIGNAL_UPDATE_ENTITY}_{self.unique_id}",
-                    update_state,
-                )
-            )
+            self.async_on_remove(async_connect_entity_updates(self, update_state))
 
         except Exception as ex:
             _LOGGER.exception("Error in async_added_to_hass: %s", ex)
 
-    def _parse_state(self, state: str) -> bool:
+    def _parse_state(self, state: Any) -> bool:
         """Parse the state string to a boolean."""
         try:
             # Get invert state flag in a safe way
@@ -242,61 +233,26 @@ class OVMSBinarySensor(BinarySensorEntity, RestoreEntity):
             _LOGGER.exception("Error checking category from attributes: %s", ex)
             return False
 
-    def _get_metric_path_from_topic(self) -> str:
-        """Extract metric path from topic."""
-        try:
-            topic_suffix = self._topic
-            if self._topic.count("/") >= 3:  # Skip the prefix part
-                parts = self._topic.split("/")
-                # Find where the actual metric path starts
-                for i, part in enumerate(parts):
-                    if part in [
-                        "metric",
-                        "status",
-                        "notify",
-                        "command",
-                        "m",
-                        "v",
-                        "s",
-                        "t",
-                    ]:
-                        topic_suffix = "/".join(parts[i:])
-                        break
-
-            return topic_suffix.replace("/", ".")
-        except Exception as ex:
-            _LOGGER.exception("Error getting metric path from topic: %s", ex)
-            return ""
-
     def _set_attributes_from_metric(self) -> bool:
         """Set attributes based on metric information."""
         try:
-            # Get metric path from topic
-            metric_path = self._get_metric_path_from_topic()
-
-            # Try exact match first
-            metric_info = get_metric_by_path(metric_path)
-
-            # If no exact match, try by pattern in name and topic
-            if not metric_info:
-                topic_parts = self._topic.split("/")
-                name_parts = self._internal_name.split("_")
-                metric_info = get_metric_by_pattern(
-                    topic_parts
-                ) or get_metric_by_pattern(name_parts)
+            # Resolved by the topic parser; looked up only when not carried
+            metric = self._metric
+            if metric is None:
+                metric = resolve_metric_for_topic(self._topic, self._internal_name)
 
             # Apply metric info if found
-            if metric_info:
-                if "device_class" in metric_info:
-                    self._attr_device_class = metric_info["device_class"]
-                if "icon" in metric_info:
-                    self._attr_icon = metric_info["icon"]
-                if "entity_category" in metric_info:
-                    self._attr_entity_category = metric_info["entity_category"]
-                if "invert_state" in metric_info:
-                    self._attr_extra_state_attributes["invert_state"] = metric_info[
-                        "invert_state"
-                    ]
+            if metric:
+                if "device_class" in metric.definition:
+                    self._attr_device_class = metric.device_class
+                if "icon" in metric.definition:
+                    self._attr_icon = metric.icon
+                if "entity_category" in metric.definition:
+                    self._attr_entity_category = metric.entity_category
+                if "invert_state" in metric.definition:
+                    self._attr_extra_state_attributes["invert_state"] = (
+                        metric.definition["invert_state"]
+                    )
                 return True
             return False
         except Exception as ex:
@@ -1,15 +1,266 @@
 """Duration formatting utilities for OVMS sensors."""
 
+import math
 import re
-from typing import Any, Optional
-from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
 
 from homeassistant.const import UnitOfTime
 
+from ..const import DURATION_FORMAT_CACHE_SIZE
+
 # Extended time units
 MONTHS = "months"
 YEARS = "years"
 
+# String unit aliases, lowercased; anything else is taken as seconds
+_UNIT_ALIASES = {
+    **dict.fromkeys(("m", "min", "minute", "minutes"), UnitOfTime.MINUTES),
+    **dict.fromkeys(("h", "hr", "hour", "hours"), UnitOfTime.HOURS),
+    **dict.fromkeys(("d", "day", "days"), UnitOfTime.DAYS),
+    **dict.fromkeys(("mo", "month", "months"), MONTHS),
+    **dict.fromkeys(("y", "yr", "year", "years"), YEARS),
+}
+
+# Label of each component: short form, full singular, full plural
+_LABELS = {
+    name: (short, f" {name}", f" {name}s")
+    for name, short in (
+        ("year", "y"),
+        ("month", "mo"),
+        ("day", "d"),
+        ("hour", "h"),
+        ("minute", "m"),
+        ("second", "s"),
+    )
+}
+# Component shown as zero when a value rounds away entirely
+_ZERO_COMPONENT = {
+    UnitOfTime.MINUTES: "minute",
+    UnitOfTime.HOURS: "hour",
+    UnitOfTime.DAYS: "day",
+    MONTHS: "month",
+    YEARS: "year",
+}
+
+# Integer divisors; months are 30.44 days, kept in hundredths of a day
+SECONDS_PER_MINUTE = 60
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+MONTH_CENTIDAYS = 3044
+
+# Values are handled as an integer numerator over a power of ten. Values with
+# more digits than this are not plausible durations and are shown as is, which
+# also bounds the size of the integers an exponent can produce.
+DURATION_MAX_DIGITS = 20
+_DIGIT_LIMIT = 10**DURATION_MAX_DIGITS
+_NUMBER_PATTERN = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?(?:[eE]([+-]?\d+))?", re.ASCII)
+
+# A formatted component: amount text, component name, singular
+_Part = Tuple[str, str, bool]
+
+
+def _split_number(  # pylint: disable=too-many-return-statements
+    value,
+) -> Optional[Tuple[bool, int, int]]:
+    """Split a number into (negative, numerator, denominator).
+
+    The numerator over the power-of-ten denominator is exactly the decimal
+    value of the number (of repr() for floats). Returns None for values that
+    are not finite numbers or have more than DURATION_MAX_DIGITS digits.
+    """
+    if type(value) is int:  # pylint: disable=unidiomatic-typecheck
+        if -_DIGIT_LIMIT < value < _DIGIT_LIMIT:
+            return value < 0, abs(value), 1
+        return None
+    if type(value) is float:  # pylint: disable=unidiomatic-typecheck
+        if not math.isfinite(value):
+            return None
+        text = repr(value)
+    elif isinstance(value, str):
+        text = value
+    else:
+        # Decimals and other number types; bools never match the pattern
+        text = str(value)
+
+    match = _NUMBER_PATTERN.fullmatch(text)
+    if not match:
+        return None
+    sign, whole, fraction, exponent = match.groups()
+    fraction = fraction or ""
+    if not whole and not fraction:
+        return None
+    scale = (int(exponent) if exponent else 0) - len(fraction)
+    if abs(scale) > DURATION_MAX_DIGITS:
+        return None
+    numerator = int(whole + fraction)
+    if scale >= 0:
+        numerator *= 10**scale
+        denominator = 1
+    else:
+        denominator = 10**-scale
+    if numerator >= _DIGIT_LIMIT:
+        return None
+    # A negative zero is formatted as zero
+    return sign == "-" and numerator > 0, numerator, denominator
+
+
+def _split_months(num: int, den: int) -> List[_Part]:
+    """Split num/den months into years, months and (under a year) days."""
+    parts = []
+    years = num // (12 * den)
+    months = (num // den) % 12
+    fraction = num % den
+    if years > 0:
+        parts.append((str(years), "year", years == 1))
+    if months > 0 or (years > 0 and fraction == 0):
+        parts.append((str(months), "month", months == 1))
+    days = fraction * MONTH_CENTIDAYS // (100 * den)
+    if days > 0 and years == 0:
+        parts.append((str(days), "day", days == 1))
+    return parts
+
+
+def _split_years(num: int, den: int) -> List[_Part]:
+    """Split num/den years into years, months and (under a year) days."""
+    parts = []
+    years, fraction = divmod(num, den)
+    if years > 0:
+        parts.append((str(years), "year", years == 1))
+    months, fraction = divmod(fraction * 12, den)
+    if months > 0 or years > 0:
+        parts.append((str(months), "month", months == 1))
+    days = fraction * MONTH_CENTIDAYS // (100 * den)
+    if days > 0 and years == 0:
+        parts.append((str(days), "day", days == 1))
+    return parts
+
+
+def _split_minutes(num: int, den: int) -> List[_Part]:
+    """Split num/den minutes into hours, minutes and (under an hour) seconds."""
+    parts = []
+    hours = num // (SECONDS_PER_MINUTE * den)
+    minutes = (num // den) % SECONDS_PER_MINUTE
+    fraction = num % den
+    if hours > 0:
+        parts.append((str(hours), "hour", hours == 1))
+    if minutes > 0 or (hours > 0 and fraction == 0):
+        parts.append((str(minutes), "minute", minutes == 1))
+    seconds = fraction * SECONDS_PER_MINUTE // den
+    if seconds > 0 and hours == 0:
+        parts.append((str(seconds), "second", seconds == 1))
+    return parts
+
+
+def _split_hours(num: int, den: int) -> List[_Part]:
+    """Split num/den hours into hours, minutes and (under an hour) seconds."""
+    parts = []
+    hours, fraction = divmod(num, den)
+    if hours > 0:
+        parts.append((str(hours), "hour", hours == 1))
+    minutes, fraction = divmod(fraction * 60, den)
+    if minutes > 0 or hours > 0:
+        parts.append((str(minutes), "minute", minutes == 1))
+    seconds = fraction * 60 // den
+    if seconds > 0 and hours == 0:
+        parts.append((str(seconds), "second", seconds == 1))
+    return parts
+
+
+def _split_days(num: int, den: int) -> List[_Part]:
+    """Split num/den days into days, hours and minutes."""
+    parts = []
+    days, fraction = divmod(num, den)
+    if days > 0:
+        parts.append((str(days), "day", days == 1))
+    hours, fraction = divmod(fraction * 24, den)
+    if hours > 0 or days > 0:
+        parts.append((str(hours), "hour", hours == 1))
+    minutes = fraction * 60 // den
+    if minutes > 0 or hours > 0 or days > 0:
+        parts.append((str(minutes), "minute", minutes == 1))
+    return parts
+
+
+def _split_seconds(num: int, den: int) -> List[_Part]:
+    """Split num/den seconds into calendar components.
+
+    Sixty days and more are shown as years, months and (fractional) days;
+    shorter spans as days, hours, minutes and, below an hour, seconds.
+    """
+    parts = []
+    days, remainder = divmod(num, SECONDS_PER_DAY * den)
+    if days >= 60:
+        months, centidays = divmod(days * 100, MONTH_CENTIDAYS)
+        if months >= 12:
+            years, months = divmod(months, 12)
+            parts.append((str(years), "year", years == 1))
+            if months > 0:
+                parts.append((str(months), "month", months == 1))
+        else:
+            parts.append((str(months), "month", months == 1))
+        if centidays > 0:
+            parts.append(
+                (f"{centidays // 100}.{centidays % 100:02d}", "day", centidays == 100)
+            )
+        return parts
+
+    if days > 0:
+        parts.append((str(days), "day", days == 1))
+    hours, remainder = divmod(remainder, SECONDS_PER_HOUR * den)
+    if hours > 0 or days > 0:
+        parts.append((str(hours), "hour", hours == 1))
+    minutes, seconds = divmod(remainder, SECONDS_PER_MINUTE * den)
+    if minutes > 0 or hours > 0 or days > 0:
+        parts.append((str(minutes), "minute", minutes == 1))
+    if not parts or (days == 0 and hours == 0):
+        if seconds < 10 * den:
+            # Tenths, rounded half up
+            tenths = (20 * seconds + den) // (2 * den)
+            parts.append((f"{tenths / 10}", "second", tenths == 10))
+        else:
+            seconds = (2 * seconds + den) // (2 * den)
+            parts.append((str(seconds), "second", seconds == 1))
+    return parts
+
+
+_SPLITTERS = {
+    UnitOfTime.SECONDS: _split_seconds,
+    UnitOfTime.MINUTES: _split_minutes,
+    UnitOfTime.HOURS: _split_hours,
+    UnitOfTime.DAYS: _split_days,
+    MONTHS: _split_months,
+    YEARS: _split_years,
+}
+
+
+@lru_cache(maxsize=DURATION_FORMAT_CACHE_SIZE, typed=True)
+def _format_duration_cached(value, unit, use_full_names):
+    """Format a duration with integer arithmetic; memoized per argument."""
+    number = _split_number(value)
+    if number is None:
+        # Return original value if it can't be parsed
+        return str(value)
+    is_negative, num, den = number
+
+    if isinstance(unit, str):
+        unit = _UNIT_ALIASES.get(unit.lower(), UnitOfTime.SECONDS)
+    else:
+        unit = UnitOfTime.SECONDS
+    parts = _SPLITTERS[unit](num, den)
+    if not parts:
+        # Only values below one unit get here, so the plural label applies
+        parts = [("0", _ZERO_COMPONENT[unit], False)]
+
+    if use_full_names:
+        text = " ".join(
+            f"{amount}{_LABELS[name][1 if singular else 2]}"
+            for amount, name, singular in parts
+        )
+    else:
+        text = " ".join(f"{amount}{_LABELS[name][0]}" for amount, name, _ in parts)
+    return f"-{text}" if is_negative else text
+
 
 def format_duration(value, unit=UnitOfTime.SECONDS, use_full_names=False):
     """Format a duration value to a human-readable string based on its native unit.
@@ -20,305 +271,26 @@ def format_duration(value, unit=UnitOfTime.SECONDS, use_full_names=False):
         use_full_names: If True, use full unit names (e.g., "minutes" instead of "m")
 
     Returns:
-        A formatted string representation of the duration
+        A formatted string representation of the duration, or str(value) if
+        it is not a number
         Short format (e.g., "5d 2h 30m") when use_full_names=False
         Full format (e.g., "5 days 2 hours 30 minutes") when use_full_names=True
     """
     try:
-        # Convert to precise decimal for calculations
-        raw_value = Decimal(str(value))
-
-        # Handle negative values
-        is_negative = raw_value < 0
-        if is_negative:
-            raw_value = abs(raw_value)
-
-        # Convert string unit to proper unit type if needed
-        if isinstance(unit, str):
-            unit_str = unit.lower()
-            if unit_str in ["m", "min", "minute", "minutes"]:
-                unit = UnitOfTime.MINUTES
-            elif unit_str in ["h", "hr", "hour", "hours"]:
-                unit = UnitOfTime.HOURS
-            elif unit_str in ["d", "day", "days"]:
-                unit = UnitOfTime.DAYS
-            elif unit_str in ["mo", "month", "months"]:
-                unit = MONTHS
-            elif unit_str in ["y", "yr", "year", "years"]:
-                unit = YEARS
-            else:
-                unit = UnitOfTime.SECONDS
-
-        # Define unit labels based on the use_full_names parameter
-        if use_full_names:
-            year_label = " year" if int(raw_value) == 1 else " years"
-            month_label = " month" if int(raw_value) == 1 else " months"
-            day_label = " day" if int(raw_value) == 1 else " days"
-            hour_label = " hour" if int(raw_value) == 1 else " hours"
-            minute_label = " minute" if int(raw_value) == 1 else " minutes"
-            second_label = " second" if int(raw_value) == 1 else " seconds"
-        else:
-            year_label = "y"
-            month_label = "mo"
-            day_label = "d"
-            hour_label = "h"
-            minute_label = "m"
-            second_label = "s"
-
-        parts = []
-
-        # Constants for time conversions
-        SECONDS_PER_MINUTE = 60
-        MINUTES_PER_HOUR = 60
-        HOURS_PER_DAY = 24
-        DAYS_PER_MONTH = Decimal("30.44")  # Average days per month (365.25/12)
-        MONTHS_PER_YEAR = 12
-
-        # Format based on the native unit
-        if unit == MONTHS:
-            # For months: extract years, months, days
-            total_months = raw_value
-
-            # Extract years from months
-            years = int(total_months // MONTHS_PER_YEAR)
-            months = int(total_months % MONTHS_PER_YEAR)
-            month_fraction = total_months % 1
-
-            if years > 0:
-                if use_full_names:
-                    year_label = " year" if years == 1 else " years"
-                parts.append(f"{years}{year_label}")
-
-            if months > 0 or (years > 0 and month_fraction == 0):
-                if use_full_names:
-                    month_label = " month" if months == 1 else " months"
-                parts.append(f"{months}{month_label}")
-
-            # Convert fraction of month to days
-            days = int(month_fraction * DAYS_PER_MONTH)
-            if days > 0 and years == 0:  # Only show days if less than 1 year
-                if use_full_names:
-                    day_label = " day" if days == 1 else " days"
-                parts.append(f"{days}{day_label}")
-
-        elif unit == YEARS:
-            # For years: extract years, months, days
-            whole_years = int(raw_value)
-            year_fraction = raw_value - whole_years
-
-            if whole_years > 0:
-                if use_full_names:
-                    year_label = " year" if whole_years == 1 else " years"
-                parts.append(f"{whole_years}{year_label}")
-
-            # Convert fraction of year to months
-            months = int(year_fraction * MONTHS_PER_YEAR)
-            month_fraction = (year_fraction * MONTHS_PER_YEAR) - months
-
-            if months > 0 or whole_years > 0:
-                if use_full_names:
-                    month_label = " month" if months == 1 else " months"
-                parts.append(f"{months}{month_label}")
-
-            # Convert fraction of month to days
-            days = int(month_fraction * DAYS_PER_MONTH)
-            if days > 0 and whole_years == 0:  # Only show days if less than 1 year
-                if use_full_names:
-                    day_label = " day" if days == 1 else " days"
-                parts.append(f"{days}{day_label}")
-
-        elif unit == UnitOfTime.MINUTES:
-            # For minutes: extract hours, minutes, seconds
-            total_minutes = raw_value
-
-            # Extract hours from minutes
-            hours = int(total_minutes // MINUTES_PER_HOUR)
-            minutes = int(total_minutes % MINUTES_PER_HOUR)
-            minute_fraction = total_minutes % 1
-
-            if hours > 0:
-                if use_full_names:
-                    hour_label = " hour" if hours == 1 else " hours"
-                parts.append(f"{hours}{hour_label}")
-
-            if minutes > 0 or (hours > 0 and minute_fraction == 0):
-                if use_full_names:
-                    minute_label = " minute" if minutes == 1 else " minutes"
-                parts.append(f"{minutes}{minute_label}")
-
-            # Convert fraction of minute to seconds
-            seconds = int(minute_fraction * SECONDS_PER_MINUTE)
-            if seconds > 0 and hours == 0:  # Only show seconds if less than 1 hour
-                if use_full_names:
-                    second_label = " second" if seconds == 1 else " seconds"
-                parts.append(f"{seconds}{second_label}")
-
-        elif unit == UnitOfTime.HOURS:
-            # For hours: extract hours, minutes, seconds
-            whole_hours = int(raw_value)
-            hour_fraction = raw_value - whole_hours
-
-            if whole_hours > 0:
-                if use_full_names:
-                    hour_label = " hour" if whole_hours == 1 else " hours"
-                parts.append(f"{whole_hours}{hour_label}")
-
-            # Convert fraction of hour to minutes
-            minutes = int(hour_fraction * MINUTES_PER_HOUR)
-            minute_fraction = (hour_fraction * MINUTES_PER_HOUR) - minutes
-
-            if minutes > 0 or whole_hours > 0:
-                if use_full_names:
-                    minute_label = " minute" if minutes == 1 else " minutes"
-                parts.append(f"{minutes}{minute_label}")
-
-            # Convert fraction of minute to seconds
-            seconds = int(minute_fraction * SECONDS_PER_MINUTE)
-            if (
-                seconds > 0 and whole_hours == 0
-            ):  # Only show seconds if less than 1 hour
-                if use_full_names:
-                    second_label = " second" if seconds == 1 else " seconds"
-                parts.append(f"{seconds}{second_label}")
-
-        elif unit == UnitOfTime.DAYS:
-            # For days: extract days, hours, minutes
-            whole_days = int(raw_value)
-            day_fraction = raw_value - whole_days
-
-            if whole_days > 0:
-                if use_full_names:
-                    day_label = " day" if whole_days == 1 else " days"
-                parts.append(f"{whole_days}{day_label}")
-
-            # Convert fraction of day to hours
-            hours = int(day_fraction * HOURS_PER_DAY)
-            hour_fraction = (day_fraction * HOURS_PER_DAY) - hours
-
-            if hours > 0 or whole_days > 0:
-                if use_full_names:
-                    hour_label = " hour" if hours == 1 else " hours"
-                parts.append(f"{hours}{hour_label}")
-
-            # Convert fraction of hour to minutes
-            minutes = int(hour_fraction * MINUTES_PER_HOUR)
-            if minutes > 0 or hours > 0 or whole_days > 0:
-                if use_full_names:
-                    minute_label = " minute" if minutes == 1 else " minutes"
-                parts.append(f"{minutes}{minute_label}")
-
-        else:  # Default: SECONDS
-            # For seconds: extract years, months, days, hours, minutes, seconds
-            total_seconds = raw_value
-
-            days = int(
-                total_seconds // (SECONDS_PER_MINUTE * MINUTES_PER_HOUR * HOURS_PER_DAY)
-            )
-            remainder = total_seconds % (
-                SECONDS_PER_MINUTE * MINUTES_PER_HOUR * HOURS_PER_DAY
-            )
+        return _format_duration_cached(value, unit, use_full_names)
+    except TypeError:
+        # Unhashable argument: nothing to memoize
+        return _format_duration_cached.__wrapped__(value, unit, use_full_names)
 
-            # If more than 60 days, convert to months and years
-            if days >= 60:
-                months = int(days // DAYS_PER_MONTH)
-                remaining_days = days % DAYS_PER_MONTH
-
-                # If more than 12 months, convert to years
-                if months >= 12:
-                    years = int(months // MONTHS_PER_YEAR)
-                    remaining_months = months % MONTHS_PER_YEAR
-
-                    if use_full_names:
-                        year_label = " year" if years == 1 else " years"
-                    parts.append(f"{years}{year_label}")
-
-                    if remaining_months > 0:
-                        if use_full_names:
-                            month_label = (
-                                " month" if remaining_months == 1 else " months"
-                            )
-                        parts.append(f"{remaining_months}{month_label}")
-                else:
-                    if use_full_names:
-                        month_label = " month" if months == 1 else " months"
-                    parts.append(f"{months}{month_label}")
-
-                if remaining_days > 0:
-                    if use_full_names:
-                        day_label = " day" if remaining_days == 1 else " days"
-                    parts.append(f"{remaining_days}{day_label}")
-
-                # Don't show hours/minutes/seconds for durations longer than 60 days
-            else:
-                # Standard days/hours/minutes/seconds format
-                if days > 0:
-                    if use_full_names:
-                        day_label = " day" if days == 1 else " days"
-                    parts.append(f"{days}{day_label}")
-
-                hours = int(remainder // (SECONDS_PER_MINUTE * MINUTES_PER_HOUR))
-                remainder = remainder % (SECONDS_PER_MINUTE * MINUTES_PER_HOUR)
-
-                if hours > 0 or days > 0:
-                    if use_full_names:
-                        hour_label = " hour" if hours == 1 else " hours"
-                    parts.append(f"{hours}{hour_label}")
-
-                minutes = int(remainder // SECONDS_PER_MINUTE)
-                seconds = remainder % SECONDS_PER_MINUTE
-
-                if minutes > 0 or hours > 0 or days > 0:
-                    if use_full_names:
-                        minute_label = " minute" if minutes == 1 else " minutes"
-                    parts.append(f"{minutes}{minute_label}")
-
-                # Only include seconds if less than 1 hour total or it's the only component
-                if (not parts) or (days == 0 and hours == 0):
-                    # Format seconds with appropriate precision
-                    if seconds < 10:
-                        seconds_rounded = float(
-                            seconds.quantize(Decimal("0.1"), rounding=ROUND_HALF_UP)
-                        )
-                        if use_full_names:
-                            second_label = (
-                                " second" if seconds_rounded == 1 else " seconds"
-                            )
-                        parts.append(f"{seconds_rounded}{second_label}")
-                    else:
-                        seconds_int = int(
-                            seconds.quantize(Decimal("1"), rounding=ROUND_HALF_UP)
-                        )
-                        if use_full_names:
-                            second_label = " second" if seconds_int == 1 else " seconds"
-                        parts.append(f"{seconds_int}{second_label}")
-
-        # Handle empty parts (zero value)
-        if not parts:
-            if unit == UnitOfTime.SECONDS:
-                parts = [f"0{second_label}"]
-            elif unit == UnitOfTime.MINUTES:
-                parts = [f"0{minute_label}"]
-            elif unit == UnitOfTime.HOURS:
-                parts = [f"0{hour_label}"]
-            elif unit == UnitOfTime.DAYS:
-                parts = [f"0{day_label}"]
-            elif unit == MONTHS:
-                parts = [f"0{month_label}"]
-            elif unit == YEARS:
-                parts = [f"0{year_label}"]
-
-        # Join parts with spaces
-        formatted = " ".join(parts)
-
-        # Add negative sign if needed
-        if is_negative:
-            formatted = "-" + formatted
-
-        return formatted
-
-    except (ValueError, TypeError):
-        # Return original value if it can't be parsed
-        return str(value)
+
+# Seconds per target unit of parse_duration; anything else is seconds
+_SECONDS_PER_UNIT = {
+    UnitOfTime.MINUTES: 60,
+    UnitOfTime.HOURS: 3600,
+    UnitOfTime.DAYS: 86400,
+    MONTHS: 86400 * 30.44,
+    YEARS: 86400 * 365.25,
+}
 
 
 def parse_duration(value: Any, target_unit=UnitOfTime.SECONDS) -> Optional[float]:
@@ -350,17 +322,7 @@ def parse_duration(value: Any, target_unit=UnitOfTime.SECONDS) -> Optional[float
                     hours, minutes, seconds = map(float, parts)
                     total_seconds = hours * 3600 + minutes * 60 + seconds
                     # Convert to target unit
-                    if target_unit == UnitOfTime.MINUTES:
-                        return total_seconds / 60
-                    elif target_unit == UnitOfTime.HOURS:
-                        return total_seconds / 3600
-                    elif target_unit == UnitOfTime.DAYS:
-                        return total_seconds / 86400
-                    elif target_unit == MONTHS:
-                        return total_seconds / (86400 * 30.44)
-                    elif target_unit == YEARS:
-                        return total_seconds / (86400 * 365.25)
-                    return total_seconds
+                    return total_seconds / _SECONDS_PER_UNIT.get(target_unit, 1)
                 except ValueError:
                     pass
             elif len(parts) == 2:  # MM:SS
@@ -368,17 +330,7 @@ def parse_duration(value: Any, target_unit=UnitOfTime.SECONDS) -> Optional[float
                     minutes, seconds = map(float, parts)
                     total_seconds = minutes * 60 + seconds
                     # Convert to target unit
-                    if target_unit == UnitOfTime.MINUTES:
-                        return total_seconds / 60
-                    elif target_unit == UnitOfTime.HOURS:
-                        return total_seconds / 3600
-                    elif target_unit == UnitOfTime.DAYS:
-                        return total_seconds / 86400
-                    elif target_unit == MONTHS:
-                        return total_seconds / (86400 * 30.44)
-                    elif target_unit == YEARS:
-                        return total_seconds / (86400 * 365.25)
-                    return total_seconds
+                    return total_seconds / _SECONDS_PER_UNIT.get(target_unit, 1)
                 except ValueError:
                     pass
 
@@ -432,17 +384,7 @@ def parse_duration(value: Any, target_unit=UnitOfTime.SECONDS) -> Optional[float
                 ]
             ):
                 # Convert to target unit
-                if target_unit == UnitOfTime.MINUTES:
-                    return total_seconds / 60
-                elif target_unit == UnitOfTime.HOURS:
-                    return total_seconds / 3600
-                elif target_unit == UnitOfTime.DAYS:
-                    return total_seconds / 86400
-                elif target_unit == MONTHS:
-                    return total_seconds / (86400 * 30.44)
-                elif target_unit == YEARS:
-                    return total_seconds / (86400 * 365.25)
-                return total_seconds
+                return total_seconds / _SECONDS_PER_UNIT.get(target_unit, 1)
         except Exception:
             pass
 
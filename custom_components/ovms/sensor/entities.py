@@ -38,7 +38,10 @@ from .factory import (
     create_cell_sensors,
 )
 from .duration_formatter import format_duration, parse_duration
+from ..metrics import MetricDescriptor
 from ..metrics.common.tire import TIRE_POSITIONS
+from ..payload import decode_payload
+from ..utils import async_connect_entity_updates
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
@@ -52,20 +55,19 @@ def format_sensor_value(value, device_class, attributes):
         return None
 
     if device_class == SensorDeviceClass.DURATION:
-        # For duration, store raw value as attribute
-        attributes["raw_value"] = value
-
         # Get the original unit directly from the metric definition in attributes
         original_unit = attributes.get("original_unit")
 
         # First format with short format (for main display)
         formatted_short = format_duration(value, original_unit, False)
 
-        # Also format with full names for the attribute
-        formatted_full = format_duration(value, original_unit, True)
+        # The full-name attribute only changes with the value, so skip it
+        # on repeated publishes of the same value
+        if "formatted_value" not in attributes or attributes.get("raw_value") != value:
+            attributes["formatted_value"] = format_duration(value, original_unit, True)
 
-        # Store both values in attributes
-        attributes["formatted_value"] = formatted_full
+        # For duration, store raw value as attribute
+        attributes["raw_value"] = value
         attributes["formatted_short"] = formatted_short
 
         # Remove any legacy or debug fields
@@ -378,6 +380,7 @@ class OVMSSensor(SensorEntity, RestoreEntity):
         friendly_name: Optional[str] = None,
         hass: Optional[HomeAssistant] = None,
         config_entry_id: Optional[str] = None,
+        metric: Optional[MetricDescriptor] = None,
     ) -> None:
         """Initialize the sensor."""
         self._attr_unique_id = unique_id
@@ -403,7 +406,7 @@ class OVMSSensor(SensorEntity, RestoreEntity):
 
         # Determine sensor type
         sensor_type = determine_sensor_type(
-            self._internal_name, self._topic, self._attr_extra_state_attributes
+            self._internal_name, self._topic, self._attr_extra_state_attributes, metric
         )
         self._attr_device_class = sensor_type["device_class"]
         self._attr_state_class = sensor_type["state_class"]
@@ -501,6 +504,7 @@ class OVMSSensor(SensorEntity, RestoreEntity):
             self._attr_extra_state_attributes.get("original_state_class")
             or self._attr_state_class
         )
+        initial_state = decode_payload(initial_state)
         handled_numeric_vector = False
         if not self._try_parse_vector(initial_state):
             if not self._is_cell_sensor:
@@ -511,6 +515,7 @@ class OVMSSensor(SensorEntity, RestoreEntity):
                     device_class_for_parsing,
                     state_class_for_parsing,
                     self._is_cell_sensor,
+                    topic=self._topic,
                 )
 
                 # Format the value
@@ -521,11 +526,7 @@ class OVMSSensor(SensorEntity, RestoreEntity):
                 )
 
         # Extract additional attributes
-        if (
-            self._is_cell_sensor
-            and isinstance(initial_state, str)
-            and "," in initial_state
-        ):
+        if self._is_cell_sensor and initial_state.fields is not None:
             self._handle_cell_values(initial_state)
         elif not handled_numeric_vector:
             updated_attrs = process_json_payload(
@@ -641,8 +642,12 @@ class OVMSSensor(SensorEntity, RestoreEntity):
                 self._attr_extra_state_attributes.update(saved_attributes)
 
         @callback
-        def update_state(payload: str) -> None:
+        def update_state(payload: Any) -> None:
             """Update the sensor state."""
+            # Decoded once by the dispatcher and shared with the other
+            # entities of the topic; raw when sent over the update signal
+            payload = decode_payload(payload)
+
             # Parse the value using original values
             device_class_for_parsing = (
                 self._attr_extra_state_attributes.get("original_device_class")
@@ -670,6 +675,7 @@ class OVMSSensor(SensorEntity, RestoreEntity):
                     device_class_for_parsing,
                     state_class_for_parsing,
                     self._is_cell_sensor,
+                    topic=self._topic,
                 )
 
                 # Format the value
@@ -680,7 +686,7 @@ class OVMSSensor(SensorEntity, RestoreEntity):
                 )
 
             # Process the payload for attributes
-            if self._is_cell_sensor and isinstance(payload, str) and "," in payload:
+            if self._is_cell_sensor and payload.fields is not None:
                 self._handle_cell_values(payload)
             elif not handled_numeric_vector:
                 updated_attrs = process_json_payload(
@@ -704,13 +710,7 @@ class OVMSSensor(SensorEntity, RestoreEntity):
 
         # Subscribe to updates
         if self.hass:
-            self.async_on_remove(
-                async_dispatcher_connect(
-                    self.hass,
-                    f"{SIGNAL_UPDATE_ENTITY}_{self.unique_id}",
-                    update_state,
-                )
-            )
+            self.async_on_remove(async_connect_entity_updates(self, update_state))
 
     def _try_parse_vector(self, payload: Any) -> bool:
         """Apply config-driven vector handling if the metric declares it.
@@ -751,15 +751,12 @@ class OVMSSensor(SensorEntity, RestoreEntity):
         so scalars, short tuples and labelled vectors are unaffected. Returns
         True when it handled the payload.
         """
-        if not isinstance(payload, str) or "," not in payload:
-            return False
-        parts = [p.strip() for p in payload.split(",") if p.strip()]
-        if len(parts) < VECTOR_MIN_VALUES:
+        payload = decode_payload(payload)
+        if payload.parts is None or len(payload.parts) < VECTOR_MIN_VALUES:
             return False
-        try:
-            values = [float(p) for p in parts]
-        except (ValueError, TypeError):
+        if payload.numbers is None:
             return False
+        values = list(payload.numbers)
 
         median = round(calculate_median(values), 4)
         self._parsed_value = median
@@ -772,15 +769,14 @@ class OVMSSensor(SensorEntity, RestoreEntity):
         self._attr_extra_state_attributes["mean"] = round(sum(values) / len(values), 4)
         return True
 
-    def _handle_cell_values(self, payload: str) -> None:
+    def _handle_cell_values(self, payload: Any) -> None:
         """Handle cell values in payload."""
         try:
-            # Parse comma-separated values
-            values = [
-                float(part.strip()) for part in payload.split(",") if part.strip()
-            ]
-            if not values:
+            # Comma-separated values, split and converted by the decoder
+            numbers = decode_payload(payload).numbers
+            if not numbers:
                 return
+            values = list(numbers)
 
             # Store values with consistent naming
             self._attr_extra_state_attributes[f"{self._stat_type}_values"] = values
@@ -933,10 +929,12 @@ class OVMSSensor(SensorEntity, RestoreEntity):
         if sensor_configs:
             async_dispatcher_send(
                 self.hass,
-                get_add_entities_signal(self._config_entry_id),
-                {
-                    "entity_type": "sensor",
-                    "cell_sensors": sensor_configs,
-                    "parent_entity": self.entity_id,
-                },
+                get_add_entities_signal(self._config_entry_id, "sensor"),
+                [
+                    {
+                        "entity_type": "sensor",
+                        "cell_sensors": sensor_configs,
+                        "parent_entity": self.entity_id,
+                    }
+                ],
             )
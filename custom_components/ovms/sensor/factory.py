@@ -18,7 +18,7 @@ from homeassistant.const import (
 from homeassistant.const import EntityCategory
 
 from ..const import LOGGER_NAME
-from ..metrics import get_metric_by_path, get_metric_by_pattern
+from ..metrics import MetricDescriptor, resolve_metric_for_topic
 from ..metrics.common.tire import TIRE_POSITIONS
 from ..metrics.patterns import TOPIC_PATTERNS
 from ..utils import get_namespaced_ovms_unique_id
@@ -27,9 +27,16 @@ _LOGGER = logging.getLogger(LOGGER_NAME)
 
 
 def determine_sensor_type(
-    internal_name: str, topic: str, attributes: Dict[str, Any]
+    internal_name: str,
+    topic: str,
+    attributes: Dict[str, Any],
+    metric: Optional[MetricDescriptor] = None,
 ) -> Dict[str, Any]:
-    """Determine the sensor type based on metrics definitions."""
+    """Determine the sensor type based on metrics definitions.
+
+    ``metric`` is the descriptor resolved by the topic parser; it is only
+    looked up from the topic when the creation payload did not carry one.
+    """
     result: Dict[str, Any] = {
         "device_class": None,
         "state_class": None,
@@ -76,57 +83,19 @@ def determine_sensor_type(
         result["state_class"] = SensorStateClass.MEASUREMENT
         return result
 
-    # Extract metric path from topic
-    topic_suffix = topic
-    if topic.count("/") >= 3:  # Skip the prefix part
-        parts = topic.split("/")
-        # Find where the actual metric path starts
-        for i, part in enumerate(parts):
-            if part in ["metric", "status", "notify", "command", "m", "v", "s", "t"]:
-                topic_suffix = "/".join(parts[i:])
-                break
-
-    # Create both standard and alternative metric paths for matching
-    metric_path = topic_suffix.replace("/", ".")
-    alt_metric_path = None
-
-    # Handle "metric/" prefix - remove it for better matching with definitions
-    if metric_path.startswith("metric."):
-        alt_metric_path = metric_path[7:]  # Remove "metric."
-
-    # Try exact match first
-    metric_info = get_metric_by_path(metric_path)
-
-    # If no match and we have an alternative path, try that
-    if not metric_info and alt_metric_path:
-        metric_info = get_metric_by_path(alt_metric_path)
-
-    # If no exact match, try by pattern in name and topic
-    if not metric_info:
-        topic_parts = topic_suffix.split("/")
-        name_parts = internal_name.split("_")
-        metric_info = get_metric_by_pattern(topic_parts) or get_metric_by_pattern(
-            name_parts
-        )
+    if metric is None:
+        metric = resolve_metric_for_topic(topic, internal_name)
 
     # Apply metric info if found
-    if metric_info:
-        if "device_class" in metric_info:
-            result["device_class"] = metric_info["device_class"]
-        if "state_class" in metric_info:
-            result["state_class"] = metric_info["state_class"]
-        if "unit" in metric_info:
-            result["native_unit_of_measurement"] = metric_info["unit"]
-        if "suggested_unit" in metric_info:
-            result["suggested_unit_of_measurement"] = metric_info["suggested_unit"]
-        if "entity_category" in metric_info:
-            result["entity_category"] = metric_info["entity_category"]
-        if "icon" in metric_info:
-            result["icon"] = metric_info["icon"]
-        if "suggested_display_precision" in metric_info:
-            result["suggested_display_precision"] = metric_info[
-                "suggested_display_precision"
-            ]
+    if metric:
+        result["device_class"] = metric.device_class
+        result["state_class"] = metric.state_class
+        result["native_unit_of_measurement"] = metric.unit
+        result["suggested_unit_of_measurement"] = metric.suggested_unit
+        if "entity_category" in metric.definition:
+            result["entity_category"] = metric.entity_category
+        result["icon"] = metric.icon
+        result["suggested_display_precision"] = metric.suggested_display_precision
         return result
 
     # If no metric info found, try matching by pattern from TOPIC_PATTERNS
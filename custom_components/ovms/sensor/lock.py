@@ -1,6 +1,7 @@
 """Support for OVMS lock entities."""
 
 import logging
+from typing import Any
 
 from homeassistant.components.lock import LockEntity
 from homeassistant.config_entries import ConfigEntry
@@ -24,7 +25,6 @@ from ..const import (
     LOCK_PIN_REQUIRED_ERROR,
     LOCK_PIN_SECURITY_ERROR,
     LOGGER_NAME,
-    SIGNAL_UPDATE_ENTITY,
     get_add_entities_signal,
 )
 from ..entity_state import (
@@ -33,8 +33,10 @@ from ..entity_state import (
     parse_boolean_state,
     update_attributes_from_json,
 )
+from ..payload import decode_payload
 from ..utils import (
     CommandFunction,
+    async_connect_entity_updates,
     get_entry_command_function,
     get_merged_config,
     is_secure_pin_connection,
@@ -79,33 +81,33 @@ async def async_setup_entry(
     pin_allowed = is_secure_pin_connection(config)
 
     @callback
-    def async_add_lock(data: DiscoveryData) -> None:
-        """Add lock based on discovery data."""
-        if data["entity_type"] != "lock":
-            return
-
-        _LOGGER.info("Adding lock: %s", data["name"])
-
-        lock = OVMSLock(
-            unique_id=data["unique_id"],
-            name=data["name"],
-            topic=data["topic"],
-            initial_state=data["payload"],
-            device_info=data["device_info"],
-            attributes=data["attributes"],
-            command_function=command_function,
-            hass=hass,
-            friendly_name=data.get("friendly_name"),
-            lock_config=data.get("lock_config", {}),
-            default_pin=default_lock_pin,
-            pin_allowed=pin_allowed,
-        )
+    def async_add_locks(batch: list[DiscoveryData]) -> None:
+        """Add a batch of locks based on discovery data."""
+        _LOGGER.info("Adding %d locks", len(batch))
+
+        locks = [
+            OVMSLock(
+                unique_id=data["unique_id"],
+                name=data["name"],
+                topic=data["topic"],
+                initial_state=data["payload"],
+                device_info=data["device_info"],
+                attributes=data["attributes"],
+                command_function=command_function,
+                hass=hass,
+                friendly_name=data.get("friendly_name"),
+                lock_config=data.get("lock_config", {}),
+                default_pin=default_lock_pin,
+                pin_allowed=pin_allowed,
+            )
+            for data in batch
+        ]
 
-        async_add_entities([lock])
+        async_add_entities(locks)
 
     entry.async_on_unload(
         async_dispatcher_connect(
-            hass, get_add_entities_signal(entry.entry_id), async_add_lock
+            hass, get_add_entities_signal(entry.entry_id, "lock"), async_add_locks
         )
     )
 
@@ -169,19 +171,14 @@ class OVMSLock(LockEntity, RestoreEntity):
                 self._attr_extra_state_attributes.update(saved_attributes)
 
         @callback
-        def update_state(payload: str) -> None:
+        def update_state(payload: Any) -> None:
             """Update the lock state."""
+            payload = decode_payload(payload)
             self._attr_is_locked = self._parse_state(payload)
             update_attributes_from_json(payload, self._attr_extra_state_attributes)
             self.async_write_ha_state()
 
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass,
-                f"{SIGNAL_UPDATE_ENTITY}_{self.unique_id}",
-                update_state,
-            )
-        )
+        self.async_on_remove(async_connect_entity_updates(self, update_state))
 
     def _parse_state(self, state: object) -> bool:
         """Parse the current lock state from the MQTT payload."""
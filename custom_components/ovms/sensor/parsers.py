@@ -1,17 +1,17 @@
 """OVMS sensor state parsers."""
 
-import json
 import logging
 import re
 from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
-from homeassistant.util import dt as dt_util
 
 from ..const import LOGGER_NAME, MAX_STATE_LENGTH, truncate_state_value
 from ..metrics.common.tire import TIRE_POSITIONS
+from ..payload import NOT_JSON, PAYLOAD_NUMERIC, decode_payload
 from .duration_formatter import parse_duration
+from .timestamp_parser import parse_timestamp
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
@@ -98,10 +98,10 @@ def parse_labeled_vector(
         Tuple of (state_value, {label: value}). state_value is None and the
         dict is empty when the payload is not a usable CSV vector.
     """
-    if not isinstance(payload, str) or "," not in payload:
+    parts = decode_payload(payload).fields
+    if parts is None:
         return None, {}
 
-    parts = [p.strip() for p in payload.split(",")]
     attributes: Dict[str, Any] = {}
     for index, label in enumerate(labels):
         if index >= len(parts) or parts[index] == "":
@@ -130,14 +130,16 @@ def parse_comma_separated_values(
     result = {}
     try:
         # Value is assumed to be cleaned (no units) by StateParser at this point.
-        parts_str = [s.strip() for s in value.split(",") if s.strip()]
-        if not parts_str:
+        payload = decode_payload(value)
+        if not payload.parts:
             return None  # No valid parts
 
-        parts = [float(p) for p in parts_str]
-
-        if not parts:
+        if payload.numbers is None:
+            _LOGGER.warning(
+                f"Could not parse comma-separated values for {entity_name}: '{payload.raw}'"
+            )
             return None
+        parts = list(payload.numbers)
 
         # Store the array in attributes - use only one consistent naming
         result[f"{stat_type}_values"] = parts
@@ -169,14 +171,13 @@ def parse_comma_separated_values(
         # This matches the behavior shown in the working cell voltage display
         result["value"] = round(result["median"], 4)
         _LOGGER.debug(
-            f"parse_comma_separated_values: Processed '{value}' -> median: {result['median']}, final value: {result['value']}"
+            f"parse_comma_separated_values: Processed '{payload.raw}' -> median: {result['median']}, final value: {result['value']}"
         )
         return result
     except (ValueError, TypeError):
         _LOGGER.warning(
-            f"Could not parse comma-separated values for {entity_name}: '{value}'"
+            f"Could not parse comma-separated values for {entity_name}: '{payload.raw}'"
         )
-        pass
     return None
 
 
@@ -185,34 +186,21 @@ def parse_value(
     device_class: Optional[Any] = None,
     state_class: Optional[Any] = None,
     is_cell_sensor: bool = False,
+    topic: Optional[str] = None,
 ) -> Any:
-    """Parse the value from the payload."""
-    # Handle timestamp device class specifically
+    """Parse the value from the payload.
+
+    value is a raw payload or a DecodedPayload; the JSON and CSV decoding is
+    taken from the decoded payload instead of being repeated per entity.
+    """
+    payload = decode_payload(value)
+    value = payload.raw
+    numeric = requires_numeric_value(device_class, state_class)
+
+    # Timestamps are decoded in the format learned for their topic; None when
+    # unrecognized, so a bad payload does not stamp the sensor with "now"
     if device_class == SensorDeviceClass.TIMESTAMP and isinstance(value, str):
-        try:
-            # Try Home Assistant's built-in datetime parser first
-            parsed = dt_util.parse_datetime(value)
-            if parsed:
-                return parsed
-
-            # For OVMS timestamp format, extract just the datetime part
-            import datetime
-            import re
-
-            # Match format "2025-03-25 17:42:57 TIMEZONE" and extract datetime part
-            match = re.match(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})", value)
-            if match:
-                dt_str = match.group(1)
-                # Create a datetime object without timezone info
-                dt_obj = datetime.datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
-                # Home Assistant requires tzinfo, but we'll use local time zone
-                return dt_util.as_local(dt_obj)
-
-            # Return current time if we can't parse it instead of failing
-            return dt_util.now()
-        except Exception:
-            # Return current time on parse failure instead of None
-            return dt_util.now()
+        return parse_timestamp(value, topic)
 
     # For duration sensors, use our dedicated parser
     if device_class == SensorDeviceClass.DURATION:
@@ -222,13 +210,11 @@ def parse_value(
         # If parsing fails, continue with standard processing
 
     # Handle special state values for numeric sensors
-    if requires_numeric_value(device_class, state_class) and is_special_state_value(
-        value
-    ):
+    if numeric and is_special_state_value(value):
         return None
 
     # Special handling for yes/no values in numeric sensors
-    if requires_numeric_value(device_class, state_class) and isinstance(value, str):
+    if numeric and isinstance(value, str):
         # Convert common boolean strings to numeric values
         if value.lower() in ["no", "off", "false", "disabled"]:
             return 0
@@ -236,113 +222,100 @@ def parse_value(
             return 1
 
         # Check if this is a comma-separated list of numbers for a cell sensor
-        if isinstance(value, str) and "," in value and is_cell_sensor:
-            # For cell sensors, the StateParser should have already detected this as cell data
-            # and returned the raw comma-separated string. Now we process it to get median/attributes.
-            # This should ideally be harmonized with StateParser to avoid any duplication.
+        if payload.fields is not None and is_cell_sensor:
+            # The main sensor state is the median of the cell values
             stat_type = "tire" if is_tire_sensor(device_class) else "cell"
             parsed_data = parse_comma_separated_values(
-                value, "", is_cell_sensor, stat_type
+                payload, "", is_cell_sensor, stat_type
             )
             if parsed_data and "value" in parsed_data:
-                # The main sensor state will be the median value from parse_comma_separated_values
                 return parsed_data["value"]
             else:
                 # Fallback if parsing failed
                 return None
 
-    # Try parsing as JSON first
-    try:
-        json_val = json.loads(value) if isinstance(value, str) else value
+    json_val = payload.json
+    if json_val is NOT_JSON:
+        # Not JSON: numeric when the whole payload is a number
+        if payload.kind == PAYLOAD_NUMERIC:
+            return payload.value
+        # If we need a numeric value but couldn't convert, return None
+        if numeric:
+            return None
+        # Otherwise return as is
+        return value
 
-        # Handle special JSON values
-        if is_special_state_value(json_val):
+    # Handle special JSON values
+    if is_special_state_value(json_val):
+        return None
+
+    # If JSON is a dict, extract likely value
+    if isinstance(json_val, dict):
+        result = None
+        if "value" in json_val:
+            result = json_val["value"]
+        elif "state" in json_val:
+            result = json_val["state"]
+        else:
+            # Return first numeric value found
+            for key, val in json_val.items():
+                if isinstance(val, (int, float)):
+                    result = val
+                    break
+
+        # Handle special values in result
+        if is_special_state_value(result):
             return None
 
-        # If JSON is a dict, extract likely value
-        if isinstance(json_val, dict):
-            result = None
-            if "value" in json_val:
-                result = json_val["value"]
-            elif "state" in json_val:
-                result = json_val["state"]
-            else:
-                # Return first numeric value found
-                for key, val in json_val.items():
-                    if isinstance(val, (int, float)):
-                        result = val
-                        break
-
-            # Handle special values in result
-            if is_special_state_value(result):
-                return None
+        # A boolean extracted from the dict (bool is an int subclass) must be
+        # converted to 1/0 for a numeric sensor, mirroring the scalar bool
+        # branch below; otherwise it is returned as Python True/False and HA
+        # renders it as the string "True"/"False" on a numeric sensor.
+        if isinstance(result, bool) and numeric:
+            return 1 if result else 0
 
-            # A boolean extracted from the dict (bool is an int subclass) must be
-            # converted to 1/0 for a numeric sensor, mirroring the scalar bool
-            # branch below; otherwise it is returned as Python True/False and HA
-            # renders it as the string "True"/"False" on a numeric sensor.
-            if isinstance(result, bool) and requires_numeric_value(
-                device_class, state_class
-            ):
-                return 1 if result else 0
-
-            # If we have a result, return it
-            if result is not None:
-                return result
-
-            # If we need a numeric value but couldn't extract one, return None
-            if requires_numeric_value(device_class, state_class):
-                return None
-            return str(json_val)
-
-        # Booleans first: bool is a subclass of int, so a JSON true/false on a
-        # numeric sensor must be converted to 1/0 here. Otherwise it falls into
-        # the int/float branch below and is returned as Python True/False, which
-        # HA renders as the string "True"/"False" for a numeric sensor.
-        if isinstance(json_val, bool):
-            if requires_numeric_value(device_class, state_class):
-                return 1 if json_val else 0
-            return json_val
-
-        # If JSON is a scalar, use it directly
-        if isinstance(json_val, (int, float)):
-            return json_val
-
-        if isinstance(json_val, str):
-            # Handle special string values
-            if is_special_state_value(json_val):
-                return None
+        # If we have a result, return it
+        if result is not None:
+            return result
 
-            # If we need a numeric value but got a string, try to convert it
-            if requires_numeric_value(device_class, state_class):
-                try:
-                    # Try to preserve integer type when possible
-                    if "." not in json_val.strip():
-                        return int(json_val)
-                    return float(json_val)
-                except (ValueError, TypeError):
-                    return None
-            return json_val
-
-        # For arrays or other types, convert to string if not numeric
-        if requires_numeric_value(device_class, state_class):
+        # If we need a numeric value but couldn't extract one, return None
+        if numeric:
             return None
         return str(json_val)
 
-    except (ValueError, json.JSONDecodeError):
-        # Not JSON, try numeric
-        try:
-            # Check if it's a float
-            if isinstance(value, str) and "." in value:
-                return float(value)
-            # Check if it's an int
-            return int(value)
-        except (ValueError, TypeError):
-            # If we need a numeric value but couldn't convert, return None
-            if requires_numeric_value(device_class, state_class):
+    # Booleans first: bool is a subclass of int, so a JSON true/false on a
+    # numeric sensor must be converted to 1/0 here. Otherwise it falls into
+    # the int/float branch below and is returned as Python True/False, which
+    # HA renders as the string "True"/"False" for a numeric sensor.
+    if isinstance(json_val, bool):
+        if numeric:
+            return 1 if json_val else 0
+        return json_val
+
+    # If JSON is a scalar, use it directly
+    if isinstance(json_val, (int, float)):
+        return json_val
+
+    if isinstance(json_val, str):
+        # Handle special string values
+        if is_special_state_value(json_val):
+            return None
+
+        # If we need a numeric value but got a string, try to convert it
+        if numeric:
+            try:
+                # Try to preserve integer type when possible
+                if "." not in json_val.strip():
+                    return int(json_val)
+                return float(json_val)
+            except (ValueError, TypeError):
                 return None
-            # Otherwise return as is
-            return value
+        return json_val
+
+    # For arrays or other types, convert to string if not numeric
+    if numeric:
+        return None
+    return str(json_val)
 
 
 def process_json_payload(
@@ -357,10 +330,11 @@ def process_json_payload(
 
     try:
         updated_attributes.pop("full_topic", None)
+        payload = decode_payload(payload)
 
         # If it's a cell sensor and the payload is a comma-separated string,
         # parse it for individual values and statistics to add as attributes.
-        if is_cell_sensor and isinstance(payload, str) and "," in payload:
+        if is_cell_sensor and payload.fields is not None:
             # The payload string should be pre-cleaned by StateParser by this point
             stat_type = (
                 "tire"
@@ -382,8 +356,8 @@ def process_json_payload(
         # If not a cell sensor or payload is not a comma-separated string, try JSON parsing for attributes.
         # This 'else' ensures we don't try to JSON parse the comma-separated string itself if it was handled above.
         else:
-            try:
-                json_data = json.loads(payload) if isinstance(payload, str) else payload
+            json_data = payload.json
+            if json_data is not NOT_JSON:
                 if isinstance(json_data, dict):
                     # Add all fields as attributes
                     for key, value in json_data.items():
@@ -430,10 +404,6 @@ def process_json_payload(
                         # Not all elements are numeric
                         pass
 
-            except (ValueError, json.JSONDecodeError):
-                # Not JSON, that's fine
-                pass
-
     except Exception as ex:
         _LOGGER.exception("Error processing attributes: %s", ex)
 
@@ -1,6 +1,7 @@
 """Support for OVMS switches."""
 
 import logging
+from typing import Any
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
@@ -20,7 +21,6 @@ from ..const import (
     OVMS_PIN_PLACEHOLDER,
     PIN_SENSITIVE_COMMANDS,
     SWITCH_TYPES,
-    SIGNAL_UPDATE_ENTITY,
     get_add_entities_signal,
 )
 from ..entity_state import (
@@ -30,15 +30,17 @@ from ..entity_state import (
     parse_boolean_state,
     update_attributes_from_json,
 )
+from ..payload import decode_payload
 from ..utils import (
     CommandFunction,
+    async_connect_entity_updates,
     get_entry_command_function,
     get_merged_config,
     is_secure_pin_connection,
     normalize_lock_pin,
 )
 
-from ..metrics import get_metric_by_path, get_metric_by_pattern
+from ..metrics import MetricDescriptor, resolve_metric_for_topic
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
@@ -58,38 +60,37 @@ async def async_setup_entry(
     pin_allowed = is_secure_pin_connection(config)
 
     @callback
-    def async_add_switch(data: DiscoveryData) -> None:
-        """Add switch based on discovery data."""
-        if data["entity_type"] != "switch":
-            return
-
-        _LOGGER.info("Adding switch: %s", data["name"])
-
-        # Extract switch_config if present (for controllable metrics)
-        switch_config = data.get("switch_config", {})
-
-        # Use kwargs to reduce positional arguments
-        switch = OVMSSwitch(
-            unique_id=data["unique_id"],
-            name=data["name"],
-            topic=data["topic"],
-            initial_state=data["payload"],
-            device_info=data["device_info"],
-            attributes=data["attributes"],
-            command_function=command_function,
-            hass=hass,
-            friendly_name=data.get("friendly_name"),
-            switch_config=switch_config,
-            default_pin=default_lock_pin,
-            pin_allowed=pin_allowed,
-        )
+    def async_add_switches(batch: list[DiscoveryData]) -> None:
+        """Add a batch of switches based on discovery data."""
+        _LOGGER.info("Adding %d switches", len(batch))
+
+        # Use kwargs to reduce positional arguments; switch_config is present
+        # for controllable metrics
+        switches = [
+            OVMSSwitch(
+                unique_id=data["unique_id"],
+                name=data["name"],
+                topic=data["topic"],
+                initial_state=data["payload"],
+                device_info=data["device_info"],
+                attributes=data["attributes"],
+                command_function=command_function,
+                hass=hass,
+                friendly_name=data.get("friendly_name"),
+                switch_config=data.get("switch_config", {}),
+                default_pin=default_lock_pin,
+                pin_allowed=pin_allowed,
+                metric=data.get("metric"),
+            )
+            for data in batch
+        ]
 
-        async_add_entities([switch])
+        async_add_entities(switches)
 
     # Subscribe to discovery events
     entry.async_on_unload(
         async_dispatcher_connect(
-            hass, get_add_entities_signal(entry.entry_id), async_add_switch
+            hass, get_add_entities_signal(entry.entry_id, "switch"), async_add_switches
         )
     )
 
@@ -114,6 +115,7 @@ class OVMSSwitch(SwitchEntity, RestoreEntity):
         switch_config: dict[str, object] | None = None,
         default_pin: str | None = None,
         pin_allowed: bool = False,
+        metric: MetricDescriptor | None = None,
     ) -> None:
         """Initialize the switch.
 
@@ -132,6 +134,7 @@ class OVMSSwitch(SwitchEntity, RestoreEntity):
                 commands (e.g. valet/unvalet) when present
             pin_allowed: Whether the configured MQTT transport is verified TLS,
                 gating PIN usage to avoid sending it over plaintext
+            metric: Metric descriptor resolved by the topic parser
         """
         self._attr_unique_id = unique_id
         # Use the entity_id compatible name for internal use
@@ -144,6 +147,7 @@ class OVMSSwitch(SwitchEntity, RestoreEntity):
             self._attr_name = name.replace("_", " ").title()
 
         self._topic = topic
+        self._metric = metric
         self._attr_device_info = device_info
         self._attr_extra_state_attributes = {
             **attributes,
@@ -184,8 +188,9 @@ class OVMSSwitch(SwitchEntity, RestoreEntity):
                 self._attr_extra_state_attributes.update(saved_attributes)
 
         @callback
-        def update_state(payload: str) -> None:
+        def update_state(payload: Any) -> None:
             """Update the switch state."""
+            payload = decode_payload(payload)
             self._attr_is_on = self._parse_state(payload)
 
             # Try to extract additional attributes if it's JSON
@@ -193,19 +198,16 @@ class OVMSSwitch(SwitchEntity, RestoreEntity):
 
             self.async_write_ha_state()
 
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass,
-                f"{SIGNAL_UPDATE_ENTITY}_{self.unique_id}",
-                update_state,
-            )
-        )
+        self.async_on_remove(async_connect_entity_updates(self, update_state))
 
-    def _parse_state(self, state: str) -> bool:
+    def _parse_state(self, state: Any) -> bool:
         """Parse the state string to a boolean."""
-        _LOGGER.debug("Parsing switch state: %s", state)
+        state = decode_payload(state)
+        _LOGGER.debug("Parsing switch state: %s", state.raw)
         if not is_boolean_state(state, (SWITCH_TRUE_STATES, SWITCH_FALSE_STATES)):
-            _LOGGER.warning("Could not determine switch state from value: %s", state)
+            _LOGGER.warning(
+                "Could not determine switch state from value: %s", state.raw
+            )
 
         return parse_boolean_state(
             state,
@@ -237,48 +239,19 @@ class OVMSSwitch(SwitchEntity, RestoreEntity):
                 self._attr_entity_category = EntityCategory.DIAGNOSTIC
                 return
 
-        # Try to find matching metric by converting topic to dot notation
-        topic_suffix = self._topic
-        if self._topic.count("/") >= 3:  # Skip the prefix part
-            parts = self._topic.split("/")
-            # Find where the actual metric path starts
-            for i, part in enumerate(parts):
-                if part in [
-                    "metric",
-                    "status",
-                    "notify",
-                    "command",
-                    "m",
-                    "v",
-                    "s",
-                    "t",
-                ]:
-                    topic_suffix = "/".join(parts[i:])
-                    break
-
-        metric_path = topic_suffix.replace("/", ".")
-
-        # Try exact match first
-        metric_info = get_metric_by_path(metric_path)
-
-        # If no exact match, try by pattern in name and topic
-        if not metric_info:
-            topic_parts = topic_suffix.split("/")
-            name_parts = self._internal_name.split("_")
-            metric_info = get_metric_by_pattern(topic_parts) or get_metric_by_pattern(
-                name_parts
-            )
+        # Resolved by the topic parser; looked up only when not carried
+        metric = self._metric
+        if metric is None:
+            metric = resolve_metric_for_topic(self._topic, self._internal_name)
 
         # Apply metric info if found
-        if metric_info:
-            if "icon" in metric_info:
-                self._attr_icon = metric_info["icon"]
-            if "entity_category" in metric_info:
-                self._attr_entity_category = metric_info["entity_category"]
+        if metric:
+            self._attr_icon = metric.icon
+            self._attr_entity_category = metric.entity_category
             return
 
         # Fallback: Check SWITCH_TYPES by keyword matching
-        for metric_path, switch_type in SWITCH_TYPES.items():
+        for _, switch_type in SWITCH_TYPES.items():
             type_identifier = switch_type.get("type", "")
             if (
                 type_identifier in self._internal_name.lower()
@@ -302,7 +275,7 @@ class OVMSSwitch(SwitchEntity, RestoreEntity):
                 return parts[command_idx + 1]
 
         # Check SWITCH_TYPES by type identifier matching
-        for metric_path, switch_type in SWITCH_TYPES.items():
+        for _, switch_type in SWITCH_TYPES.items():
             type_identifier = switch_type.get("type", "")
             if type_identifier in self._internal_name.lower():
                 # Return the type identifier as the base command
@@ -316,7 +289,7 @@ class OVMSSwitch(SwitchEntity, RestoreEntity):
         command = self._internal_name.lower().replace("command_", "")
         return command
 
-    def _process_json_payload(self, payload: str) -> None:
+    def _process_json_payload(self, payload: Any) -> None:
         """Process JSON payload to extract additional attributes."""
         update_attributes_from_json(payload, self._attr_extra_state_attributes)
 
@@ -0,0 +1,147 @@
+"""Timestamp decoding for OVMS timestamp sensors."""
+
+import logging
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+from homeassistant.util import dt as dt_util
+
+from ..const import (
+    LOGGER_NAME,
+    TIMESTAMP_CACHE_SIZE,
+    TIMESTAMP_EPOCH_MIN,
+    TIMESTAMP_EPOCH_MAX,
+)
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# OVMS renders times as "2025-03-25 17:42:57 CET"; the zone name is not
+# resolvable (abbreviations are ambiguous), so the time is taken as local.
+_OVMS_PATTERN = re.compile(r"(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})")
+_EPOCH_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+FORMAT_ISO = "iso"
+FORMAT_OVMS = "ovms"
+FORMAT_EPOCH = "epoch"
+
+
+def _decode_iso(value: str) -> Optional[datetime]:
+    """Decode an ISO 8601 timestamp; one without an offset is local time."""
+    parsed = dt_util.parse_datetime(value)
+    if parsed is not None and parsed.tzinfo is None:
+        # HA rejects naive datetimes on timestamp sensors
+        return dt_util.as_local(parsed)
+    return parsed
+
+
+def _decode_ovms(value: str) -> Optional[datetime]:
+    """Decode the OVMS "YYYY-MM-DD HH:MM:SS TZ" format as local time."""
+    match = _OVMS_PATTERN.match(value)
+    if not match:
+        return None
+    try:
+        naive = datetime(*map(int, match.groups()))
+    except ValueError:
+        return None
+    return dt_util.as_local(naive)
+
+
+def _decode_epoch(value: str) -> Optional[datetime]:
+    """Decode seconds since the Unix epoch.
+
+    Small numbers (e.g. "seconds since midnight" timer metrics) are not
+    epochs, so only values from TIMESTAMP_EPOCH_MIN on are accepted.
+    """
+    if not _EPOCH_PATTERN.fullmatch(value):
+        return None
+    seconds = float(value)
+    if not TIMESTAMP_EPOCH_MIN <= seconds <= TIMESTAMP_EPOCH_MAX:
+        return None
+    return dt_util.as_local(dt_util.utc_from_timestamp(seconds))
+
+
+_DECODERS: Dict[str, Callable[[str], Optional[datetime]]] = {
+    FORMAT_ISO: _decode_iso,
+    FORMAT_OVMS: _decode_ovms,
+    FORMAT_EPOCH: _decode_epoch,
+}
+
+
+@lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def _decode(fmt: str, value: str, _time_zone) -> Optional[datetime]:
+    """Decode value in one format; memoized per (format, value, local zone)."""
+    # The zone is only part of the cache key: the decoders read the current
+    # default zone, and a changed zone must not reuse the old local times
+    return _DECODERS[fmt](value)
+
+
+class TimestampParser:
+    """Decode timestamp payloads, learning each topic's format once.
+
+    Every topic of a vehicle publishes its timestamps in one format, so the
+    format that decoded the last value is tried first and the others only
+    when it stops matching. Decoded values are cached, so repeated payloads
+    (retained messages, unchanged service dates) cost one dict lookup.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the parser."""
+        self._formats: Dict[str, str] = {}
+
+    def parse(self, value: str, topic: Optional[str] = None) -> Optional[datetime]:
+        """Decode a timestamp payload.
+
+        Returns None when no known format matches; the caller shows the
+        sensor as unknown rather than stamping it with the current time.
+        """
+        value = value.strip()
+        if not value:
+            return None
+        time_zone = dt_util.get_default_time_zone()
+        learned = self._formats.get(topic)
+        if learned is not None:
+            parsed = _decode(learned, value, time_zone)
+            if parsed is not None:
+                return parsed
+
+        for fmt in _DECODERS:
+            if fmt == learned:
+                continue
+            parsed = _decode(fmt, value, time_zone)
+            if parsed is not None:
+                if topic is not None:
+                    self._formats[topic] = fmt
+                return parsed
+
+        _LOGGER.debug("Unrecognized timestamp on %s: %r", topic, value)
+        return None
+
+    def learned_format(self, topic: str) -> Optional[str]:
+        """Return the format learned for a topic, if any."""
+        return self._formats.get(topic)
+
+    def forget_topics(self, prefix: str) -> None:
+        """Drop the formats learned for the topics under a topic prefix."""
+        prefix = f"{prefix.rstrip('/')}/"
+        for topic in [topic for topic in self._formats if topic.startswith(prefix)]:
+            del self._formats[topic]
+
+
+TIMESTAMP_PARSER = TimestampParser()
+
+
+def parse_timestamp(value: str, topic: Optional[str] = None) -> Optional[datetime]:
+    """Decode a timestamp payload with the shared parser."""
+    return TIMESTAMP_PARSER.parse(value, topic)
+
+
+def forget_timestamp_topics(prefix: str) -> None:
+    """Drop what the shared parser learned about a vehicle's topics.
+
+    The parser is shared by all config entries; each entry calls this for
+    its topic prefix on unload, so the learned formats stay bounded by the
+    topics of the loaded vehicles.
+    """
+    TIMESTAMP_PARSER.forget_topics(prefix)
@@ -10,7 +10,32 @@ from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
 from homeassistant.helpers import config_validation as cv
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import CONF_VEHICLE_ID, DEFAULT_COMMAND_TIMEOUT, DOMAIN, LOGGER_NAME
+from .const import (
+    CHARGE_QUERY_DEFAULT_LIMIT,
+    CHARGE_QUERY_MAX_LIMIT,
+    CONF_VEHICLE_ID,
+    DEFAULT_COMMAND_TIMEOUT,
+    DOMAIN,
+    LOGGER_NAME,
+    MEMORY_DEFAULT_TOP,
+    MEMORY_MAX_TOP,
+    MEMORY_TRACE_DEFAULT_DURATION,
+    MEMORY_TRACE_MAX_DURATION,
+    PROFILE_DEFAULT_DURATION,
+    PROFILE_DEFAULT_TOP,
+    PROFILE_MAX_DURATION,
+    PROFILE_MAX_MESSAGES,
+    PROFILE_MAX_TOP,
+    PROFILE_SORT_KEYS,
+    TRIP_QUERY_DEFAULT_LIMIT,
+    TRIP_QUERY_MAX_LIMIT,
+)
+from .memory_accounting import (
+    MemoryTraceBusyError,
+    async_memory_report,
+    iter_clients,
+)
+from .profiler import ProfilerBusyError
 from .utils import get_merged_config
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
@@ -67,6 +92,10 @@ SERVICE_CLIMATE_SCHEDULE = "climate_schedule"
 SERVICE_TPMS_MAP = "tpms_map"
 SERVICE_AUX_MONITOR = "aux_monitor"
 SERVICE_REFRESH_METRICS = "refresh_metrics"
+SERVICE_QUERY_TRIPS = "query_trips"
+SERVICE_QUERY_CHARGES = "query_charges"
+SERVICE_PROFILE = "profile"
+SERVICE_MEMORY_REPORT = "memory_report"
 
 # Schema for the send_command service
 SEND_COMMAND_SCHEMA = vol.Schema(
@@ -162,6 +191,58 @@ REFRESH_METRICS_SCHEMA = vol.Schema(
     }
 )
 
+# Schema for the query_trips service
+QUERY_TRIPS_SCHEMA = vol.Schema(
+    {
+        vol.Required("vehicle_id"): cv.string,
+        vol.Optional("limit", default=TRIP_QUERY_DEFAULT_LIMIT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=TRIP_QUERY_MAX_LIMIT)
+        ),
+        vol.Optional("since"): cv.datetime,
+    }
+)
+
+# Schema for the query_charges service
+QUERY_CHARGES_SCHEMA = vol.Schema(
+    {
+        vol.Required("vehicle_id"): cv.string,
+        vol.Optional("limit", default=CHARGE_QUERY_DEFAULT_LIMIT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=CHARGE_QUERY_MAX_LIMIT)
+        ),
+        vol.Optional("since"): cv.datetime,
+    }
+)
+
+# Schema for the profile service
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Required("vehicle_id"): cv.string,
+        vol.Optional("duration", default=PROFILE_DEFAULT_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=PROFILE_MAX_DURATION)
+        ),
+        vol.Optional("messages"): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=PROFILE_MAX_MESSAGES)
+        ),
+        vol.Optional("top", default=PROFILE_DEFAULT_TOP): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=PROFILE_MAX_TOP)
+        ),
+        vol.Optional("sort", default=PROFILE_SORT_KEYS[0]): vol.In(PROFILE_SORT_KEYS),
+    }
+)
+
+# Schema for the memory_report service
+MEMORY_REPORT_SCHEMA = vol.Schema(
+    {
+        vol.Optional("vehicle_id"): cv.string,
+        vol.Optional("trace_duration", default=MEMORY_TRACE_DEFAULT_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=MEMORY_TRACE_MAX_DURATION)
+        ),
+        vol.Optional("top", default=MEMORY_DEFAULT_TOP): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MEMORY_MAX_TOP)
+        ),
+    }
+)
+
 
 async def async_setup_services(hass: HomeAssistant) -> None:
     """Set up OVMS services."""
@@ -560,6 +641,107 @@ async def async_setup_services(hass: HomeAssistant) -> None:
                 "Ensure your OVMS module is online and connected."
             ) from ex
 
+    async def async_query_trips(call: ServiceCall) -> Dict[str, Any]:
+        """Return completed trips recorded by the trip tracker, newest first."""
+        vehicle_id = call.data.get("vehicle_id")
+        limit = call.data.get("limit", TRIP_QUERY_DEFAULT_LIMIT)
+        since = call.data.get("since")
+
+        _LOGGER.debug(
+            "Service call query_trips for vehicle %s: limit=%s since=%s",
+            vehicle_id,
+            limit,
+            since,
+        )
+
+        mqtt_client = get_mqtt_client_or_raise(vehicle_id)
+
+        try:
+            trips = await mqtt_client.trip_tracker.async_query_trips(limit, since)
+        except OSError as ex:
+            _LOGGER.warning("Reading trip log failed: %s", ex)
+            raise HomeAssistantError(f"Failed to read trip log: {ex}") from ex
+
+        return {"vehicle_id": vehicle_id, "count": len(trips), "trips": trips}
+
+    async def async_query_charges(call: ServiceCall) -> Dict[str, Any]:
+        """Return completed charge sessions, newest first."""
+        vehicle_id = call.data.get("vehicle_id")
+        limit = call.data.get("limit", CHARGE_QUERY_DEFAULT_LIMIT)
+        since = call.data.get("since")
+
+        _LOGGER.debug(
+            "Service call query_charges for vehicle %s: limit=%s since=%s",
+            vehicle_id,
+            limit,
+            since,
+        )
+
+        mqtt_client = get_mqtt_client_or_raise(vehicle_id)
+
+        try:
+            charges = await mqtt_client.charge_tracker.async_query_charges(limit, since)
+        except OSError as ex:
+            _LOGGER.warning("Reading charge log failed: %s", ex)
+            raise HomeAssistantError(f"Failed to read charge log: {ex}") from ex
+
+        return {"vehicle_id": vehicle_id, "count": len(charges), "charges": charges}
+
+    async def async_profile(call: ServiceCall) -> Dict[str, Any]:
+        """Profile the vehicle's ingest path and return the top functions."""
+        vehicle_id = call.data.get("vehicle_id")
+        duration = call.data.get("duration", PROFILE_DEFAULT_DURATION)
+        messages = call.data.get("messages")
+
+        _LOGGER.debug(
+            "Service call profile for vehicle %s: duration=%s messages=%s",
+            vehicle_id,
+            duration,
+            messages,
+        )
+
+        mqtt_client = get_mqtt_client_or_raise(vehicle_id)
+
+        try:
+            return await mqtt_client.profiler.async_profile(
+                duration,
+                messages,
+                call.data.get("top", PROFILE_DEFAULT_TOP),
+                call.data.get("sort", PROFILE_SORT_KEYS[0]),
+            )
+        except ProfilerBusyError as ex:
+            raise HomeAssistantError(str(ex)) from ex
+        except OSError as ex:
+            _LOGGER.warning("Writing profile report failed: %s", ex)
+            raise HomeAssistantError(f"Failed to write profile: {ex}") from ex
+
+    async def async_memory_report_service(call: ServiceCall) -> Dict[str, Any]:
+        """Report the memory retained per vehicle and entity."""
+        vehicle_id = call.data.get("vehicle_id")
+        trace_duration = call.data.get("trace_duration", MEMORY_TRACE_DEFAULT_DURATION)
+
+        _LOGGER.debug(
+            "Service call memory_report for vehicle %s: trace_duration=%s",
+            vehicle_id or "all",
+            trace_duration,
+        )
+
+        if vehicle_id:
+            clients = [get_mqtt_client_or_raise(vehicle_id)]
+        else:
+            # Resolved after the trace window, for the vehicles loaded then
+            clients = iter_clients(hass)
+
+        try:
+            return await async_memory_report(
+                hass,
+                clients,
+                trace_duration,
+                call.data.get("top", MEMORY_DEFAULT_TOP),
+            )
+        except MemoryTraceBusyError as ex:
+            raise HomeAssistantError(str(ex)) from ex
+
     # Register the services with response support for data-returning services
     hass.services.async_register(
         DOMAIN,
@@ -633,6 +815,38 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         supports_response=SupportsResponse.OPTIONAL,
     )
 
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_TRIPS,
+        async_query_trips,
+        schema=QUERY_TRIPS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_CHARGES,
+        async_query_charges,
+        schema=QUERY_CHARGES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_MEMORY_REPORT,
+        async_memory_report_service,
+        schema=MEMORY_REPORT_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
 
 async def async_unload_services(hass: HomeAssistant) -> None:
     """Unload OVMS services."""
@@ -646,6 +860,10 @@ async def async_unload_services(hass: HomeAssistant) -> None:
         SERVICE_TPMS_MAP,
         SERVICE_AUX_MONITOR,
         SERVICE_REFRESH_METRICS,
+        SERVICE_QUERY_TRIPS,
+        SERVICE_QUERY_CHARGES,
+        SERVICE_PROFILE,
+        SERVICE_MEMORY_REPORT,
     ]
     for service in services:
         if hass.services.has_service(DOMAIN, service):
@@ -0,0 +1,108 @@
+"""Append-only JSON-lines logs of completed trips and charge sessions."""
+
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import LOGGER_NAME
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+
+class SessionLog:
+    """One JSON object per line, oldest first, in the HA config directory.
+
+    The file I/O methods must run in the executor; the async_ methods are
+    called from the event loop.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the log; the file is created on the first append."""
+        self.path = path
+        # Records waiting for the executor, and the job writing the previous
+        # ones; one job at a time keeps the lines in order
+        self._queued: List[Dict[str, Any]] = []
+        self._writer: Optional[asyncio.Future] = None
+
+    @callback
+    def async_schedule_append(
+        self, hass: HomeAssistant, record: Dict[str, Any]
+    ) -> None:
+        """Append one record in the executor, after the ones scheduled before."""
+        self._queued.append(record)
+        if self._writer is None:
+            self._async_start_writer(hass)
+
+    @callback
+    def _async_start_writer(self, hass: HomeAssistant) -> None:
+        """Write the queued records in one executor job."""
+        records, self._queued = self._queued, []
+        self._writer = hass.async_add_executor_job(self.append, *records)
+        self._writer.add_done_callback(lambda _job: self._async_writer_done(hass))
+
+    @callback
+    def _async_writer_done(self, hass: HomeAssistant) -> None:
+        """Start writing the records queued while the last job ran."""
+        self._writer = None
+        if self._queued:
+            self._async_start_writer(hass)
+
+    async def async_flush(self) -> None:
+        """Wait for the scheduled appends to be written."""
+        while self._writer is not None:
+            await asyncio.wait({self._writer})
+
+    def append(self, *records: Dict[str, Any]) -> None:
+        """Append records."""
+        try:
+            with open(self.path, "a", encoding="utf-8") as log_file:
+                for record in records:
+                    log_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except OSError as ex:
+            _LOGGER.error("Failed to write session log %s: %s", self.path, ex)
+
+    def read_last(self) -> Optional[Dict[str, Any]]:
+        """Return the last record, or None if there is none."""
+        if not os.path.exists(self.path):
+            return None
+        last_line = None
+        with open(self.path, encoding="utf-8") as log_file:
+            for line in log_file:
+                if line.strip():
+                    last_line = line
+        if last_line is None:
+            return None
+        try:
+            return json.loads(last_line)
+        except ValueError:
+            return None
+
+    def read(self, limit: int, since: Optional[datetime]) -> List[Dict[str, Any]]:
+        """Return the newest records, newest first.
+
+        Streams the file through a bounded deque so memory stays at
+        ``limit`` records however long the log grows. ``since`` filters on
+        the records' start_time.
+        """
+        if not os.path.exists(self.path):
+            return []
+        since_iso = dt_util.as_utc(since).isoformat() if since else None
+        newest: deque = deque(maxlen=limit)
+        with open(self.path, encoding="utf-8") as log_file:
+            for line in log_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                # ISO-8601 UTC timestamps sort lexically
+                if since_iso and record.get("start_time", "") < since_iso:
+                    continue
+                newest.append(record)
+        return list(reversed(newest))
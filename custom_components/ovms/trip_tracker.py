@@ -0,0 +1,480 @@
+"""Streaming trip segmentation for OVMS integration."""
+
+import logging
+import math
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    UnitOfEnergy,
+    UnitOfEnergyDistance,
+    UnitOfLength,
+    UnitOfSpeed,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_CLIENT_ID,
+    CONF_CONFIG_ENTRY_ID,
+    CONF_VEHICLE_ID,
+    LOGGER_NAME,
+    SIGNAL_UPDATE_ENTITY,
+    TRIP_EARTH_RADIUS_KM,
+    TRIP_LOG_FILENAME_TEMPLATE,
+    TRIP_MIN_DISTANCE_KM,
+    TRIP_QUERY_DEFAULT_LIMIT,
+    TRIP_UNIQUE_ID_MARKER,
+    get_add_entities_signal,
+)
+from .entity_state import (
+    BOOLEAN_FALSE_STATES,
+    BOOLEAN_TRUE_STATES,
+    parse_boolean_state,
+)
+from .session_log import SessionLog
+from .utils import get_namespaced_ovms_unique_id, get_ovms_device_info, safe_float
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Metric paths the trip tracker consumes. Everything else is ignored after a
+# single dict lookup, so feeding every MQTT message through is cheap.
+METRIC_VEHICLE_ON = "v.e.on"
+METRIC_SPEED = "v.p.speed"
+METRIC_ODOMETER = "v.p.odometer"
+METRIC_ENERGY_USED = "v.b.energy.used"
+METRIC_ENERGY_RECD = "v.b.energy.recd"
+METRIC_SOC = "v.b.soc"
+
+# Last-trip sensors: trip record key -> sensor description.
+TRIP_SENSOR_TYPES = {
+    "distance_km": {
+        "name": "Last Trip Distance",
+        "icon": "mdi:map-marker-distance",
+        "device_class": SensorDeviceClass.DISTANCE,
+        "unit": UnitOfLength.KILOMETERS,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
+    "energy_kwh": {
+        "name": "Last Trip Energy",
+        "icon": "mdi:lightning-bolt",
+        "device_class": SensorDeviceClass.ENERGY,
+        "unit": UnitOfEnergy.KILO_WATT_HOUR,
+        # HA allows only totals for energy, and the last trip's energy is
+        # neither a measurement nor a running total
+        "state_class": None,
+    },
+    "wh_per_km": {
+        "name": "Last Trip Consumption",
+        "icon": "mdi:gauge",
+        "device_class": SensorDeviceClass.ENERGY_DISTANCE,
+        "unit": UnitOfEnergyDistance.WATT_HOUR_PER_KM,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
+    "max_speed": {
+        "name": "Last Trip Max Speed",
+        "icon": "mdi:speedometer",
+        "device_class": SensorDeviceClass.SPEED,
+        "unit": UnitOfSpeed.KILOMETERS_PER_HOUR,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
+    "duration_s": {
+        "name": "Last Trip Duration",
+        "icon": "mdi:timer-outline",
+        "device_class": SensorDeviceClass.DURATION,
+        "unit": UnitOfTime.SECONDS,
+        "state_class": SensorStateClass.MEASUREMENT,
+    },
+}
+
+# Trip record keys exposed as attributes on every last-trip sensor.
+TRIP_ATTRIBUTE_KEYS = (
+    "start_time",
+    "end_time",
+    "start_latitude",
+    "start_longitude",
+    "end_latitude",
+    "end_longitude",
+    "soc_start",
+    "soc_end",
+    "distance_source",
+)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Return the great-circle distance between two GPS fixes in kilometres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * TRIP_EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def counter_delta(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    """Return the increase of a running counter between two samples.
+
+    OVMS resets the trip energy counters (v.b.energy.used/recd) when the
+    vehicle is switched on. If the reset lands after our start sample the
+    counter goes backwards; in that case the end value is the whole trip.
+    """
+    if start is None or end is None:
+        return None
+    if end >= start:
+        return end - start
+    return end
+
+
+class _OpenTrip:
+    """Running summary of the trip in progress (fixed size)."""
+
+    __slots__ = (
+        "start_time",
+        "start_latitude",
+        "start_longitude",
+        "end_latitude",
+        "end_longitude",
+        "odometer_start",
+        "used_start",
+        "recd_start",
+        "soc_start",
+        "max_speed",
+        "gps_distance_km",
+    )
+
+    def __init__(self, start_time: datetime, tracker: "TripTracker") -> None:
+        """Seed the trip from the tracker's latest readings."""
+        self.start_time = start_time
+        self.start_latitude = tracker.latitude
+        self.start_longitude = tracker.longitude
+        self.end_latitude = tracker.latitude
+        self.end_longitude = tracker.longitude
+        self.odometer_start = tracker.odometer
+        self.used_start = tracker.energy_used
+        self.recd_start = tracker.energy_recd
+        self.soc_start = tracker.soc
+        self.max_speed = tracker.speed or 0.0
+        self.gps_distance_km = 0.0
+
+
+class TripTracker:
+    """Segment the live metric stream into trips and persist completed ones."""
+
+    def __init__(self, hass: HomeAssistant, config: Dict[str, Any]) -> None:
+        """Initialize the trip tracker."""
+        self.hass = hass
+        self.config = config
+        self._client_id = config.get(CONF_CLIENT_ID)
+        self._config_entry_id = config.get(CONF_CONFIG_ENTRY_ID)
+        self._vehicle_id = config.get(CONF_VEHICLE_ID, "unknown")
+        self._add_entities_signal = get_add_entities_signal(
+            self._config_entry_id, "sensor"
+        )
+
+        safe_vehicle_id = re.sub(r"[^a-zA-Z0-9_-]", "_", str(self._vehicle_id))
+        self.log_path = hass.config.path(
+            TRIP_LOG_FILENAME_TEMPLATE.format(vehicle_id=safe_vehicle_id)
+        )
+        self._log = SessionLog(self.log_path)
+
+        # Latest readings (only the values needed to open/close a trip)
+        self.vehicle_on: Optional[bool] = None
+        self.speed: Optional[float] = None
+        self.odometer: Optional[float] = None
+        self.energy_used: Optional[float] = None
+        self.energy_recd: Optional[float] = None
+        self.soc: Optional[float] = None
+        self.latitude: Optional[float] = None
+        self.longitude: Optional[float] = None
+
+        self.current_trip: Optional[_OpenTrip] = None
+        self.last_trip: Optional[Dict[str, Any]] = None
+        self.trip_count = 0
+        self._sensor_ids: List[str] = []
+        self._sensors_created = False
+
+        # Topic -> handler cache. Resolving the metric path from a topic is a
+        # string split; caching it keeps the per-message cost to one lookup.
+        self._topic_handlers: Dict[str, Optional[Callable[[str], None]]] = {}
+        self._metric_handlers: Dict[str, Callable[[str], None]] = {
+            METRIC_VEHICLE_ON: self._handle_vehicle_on,
+            METRIC_SPEED: self._handle_speed,
+            METRIC_ODOMETER: self._handle_odometer,
+            METRIC_ENERGY_USED: self._handle_energy_used,
+            METRIC_ENERGY_RECD: self._handle_energy_recd,
+            METRIC_SOC: self._handle_soc,
+        }
+
+    async def async_setup(self) -> None:
+        """Load the most recent completed trip from the trip log."""
+        try:
+            self.last_trip = await self.hass.async_add_executor_job(self._log.read_last)
+        except OSError as ex:
+            _LOGGER.warning("Could not read trip log %s: %s", self.log_path, ex)
+
+    @callback
+    def process_message(self, topic: str, payload: Any) -> None:
+        """Feed one MQTT message into the trip state machine."""
+        handler = self._topic_handlers.get(topic, False)
+        if handler is False:
+            handler = self._resolve_handler(topic)
+            self._topic_handlers[topic] = handler
+        if handler is not None:
+            handler(payload)
+
+    @callback
+    def process_location(self, latitude: float, longitude: float) -> None:
+        """Feed one coalesced GPS fix (from the UpdateDispatcher flush)."""
+        trip = self.current_trip
+        if trip is not None:
+            if trip.end_latitude is not None and trip.end_longitude is not None:
+                trip.gps_distance_km += haversine_km(
+                    trip.end_latitude, trip.end_longitude, latitude, longitude
+                )
+            if trip.start_latitude is None:
+                trip.start_latitude = latitude
+                trip.start_longitude = longitude
+            trip.end_latitude = latitude
+            trip.end_longitude = longitude
+        self.latitude = latitude
+        self.longitude = longitude
+
+    def _resolve_handler(self, topic: str) -> Optional[Callable[[str], None]]:
+        """Map a topic to its metric handler, or None if not trip-relevant."""
+        _, sep, suffix = topic.partition("/metric/")
+        if not sep:
+            return None
+        return self._metric_handlers.get(suffix.replace("/", "."))
+
+    def _handle_vehicle_on(self, payload: Any) -> None:
+        """Open or close a trip on ignition transitions."""
+        vehicle_on = parse_boolean_state(
+            payload, (BOOLEAN_TRUE_STATES, BOOLEAN_FALSE_STATES)
+        )
+        was_on = self.vehicle_on
+        self.vehicle_on = vehicle_on
+
+        if vehicle_on and not was_on and self.current_trip is None:
+            self.current_trip = _OpenTrip(dt_util.utcnow(), self)
+            _LOGGER.debug("Trip started for %s", self._vehicle_id)
+        elif not vehicle_on and self.current_trip is not None:
+            self._close_trip()
+
+    def _handle_speed(self, payload: Any) -> None:
+        """Track the latest speed and the trip maximum."""
+        speed = safe_float(payload)
+        if speed is None:
+            return
+        self.speed = speed
+        trip = self.current_trip
+        if trip is not None and speed > trip.max_speed:
+            trip.max_speed = speed
+
+    def _handle_odometer(self, payload: Any) -> None:
+        """Track the odometer; seed the open trip if it started without one."""
+        odometer = safe_float(payload)
+        if odometer is None:
+            return
+        self.odometer = odometer
+        if self.current_trip is not None and self.current_trip.odometer_start is None:
+            self.current_trip.odometer_start = odometer
+
+    def _handle_energy_used(self, payload: Any) -> None:
+        """Track the energy-used counter."""
+        value = safe_float(payload)
+        if value is None:
+            return
+        self.energy_used = value
+        if self.current_trip is not None and self.current_trip.used_start is None:
+            self.current_trip.used_start = value
+
+    def _handle_energy_recd(self, payload: Any) -> None:
+        """Track the energy-recovered counter."""
+        value = safe_float(payload)
+        if value is None:
+            return
+        self.energy_recd = value
+        if self.current_trip is not None and self.current_trip.recd_start is None:
+            self.current_trip.recd_start = value
+
+    def _handle_soc(self, payload: Any) -> None:
+        """Track the state of charge."""
+        value = safe_float(payload)
+        if value is None:
+            return
+        self.soc = value
+        if self.current_trip is not None and self.current_trip.soc_start is None:
+            self.current_trip.soc_start = value
+
+    def _close_trip(self) -> None:
+        """Summarise the open trip, persist it and publish it to the sensors."""
+        trip = self.current_trip
+        self.current_trip = None
+        if trip is None:
+            return
+
+        end_time = dt_util.utcnow()
+        distance = counter_delta(trip.odometer_start, self.odometer)
+        distance_source = "odometer"
+        if distance is None or distance <= 0:
+            distance = trip.gps_distance_km
+            distance_source = "gps"
+
+        if distance < TRIP_MIN_DISTANCE_KM:
+            _LOGGER.debug(
+                "Discarding ignition cycle of %.2f km for %s",
+                distance,
+                self._vehicle_id,
+            )
+            return
+
+        used = counter_delta(trip.used_start, self.energy_used)
+        recd = counter_delta(trip.recd_start, self.energy_recd)
+        energy = None
+        if used is not None:
+            energy = used - (recd or 0.0)
+
+        record = {
+            "start_time": trip.start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+            "duration_s": round((end_time - trip.start_time).total_seconds()),
+            "start_latitude": trip.start_latitude,
+            "start_longitude": trip.start_longitude,
+            "end_latitude": trip.end_latitude,
+            "end_longitude": trip.end_longitude,
+            "distance_km": round(distance, 2),
+            "distance_source": distance_source,
+            "energy_kwh": round(energy, 3) if energy is not None else None,
+            "wh_per_km": (
+                round(energy * 1000 / distance, 1) if energy is not None else None
+            ),
+            "max_speed": round(trip.max_speed, 1),
+            "soc_start": trip.soc_start,
+            "soc_end": self.soc,
+        }
+
+        self.last_trip = record
+        self.trip_count += 1
+        _LOGGER.info(
+            "Trip completed for %s: %.2f km", self._vehicle_id, record["distance_km"]
+        )
+
+        self._log.async_schedule_append(self.hass, record)
+        for unique_id in self._sensor_ids:
+            async_dispatcher_send(
+                self.hass, f"{SIGNAL_UPDATE_ENTITY}_{unique_id}", record
+            )
+
+    async def async_query_trips(
+        self, limit: int = TRIP_QUERY_DEFAULT_LIMIT, since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` completed trips, newest first."""
+        await self._log.async_flush()
+        return await self.hass.async_add_executor_job(self._log.read, limit, since)
+
+    async def async_shutdown(self) -> None:
+        """Wait for the completed trips still being written to the log."""
+        await self._log.async_flush()
+
+    @callback
+    def async_create_sensors(self) -> None:
+        """Create the last-trip sensors once the platforms are loaded."""
+        if self._sensors_created:
+            return
+        self._sensors_created = True
+
+        device_info = get_ovms_device_info(self._client_id, self._vehicle_id)
+        batch = []
+        for key, description in TRIP_SENSOR_TYPES.items():
+            unique_id = get_namespaced_ovms_unique_id(
+                f"ovms_{self._vehicle_id}_{TRIP_UNIQUE_ID_MARKER}_{key}",
+                self._config_entry_id,
+            )
+            self._sensor_ids.append(unique_id)
+            sensor = OVMSTripSensor(self, key, description, unique_id, device_info)
+            batch.append(
+                {
+                    "entity_type": "sensor",
+                    "name": description["name"],
+                    "diagnostic_sensor": sensor,
+                }
+            )
+        async_dispatcher_send(self.hass, self._add_entities_signal, batch)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return a diagnostics snapshot of the trip tracker."""
+        return {
+            "trip_in_progress": self.current_trip is not None,
+            "trips_completed": self.trip_count,
+            "log_path": self.log_path,
+        }
+
+
+class OVMSTripSensor(SensorEntity):
+    """Sensor exposing one value of the last completed trip."""
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        tracker: TripTracker,
+        key: str,
+        description: Dict[str, Any],
+        unique_id: str,
+        device_info: Dict[str, Any],
+    ) -> None:
+        """Initialize the sensor."""
+        self._tracker = tracker
+        self._key = key
+        self._attr_name = description["name"]
+        self._attr_icon = description["icon"]
+        self._attr_device_class = description["device_class"]
+        self._attr_native_unit_of_measurement = description["unit"]
+        self._attr_state_class = description["state_class"]
+        self._attr_unique_id = unique_id
+        self._attr_device_info = device_info
+
+    @property
+    def native_value(self) -> Optional[float]:
+        """Return the value from the last completed trip."""
+        trip = self._tracker.last_trip
+        return trip.get(self._key) if trip else None
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        """Return start/end details of the last completed trip."""
+        trip = self._tracker.last_trip
+        if not trip:
+            return {}
+        return {key: trip.get(key) for key in TRIP_ATTRIBUTE_KEYS}
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to trip completion updates."""
+        await super().async_added_to_hass()
+
+        @callback
+        def update_state(_record: Dict[str, Any]) -> None:
+            """Refresh from the tracker's last trip."""
+            self.async_write_ha_state()
+
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                f"{SIGNAL_UPDATE_ENTITY}_{self.unique_id}",
+                update_state,
+            )
+        )
@@ -7,6 +7,8 @@ from typing import Any, Dict, Mapping, Optional
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import Entity
 
 from .const import (
     CONF_HOST,
@@ -15,11 +17,13 @@ from .const import (
     CONF_USERNAME,
     CONF_VEHICLE_ID,
     CONF_VERIFY_SSL,
+    DEFAULT_RESYNC_PRIORITY,
     DOMAIN,
     LOGGER_NAME,
     OVMS_DEVICE_MANUFACTURER,
     OVMS_DEVICE_MODEL,
     PIN_SECURE_PROTOCOLS,
+    SIGNAL_UPDATE_ENTITY,
 )
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
@@ -99,6 +103,30 @@ def get_entry_command_function(
     return hass.data[DOMAIN][entry.entry_id]["mqtt_client"].async_send_command
 
 
+def async_connect_entity_updates(
+    entity: Entity, target: Callable[[Any], None]
+) -> Callable[[], None]:
+    """Subscribe an added entity to its state updates.
+
+    The callback is registered directly with the UpdateDispatcher of the
+    entity's config entry. Entities that are not attached to a loaded entry
+    fall back to the per-entity update signal.
+    """
+    entry = getattr(entity.platform, "config_entry", None)
+    client = (
+        entity.hass.data.get(DOMAIN, {}).get(entry.entry_id, {}).get("mqtt_client")
+        if entry is not None
+        else None
+    )
+    if client is not None:
+        return client.update_dispatcher.async_register_entity(
+            entity.unique_id, target, entity
+        )
+    return async_dispatcher_connect(
+        entity.hass, f"{SIGNAL_UPDATE_ENTITY}_{entity.unique_id}", target
+    )
+
+
 def get_namespaced_ovms_unique_id(
     unique_id: str, config_entry_id: Optional[str]
 ) -> str:
@@ -201,6 +229,45 @@ def sanitize_topic_structure(value: Any) -> Optional[str]:
     return stripped if stripped else None
 
 
+def parse_resync_priority(value: Any) -> list[list[str]]:
+    """Normalize a configured resync priority into a list of pattern stages.
+
+    Accepts the stored list of lists or the options-flow text form, where
+    stages are separated by ``;`` and patterns by ``,``. A pattern that an
+    earlier one already covers (``v.c.*`` after ``v.*``) is dropped, so the
+    module is not asked for the same pattern twice. A wildcard after an exact
+    path (``v.b.*`` after ``v.b.soc``) is kept and still includes that path:
+    a request pattern cannot leave out a metric.
+    """
+    if isinstance(value, str):
+        value = [stage.split(",") for stage in value.split(";")]
+    if not isinstance(value, (list, tuple)):
+        return [list(stage) for stage in DEFAULT_RESYNC_PRIORITY]
+
+    stages = []
+    requested: list[str] = []
+    for stage in value:
+        if isinstance(stage, str):
+            stage = [stage]
+        patterns = []
+        for pattern in (str(p).strip() for p in stage):
+            if pattern and not any(
+                pattern == earlier
+                or (earlier.endswith("*") and pattern.startswith(earlier[:-1]))
+                for earlier in requested
+            ):
+                patterns.append(pattern)
+                requested.append(pattern)
+        if patterns:
+            stages.append(patterns)
+    return stages or [list(stage) for stage in DEFAULT_RESYNC_PRIORITY]
+
+
+def format_resync_priority(stages: list[list[str]]) -> str:
+    """Render resync stages in the options-flow text form."""
+    return "; ".join(",".join(stage) for stage in stages)
+
+
 def safe_float(value: Any) -> Optional[float]:
     """Safely convert a value to float."""
     if value is None:
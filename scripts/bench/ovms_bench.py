@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the OVMS parsers and metric resolution.
+
+Every benchmark runs one function of the integration over a fixed payload
+corpus and reports the best time per call over several samples. Results are
+compared with the JSON baseline next to this script; a benchmark slower than
+its baseline by more than its budget fails the run.
+
+Baselines are recorded on whatever machine runs --update-baseline. To keep
+them usable elsewhere, every run also times a fixed pure-Python calibration
+workload, interleaved with the benchmark samples, and compares the median
+ratio of each sample to its neighbouring calibration sample.
+
+Usage:
+    python3 scripts/bench/ovms_bench.py                    # compare, exit 1 on regression
+    python3 scripts/bench/ovms_bench.py --update-baseline  # record a new baseline
+    python3 scripts/bench/ovms_bench.py --filter parse_value --json results.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+
+# Make the repo root importable when run directly from scripts/bench/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+from homeassistant.const import UnitOfTime
+
+from custom_components.ovms.const import LOGGER_NAME
+from custom_components.ovms.metrics import (
+    METRIC_DEFINITIONS,
+    determine_category_from_topic,
+    get_metric_by_path,
+    get_metric_by_pattern,
+    load_vehicle_metrics,
+)
+from custom_components.ovms.mqtt.entity_registry import EntityRegistry
+from custom_components.ovms.mqtt.state_parser import StateParser
+from custom_components.ovms.mqtt.topic_parser import TopicParser
+from custom_components.ovms.payload import decode_payload
+from custom_components.ovms.sensor.duration_formatter import (
+    format_duration,
+    parse_duration,
+)
+from custom_components.ovms.sensor.entities import OVMSSensor
+from custom_components.ovms.sensor.parsers import parse_value
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+BASELINE_VERSION = 1
+DEFAULT_BUDGET = 0.50  # allowed slowdown relative to the baseline
+DEFAULT_REPEAT = 15
+DEFAULT_MIN_TIME = 0.05  # seconds per sample
+
+# The corpora include the vehicle-specific Leaf definitions
+VEHICLE_PREFIX = "xnl."
+CONFIG = {
+    "vehicle_id": "leaf",
+    "mqtt_username": "bench",
+    "topic_prefix": "ovms",
+    "topic_structure": "{prefix}/{mqtt_username}/{vehicle_id}",
+    "client_id": "ha_ovms_bench",
+}
+STRUCTURE_PREFIX = "ovms/bench/leaf"
+
+CELL_VOLTAGES = ",".join(f"{3.9 + (i % 7) * 0.004:.3f}" for i in range(96))
+CELL_TEMPS = ",".join(f"{24 + (i % 5) * 0.5:.1f}" for i in range(32))
+TIRE_PRESSURES = "230.5,231.0,229.5,230.0"
+
+POWER = SensorDeviceClass.POWER
+MEASUREMENT = SensorStateClass.MEASUREMENT
+VALUE_PAYLOADS = (
+    ("80.5", SensorDeviceClass.BATTERY, MEASUREMENT, "metric/v/b/soc"),
+    ("12.62", SensorDeviceClass.VOLTAGE, MEASUREMENT, "metric/v/b/12v/voltage"),
+    ("-3.25", POWER, MEASUREMENT, "metric/v/b/power"),
+    ("yes", None, None, "metric/v/c/charging"),
+    ("no", SensorDeviceClass.ENERGY, MEASUREMENT, "metric/v/c/kwh"),
+    ("charging", None, None, "metric/v/c/state"),
+    ("", SensorDeviceClass.TEMPERATURE, MEASUREMENT, "metric/v/m/temp"),
+    ("unavailable", SensorDeviceClass.CURRENT, MEASUREMENT, "metric/v/b/current"),
+    ('{"value": 21.5}', SensorDeviceClass.TEMPERATURE, MEASUREMENT, "metric/v/e/temp"),
+    ('{"on": true}', None, None, "metric/xnl/v/climate"),
+    (
+        "3.92,3.93,3.91,3.94",
+        SensorDeviceClass.VOLTAGE,
+        MEASUREMENT,
+        "metric/v/b/c/voltage",
+    ),
+    ("1.5,2.5,3.5", POWER, MEASUREMENT, "metric/v/c/power"),
+    (CELL_VOLTAGES, SensorDeviceClass.VOLTAGE, MEASUREMENT, "metric/v/b/c/voltage"),
+    ("5400", SensorDeviceClass.DURATION, MEASUREMENT, "metric/v/c/time"),
+    (
+        "2024-05-01 12:30:00 UTC",
+        SensorDeviceClass.TIMESTAMP,
+        None,
+        "metric/v/c/timestamp",
+    ),
+    ("Type 2", None, None, "metric/v/c/type"),
+)
+DURATION_VALUES = (
+    (0, UnitOfTime.SECONDS, False),
+    (59, UnitOfTime.SECONDS, False),
+    (61, UnitOfTime.SECONDS, True),
+    (3600, UnitOfTime.SECONDS, False),
+    (5400.5, UnitOfTime.SECONDS, True),
+    (86399, UnitOfTime.SECONDS, False),
+    (90061, UnitOfTime.SECONDS, True),
+    (1234567, UnitOfTime.SECONDS, False),
+    (45, UnitOfTime.MINUTES, False),
+    (130, UnitOfTime.MINUTES, True),
+    (36, UnitOfTime.HOURS, False),
+    (400, UnitOfTime.DAYS, True),
+)
+DURATION_STRINGS = (
+    ("5400", UnitOfTime.SECONDS),
+    (5400, UnitOfTime.SECONDS),
+    ("01:30:00", UnitOfTime.SECONDS),
+    ("12:30", UnitOfTime.MINUTES),
+    ("2h 30m", UnitOfTime.SECONDS),
+    ("1d 2h 3m 4s", UnitOfTime.SECONDS),
+    ("2 hours 30 minutes", UnitOfTime.MINUTES),
+    ("3 days", UnitOfTime.HOURS),
+    ("1y 2mo", UnitOfTime.DAYS),
+    ("45 min", UnitOfTime.SECONDS),
+    ("", UnitOfTime.SECONDS),
+    ("soon", UnitOfTime.SECONDS),
+)
+UNKNOWN_PATHS = ("x.custom.metric", "v.b.unknown", "xzz.v.b.soc", "m.net.foo.bar")
+CELL_PAYLOADS = (
+    ("metric/v/b/c/voltage", CELL_VOLTAGES),
+    ("metric/v/b/c/temp", CELL_TEMPS),
+    ("metric/v/t/pressure", TIRE_PRESSURES),
+)
+
+
+class Benchmark:
+    """One function timed over a fixed corpus of argument tuples."""
+
+    def __init__(self, name, func, corpus):
+        """Initialize the benchmark."""
+        self.name = name
+        self.func = func
+        self.corpus = list(corpus)
+
+    def run_once(self):
+        """Call the function once for every corpus entry."""
+        func = self.func
+        for args in self.corpus:
+            func(*args)
+
+    def passes_for(self, min_time):
+        """Warm up, then return the corpus passes one sample needs."""
+        self.run_once()  # warm caches and lazy imports
+        passes = 1
+        while self.sample(passes) < min_time:
+            passes *= 2
+        return passes
+
+    def sample(self, passes):
+        """Return the seconds passes runs over the corpus take."""
+        started = time.perf_counter()
+        for _ in range(passes):
+            self.run_once()
+        return time.perf_counter() - started
+
+
+def _metric_paths():
+    return sorted(path for path in METRIC_DEFINITIONS if "*" not in path)
+
+
+def _cell_sensor(topic, payload):
+    return OVMSSensor(
+        f"bench_{topic}",
+        topic.replace("/", "_"),
+        f"{STRUCTURE_PREFIX}/{topic}",
+        payload,
+        {},
+        {"category": "battery", "has_cell_data": True},
+    )
+
+
+def build_benchmarks():
+    """Return the benchmarks, corpora included."""
+    load_vehicle_metrics(VEHICLE_PREFIX)
+    paths = _metric_paths()
+    all_paths = paths + list(UNKNOWN_PATHS)
+    topic_parts = [path.split(".") for path in all_paths]
+    topics = [
+        f"{STRUCTURE_PREFIX}/metric/{path.replace('.', '/')}" for path in all_paths
+    ]
+    topic_parser = TopicParser(CONFIG, EntityRegistry())
+    cell_sensors = [
+        (_cell_sensor(topic, payload), payload) for topic, payload in CELL_PAYLOADS
+    ]
+
+    return [
+        Benchmark(
+            "sensor.parsers.parse_value",
+            parse_value,
+            [
+                (value, device_class, state_class, "/c/" in topic, topic)
+                for value, device_class, state_class, topic in VALUE_PAYLOADS
+            ],
+        ),
+        Benchmark(
+            "payload.decode_payload",
+            decode_payload,
+            [(payload[0],) for payload in VALUE_PAYLOADS]
+            + [(payload,) for _, payload in CELL_PAYLOADS],
+        ),
+        Benchmark(
+            "mqtt.state_parser.StateParser.parse_value",
+            StateParser.parse_value,
+            VALUE_PAYLOADS,
+        ),
+        Benchmark(
+            "sensor.duration_formatter.format_duration",
+            format_duration,
+            DURATION_VALUES,
+        ),
+        Benchmark(
+            "sensor.duration_formatter.parse_duration", parse_duration, DURATION_STRINGS
+        ),
+        Benchmark(
+            "metrics.get_metric_by_path",
+            get_metric_by_path,
+            [(path,) for path in all_paths],
+        ),
+        Benchmark(
+            "metrics.get_metric_by_pattern",
+            get_metric_by_pattern,
+            [(parts,) for parts in topic_parts],
+        ),
+        Benchmark(
+            "metrics.determine_category_from_topic",
+            determine_category_from_topic,
+            [(parts,) for parts in topic_parts],
+        ),
+        Benchmark(
+            "mqtt.topic_parser.TopicParser.parse_topic",
+            topic_parser.parse_topic,
+            [(topic, "42") for topic in topics],
+        ),
+        Benchmark(
+            "sensor.entities.OVMSSensor._handle_cell_values",
+            lambda sensor, payload: sensor._handle_cell_values(payload),
+            cell_sensors,
+        ),
+    ]
+
+
+def _calibration_workload():
+    """Fixed pure-Python work: string splitting, float parsing, dict updates."""
+    values = {}
+    for index, part in enumerate(CELL_VOLTAGES.split(",")):
+        values[f"cell_{index}"] = round(float(part) * 1000.0, 1)
+    return sorted(values.items(), key=lambda item: item[1])
+
+
+def calibrated_relative(samples, references, calls):
+    """Return the benchmark's time per call relative to the calibration.
+
+    ``samples`` are the benchmark's sample times of ``calls`` calls each and
+    ``references`` the calibration times per pass taken alongside them. The
+    result is the median over the pairs of the time per call divided by the
+    calibration time of the same pair: a pair hit by a load spike slows both
+    sides, and the median drops the pairs where only one side was hit.
+    """
+    return statistics.median(
+        sample / calls / reference for sample, reference in zip(samples, references)
+    )
+
+
+def run_benchmarks(benchmarks, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME):
+    """Measure the benchmarks; returns the results document.
+
+    Samples of each benchmark alternate with samples of the calibration
+    workload, so both see the same machine load, and ``relative`` compares
+    each sample with its own pair (calibrated_relative). Taking the best of
+    each side instead paired the benchmark's quietest moment with the
+    calibration's, which came from a different moment on a busy machine.
+    """
+    calibration = Benchmark("calibration", _calibration_workload, [()])
+    calibration_passes = calibration.passes_for(min_time)
+    calibration_ns = []
+    measured = {}
+    for benchmark in benchmarks:
+        passes = benchmark.passes_for(min_time)
+        calls = passes * len(benchmark.corpus)
+        samples = []
+        references = []
+        for _ in range(repeat):
+            reference = calibration.sample(calibration_passes) / calibration_passes
+            samples.append(benchmark.sample(passes))
+            references.append(reference)
+            calibration_ns.append(reference * 1e9)
+        measured[benchmark.name] = {
+            "ns_per_call": round(min(samples) / calls * 1e9, 1),
+            "median_ns_per_call": round(statistics.median(samples) / calls * 1e9, 1),
+            "relative": round(calibrated_relative(samples, references, calls), 6),
+            "corpus": len(benchmark.corpus),
+        }
+    return {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "calibration_ns": (
+            round(statistics.median(calibration_ns), 1) if calibration_ns else None
+        ),
+        "benchmarks": measured,
+    }
+
+
+def compare(results, baseline, budget_override=None):
+    """Compare results with the baseline.
+
+    Returns one row per benchmark: name, baseline and current ns per call,
+    the change of the calibrated time, the budget and the status ("ok",
+    "REGRESSION", "new" or "faster").
+    """
+    rows = []
+    recorded = baseline.get("benchmarks", {})
+    for name, result in results["benchmarks"].items():
+        entry = recorded.get(name)
+        if entry is None:
+            rows.append((name, None, result["ns_per_call"], None, None, "new"))
+            continue
+        budget = (
+            budget_override
+            if budget_override is not None
+            else entry.get("budget", DEFAULT_BUDGET)
+        )
+        change = result["relative"] / entry["relative"] - 1
+        if change > budget:
+            status = "REGRESSION"
+        elif change < -budget:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append(
+            (name, entry["ns_per_call"], result["ns_per_call"], change, budget, status)
+        )
+    return rows
+
+
+def updated_baseline(results, baseline):
+    """Return results as a baseline, keeping the budgets already set."""
+    recorded = baseline.get("benchmarks", {})
+    document = dict(results)
+    document["benchmarks"] = {
+        name: {
+            "ns_per_call": result["ns_per_call"],
+            "relative": result["relative"],
+            "corpus": result["corpus"],
+            "budget": recorded.get(name, {}).get("budget", DEFAULT_BUDGET),
+        }
+        for name, result in results["benchmarks"].items()
+    }
+    return document
+
+
+def format_rows(rows):
+    """Render comparison rows as a table."""
+    lines = [
+        f"{'benchmark':<50}{'baseline ns':>13}{'current ns':>13}"
+        f"{'change':>9}{'budget':>8}  status"
+    ]
+    for name, base, current, change, budget, status in rows:
+        lines.append(
+            f"{name:<50}"
+            f"{base if base is not None else '-':>13}"
+            f"{current:>13}"
+            f"{f'{change:+.1%}' if change is not None else '-':>9}"
+            f"{f'{budget:.0%}' if budget is not None else '-':>8}"
+            f"  {status}"
+        )
+    return "\n".join(lines)
+
+
+def load_baseline(path):
+    """Load a baseline file; an absent file is an empty baseline."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as baseline_file:
+        return json.load(baseline_file)
+
+
+def build_parser():
+    """Return the command line parser."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="write the results as the new baseline (budgets are kept)",
+    )
+    parser.add_argument("--filter", help="only run benchmarks containing this")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "--min-time", type=float, default=DEFAULT_MIN_TIME, help="seconds per sample"
+    )
+    parser.add_argument(
+        "--budget", type=float, help="override every benchmark's budget (0.3 = 30%%)"
+    )
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser
+
+
+def main(argv=None):
+    """Run the benchmarks from the command line."""
+    options = build_parser().parse_args(argv)
+    # Parse failures on the corpus log warnings; keep them off the timings
+    logging.getLogger(LOGGER_NAME).setLevel(logging.CRITICAL)
+
+    benchmarks = [
+        benchmark
+        for benchmark in build_benchmarks()
+        if not options.filter or options.filter in benchmark.name
+    ]
+    results = run_benchmarks(benchmarks, options.repeat, options.min_time)
+    baseline = load_baseline(options.baseline)
+    rows = compare(results, baseline, options.budget)
+    print(f"calibration: {results['calibration_ns']} ns")
+    print(format_rows(rows))
+
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as results_file:
+            json.dump(results, results_file, indent=2)
+    if options.update_baseline:
+        document = updated_baseline(results, baseline)
+        if options.filter:
+            # Keep the benchmarks that were not run
+            kept = dict(baseline.get("benchmarks", {}))
+            kept.update(document["benchmarks"])
+            document["benchmarks"] = kept
+            document["calibration_ns"] = baseline.get(
+                "calibration_ns", results["calibration_ns"]
+            )
+        with open(options.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(document, baseline_file, indent=2)
+            baseline_file.write("\n")
+        print(f"Baseline written to {options.baseline}")
+        return 0
+
+    regressions = [row[0] for row in rows if row[5] == "REGRESSION"]
+    if regressions:
+        print(
+            f"\n{len(regressions)} benchmark(s) over budget: {', '.join(regressions)}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1176 @@
+#!/usr/bin/env python3
+"""Synthetic multi-vehicle OVMS load generator.
+
+Answers "how many vehicles can one Home Assistant instance handle?" by
+running N simulated OVMS modules against the integration in this process:
+
+  * an in-process MQTT broker stand-in (retained messages, ``+``/``#``
+    wildcards, last will, MQTT v5 subscription identifiers and
+    ``no_local``) sits between the modules and the integration;
+  * every module publishes the metric mix of metrics/common plus one
+    vehicle's metrics/vehicles table: cell vectors, tyre vectors, GPS
+    latitude/longitude pairs, drive/park/charge sessions (v.c.charging,
+    v.c.state, v.c.type, v.c.power, v.c.kwh, v.b.soc), a retained
+    ``s.v3.connected`` with its last will, and a retained snapshot of every
+    metric on connect, as the firmware does;
+  * modules answer ``client/rr/command/<id>`` on ``client/rr/response/<id>``
+    and re-publish the metrics matching a ``client/<id>/request/metric``
+    pattern, like OVMS edge firmware;
+  * each vehicle is served by a REAL OVMSMQTTClient and the REAL platform
+    setup of sensor, binary_sensor, switch, lock and device_tracker.
+    Home Assistant itself is replaced by the same kind of stand-in the
+    scripts/tests use: entities are attached to their entry, but state
+    writes are timed instead of written to a state machine.
+
+The report covers throughput, ingest queue delay and handler time,
+end-to-end latency from publish to entity state write, event loop lag and
+command round trips.
+
+Usage:
+    python3 scripts/loadgen/ovms_loadgen.py --vehicles 50 --rate 5 --duration 60
+    python3 scripts/loadgen/ovms_loadgen.py --vehicles 10 --json report.json
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+# Make the repo root importable when run directly from scripts/loadgen/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import paho.mqtt.client as mqtt
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+import custom_components.ovms.mqtt.discovery_snapshot as ds_mod
+
+from custom_components.ovms import binary_sensor, device_tracker, lock, switch
+from custom_components.ovms import sensor as sensor_platform
+from custom_components.ovms.const import (
+    COMMAND_TOPIC_TEMPLATE,
+    DOMAIN,
+    LOGGER_NAME,
+    METRIC_REQUEST_TOPIC_TEMPLATE,
+    RESPONSE_TOPIC_TEMPLATE,
+    get_platforms_loaded_signal,
+)
+from custom_components.ovms.memory_accounting import measure_vehicles
+from custom_components.ovms.metrics import (
+    BINARY_METRICS,
+    METRIC_DEFINITIONS,
+    VEHICLE_MODULES,
+    import_vehicle_metrics,
+)
+from custom_components.ovms.mqtt import OVMSMQTTClient
+
+PLATFORMS = {
+    "sensor": sensor_platform,
+    "binary_sensor": binary_sensor,
+    "switch": switch,
+    "lock": lock,
+    "device_tracker": device_tracker,
+}
+
+# Random-walk ranges by unit of measurement
+UNIT_RANGES = {
+    "%": (5.0, 100.0),
+    "°C": (-5.0, 40.0),
+    "V": (300.0, 400.0),
+    "A": (-50.0, 150.0),
+    "kW": (-10.0, 80.0),
+    "W": (0.0, 3000.0),
+    "kWh": (0.0, 60.0),
+    "Ah": (0.0, 150.0),
+    "km": (0.0, 500.0),
+    "km/h": (0.0, 130.0),
+    "min": (0.0, 600.0),
+    "s": (0.0, 36000.0),
+    "kPa": (220.0, 260.0),
+    "dBm": (-110.0, -50.0),
+    "Wh/km": (120.0, 220.0),
+    "°": (0.0, 359.0),
+}
+DEFAULT_RANGE = (0.0, 100.0)
+
+# Relative publish weight of each metric kind in the live stream
+KIND_WEIGHTS = {
+    "gps": 8.0,
+    "fast": 6.0,
+    "numeric": 2.0,
+    "vector": 1.0,
+    "binary": 0.5,
+    "text": 0.2,
+    "timestamp": 0.2,
+}
+FAST_UNITS = ("kW", "W", "A", "km/h")
+
+START_POSITION = (59.91, 10.75)
+CHARGERS = (("type2", 7.2), ("type2", 11.0), ("ccs", 50.0))
+TICK = 0.1  # seconds between publish batches of one module
+
+_LOGGER = logging.getLogger("ovms_loadgen")
+
+
+def _percentiles(samples):
+    """Return count, p50, p95, p99 and max in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def _at(fraction):
+        index = min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)
+        return round(ordered[max(index, 0)] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": _at(0.50),
+        "p95_ms": _at(0.95),
+        "p99_ms": _at(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _filter_matches(filter_levels, topic_levels):
+    """Return True if a split topic filter matches a split topic."""
+    for index, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if index >= len(topic_levels):
+            return False
+        if level != "+" and level != topic_levels[index]:
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+class _RetainedTree:
+    """Retained messages by topic level, so a new subscription only visits
+    the topics its filter can match."""
+
+    def __init__(self):
+        self.root = {}
+
+    def set(self, topic, payload):
+        node = self.root
+        for level in topic.split("/"):
+            node = node.setdefault(level, {})
+        # Levels are strings, so None cannot clash with a child
+        node[None] = payload
+
+    def remove(self, topic):
+        node = self.root
+        for level in topic.split("/"):
+            node = node.get(level)
+            if node is None:
+                return
+        node.pop(None, None)
+
+    def match(self, topic_filter):
+        """Yield (topic, payload) of the retained messages a filter matches."""
+        yield from self._walk(self.root, topic_filter.split("/"), 0, [])
+
+    def _walk(self, node, levels, index, path):
+        if index == len(levels):
+            if None in node:
+                yield "/".join(path), node[None]
+            return
+        level = levels[index]
+        if level == "#":
+            yield from self._subtree(node, path)
+        elif level == "+":
+            for key, child in node.items():
+                if key is not None:
+                    yield from self._walk(child, levels, index + 1, path + [key])
+        elif level in node:
+            yield from self._walk(node[level], levels, index + 1, path + [level])
+
+    def _subtree(self, node, path):
+        for key, child in node.items():
+            if key is None:
+                yield "/".join(path), child
+            else:
+                yield from self._subtree(child, path + [key])
+
+
+class InProcessBroker:
+    """MQTT broker stand-in living on the event loop.
+
+    Deliveries are scheduled with call_soon, so publishers never run their
+    subscribers' handlers inline, as with a real broker. The sessions a topic
+    is routed to are cached until a subscription changes.
+    """
+
+    def __init__(self, loop):
+        """Initialize the broker."""
+        self.loop = loop
+        self.sessions = []
+        self.retained = _RetainedTree()
+        self.published_at = {}
+        self.published = 0
+        self.deliveries = 0
+        self.pending = 0
+        self._routes = {}
+
+    def connect(self, session):
+        """Accept a session; its last will is armed until a clean disconnect."""
+        self.sessions.append(session)
+        self._routes.clear()
+
+    def disconnect(self, session, clean=True):
+        """Drop a session, publishing its last will unless clean."""
+        if session in self.sessions:
+            self.sessions.remove(session)
+            self._routes.clear()
+        if not clean and session.will is not None:
+            topic, payload, retain = session.will
+            self.publish(topic, payload, retain=retain)
+
+    def subscriptions_changed(self):
+        """Forget the cached routes."""
+        self._routes.clear()
+
+    def publish(self, topic, payload, qos=0, retain=False, sender=None):
+        """Route one publish to every matching subscription."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        elif payload is None:
+            payload = b""
+        self.published += 1
+        self.published_at[topic] = time.perf_counter()
+        if retain:
+            if payload:
+                self.retained.set(topic, payload)
+            else:
+                self.retained.remove(topic)
+
+        routes = self._routes.get(topic)
+        if routes is None:
+            routes = self._routes[topic] = self._route(topic)
+        for session, subscriptions in routes:
+            matched = [
+                identifier
+                for identifier, no_local in subscriptions
+                if not (no_local and session is sender)
+            ]
+            if matched:
+                identifiers = [i for i in matched if i is not None]
+                self._deliver(session, topic, payload, identifiers, False)
+
+    def _route(self, topic):
+        levels = topic.split("/")
+        routes = []
+        for session in self.sessions:
+            subscriptions = [
+                (identifier, no_local)
+                for filter_levels, identifier, no_local in session.filters.values()
+                if _filter_matches(filter_levels, levels)
+            ]
+            if subscriptions:
+                routes.append((session, subscriptions))
+        return routes
+
+    def deliver_retained(self, session, topic_filter, identifier):
+        """Send the retained messages matching a new subscription."""
+        identifiers = [identifier] if identifier is not None else []
+        for topic, payload in list(self.retained.match(topic_filter)):
+            # Latency of a replay counts from the replay
+            self.published_at[topic] = time.perf_counter()
+            self._deliver(session, topic, payload, identifiers, True)
+
+    def _deliver(self, session, topic, payload, identifiers, retain):
+        self.pending += 1
+        self.loop.call_soon(
+            self._run_delivery, session, topic, payload, identifiers, retain
+        )
+
+    def _run_delivery(self, session, topic, payload, identifiers, retain):
+        self.pending -= 1
+        self.deliveries += 1
+        session.deliver(topic, payload, identifiers, retain)
+
+
+class BrokerSession:
+    """The subset of paho's Client the integration and modules use."""
+
+    def __init__(self, broker, will=None):
+        """Initialize a session."""
+        self.broker = broker
+        self.will = will
+        self.filters = {}
+        self.on_connect = None
+        self.on_disconnect = None
+        self.on_message = None
+
+    def subscribe(self, topics, properties=None):
+        """Subscribe [(filter, qos or SubscribeOptions)], as paho does."""
+        identifiers = getattr(properties, "SubscriptionIdentifier", None)
+        identifier = identifiers[0] if identifiers else None
+        for topic_filter, options in topics:
+            no_local = bool(getattr(options, "noLocal", False))
+            self.filters[topic_filter] = (
+                topic_filter.split("/"),
+                identifier,
+                no_local,
+            )
+            self.broker.subscriptions_changed()
+            self.broker.deliver_retained(self, topic_filter, identifier)
+        return (mqtt.MQTT_ERR_SUCCESS, None)
+
+    def unsubscribe(self, topics):
+        """Remove subscriptions."""
+        for topic_filter in topics:
+            self.filters.pop(topic_filter, None)
+        self.broker.subscriptions_changed()
+        return (mqtt.MQTT_ERR_SUCCESS, None)
+
+    def publish(self, topic, payload=None, qos=0, retain=False, properties=None):
+        """Publish through the broker."""
+        self.broker.publish(topic, payload, qos, retain, sender=self)
+
+    def deliver(self, topic, payload, identifiers, retain):
+        """Hand a delivery to on_message as a paho MQTTMessage."""
+        if self.on_message is None:
+            return
+        msg = mqtt.MQTTMessage(topic=topic.encode())
+        msg.payload = payload
+        msg.retain = retain
+        if identifiers:
+            msg.properties = mqtt.Properties(mqtt.PacketTypes.PUBLISH)
+            for identifier in identifiers:
+                msg.properties.SubscriptionIdentifier = identifier
+        self.on_message(self, None, msg)
+
+    def loop_stop(self):
+        """Nothing to stop; deliveries run on the event loop."""
+
+    def disconnect(self):
+        """Disconnect cleanly (the last will is discarded)."""
+        self.broker.disconnect(self, clean=True)
+
+
+class _Metric:
+    """Value model of one metric."""
+
+    def __init__(self, path, definition, kind, rng, cells):
+        self.path = path
+        self.kind = kind
+        self.rng = rng
+        self.size = 4 if path.startswith("v.t.") else cells
+        unit = str(definition.get("unit")) if definition.get("unit") else None
+        if path.startswith("v.b.12v.") and unit == "V":
+            low, high = 11.8, 14.4
+        elif kind == "vector" and unit == "V":
+            low, high = 3.55, 4.15
+        elif kind == "vector" and unit == "°C":
+            low, high = 15.0, 35.0
+        else:
+            low, high = UNIT_RANGES.get(unit, DEFAULT_RANGE)
+        self.low, self.high = low, high
+        self.value = rng.uniform(low, high)
+        self.flag = rng.random() < 0.3
+        words = [
+            word.strip()
+            for word in str(definition.get("description", "")).split(",")
+            if word.strip()
+        ]
+        self.words = (
+            words
+            if len(words) > 1
+            and all(word.isalpha() and len(word) < 16 for word in words)
+            else ["ok"]
+        )
+        self.text = rng.choice(self.words)
+
+    def step(self):
+        """Advance the value one step."""
+        if self.kind == "binary":
+            if self.rng.random() < 0.05:
+                self.flag = not self.flag
+        elif self.kind == "text":
+            if self.rng.random() < 0.05:
+                self.text = self.rng.choice(self.words)
+        elif self.kind != "timestamp":
+            span = self.high - self.low
+            self.value = min(
+                self.high, max(self.low, self.value + self.rng.gauss(0, span * 0.02))
+            )
+
+    def payload(self):
+        """Format the value like the firmware."""
+        if self.kind == "binary":
+            return "yes" if self.flag else "no"
+        if self.kind == "text":
+            return self.text
+        if self.kind == "timestamp":
+            return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+        if self.kind == "vector":
+            spread = (self.high - self.low) * 0.01
+            return ",".join(
+                f"{self.value + self.rng.uniform(-spread, spread):.3f}"
+                for _ in range(self.size)
+            )
+        return f"{self.value:.2f}"
+
+
+class SimulatedModule:
+    """One OVMS module: metric stream, sessions and firmware responders."""
+
+    def __init__(self, broker, base, vehicle_prefix, options, rng):
+        """Initialize the module."""
+        self.broker = broker
+        self.base = base
+        self.rng = rng
+        self.rate = options.rate
+        self.time_scale = options.time_scale
+        self.vehicle_prefix = vehicle_prefix
+        self.session = BrokerSession(
+            broker, will=(self._topic("s.v3.connected"), "no", True)
+        )
+        self.session.on_message = self._on_message
+        self.published = 0
+        self.commands_answered = 0
+        self.metric_requests_answered = 0
+
+        definitions = dict(METRIC_DEFINITIONS)
+        if vehicle_prefix:
+            definitions.update(import_vehicle_metrics(vehicle_prefix))
+        self.metrics = {
+            path: _Metric(
+                path, definition, self._kind(path, definition), rng, options.cells
+            )
+            for path, definition in sorted(definitions.items())
+            if "*" not in path
+        }
+        self._stream = [
+            metric
+            for metric in self.metrics.values()
+            if metric.path not in self._SESSION_METRICS
+            and metric.path != "v.p.longitude"
+        ]
+        self._weights = [KIND_WEIGHTS[metric.kind] for metric in self._stream]
+
+        # Session state machine
+        self.phase = "charge" if rng.random() < options.charging else "drive"
+        self.phase_left = rng.uniform(600, 3600)
+        self.sessions = 1 if self.phase == "charge" else 0
+        self.soc = rng.uniform(20, 70)
+        self.target_soc = rng.uniform(80, 100)
+        self.charger = rng.choice(CHARGERS)
+        self.kwh = 0.0
+        self.speed = 0.0
+        self.heading = rng.uniform(0, 2 * math.pi)
+        self.lat = START_POSITION[0] + rng.uniform(-0.5, 0.5)
+        self.lon = START_POSITION[1] + rng.uniform(-0.5, 0.5)
+
+    _SESSION_METRICS = frozenset(
+        (
+            "v.c.charging",
+            "v.c.state",
+            "v.c.type",
+            "v.c.power",
+            "v.c.kwh",
+            "v.b.soc",
+            "v.p.speed",
+            "s.v3.connected",
+        )
+    )
+
+    @staticmethod
+    def _kind(path, definition):
+        if path in ("v.p.latitude", "v.p.longitude"):
+            return "gps"
+        if path in BINARY_METRICS:
+            return "binary"
+        if definition.get("has_cell_data") or (
+            path.startswith("v.t.") and definition.get("unit")
+        ):
+            return "vector"
+        device_class = str(definition.get("device_class"))
+        if device_class == "timestamp":
+            return "timestamp"
+        unit = definition.get("unit")
+        if unit is None and definition.get("state_class") is None:
+            return "text"
+        return "fast" if str(unit) in FAST_UNITS else "numeric"
+
+    def _topic(self, path):
+        return f"{self.base}/metric/{path.replace('.', '/')}"
+
+    def publish_metric(self, path, payload):
+        """Publish one metric, retained like the firmware."""
+        self.published += 1
+        self.session.publish(self._topic(path), payload, retain=True)
+
+    def _publish_model(self, metric):
+        if metric.kind == "gps":
+            self.publish_metric("v.p.latitude", f"{self.lat:.6f}")
+            self.publish_metric("v.p.longitude", f"{self.lon:.6f}")
+            return
+        self.publish_metric(metric.path, metric.payload())
+
+    def connect(self):
+        """Connect, publish the connected flag and the full metric snapshot."""
+        self.broker.connect(self.session)
+        self.session.subscribe(
+            [
+                (
+                    COMMAND_TOPIC_TEMPLATE.format(
+                        structure_prefix=self.base, command_id="+"
+                    ),
+                    1,
+                ),
+                (
+                    METRIC_REQUEST_TOPIC_TEMPLATE.format(
+                        structure_prefix=self.base, client_id="+"
+                    ),
+                    1,
+                ),
+            ]
+        )
+        self.publish_metric("s.v3.connected", "yes")
+        self.publish_all("*")
+
+    def publish_all(self, pattern):
+        """Publish every metric matching a comma-separated glob pattern."""
+        patterns = [part.strip() for part in pattern.split(",") if part.strip()]
+        for metric in self.metrics.values():
+            if metric.path == "v.p.longitude":
+                continue
+            if any(fnmatch.fnmatchcase(metric.path, part) for part in patterns):
+                if metric.path in self._SESSION_METRICS:
+                    self._publish_session_metric(metric.path)
+                else:
+                    self._publish_model(metric)
+
+    def drop(self):
+        """Lose the connection; the broker publishes the last will."""
+        self.broker.disconnect(self.session, clean=False)
+
+    def tick(self, budget):
+        """Advance the simulation by TICK and publish budget stream messages."""
+        self._advance_session(TICK * self.time_scale)
+        for metric in self.rng.choices(self._stream, self._weights, k=budget):
+            metric.step()
+            self._publish_model(metric)
+
+    def _advance_session(self, seconds):
+        self.phase_left -= seconds
+        if self.phase == "drive":
+            self.speed = min(130.0, max(0.0, self.speed + self.rng.gauss(2, 8)))
+            self.heading += self.rng.gauss(0, 0.1)
+            step = self.speed / 3600 * seconds / 111.0
+            self.lat += step * math.cos(self.heading)
+            self.lon += step * math.sin(self.heading) / math.cos(math.radians(self.lat))
+            self.soc = max(5.0, self.soc - self.speed * seconds / 3600 * 0.2)
+        elif self.phase == "charge":
+            power = self.charger[1] * (0.5 if self.soc > 90 else 1.0)
+            self.kwh += power * seconds / 3600
+            self.soc = min(100.0, self.soc + power * seconds / 3600 * 1.6)
+            self.publish_metric("v.c.power", f"{power:.2f}")
+            self.publish_metric("v.c.kwh", f"{self.kwh:.2f}")
+            if self.soc >= self.target_soc:
+                self._enter("park")
+                return
+        if self.phase_left <= 0:
+            self._enter(self.rng.choice(("drive", "charge", "park")))
+
+    def _enter(self, phase):
+        previous, self.phase = self.phase, phase
+        self.phase_left = self.rng.uniform(600, 3600)
+        if previous == "drive" or phase != "drive":
+            self.speed = 0.0
+            self.publish_metric("v.p.speed", "0")
+        if phase == "charge":
+            self.sessions += 1
+            self.kwh = 0.0
+            self.target_soc = self.rng.uniform(max(80.0, self.soc + 5), 100.0)
+            self.charger = self.rng.choice(CHARGERS)
+            for path in ("v.c.type", "v.c.charging", "v.c.state", "v.c.kwh"):
+                self._publish_session_metric(path)
+        elif previous == "charge":
+            self.publish_metric("v.c.power", "0")
+            for path in ("v.c.charging", "v.c.state"):
+                self._publish_session_metric(path)
+        self._publish_session_metric("v.b.soc")
+
+    def _publish_session_metric(self, path):
+        charging = self.phase == "charge"
+        if path == "v.c.charging":
+            payload = "yes" if charging else "no"
+        elif path == "v.c.state":
+            payload = "charging" if charging else "done" if self.sessions else "stopped"
+        elif path == "v.c.type":
+            payload = self.charger[0]
+        elif path == "v.c.power":
+            payload = f"{self.charger[1]:.2f}" if charging else "0"
+        elif path == "v.c.kwh":
+            payload = f"{self.kwh:.2f}"
+        elif path == "v.b.soc":
+            payload = f"{self.soc:.1f}"
+        elif path == "v.p.speed":
+            payload = f"{self.speed:.1f}"
+        else:
+            payload = "yes"
+        self.publish_metric(path, payload)
+
+    def _on_message(self, _client, _userdata, msg):
+        """Firmware side of commands and on-demand metric requests."""
+        topic = msg.topic
+        payload = msg.payload.decode()
+        if "/client/rr/command/" in topic:
+            command_id = topic.rsplit("/", 1)[-1]
+            self.commands_answered += 1
+            self.session.publish(
+                RESPONSE_TOPIC_TEMPLATE.format(
+                    structure_prefix=self.base, command_id=command_id
+                ),
+                self._command_output(payload),
+            )
+        elif topic.endswith("/request/metric"):
+            self.metric_requests_answered += 1
+            self.publish_all(payload)
+
+    def _command_output(self, command):
+        words = command.split()
+        if words[:1] == ["stat"]:
+            state = "Charging" if self.phase == "charge" else "Not charging"
+            return f"{state}\nSOC: {self.soc:.1f}%\nCAC: 110.2Ah"
+        if words[:2] == ["charge", "start"] or words[:2] == ["charge", "stop"]:
+            return f"Charge has been {words[1]}ed"
+        if words[:2] == ["metrics", "list"]:
+            pattern = words[2] if len(words) > 2 else "*"
+            return "\n".join(
+                f"{metric.path} {metric.payload()}"
+                for metric in self.metrics.values()
+                if fnmatch.fnmatchcase(metric.path, pattern) and metric.kind != "gps"
+            )
+        return "Unrecognised command"
+
+    async def async_run(self, stop):
+        """Publish the stream at the configured rate until stop is set."""
+        carry = 0.0
+        while not stop.is_set():
+            carry += self.rate * TICK
+            budget = int(carry)
+            carry -= budget
+            self.tick(budget)
+            try:
+                await asyncio.wait_for(stop.wait(), TICK)
+            except asyncio.TimeoutError:
+                pass
+
+
+class _FakeStore:
+    """In-memory stand-in for homeassistant.helpers.storage.Store."""
+
+    async def async_load(self):
+        return None
+
+    def async_delay_save(self, _data_func, _delay):
+        return None
+
+    async def async_save(self, _data):
+        return None
+
+
+class _DeviceRegistry:
+    """Device registry stand-in; firmware versions are kept, not written."""
+
+    def __init__(self):
+        self.writes = 0
+
+    def async_get(self, _device_id):
+        return None
+
+    def async_get_device(self, identifiers=None, connections=None):
+        return None
+
+    def async_update_device(self, _device_id, **_changes):
+        self.writes += 1
+
+
+class _HassStandIn:
+    """Enough of HomeAssistant for the integration, its platforms and HA's
+    dispatcher and event helpers.
+
+    Executor jobs run inline: the load is measured on the event loop, which
+    is where the integration does its work.
+    """
+
+    def __init__(self, loop, config_dir):
+        self.loop = loop
+        self.data = {DOMAIN: {}, dr.DATA_REGISTRY: _DeviceRegistry()}
+        self.config = SimpleNamespace(
+            config_dir=config_dir,
+            path=lambda *parts: os.path.join(config_dir, *parts),
+        )
+
+    def verify_event_loop_thread(self, _what):
+        return None
+
+    async def async_add_executor_job(self, func, *args):
+        return func(*args)
+
+    def async_create_task(self, target, name=None, eager_start=True):
+        return self.loop.create_task(target)
+
+    def async_create_background_task(self, target, name=None, eager_start=True):
+        return self.loop.create_task(target)
+
+    def async_run_hass_job(self, job, *args, **kwargs):
+        result = job.target(*args)
+        if asyncio.iscoroutine(result):
+            return self.loop.create_task(result)
+        return None
+
+
+class LoadTest:
+    """N simulated modules against N integration entries in one process."""
+
+    def __init__(self, options):
+        """Initialize the run."""
+        self.options = options
+        self.rng = random.Random(options.seed)
+        self.modules = []
+        self.clients = []
+        self.entities = {}
+        self.entities_by_platform = {platform: 0 for platform in PLATFORMS}
+        self.live_entities = set()
+        self.state_writes = 0
+        self.measuring = False
+        self.startup = {}
+        self.state_latency = []
+        self.queue_delay = []
+        self.handler_time = []
+        self.loop_lag = []
+        self.command_rtt = []
+        self.commands_failed = 0
+        self.platform_errors = 0
+
+    async def async_run(self):
+        """Run the load and return the report."""
+        loop = asyncio.get_running_loop()
+        ds_mod.Store = lambda _hass, _version, _key: _FakeStore()
+        with tempfile.TemporaryDirectory() as config_dir:
+            self.hass = _HassStandIn(loop, config_dir)
+            self.broker = InProcessBroker(loop)
+            prefixes = self.options.vehicle_types or [None, *VEHICLE_MODULES]
+
+            started = time.perf_counter()
+            for index in range(self.options.vehicles):
+                vehicle_id = f"sim{index:03d}"
+                prefix = prefixes[index % len(prefixes)]
+                await self._async_add_vehicle(index, vehicle_id, prefix)
+
+            stop = asyncio.Event()
+            tasks = [
+                loop.create_task(module.async_run(stop)) for module in self.modules
+            ]
+            tasks.append(loop.create_task(self._async_watch_loop(stop)))
+            tasks.extend(
+                loop.create_task(self._async_send_commands(client, stop))
+                for client in self.clients
+            )
+            if self.options.refresh_interval:
+                tasks.extend(
+                    loop.create_task(self._async_refresh(client, stop))
+                    for client in self.clients
+                )
+
+            # The connect snapshot and entity discovery settle first; latency
+            # and throughput are measured on the live stream after that
+            await asyncio.sleep(self.options.warmup)
+            self.startup = {
+                "duration_s": round(time.perf_counter() - started, 3),
+                "messages_processed": self._processed(),
+                "entities": len(self.entities),
+            }
+            self.measuring = True
+            measured_from = time.perf_counter()
+            processed_from = self._processed()
+            await asyncio.sleep(self.options.duration)
+            self.measuring = False
+            window = (time.perf_counter() - measured_from, processed_from)
+            stop.set()
+            await asyncio.gather(*tasks)
+
+            # Lose every module's connection so the last will goes out
+            for module in self.modules:
+                module.drop()
+            await self._async_drain()
+            report = self._report(*window)
+
+            for client in self.clients:
+                await client.async_shutdown()
+            return report
+
+    async def _async_add_vehicle(self, index, vehicle_id, prefix):
+        base = f"ovms/loadgen/{vehicle_id}"
+        module = SimulatedModule(
+            self.broker,
+            base,
+            prefix,
+            self.options,
+            random.Random(self.rng.random()),
+        )
+        module.connect()
+        self.modules.append(module)
+
+        entry_id = f"loadgen_{index:03d}"
+        config = {
+            "vehicle_id": vehicle_id,
+            "mqtt_username": "loadgen",
+            "topic_prefix": "ovms",
+            "topic_structure": "{prefix}/{mqtt_username}/{vehicle_id}",
+            "client_id": f"ha_ovms_loadgen{index:03d}",
+            "config_entry_id": entry_id,
+            "qos": 1,
+        }
+        client = OVMSMQTTClient(self.hass, config)
+        self._attach_to_broker(client)
+        self.clients.append(client)
+        if not await client.async_setup():
+            raise RuntimeError(f"Integration setup failed for {vehicle_id}")
+        self.hass.data[DOMAIN][entry_id] = {"mqtt_client": client}
+
+        entry = SimpleNamespace(
+            entry_id=entry_id,
+            data=config,
+            options={},
+            async_on_unload=lambda _unsubscribe: None,
+        )
+        for name, platform in PLATFORMS.items():
+            await platform.async_setup_entry(
+                self.hass, entry, self._add_entities_callback(name, entry)
+            )
+        async_dispatcher_send(self.hass, get_platforms_loaded_signal(entry_id))
+
+    def _attach_to_broker(self, client):
+        """Connect the client's connection manager to the broker stand-in."""
+        manager = client.connection_manager
+        handler = manager.message_callback
+
+        async def _create_mqtt_client():
+            manager.protocol = mqtt.MQTTv5
+            return BrokerSession(self.broker)
+
+        async def _connect():
+            self.broker.connect(manager.client)
+            connack = mqtt.Properties(mqtt.PacketTypes.CONNACK)
+            connack.SubscriptionIdentifierAvailable = 1
+            manager.client.on_connect(manager.client, None, {}, 0, connack)
+            return True
+
+        async def _measured(topic, payload, route=None):
+            started = time.perf_counter()
+            published = self.broker.published_at.get(topic)
+            await handler(topic, payload, route)
+            if self.measuring:
+                if published is not None:
+                    self.queue_delay.append(started - published)
+                self.handler_time.append(time.perf_counter() - started)
+
+        manager._create_mqtt_client = _create_mqtt_client
+        manager.async_connect = _connect
+        manager.message_callback = _measured
+
+    def _add_entities_callback(self, name, entry):
+        def _add_entities(new_entities, update_before_add=False):
+            for entity in new_entities:
+                self.entities_by_platform[name] += 1
+                self.entities[entity.unique_id] = entity
+                entity.hass = self.hass
+                entity.platform = SimpleNamespace(config_entry=entry, domain=name)
+                entity.async_get_last_state = _no_last_state
+                entity.async_write_ha_state = self._state_writer(entity)
+                self.hass.async_create_task(self._async_add_entity(entity))
+
+        return _add_entities
+
+    async def _async_add_entity(self, entity):
+        try:
+            await entity.async_added_to_hass()
+        except Exception:  # pylint: disable=broad-except
+            self.platform_errors += 1
+            _LOGGER.exception("Adding %s failed", entity.unique_id)
+            return
+        self.live_entities.add(entity.unique_id)
+
+    def _state_writer(self, entity):
+        def _write():
+            self.state_writes += 1
+            # Only updates of added entities; the write while adding is not
+            # caused by a publish
+            if not self.measuring or entity.unique_id not in self.live_entities:
+                return
+            published = self.broker.published_at.get(getattr(entity, "_topic", None))
+            if published is not None:
+                self.state_latency.append(time.perf_counter() - published)
+
+        return _write
+
+    async def _async_watch_loop(self, stop):
+        """Sample event loop lag: how late a short sleep wakes up."""
+        interval = 0.05
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            if self.measuring:
+                self.loop_lag.append(max(0.0, time.perf_counter() - started - interval))
+
+    async def _async_send_commands(self, client, stop):
+        """Send commands within the integration's rate limit."""
+        interval = self.options.command_interval
+        if not interval:
+            return
+        commands = ("stat", "metrics list v.b.*", "charge start", "charge stop")
+        index = 0
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            started = time.perf_counter()
+            result = await client.async_send_command(
+                command=commands[index % len(commands)], timeout=10
+            )
+            index += 1
+            if result.get("success"):
+                self.command_rtt.append(time.perf_counter() - started)
+            else:
+                self.commands_failed += 1
+
+    async def _async_refresh(self, client, stop):
+        """Request metrics like the ovms.refresh_metrics service."""
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), self.options.refresh_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            await client.async_request_metrics(self.options.refresh_pattern)
+
+    async def _async_drain(self):
+        """Wait until the broker and the entity batches have settled."""
+        for _ in range(200):
+            await asyncio.sleep(0.02)
+            if not self.broker.pending and not any(
+                client.entity_factory._pending_batches for client in self.clients
+            ):
+                break
+        await asyncio.sleep(0.2)
+
+    def _processed(self):
+        return sum(client.message_count for client in self.clients)
+
+    def _report(self, elapsed, processed_from):
+        processed = self._processed() - processed_from
+        return {
+            "vehicles": len(self.modules),
+            "vehicle_types": sorted(
+                {module.vehicle_prefix or "generic" for module in self.modules}
+            ),
+            "startup": self.startup,
+            "duration_s": round(elapsed, 3),
+            "module_publishes": sum(module.published for module in self.modules),
+            "broker_deliveries": self.broker.deliveries,
+            "duplicates_dropped": sum(
+                client.connection_manager.duplicate_deliveries
+                for client in self.clients
+            ),
+            "messages_processed": processed,
+            "throughput_msg_s": round(processed / elapsed, 1) if elapsed else 0.0,
+            "entities": sum(self.entities_by_platform.values()),
+            "entities_by_platform": dict(self.entities_by_platform),
+            "platform_errors": self.platform_errors,
+            "state_writes": self.state_writes,
+            # Deferred updates reach their entities late by design
+            "load_shedding": {
+                key: sum(client.load_shedder.counts[key] for client in self.clients)
+                for key in ("passed", "deferred", "shed", "flushed")
+            },
+            "charge_sessions": sum(module.sessions for module in self.modules),
+            "ingest_queue_delay": _percentiles(self.queue_delay),
+            "ingest_handler_time": _percentiles(self.handler_time),
+            "publish_to_state_latency": _percentiles(self.state_latency),
+            "event_loop_lag": _percentiles(self.loop_lag),
+            "commands": {
+                "answered": sum(module.commands_answered for module in self.modules),
+                "failed": self.commands_failed,
+                "round_trip": _percentiles(self.command_rtt),
+            },
+            "metric_requests_answered": sum(
+                module.metric_requests_answered for module in self.modules
+            ),
+            "memory": _memory_summary(measure_vehicles(self.clients, 1)),
+        }
+
+
+def _memory_summary(memory):
+    """Reduce the structural memory estimates to per-vehicle figures."""
+    vehicles = memory["vehicles"]
+    subsystems = {}
+    for vehicle in vehicles:
+        for name, size in vehicle["subsystems"].items():
+            subsystems[name] = subsystems.get(name, 0) + size
+    count = len(vehicles) or 1
+    return {
+        "per_vehicle_bytes": memory["total_bytes"] // count,
+        "max_vehicle_bytes": max(
+            (vehicle["total_bytes"] for vehicle in vehicles), default=0
+        ),
+        "per_vehicle_subsystems": {
+            name: size // count
+            for name, size in sorted(
+                subsystems.items(), key=lambda item: item[1], reverse=True
+            )
+        },
+        "largest_entity": memory["top_entities"][0] if memory["top_entities"] else None,
+    }
+
+
+async def _no_last_state():
+    return None
+
+
+def format_report(report):
+    """Render the report as text."""
+    lines = [
+        f"Vehicles:            {report['vehicles']} "
+        f"({', '.join(report['vehicle_types'])})",
+        f"Startup:             {report['startup']['duration_s']} s, "
+        f"{report['startup']['messages_processed']} messages, "
+        f"{report['startup']['entities']} entities",
+        f"Measured window:     {report['duration_s']} s",
+        f"Messages processed:  {report['messages_processed']} "
+        f"({report['throughput_msg_s']} msg/s)",
+        "",
+        "Whole run:",
+        f"Module publishes:    {report['module_publishes']}",
+        f"Broker deliveries:   {report['broker_deliveries']} "
+        f"({report['duplicates_dropped']} overlapping duplicates dropped)",
+        f"Entities:            {report['entities']} "
+        + " ".join(
+            f"{name}={count}" for name, count in report["entities_by_platform"].items()
+        ),
+        f"State writes:        {report['state_writes']}",
+        "Load shedding:       "
+        + " ".join(f"{key}={count}" for key, count in report["load_shedding"].items()),
+        f"Charge sessions:     {report['charge_sessions']}",
+        f"Metric requests:     {report['metric_requests_answered']} answered",
+        f"Commands:            {report['commands']['answered']} answered, "
+        f"{report['commands']['failed']} failed",
+        f"Memory (estimate):   {report['memory']['per_vehicle_bytes'] // 1024} KiB "
+        f"per vehicle, max {report['memory']['max_vehicle_bytes'] // 1024} KiB; "
+        + " ".join(
+            f"{name}={size // 1024}"
+            for name, size in list(report["memory"]["per_vehicle_subsystems"].items())[
+                :5
+            ]
+        ),
+        "",
+        f"{'measured window':<26}{'count':>9}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'max ms':>10}",
+    ]
+    for label, stats in (
+        ("ingest queue delay", report["ingest_queue_delay"]),
+        ("ingest handler time", report["ingest_handler_time"]),
+        ("publish -> state write", report["publish_to_state_latency"]),
+        ("event loop lag", report["event_loop_lag"]),
+        ("command round trip", report["commands"]["round_trip"]),
+    ):
+        if not stats["count"]:
+            lines.append(f"{label:<26}{0:>9}")
+            continue
+        lines.append(
+            f"{label:<26}{stats['count']:>9}{stats['p50_ms']:>10}"
+            f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}"
+        )
+    return "\n".join(lines)
+
+
+def build_parser():
+    """Return the command line parser."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--vehicles", type=int, default=10, help="simulated modules")
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=5.0,
+        help="stream messages per second per vehicle (after the connect snapshot)",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=10.0,
+        help="seconds for the connect snapshot and discovery before measuring",
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument(
+        "--cells", type=int, default=96, help="cells per battery vector"
+    )
+    parser.add_argument(
+        "--charging",
+        type=float,
+        default=0.3,
+        help="share of vehicles starting in a charge session",
+    )
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=60.0,
+        help="simulated seconds per real second for drive/charge sessions",
+    )
+    parser.add_argument(
+        "--vehicle-types",
+        nargs="*",
+        choices=list(VEHICLE_MODULES),
+        help="vehicle metric prefixes to cycle through (default: generic plus all)",
+    )
+    parser.add_argument(
+        "--command-interval",
+        type=float,
+        default=15.0,
+        help="seconds between commands per vehicle, 0 to disable "
+        "(the integration allows 5 per minute)",
+    )
+    parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=0.0,
+        help="seconds between metric requests per vehicle, 0 to disable",
+    )
+    parser.add_argument("--refresh-pattern", default="*", help="metric request pattern")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument(
+        "--log-level", default="WARNING", help="log level of the integration"
+    )
+    return parser
+
+
+def main(argv=None):
+    """Run the generator from the command line."""
+    options = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger(LOGGER_NAME).setLevel(options.log_level.upper())
+    report = asyncio.run(LoadTest(options).async_run())
+    print(format_report(report))
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
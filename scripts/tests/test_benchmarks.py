@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Smoke test for the parser and metric-resolution benchmark suite.
+
+scripts/bench/ovms_bench.py times the hot parsing and resolution functions
+over fixed corpora and fails when one is slower than its JSON baseline by
+more than its budget. Timings are not asserted here (they depend on the
+machine); this test runs the suite briefly and asserts:
+
+  * every benchmark runs its corpus, and the corpora reach the real work
+    (cell statistics, parsed topics) instead of an early return;
+  * the committed baseline covers every benchmark, with a budget;
+  * the comparison flags a slowdown beyond the budget, reports speedups and
+    new benchmarks;
+  * the calibration cancels a machine that is slower across the board, and
+    the median drops a sample pair where only one side hit a load spike;
+  * --update-baseline keeps hand-tuned budgets, and the command line exits
+    non-zero only on a regression (checked on synthetic results, so the
+    exit status does not depend on the load of the test machine).
+
+Run standalone:  python3 scripts/tests/test_benchmarks.py
+Exits non-zero on failure.
+"""
+
+import copy
+import json
+import os
+import sys
+import tempfile
+
+# Make the repo root and the suite importable when run directly.
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts", "bench"))
+
+import ovms_bench
+
+QUICK = ["--repeat", "1", "--min-time", "0.001"]
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _status(rows):
+    return {row[0]: row[5] for row in rows}
+
+
+def main():
+    results = []
+    benchmarks = ovms_bench.build_benchmarks()
+    names = [benchmark.name for benchmark in benchmarks]
+    measured = ovms_bench.run_benchmarks(benchmarks, repeat=1, min_time=0.001)
+    _check(
+        "every benchmark measured",
+        list(measured["benchmarks"]) == names
+        and all(
+            entry["ns_per_call"] > 0 and entry["relative"] > 0
+            for entry in measured["benchmarks"].values()
+        ),
+        results,
+    )
+
+    by_name = {benchmark.name: benchmark for benchmark in benchmarks}
+    cells = by_name["sensor.entities.OVMSSensor._handle_cell_values"].corpus
+    sensor, payload = cells[0]
+    topics = by_name["mqtt.topic_parser.TopicParser.parse_topic"].corpus
+    parser = by_name["mqtt.topic_parser.TopicParser.parse_topic"].func
+    _check(
+        "corpora reach the real work",
+        sensor.extra_state_attributes.get("count") == len(payload.split(","))
+        and parser(*topics[0]) is not None
+        and len(topics) > 100,
+        results,
+    )
+
+    baseline = ovms_bench.load_baseline(ovms_bench.BASELINE_PATH)
+    _check(
+        "committed baseline covers every benchmark",
+        set(baseline.get("benchmarks", {})) == set(names)
+        and all(
+            entry.get("budget") and entry.get("relative")
+            for entry in baseline["benchmarks"].values()
+        ),
+        results,
+    )
+
+    reference = ovms_bench.updated_baseline(measured, {})
+    slower = copy.deepcopy(measured)
+    slower["benchmarks"][names[0]]["relative"] *= 2
+    slower["benchmarks"][names[1]]["relative"] *= 0.3
+    slower["benchmarks"]["brand.new"] = dict(slower["benchmarks"][names[2]])
+    status = _status(ovms_bench.compare(slower, reference))
+    _check(
+        "slowdown over budget flagged, speedup and new benchmark reported",
+        status[names[0]] == "REGRESSION"
+        and status[names[1]] == "faster"
+        and status["brand.new"] == "new"
+        and all(status[name] == "ok" for name in names[2:]),
+        results,
+    )
+
+    # A slower machine slows the calibration workload alike
+    samples = [2.0e-3, 2.1e-3, 1.9e-3, 2.0e-3, 2.2e-3]
+    references = [1.0e-4, 1.05e-4, 0.95e-4, 1.0e-4, 1.1e-4]
+    relative = ovms_bench.calibrated_relative(samples, references, 100)
+    slow = ovms_bench.calibrated_relative(
+        [sample * 3 for sample in samples],
+        [reference * 3 for reference in references],
+        100,
+    )
+    spiked = ovms_bench.calibrated_relative(
+        [samples[0] * 5, *samples[1:]], references, 100
+    )
+    machine = {"benchmarks": {"a": {"ns_per_call": 60.0, "relative": slow}}}
+    on_reference = {"benchmarks": {"a": {"ns_per_call": 20.0, "relative": relative}}}
+    _check(
+        "uniformly slower machine is not a regression, one-sided spike dropped",
+        abs(slow / relative - 1) < 1e-9
+        and abs(spiked / relative - 1) < 1e-9
+        and _status(ovms_bench.compare(machine, on_reference)) == {"a": "ok"},
+        results,
+    )
+
+    tuned = copy.deepcopy(reference)
+    tuned["benchmarks"][names[0]]["budget"] = 0.1
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "baseline.json")
+        with open(path, "w", encoding="utf-8") as baseline_file:
+            json.dump(tuned, baseline_file)
+        ovms_bench.main(["--baseline", path, "--update-baseline", *QUICK])
+        rewritten = ovms_bench.load_baseline(path)
+        _check(
+            "updating the baseline keeps tuned budgets",
+            rewritten["benchmarks"][names[0]]["budget"] == 0.1
+            and rewritten["benchmarks"][names[1]]["budget"]
+            == ovms_bench.DEFAULT_BUDGET,
+            results,
+        )
+
+        # Against a baseline ten times faster, the command line must fail.
+        # The results are synthetic: real timings would make this flaky.
+        for name, entry in rewritten["benchmarks"].items():
+            entry["relative"] = measured["benchmarks"][name]["relative"] / 10
+        with open(path, "w", encoding="utf-8") as baseline_file:
+            json.dump(rewritten, baseline_file)
+        run_benchmarks = ovms_bench.run_benchmarks
+        ovms_bench.run_benchmarks = lambda selected, *_args: {
+            "calibration_ns": measured["calibration_ns"],
+            "benchmarks": {
+                benchmark.name: measured["benchmarks"][benchmark.name]
+                for benchmark in selected
+            },
+        }
+        try:
+            failing = ovms_bench.main(
+                ["--baseline", path, "--filter", "format_duration"]
+            )
+            passing = ovms_bench.main(
+                ["--baseline", path, "--filter", "format_duration", "--budget", "100"]
+            )
+        finally:
+            ovms_bench.run_benchmarks = run_benchmarks
+        _check(
+            "exit status reflects regressions",
+            failing == 1 and passing == 0,
+            results,
+        )
+
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
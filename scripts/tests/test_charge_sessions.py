@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Regression test for charge session detection and the charge log.
+
+ChargeTracker follows the EnergySessionTracker's charge sessions (the
+v.c.charging flag, or v.c.state when the flag is not published) and
+summarises each one into a single compact record in an append-only JSONL
+log. This test drives the REAL trackers with a simulated clock and asserts:
+
+  * a session opens on charging and closes on the end state, with SOC
+    delta, energy from v.c.kwh (across its reset at charge start), peak
+    and mean power, the coalesced GPS fix and the AC/DC type;
+  * without v.c.kwh the energy is the session energy tracker's charge
+    counter, so the log and the session energy sensor agree;
+  * sessions that added no energy and no SOC are discarded;
+  * records are appended to the log, restored at startup and queried
+    newest first;
+  * the last-charge sensors expose the session and are signalled on close,
+    with state classes HA allows for their device class (none for energy).
+
+Run standalone:  python3 scripts/tests/test_charge_sessions.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from homeassistant.components.sensor import (
+    DEVICE_CLASS_STATE_CLASSES,
+    SensorStateClass,
+)
+
+import custom_components.ovms.charge_tracker as ct_mod
+
+from custom_components.ovms.charge_tracker import ChargeTracker, charge_current
+from custom_components.ovms.energy_sessions import EnergySessionTracker
+
+PREFIX = "ovms/user/leaf/metric"
+CONFIG = {
+    "vehicle_id": "leaf",
+    "client_id": "ha_ovms_abc123",
+    "config_entry_id": "entry1",
+}
+
+_SENT = []
+ct_mod.async_dispatcher_send = lambda _hass, signal, *args: _SENT.append((signal, args))
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _FakeConfig:
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+
+class _FakeHass:
+    def __init__(self, root):
+        self.data = {}
+        self.config = _FakeConfig(root)
+
+    def async_add_executor_job(self, func, *args):
+        future = asyncio.get_event_loop().create_future()
+        future.set_result(func(*args))
+        return future
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _feed(tracker, metric, value):
+    # In the order of the MQTT client: session energy, then charge tracker
+    topic = f"{PREFIX}/{metric.replace('.', '/')}"
+    tracker.energy_sessions.process_message(topic, value)
+    tracker.process_message(topic, value)
+
+
+def _tracker(root, clock):
+    hass = _FakeHass(root)
+    return ChargeTracker(hass, CONFIG, EnergySessionTracker(hass, CONFIG, clock))
+
+
+def _charge_with_power(tracker, clock, powers):
+    for power in powers:
+        clock.now += 60
+        _feed(tracker, "v.c.power", str(power))
+
+
+async def _run(results):
+    with tempfile.TemporaryDirectory() as root:
+        clock = _Clock()
+        tracker = _tracker(root, clock)
+        await tracker.async_setup()
+        _SENT.clear()
+        tracker.async_create_sensors()
+        sensors = {
+            data["diagnostic_sensor"]._key: data["diagnostic_sensor"]
+            for _, args in _SENT
+            for data in args[0]
+        }
+
+        # Session 1: counter energy with a reset at charge start, DC
+        _feed(tracker, "v.c.type", "ccs")
+        _feed(tracker, "v.c.kwh", "12.4")  # left over from the last charge
+        _feed(tracker, "v.b.soc", "30")
+        tracker.process_location(59.33, 18.07)
+        _feed(tracker, "v.c.charging", "yes")
+        _feed(tracker, "v.c.state", "charging")
+        _feed(tracker, "v.c.kwh", "0.2")
+        _charge_with_power(tracker, clock, [40, 50, 30])
+        tracker.process_location(59.5, 18.5)  # moved while charging: ignored
+        _feed(tracker, "v.c.kwh", "20.2")
+        _feed(tracker, "v.b.soc", "70")
+        _SENT.clear()
+        _feed(tracker, "v.c.state", "done")
+        _feed(tracker, "v.c.charging", "no")
+        await asyncio.sleep(0)
+
+        session = tracker.last_session or {}
+        _check(
+            "session closes with SOC delta, counter energy, power and place",
+            tracker.current_session is None
+            and session.get("soc_delta") == 40.0
+            and session.get("energy_kwh") == 20.2
+            and session.get("energy_source") == "counter"
+            and session.get("peak_power_kw") == 50.0
+            and session.get("mean_power_kw") == 40.0
+            and session.get("latitude") == 59.33
+            and session.get("current") == "DC"
+            and session.get("end_state") == "done",
+            results,
+        )
+        _check(
+            "sensors signalled once per sensor on close",
+            len(_SENT) == len(sensors) == 5
+            and sensors["energy_kwh"].native_value == 20.2
+            and sensors["soc_delta"].extra_state_attributes["charge_type"] == "ccs",
+            results,
+        )
+        _check(
+            "state classes valid for their device classes, none for energy",
+            all(
+                sensor.state_class is None
+                or sensor.device_class is None
+                or sensor.state_class in DEVICE_CLASS_STATE_CLASSES[sensor.device_class]
+                for sensor in sensors.values()
+            )
+            and sensors["energy_kwh"].state_class is None
+            and sensors["peak_power_kw"].state_class == SensorStateClass.MEASUREMENT,
+            results,
+        )
+
+        # Session 2: no v.c.kwh updates, energy integrated from power
+        tracker.kwh = None
+        _feed(tracker, "v.c.type", "type2")
+        _feed(tracker, "v.c.power", "7")
+        _feed(tracker, "v.c.state", "charging")  # no v.c.charging flag
+        _charge_with_power(tracker, clock, [7] * 30)
+        _feed(tracker, "v.c.state", "stopped")
+        await asyncio.sleep(0)
+        session = tracker.last_session or {}
+        _check(
+            "energy from the session energy counter without v.c.kwh",
+            session.get("energy_source") == "power"
+            and abs(session.get("energy_kwh", 0) - 3.5) < 1e-3
+            and session.get("energy_kwh")
+            == tracker.energy_sessions.get_energy("charge")
+            and session.get("end_state") == "stopped"
+            and session.get("soc_delta") == 0.0
+            and session.get("current") == "AC",
+            results,
+        )
+
+        # Session 3: plugged in but nothing flowed
+        _feed(tracker, "v.c.charging", "yes")
+        _feed(tracker, "v.c.state", "topoff")
+        _feed(tracker, "v.c.state", "timerwait")  # neither starts nor ends
+        _feed(tracker, "v.c.charging", "no")
+        await asyncio.sleep(0)
+        _check(
+            "empty session discarded",
+            tracker.session_count == 2 and tracker.last_session is session,
+            results,
+        )
+
+        restarted = _tracker(root, clock)
+        await restarted.async_setup()
+        newest = await restarted.async_query_charges(limit=1)
+        both = await restarted.async_query_charges(limit=10)
+        with open(restarted.log_path, encoding="utf-8") as log_file:
+            lines = log_file.read().splitlines()
+        _check(
+            "log appended, restored and queried newest first",
+            len(lines) == 2
+            and restarted.last_session == session
+            and [s["current"] for s in newest] == ["AC"]
+            and [s["current"] for s in both] == ["AC", "DC"],
+            results,
+        )
+
+    _check(
+        "connector types map to AC/DC",
+        charge_current("CHAdeMO") == "DC"
+        and charge_current("type1") == "AC"
+        and charge_current("undefined") is None
+        and charge_current(None) is None,
+        results,
+    )
+
+
+def main():
+    results = []
+    asyncio.run(_run(results))
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
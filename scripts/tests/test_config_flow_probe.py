@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""Regression test for the event-driven, shared config-flow probe.
+
+Each config-flow step used to open its own MQTT connection and poll for
+the CONNACK, and topic discovery always slept for the full active (10 s)
+or passive (50 s) window, so adding a vehicle took three handshakes and up
+to a minute of fixed sleeps. The steps now share one MQTTProbe whose
+futures are completed from paho callbacks. This test drives the REAL
+test_mqtt_connection, discover_topics and test_topic_availability against
+a fake paho client that answers from its own thread, like the network
+loop does, and asserts:
+
+  * the connection test keeps its probe open on request, and the later
+    steps reuse it without another handshake;
+  * discovery finishes as soon as the retained burst goes quiet, or as
+    soon as the metric burst answering the request ends, and narrows its
+    subscription to the user's vehicle on a shared broker;
+  * the availability test gets its command response without fixed waits;
+  * a probe for other settings is not reused, and owned probes are closed.
+
+Run standalone:  python3 scripts/tests/test_config_flow_probe.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_PROTOCOL
+
+import custom_components.ovms.config_flow.probe as probe_mod
+import custom_components.ovms.config_flow.topic_discovery as td_mod
+
+from custom_components.ovms.config_flow.mqtt_connection import test_mqtt_connection
+from custom_components.ovms.config_flow.topic_discovery import (
+    discover_topics,
+    get_expected_metric_count,
+    test_topic_availability,
+)
+from custom_components.ovms.const import (
+    ACTIVE_DISCOVERY_TIMEOUT,
+    CONF_MQTT_USERNAME,
+    CONF_TOPIC_PREFIX,
+    CONF_TOPIC_STRUCTURE,
+    CONF_VEHICLE_ID,
+    DEFAULT_TOPIC_STRUCTURE,
+)
+from custom_components.ovms.metrics import METRIC_DEFINITIONS
+
+td_mod.DISCOVERY_QUIET_PERIOD = 0.3
+
+BASE = "ovms/user/leaf"
+METRIC_TOPICS = [
+    f"{BASE}/metric/{path.replace('.', '/')}"
+    for path in METRIC_DEFINITIONS
+    if not path.startswith("x")
+][: get_expected_metric_count("generic")]
+OTHER_TOPIC = "ovms/bob/car2/metric/v/b/soc"
+
+
+class _Broker:
+    """Scripted broker state shared by all fake clients."""
+
+    def __init__(self):
+        self.retained = {}
+        self.answer_metric_request = False
+        self.connects = 0
+        self.clients = []
+
+
+BROKER = _Broker()
+
+
+class _FakeClient:
+    """paho.mqtt.client.Client stand-in answering from a network thread."""
+
+    def __init__(self, client_id, protocol=None, transport="tcp"):
+        self.client_id = client_id
+        self.connect_timeout = None
+        self.subscriptions = set()
+        self.running = False
+        self.on_connect = self.on_disconnect = self.on_subscribe = None
+        self.on_message = self.on_log = None
+        self._mid = 0
+        BROKER.clients.append(self)
+
+    def username_pw_set(self, username, password=None):
+        return None
+
+    def connect(self, host, port, keepalive):
+        BROKER.connects += 1
+
+    def loop_start(self):
+        self.running = True
+        self._later(self.on_connect, self, None, {}, 0, None)
+
+    def loop_stop(self):
+        self.running = False
+
+    def disconnect(self):
+        self.subscriptions.clear()
+
+    def subscribe(self, topics, qos=0):
+        if isinstance(topics, str):
+            topics = [(topics, qos)]
+        self._mid += 1
+        self.subscriptions.update(topic for topic, _ in topics)
+        self._later(self._suback, self._mid, [qos for _, qos in topics])
+        return 0, self._mid
+
+    def unsubscribe(self, topics):
+        for topic in [topics] if isinstance(topics, str) else topics:
+            self.subscriptions.discard(topic)
+
+    def publish(self, topic, payload, qos=0):
+        if topic.endswith("/request/metric") and BROKER.answer_metric_request:
+            self._later(self._burst, list(METRIC_TOPICS), False)
+        if "/client/rr/command/" in topic:
+            response = topic.replace("/command/", "/response/")
+            self._later(self._deliver, response, b"Not charging", False)
+        return types.SimpleNamespace(rc=0)
+
+    def _suback(self, mid, granted):
+        self.on_subscribe(self, None, mid, granted, None)
+        self._burst(list(BROKER.retained), True)
+
+    def _burst(self, topics, retain):
+        for topic in topics:
+            self._deliver(topic, b"1", retain)
+
+    def _deliver(self, topic, payload, retain):
+        if any(_matches(sub, topic) for sub in self.subscriptions):
+            msg = types.SimpleNamespace(topic=topic, payload=payload, retain=retain)
+            self.on_message(self, None, msg)
+
+    @staticmethod
+    def _later(func, *args):
+        threading.Timer(0.01, func, args).start()
+
+
+def _matches(subscription, topic):
+    sub_parts = subscription.split("/")
+    topic_parts = topic.split("/")
+    for index, part in enumerate(sub_parts):
+        if part == "#":
+            return True
+        if index >= len(topic_parts) or part not in ("+", topic_parts[index]):
+            return False
+    return len(sub_parts) == len(topic_parts)
+
+
+probe_mod.mqtt = types.SimpleNamespace(Client=_FakeClient, MQTTv5=5, MQTT_ERR_SUCCESS=0)
+
+
+class _FakeHass:
+    """Minimal hass stub that runs executor jobs in a real thread pool."""
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=4)
+
+    async def async_add_executor_job(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+async def _timed(coro):
+    start = time.monotonic()
+    result = await coro
+    return result, time.monotonic() - start
+
+
+async def _run(results, port):
+    hass = _FakeHass()
+    config = {
+        CONF_HOST: "127.0.0.1",
+        CONF_PORT: port,
+        CONF_PROTOCOL: "mqtt",
+        CONF_TOPIC_PREFIX: "ovms",
+        CONF_TOPIC_STRUCTURE: DEFAULT_TOPIC_STRUCTURE,
+        CONF_MQTT_USERNAME: "user",
+    }
+
+    result = await test_mqtt_connection(hass, config, keep_probe=True)
+    probe = result.pop("probe", None)
+    _check(
+        "connection test keeps an open probe",
+        result["success"] and probe is not None and probe.connected,
+        results,
+    )
+    _check(
+        "test subscription dropped again",
+        not probe.client.subscriptions and BROKER.connects == 1,
+        results,
+    )
+
+    # Retained metrics cover the expected set: done once the burst is quiet.
+    # Another user's vehicle shares the broker.
+    BROKER.retained = dict.fromkeys(METRIC_TOPICS + [OTHER_TOPIC])
+    result, elapsed = await _timed(discover_topics(hass, config, probe=probe))
+    _check(
+        "retained discovery reuses the probe",
+        result["success"]
+        and result["debug_info"]["shared_connection"]
+        and BROKER.connects == 1,
+        results,
+    )
+    _check(
+        "retained discovery ends when the burst is quiet",
+        result["debug_info"]["discovery_method"] == "retained"
+        and result["metric_count"] == len(METRIC_TOPICS)
+        and elapsed < 1.0,
+        results,
+    )
+    _check(
+        "subscription narrowed to the user's vehicle",
+        result["debug_info"]["subscriptions"] == ["ovms/+/leaf/#"]
+        and OTHER_TOPIC not in result["discovered_topics"],
+        results,
+    )
+    _check(
+        "discovery subscription dropped from the shared probe",
+        not probe.client.subscriptions and not probe._listeners,
+        results,
+    )
+
+    # No retained metrics: done once the requested burst ends
+    BROKER.retained = {}
+    BROKER.answer_metric_request = True
+    result, elapsed = await _timed(discover_topics(hass, config, probe=probe))
+    _check(
+        "active discovery ends after the requested burst",
+        result["debug_info"]["discovery_method"] == "active"
+        and result["metric_count"] == len(METRIC_TOPICS)
+        and elapsed < ACTIVE_DISCOVERY_TIMEOUT / 5,
+        results,
+    )
+
+    vehicle_config = dict(config, **{CONF_VEHICLE_ID: "leaf"})
+    result, elapsed = await _timed(
+        test_topic_availability(hass, vehicle_config, probe=probe)
+    )
+    _check(
+        "availability test gets its response without fixed waits",
+        result["success"]
+        and result["debug_info"]["responses_received"] == 1
+        and result["debug_info"]["shared_connection"]
+        and elapsed < 1.0,
+        results,
+    )
+    _check("one handshake for the whole flow", BROKER.connects == 1, results)
+
+    # Different settings: a new, owned probe that is closed afterwards
+    other = dict(vehicle_config, **{CONF_PORT: port + 1})
+    result = await test_topic_availability(hass, other, probe=probe)
+    _check(
+        "probe for other settings not reused",
+        result["success"]
+        and not result["debug_info"]["shared_connection"]
+        and BROKER.connects == 2
+        and not BROKER.clients[-1].running,
+        results,
+    )
+
+    await probe.async_close()
+    _check(
+        "closing stops the network loop",
+        not probe.connected and not probe.client.running and not probe.matches(config),
+        results,
+    )
+
+
+def main():
+    results = []
+    # The connection test probes the TCP port, so give it an open one
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(4)
+    try:
+        asyncio.run(_run(results, listener.getsockname()[1]))
+    finally:
+        listener.close()
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
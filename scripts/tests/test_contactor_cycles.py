@@ -23,12 +23,16 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
 import custom_components.ovms.sensor.entities as entities_mod
+import custom_components.ovms.utils as utils_mod
 
 from custom_components.ovms.sensor.entities import OVMSSensor
 from custom_components.ovms.attribute_manager import AttributeManager
-from custom_components.ovms.metrics import get_metric_by_path
+from custom_components.ovms.metrics import get_metric_by_path, load_vehicle_metrics
 from custom_components.ovms.const import SIGNAL_UPDATE_ENTITY
 
+# The MQTT client loads a vehicle's definitions before its first topic
+load_vehicle_metrics("xsq.")
+
 CONTACTOR_TOPIC = "ovms/u/sq/metric/xsq/bms/contactor/cycles"
 CONTACTOR_PATH = "xsq.bms.contactor.cycles"
 # An ordinary scalar metric (no vector config) - must be unaffected.
@@ -49,6 +53,8 @@ def _send(signal, payload):
 
 
 entities_mod.async_dispatcher_connect = _connect
+# Sensors outside a loaded config entry subscribe through the update signal
+utils_mod.async_dispatcher_connect = _connect
 
 
 class _FakeHass:
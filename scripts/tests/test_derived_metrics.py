@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Regression test for the incremental derived-metrics engine.
+
+Efficiency, charge ETA, charge rate and range at the SOC limit were template
+sensors, re-rendered on every state change of any entity they referenced.
+DerivedMetricsEngine compiles the formulas declared in metrics/derived.py
+into a dependency graph over metric paths and re-evaluates a formula only
+when one of its inputs changes. This test drives the REAL engine and asserts:
+
+  * definitions compile in dependency order and a cycle is rejected;
+  * unrelated topics and repeated values evaluate nothing, and a changed
+    input evaluates only the formulas reading it;
+  * a formula reading another derived metric follows it, and an unchanged
+    intermediate result stops the propagation;
+  * the built-ins compute trip efficiency, charge rate, range at the limit
+    and the charge ETA from the generic v.b/v.c/v.p metrics;
+  * the sensors are created once and signalled only when their value changes.
+
+Run standalone:  python3 scripts/tests/test_derived_metrics.py
+Exits non-zero on failure.
+"""
+
+import os
+import sys
+from datetime import timedelta
+from types import SimpleNamespace
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import custom_components.ovms.derived_metrics as dm_mod
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.ovms.const import SIGNAL_UPDATE_ENTITY
+from custom_components.ovms.derived_metrics import (
+    DerivedMetricsEngine,
+    compile_derived_metrics,
+)
+
+PREFIX = "ovms/user/leaf/metric"
+CONFIG = {
+    "vehicle_id": "leaf",
+    "client_id": "ha_ovms_abc123",
+    "config_entry_id": "entry1",
+}
+
+_SENT = []
+dm_mod.async_dispatcher_send = lambda _hass, signal, *args: _SENT.append((signal, args))
+
+# a = x + y, b = a // 10, c = b + z: b only changes every ten steps of a
+CHAIN = {
+    "c": {"name": "C", "inputs": ("b", "m.z"), "formula": lambda b, z: (b, z)},
+    "a": {"name": "A", "inputs": ("m.x", "m.y"), "formula": lambda x, y: x + y},
+    "b": {"name": "B", "inputs": ("a",), "formula": lambda a: a // 10},
+}
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _send(engine, path, payload):
+    engine.process_message(f"{PREFIX}/{path.replace('.', '/')}", payload)
+
+
+def _graph(results):
+    ordered, consumers = compile_derived_metrics(CHAIN)
+    try:
+        compile_derived_metrics(
+            {
+                "p": {"inputs": ("q",), "formula": abs},
+                "q": {"inputs": ("p",), "formula": abs},
+            }
+        )
+        rejected = False
+    except ValueError:
+        rejected = True
+    _check(
+        "definitions compile in dependency order, cycles rejected",
+        [metric.key for metric in ordered] == ["a", "b", "c"]
+        and {path: [m.key for m in metrics] for path, metrics in consumers.items()}
+        == {"m.x": ["a"], "m.y": ["a"], "m.z": ["c"]}
+        and rejected,
+        results,
+    )
+
+    engine = DerivedMetricsEngine(SimpleNamespace(), CONFIG, CHAIN)
+    for path, value in (("m.x", "1"), ("m.y", "2"), ("m.z", "3")):
+        _send(engine, path, value)
+    before = engine.evaluations
+    _send(engine, "m.x", "4")  # a: 6, b unchanged at 0, so c is not evaluated
+    step = engine.evaluations - before
+    _send(engine, "m.x", "9")  # a: 11, b: 1, c: (1, 3)
+    _check(
+        "derived inputs propagate only through changed results",
+        step == 2
+        and engine.evaluations - before == 5
+        and engine.values["c"] == (1, 3.0),
+        results,
+    )
+
+
+def _builtins(results):
+    _SENT.clear()
+    engine = DerivedMetricsEngine(SimpleNamespace(), CONFIG)
+    engine.async_create_sensors()
+    engine.async_create_sensors()
+    batches = [args[0] for signal, args in _SENT if "add_entities" in signal]
+    sensors = {
+        data["diagnostic_sensor"]._key: data["diagnostic_sensor"] for data in batches[0]
+    }
+    _check(
+        "sensors created once, one per built-in",
+        len(batches) == 1
+        and set(sensors)
+        == {"trip_efficiency", "charge_eta", "charge_rate", "range_at_limit"},
+        results,
+    )
+
+    _SENT.clear()
+    for path in ("v.b.12v.voltage", "v.e.on", "v.p.latitude"):
+        _send(engine, path, "12.6")
+    _check(
+        "unrelated topics evaluate nothing",
+        engine.evaluations == 0 and not _SENT,
+        results,
+    )
+
+    _send(engine, "v.b.range.est", "200")
+    _send(engine, "v.b.soc", "50")
+    _send(engine, "v.c.limit.soc", "0")
+    evaluations = engine.evaluations
+    _send(engine, "v.b.soc", "50")
+    _send(engine, "v.b.soc", "50.0")
+    unchanged = engine.evaluations == evaluations
+    _SENT.clear()
+    _send(engine, "v.c.limit.soc", "80")
+    _check(
+        "changed input evaluates only its formulas",
+        unchanged
+        and engine.evaluations == evaluations + 1
+        and sensors["range_at_limit"].native_value == 320
+        and [signal for signal, _ in _SENT]
+        == [f"{SIGNAL_UPDATE_ENTITY}_{sensors['range_at_limit'].unique_id}"],
+        results,
+    )
+
+    for path, value in (
+        ("v.b.energy.used", "6.5"),
+        ("v.b.energy.recd", "0.5"),
+        ("v.p.trip", "40"),
+        ("v.c.power", "11"),
+        ("v.b.capacity", "55"),
+        ("v.c.duration.soc", "90"),
+        ("v.c.charging", "yes"),
+    ):
+        _send(engine, path, value)
+    eta = sensors["charge_eta"].native_value
+    expected = dt_util.utcnow() + timedelta(minutes=90)
+    charging_eta = eta is not None and abs((eta - expected).total_seconds()) <= 60
+    _send(engine, "v.c.charging", "no")
+    _check(
+        "built-ins compute from v.b/v.c/v.p metrics",
+        sensors["trip_efficiency"].native_value == 150.0
+        and sensors["charge_rate"].native_value == 20.0
+        and charging_eta
+        and sensors["charge_eta"].native_value is None
+        and engine.get_status()["metrics"]["charge_rate"] == 20.0,
+        results,
+    )
+
+
+def main():
+    results = []
+    _graph(results)
+    _builtins(results)
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,6 +23,7 @@ Exits non-zero on failure so CI catches regressions of #203 / #223.
 import asyncio
 import os
 import sys
+from types import SimpleNamespace
 
 # Make the repo root importable when run directly from scripts/tests/.
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
@@ -38,7 +39,11 @@ from custom_components.ovms.mqtt.entity_factory import EntityFactory
 from custom_components.ovms.device_tracker import OVMSDeviceTracker
 from custom_components.ovms.naming_service import EntityNamingService
 from custom_components.ovms.attribute_manager import AttributeManager
-from custom_components.ovms.const import GPS_COALESCE_WINDOW, get_add_entities_signal
+from custom_components.ovms.const import (
+    ENTITY_BATCH_WINDOW,
+    GPS_COALESCE_WINDOW,
+    get_add_entities_signal,
+)
 
 ENTRY_ID = "entry1"
 CONFIG = {
@@ -143,15 +148,17 @@ async def _build():
 
     holder = {}
 
-    def on_add(data):
-        if data.get("entity_type") == "device_tracker":
-            holder["data"] = data
+    def on_add(batch):
+        holder["data"] = batch[0]
 
-    _BUS.setdefault(get_add_entities_signal(ENTRY_ID), []).append(on_add)
+    _BUS.setdefault(get_add_entities_signal(ENTRY_ID, "device_tracker"), []).append(
+        on_add
+    )
     for topic, value in ((LAT_TOPIC, "59.1"), (LON_TOPIC, "10.1")):
         await factory.async_create_entities(
             topic, value, parser.parse_topic(topic, value)
         )
+    hass.loop.advance(ENTITY_BATCH_WINDOW)
 
     data = holder["data"]
     tracker = _RecordingTracker(
@@ -167,6 +174,12 @@ async def _build():
         attr,
         writes=writes,
     )
+    # Attach the tracker to the entry so it registers its update callback
+    # directly with the dispatcher, as it does when HA adds it
+    hass.data["ovms"][ENTRY_ID] = {
+        "mqtt_client": SimpleNamespace(update_dispatcher=dispatcher)
+    }
+    tracker.platform = SimpleNamespace(config_entry=SimpleNamespace(entry_id=ENTRY_ID))
     await tracker.async_added_to_hass()
     return hass, dispatcher, writes
 
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Regression test for bounded topic discovery on shared brokers.
+
+Discovery subscribes to {prefix}/#, which on a shared OVMS server carries
+every vehicle on the broker, and used to keep every topic in an unbounded
+set that extract_vehicle_ids and detect_vehicle_type then scanned. Topics
+now stream through a DiscoveryAggregator. This test feeds the REAL
+aggregator a simulated server with thousands of vehicles and asserts:
+
+  * the kept topics and the per-vehicle counters stay within their caps;
+  * every topic of the user's own vehicle is kept, even when it arrives
+    after the caps are reached, and the sample cap only limits others;
+  * the user's vehicles are selected as targets (narrowing the
+    subscription to {prefix}/+/{vehicle_id}/#), the other vehicles' topics
+    are dropped and ignored from then on, and metric counts and detection
+    cover the targets only;
+  * a configured vehicle is a target from the start, and confidence is
+    reached once it covers enough of the expected metrics;
+  * with too many candidate vehicles no target is guessed.
+
+Run standalone:  python3 scripts/tests/test_discovery_aggregator.py
+Exits non-zero on failure.
+"""
+
+import os
+import sys
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.ovms.config_flow.topic_discovery import (
+    DiscoveryAggregator,
+    detect_vehicle_type,
+    extract_vehicle_ids,
+    format_vehicle_subscription,
+)
+from custom_components.ovms.const import (
+    CONF_MQTT_USERNAME,
+    CONF_TOPIC_PREFIX,
+    CONF_TOPIC_STRUCTURE,
+    CONF_VEHICLE_ID,
+    DEFAULT_TOPIC_STRUCTURE,
+    DISCOVERY_MAX_TARGETS,
+    DISCOVERY_MAX_VEHICLES,
+    DISCOVERY_TOPIC_SAMPLE_SIZE,
+)
+
+CONFIG = {
+    CONF_TOPIC_PREFIX: "ovms",
+    CONF_TOPIC_STRUCTURE: DEFAULT_TOPIC_STRUCTURE,
+    CONF_MQTT_USERNAME: "alice",
+}
+METRICS = [f"v/b/m{index}" for index in range(40)]
+OWN_METRICS = METRICS + ["xnl/v/b/soh", "xnl/v/b/range"]
+OTHER_VEHICLES = 3000
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _feed_shared_broker(aggregator, own_vehicles=("ev1",)):
+    """Retained burst of a shared server; the user's vehicles come last."""
+    for index in range(OTHER_VEHICLES):
+        for metric in METRICS:
+            aggregator(f"ovms/user{index}/car{index}/metric/{metric}", b"1", True)
+    for vehicle_id in own_vehicles:
+        for metric in OWN_METRICS:
+            aggregator(f"ovms/alice/{vehicle_id}/metric/{metric}", b"1", True)
+    aggregator("ovms/alice/ev1/client/rr/command/abc", b"stat", False)
+
+
+def main():
+    results = []
+
+    aggregator = DiscoveryAggregator(dict(CONFIG), "test")
+    _feed_shared_broker(aggregator)
+    own_topics = {
+        topic for topic in aggregator.topics if topic.startswith("ovms/alice/ev1/")
+    }
+    _check(
+        "kept topics capped apart from the user's",
+        len(aggregator.topics) - len(own_topics) <= DISCOVERY_TOPIC_SAMPLE_SIZE
+        and aggregator.unsampled_messages > 0,
+        results,
+    )
+    _check(
+        "vehicle counters capped",
+        len(aggregator.vehicles) == DISCOVERY_MAX_VEHICLES + 1
+        and aggregator.uncounted_messages > 0,
+        results,
+    )
+    _check(
+        "every topic of the late own vehicle kept",
+        len(own_topics) == len(OWN_METRICS) + 1,
+        results,
+    )
+
+    targets = aggregator.select_targets()
+    _check("own vehicle selected as target", targets == {"ev1"}, results)
+    _check(
+        "narrow subscription for the target",
+        format_vehicle_subscription(CONFIG, "ev1") == "ovms/+/ev1/#",
+        results,
+    )
+    _check(
+        "other vehicles' topics dropped",
+        aggregator.topics == own_topics and aggregator.retained <= own_topics,
+        results,
+    )
+    aggregator("ovms/user7/car7/metric/v/b/new", b"1", False)
+    _check(
+        "in-flight topics of other vehicles ignored after selection",
+        aggregator.topics == own_topics,
+        results,
+    )
+    _check(
+        "metric count covers the target only",
+        aggregator.metric_count == len(OWN_METRICS),
+        results,
+    )
+    _check(
+        "detection and id extraction see the target only",
+        detect_vehicle_type(aggregator.topics)[0] == "nissan_leaf"
+        and extract_vehicle_ids(aggregator.topics, dict(CONFIG)) == {"ev1"},
+        results,
+    )
+    summary = aggregator.get_vehicle_summary(limit=3)
+    _check(
+        "summary reports targets and sampling",
+        summary["targets"] == ["ev1"]
+        and len(summary["top_vehicles"]) == 3
+        and summary["unsampled_messages"] == aggregator.unsampled_messages,
+        results,
+    )
+
+    # A configured vehicle is a target from the start
+    aggregator = DiscoveryAggregator(dict(CONFIG, **{CONF_VEHICLE_ID: "ev1"}), "test")
+    for metric in METRICS[:10]:
+        aggregator(f"ovms/bob/ev1/metric/{metric}", b"1", True)
+    _check(
+        "configured vehicle kept under any username",
+        aggregator.metric_count == 10 and aggregator.targets == {"ev1"},
+        results,
+    )
+    _check(
+        "confident once the target covers enough metrics",
+        aggregator.is_confident(40) and not aggregator.is_confident(41),
+        results,
+    )
+
+    # Without a username match, a handful of vehicles are all targets...
+    aggregator = DiscoveryAggregator(dict(CONFIG, **{CONF_MQTT_USERNAME: ""}), "test")
+    for vehicle_id in ("a", "b"):
+        aggregator(f"ovms/someone/{vehicle_id}/metric/v/b/soc", b"1", True)
+    _check(
+        "few vehicles all become targets",
+        aggregator.select_targets() == {"a", "b"},
+        results,
+    )
+    # ...but among many, none is guessed
+    aggregator = DiscoveryAggregator(dict(CONFIG, **{CONF_MQTT_USERNAME: ""}), "test")
+    for index in range(DISCOVERY_MAX_TARGETS + 1):
+        aggregator(f"ovms/someone/car{index}/metric/v/b/soc", b"1", True)
+    _check(
+        "no target guessed among many vehicles",
+        aggregator.select_targets() == set() and not aggregator.targets,
+        results,
+    )
+
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Regression test for the persisted discovery snapshot.
+
+Every start used to rediscover the vehicle topic by topic: nothing existed
+until the broker replayed retained messages or the module republished, and
+each first message went through parsing, naming and entity creation again.
+EntityFactory now records each created entity in a DiscoverySnapshot and the
+next start recreates them all before the broker connects. This test drives
+the REAL TopicParser, EntityFactory and DiscoverySnapshot (with an in-memory
+stand-in for the HA Store) and asserts:
+
+  * discovery records topic, unique_id, type, metric path and related IDs,
+    and repeated discovery does not schedule extra writes;
+  * restore registers every recorded topic and queues the entities with no
+    payload, including the combined device tracker and its relationships;
+  * records without a registry entry (deleted by the user or the staleness
+    manager) are pruned;
+  * payloads that arrive before the platforms load seed the queued entities;
+  * every entity type can be constructed from a restored (payload-less) entry.
+
+Run standalone:  python3 scripts/tests/test_discovery_snapshot.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import sys
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import custom_components.ovms.mqtt.discovery_snapshot as ds_mod
+
+from custom_components.ovms.attribute_manager import AttributeManager
+from custom_components.ovms.mqtt.discovery_snapshot import DiscoverySnapshot
+from custom_components.ovms.mqtt.entity_factory import EntityFactory
+from custom_components.ovms.mqtt.entity_registry import EntityRegistry
+from custom_components.ovms.mqtt.topic_parser import TopicParser
+from custom_components.ovms.naming_service import EntityNamingService
+from custom_components.ovms.sensor.binary_sensor import OVMSBinarySensor
+from custom_components.ovms.sensor.entities import OVMSSensor
+from custom_components.ovms.sensor.lock import OVMSLock
+
+PREFIX = "ovms/user/leaf"
+CONFIG = {
+    "vehicle_id": "leaf",
+    "mqtt_username": "user",
+    "topic_prefix": "ovms",
+    "client_id": "ha_ovms_abc123",
+    "config_entry_id": "entry1",
+}
+TOPICS = {
+    f"{PREFIX}/metric/v/b/soc": "81",
+    f"{PREFIX}/metric/v/e/locked": "yes",
+    f"{PREFIX}/metric/v/p/latitude": "59.91",
+    f"{PREFIX}/metric/v/p/longitude": "10.75",
+    f"{PREFIX}/status": "online",
+}
+
+
+class _FakeStore:
+    """In-memory stand-in for homeassistant.helpers.storage.Store."""
+
+    def __init__(self, data=None):
+        self.data = data
+        self.delayed_saves = 0
+        self._pending = None
+
+    async def async_load(self):
+        return self.data
+
+    def async_delay_save(self, data_func, _delay):
+        self.delayed_saves += 1
+        self._pending = data_func
+
+    async def async_save(self, data):
+        self.data = data
+        self._pending = None
+
+    def flush(self):
+        if self._pending is not None:
+            self.data = self._pending()
+            self._pending = None
+
+
+_STORES = {}
+ds_mod.Store = lambda _hass, _version, key: _STORES.setdefault(key, _FakeStore())
+
+
+class _FakeEntityRegistry:
+    def __init__(self, unique_ids):
+        self.unique_ids = set(unique_ids)
+
+    def async_get_entity_id(self, _domain, _platform, unique_id):
+        return f"entity.{unique_id}" if unique_id in self.unique_ids else None
+
+
+class _FakeHass:
+    def __init__(self):
+        self.data = {}
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _build_factory(hass):
+    snapshot = DiscoverySnapshot(hass, CONFIG)
+    registry = EntityRegistry()
+    factory = EntityFactory(
+        hass,
+        registry,
+        None,
+        CONFIG,
+        EntityNamingService(CONFIG),
+        AttributeManager(CONFIG),
+        snapshot=snapshot,
+    )
+    return factory, snapshot, registry
+
+
+async def _discover(factory, parser):
+    for topic, payload in TOPICS.items():
+        parsed = parser.parse_topic(topic, payload)
+        await factory.async_create_entities(topic, payload, parsed)
+        for related in parser.get_related_entities(parsed):
+            await factory.async_create_entities(topic, payload, related)
+
+
+async def _run(results):
+    hass = _FakeHass()
+
+    # First run: live discovery fills the snapshot
+    factory, snapshot, registry = _build_factory(hass)
+    store = snapshot._store
+    parser = TopicParser(CONFIG, registry)
+    await _discover(factory, parser)
+    store.flush()
+
+    records = {r["unique_id"]: r for r in store.data["entities"]}
+    by_type = {}
+    for record in records.values():
+        by_type.setdefault(record["entity_type"], []).append(record)
+    _check(
+        "every created entity recorded",
+        set(records) == factory.created_entities,
+        results,
+    )
+    _check(
+        "sensor, binary sensor, lock and tracker recorded",
+        {"sensor", "binary_sensor", "lock", "device_tracker"} <= set(by_type),
+        results,
+    )
+    soc = next(r for r in records.values() if r["topic"].endswith("/v/b/soc"))
+    _check("metric path recorded", soc["metric_path"] == "v.b.soc", results)
+    tracker = by_type["device_tracker"][0]
+    _check(
+        "tracker records its lat/lon sources",
+        set(tracker["related"]) == {"latitude", "longitude"},
+        results,
+    )
+    lock = by_type["lock"][0]
+    _check("lock config recorded", "lock_command" in lock["lock_config"], results)
+
+    saves = store.delayed_saves
+    await _discover(factory, parser)
+    _check("rediscovery schedules no write", store.delayed_saves == saves, results)
+
+    # Second run: restore before connecting; the soc sensor was deleted
+    ds_mod.er.async_get = lambda _hass: _FakeEntityRegistry(
+        uid for uid in records if uid != soc["unique_id"]
+    )
+    factory, snapshot, registry = _build_factory(hass)
+    restored_records = await snapshot.async_load()
+    _check("deleted entity pruned", snapshot.pruned_count == 1, results)
+
+    restored = await factory.async_restore_entities(restored_records)
+    _check("all remaining entities restored", restored == len(records) - 1, results)
+    _check(
+        "restored topics registered for live updates",
+        all(
+            registry.get_entities_for_topic(topic)
+            for topic in TOPICS
+            if not topic.endswith("/v/b/soc")
+        ),
+        results,
+    )
+    _check(
+        "combined tracker restored once",
+        factory.combined_tracker_created
+        and registry.get_entities_for_topic("combined_location")
+        == [tracker["unique_id"]],
+        results,
+    )
+    _check(
+        "tracker relationships restored",
+        len(
+            registry.get_related_entities_by_type(
+                tracker["unique_id"], "combined_tracker"
+            )
+        )
+        == 2,
+        results,
+    )
+
+    # A payload received before the platforms load seeds the queued entity
+    lat_topic = f"{PREFIX}/metric/v/p/latitude"
+    factory.refresh_restored_payloads({lat_topic: {"payload": "60.0"}})
+    queued = []
+    while not factory.entity_queue.empty():
+        queued.append(factory.entity_queue.get_nowait())
+    _check("one queued entry per restored entity", len(queued) == restored, results)
+    payloads = {d["topic"]: d["payload"] for d in queued}
+    _check("cached payload applied", payloads[lat_topic] == "60.0", results)
+    _check(
+        "others restored without payload",
+        payloads[f"{PREFIX}/status"] is None,
+        results,
+    )
+
+    # Platforms can build every restored entity without a payload
+    built = 0
+    for data in queued:
+        args = (
+            data["unique_id"],
+            data["name"],
+            data["topic"],
+            data["payload"],
+            data["device_info"],
+            data["attributes"],
+        )
+        if data["entity_type"] == "sensor":
+            OVMSSensor(*args, data["friendly_name"], None, "entry1")
+        elif data["entity_type"] == "binary_sensor":
+            OVMSBinarySensor(*args, None, data["friendly_name"])
+        elif data["entity_type"] == "lock":
+            OVMSLock(
+                *args,
+                None,
+                None,
+                data["friendly_name"],
+                lock_config=data["lock_config"],
+            )
+        else:
+            continue
+        built += 1
+    _check("restored entries construct entities", built == restored - 1, results)
+
+
+def main():
+    results = []
+    asyncio.run(_run(results))
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Equivalence and benchmark test for the integer duration formatter.
+
+Every duration update formatted its value twice (short and full form), each
+time converting to Decimal(str(value)) and recomputing the split with Decimal
+arithmetic. format_duration now splits with integer arithmetic, memoizes
+results per (value, unit, style), and format_sensor_value only rebuilds the
+full form when the value changes. The outputs of the Decimal formatter were
+frozen before it was removed: a table of representative cases, and a digest
+of the whole grid below. This test asserts:
+
+  * the formatter matches the frozen table, and is byte-identical to the
+    Decimal formatter over a grid of ints, floats and number strings in
+    every unit, unit alias and style, including negatives, zero, rounding
+    edges and month/year splits;
+  * values that are not finite, plausible numbers (bools, NaN, infinities,
+    huge values, garbage strings, unhashable values) are returned as text,
+    Decimals are formatted like their value and a negative zero as zero;
+  * cached lookups are much faster than formatting;
+  * format_sensor_value formats the full form only when the value changes.
+
+Run standalone:  python3 scripts/tests/test_duration_formatter.py
+Exits non-zero on failure.
+"""
+
+import hashlib
+import os
+import random
+import sys
+import timeit
+from decimal import Decimal
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.const import UnitOfTime
+
+import custom_components.ovms.sensor.entities as entities_mod
+
+from custom_components.ovms.sensor.duration_formatter import (
+    MONTHS,
+    YEARS,
+    _format_duration_cached,
+    format_duration,
+)
+
+# (value, unit, short form, full form) as formatted by the Decimal formatter
+EXPECTED = [
+    (0, "s", "0.0s", "0.0 seconds"),
+    (9.95, "s", "10.0s", "10.0 seconds"),
+    (59.5, "s", "60s", "60 seconds"),
+    (3601, "s", "1h 0m", "1 hour 0 minutes"),
+    (86399, "s", "23h 59m", "23 hours 59 minutes"),
+    (5184000, "s", "1mo 29.56d", "1 month 29.56 days"),
+    (34560000, "s", "1y 1mo 4.28d", "1 year 1 month 4.28 days"),
+    (0.5, "min", "30s", "30 seconds"),
+    (125, "min", "2h 5m", "2 hours 5 minutes"),
+    (120, "min", "2h 0m", "2 hours 0 minutes"),
+    (1.5, "h", "1h 30m", "1 hour 30 minutes"),
+    (0.25, "h", "15m", "15 minutes"),
+    (2.75, "d", "2d 18h 0m", "2 days 18 hours 0 minutes"),
+    (0.01, "d", "14m", "14 minutes"),
+    (14.5, "mo", "1y 2mo", "1 year 2 months"),
+    (0.5, "mo", "15d", "15 days"),
+    (1.5, "y", "1y 6mo", "1 year 6 months"),
+    (1, "y", "1y 0mo", "1 year 0 months"),
+    (-7.25, "min", "-7m 15s", "-7 minutes 15 seconds"),
+    ("12.500", "s", "13s", "13 seconds"),
+    ("1e3", "s", "16m 40s", "16 minutes 40 seconds"),
+    (".5", "h", "30m", "30 minutes"),
+    (-0.01, "s", "-0.0s", "-0.0 seconds"),
+]
+# SHA-256 of the Decimal formatter's outputs over _values() x UNITS x styles
+CORPUS_DIGEST = "2ea1d4c0fdfa12f4cdb2f84914c822ba1be57bff45e273aa352275308ba1d7c8"
+
+UNITS = [
+    UnitOfTime.SECONDS,
+    UnitOfTime.MINUTES,
+    UnitOfTime.HOURS,
+    UnitOfTime.DAYS,
+    MONTHS,
+    YEARS,
+    "s",
+    "sec",
+    "Min",
+    "minutes",
+    "hr",
+    "HOURS",
+    "day",
+    "mo",
+    "month",
+    "y",
+    "yr",
+    "weeks",
+    None,
+]
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _outcome(func, *args):
+    try:
+        return func(*args)
+    except Exception as err:  # pylint: disable=broad-except
+        return type(err)
+
+
+def _values():
+    rng = random.Random(37)
+    values = [0, 1, -1, 9, 10, 59, 60, 61, 3599, 3600, 3601, 86399, 86400]
+    values += [0.0, 0.04, 0.05, 0.95, 9.94, 9.95, 9.96, 10.4, 10.5, 59.5]
+    values += [1.5, 0.5, 11.999, 12, 12.5, 24, 30.44, 365.25, 1e-05, 1e15]
+    # Around the 60-day and one-year switches of the seconds split
+    values += [60 * 86400 + delta for delta in (-1, 0, 1)]
+    values += [days * 86400 for days in range(55, 800, 7)]
+    values += [rng.randrange(0, 10**8) for _ in range(400)]
+    values += [round(rng.uniform(0, 10**6), rng.randrange(0, 7)) for _ in range(400)]
+    values += [rng.uniform(-100, 100) for _ in range(200)]
+    values += [str(value) for value in values[:150]]
+    values += ["+5", "-7.25", "1.", ".5", "1e3", "2.5E-2", "007", "12.500"]
+    return values
+
+
+def main():
+    results = []
+    values = _values()
+
+    mismatches = [
+        (value, unit)
+        for value, unit, short, full in EXPECTED
+        if (format_duration(value, unit), format_duration(value, unit, True))
+        != (short, full)
+    ]
+    _check("frozen table matched", not mismatches, results)
+    if mismatches:
+        print("  mismatches:", mismatches)
+
+    outputs = "\n".join(
+        format_duration(value, unit, full)
+        for value in values
+        for unit in UNITS
+        for full in (False, True)
+    )
+    _check(
+        f"byte-identical to the frozen corpus ({len(values) * len(UNITS) * 2} cases)",
+        hashlib.sha256(outputs.encode()).hexdigest() == CORPUS_DIGEST,
+        results,
+    )
+
+    unusual = [
+        True,
+        float("nan"),
+        float("inf"),
+        -float("inf"),
+        10**30,
+        1e22,
+        "1" * 30,
+        "1e-30",
+        " 42 ",
+        "1_000",
+        "abc",
+        "",
+        ".",
+        None,
+        [1],
+    ]
+    _check(
+        "values that are not plausible numbers returned as text",
+        all(
+            format_duration(value, unit, full) == str(value)
+            for value in unusual
+            for unit in (UnitOfTime.SECONDS, MONTHS, "h")
+            for full in (False, True)
+        ),
+        results,
+    )
+    _check(
+        "Decimals formatted like their value, negative zero as zero",
+        format_duration(Decimal("90.5"), "h", True) == "90 hours 30 minutes"
+        and format_duration(Decimal("1E+3")) == "16m 40s"
+        and format_duration(-0.0) == format_duration("-0") == "0.0s"
+        and format_duration(-0.0, MONTHS) == "0mo",
+        results,
+    )
+    _check(
+        "bool not served from the cache entry of the equal int",
+        format_duration(1) == "1.0s" and format_duration(True) == "True",
+        results,
+    )
+
+    # Benchmark a working set that fits the cache (recurring values of a few
+    # duration sensors), formatted afresh and looked up
+    units = [UnitOfTime.SECONDS, UnitOfTime.MINUTES, "h", MONTHS]
+    recurring = values[:100]
+
+    def _run(func):
+        for value in recurring:
+            for unit in units:
+                func(value, unit, False)
+
+    uncached_time = min(
+        timeit.repeat(lambda: _run(_format_duration_cached.__wrapped__), number=3)
+    )
+    _run(format_duration)
+    cached_time = min(timeit.repeat(lambda: _run(format_duration), number=3))
+    print(
+        f"  working set: formatted {uncached_time * 1000:.1f} ms,"
+        f" cached {cached_time * 1000:.1f} ms ({uncached_time / cached_time:.1f}x)"
+    )
+    _check("cached lookups much faster", cached_time * 3 < uncached_time, results)
+
+    # The full form is only rebuilt when the value changes
+    calls = []
+
+    def _counting(value, unit=UnitOfTime.SECONDS, use_full_names=False):
+        calls.append(use_full_names)
+        return format_duration(value, unit, use_full_names)
+
+    entities_mod.format_duration = _counting
+    try:
+        attributes = {"original_unit": UnitOfTime.MINUTES}
+        for value in (125, 125, 125, 126):
+            entities_mod.format_sensor_value(
+                value, SensorDeviceClass.DURATION, attributes
+            )
+    finally:
+        entities_mod.format_duration = format_duration
+    _check(
+        "full form formatted only on value change",
+        calls.count(True) == 2 and calls.count(False) == 4,
+        results,
+    )
+    _check(
+        "attributes carry both forms of the latest value",
+        attributes["formatted_value"] == "2 hours 6 minutes"
+        and attributes["formatted_short"] == "2h 6m"
+        and attributes["raw_value"] == 126,
+        results,
+    )
+
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""Regression test for the streaming charge and drive energy integration.
+
+Vehicles without the v.b.energy.* counters only publish instantaneous power
+(v.b.power, v.c.power), and HA's Riemann integral helper integrates every
+state change through the state machine. EnergySessionTracker integrates the
+power topics straight from the ingest path. This test drives the REAL
+tracker with a simulated clock and asserts:
+
+  * the trapezoidal rule is exact for a linear ramp, and an interval whose
+    power changes sign is split at the zero crossing;
+  * intervals longer than ENERGY_MAX_SAMPLE_GAP hold the earlier power
+    (OVMS only publishes changes) for at most ENERGY_MAX_HELD_GAP, so a
+    module that goes offline for hours adds no made-up energy, and an
+    interruption skips ahead;
+  * charge energy only accumulates during a charge session and restarts
+    from zero with the next one;
+  * v.c.state starts and ends charge sessions too, and session listeners
+    hear each start and end after the counters are reset;
+  * drive energy separates battery output from recovered energy;
+  * a restored counter continues after a restart mid-session;
+  * the sensors are TOTAL_INCREASING kWh energy sensors, signalled only
+    when the rounded value changes.
+
+Run standalone:  python3 scripts/tests/test_energy_sessions.py
+Exits non-zero on failure.
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import custom_components.ovms.energy_sessions as es_mod
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+
+from custom_components.ovms.const import ENERGY_MAX_HELD_GAP, ENERGY_MAX_SAMPLE_GAP
+from custom_components.ovms.energy_sessions import (
+    EnergySessionTracker,
+    TrapezoidIntegrator,
+)
+
+PREFIX = "ovms/user/leaf/metric"
+CONFIG = {
+    "vehicle_id": "leaf",
+    "client_id": "ha_ovms_abc123",
+    "config_entry_id": "entry1",
+}
+
+_SENT = []
+es_mod.async_dispatcher_send = lambda _hass, signal, *args: _SENT.append((signal, args))
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _close(value, expected, tolerance=1e-9):
+    return abs(value - expected) <= tolerance
+
+
+def _integrator(results):
+    ramp = TrapezoidIntegrator()
+    total = 0.0
+    for step in range(61):
+        total += ramp.add(step * 60.0, step / 6)[0]
+    crossing = TrapezoidIntegrator()
+    crossing.add(0.0, 10.0)
+    split = crossing.add(36.0, -10.0)
+    _check(
+        "trapezoids exact for a ramp, split at a zero crossing",
+        # 10 kW to -10 kW over 36 s: two triangles of 18 s each
+        _close(total, 5.0) and _close(split[0], 0.025) and _close(split[1], 0.025),
+        results,
+    )
+
+    gappy = TrapezoidIntegrator()
+    gappy.add(0.0, 10.0)
+    held = gappy.add(1800.0, 4.0)  # half an hour at 10 kW, then a change
+    recovered = gappy.add(1800.0 + ENERGY_MAX_SAMPLE_GAP * 2, -6.0)
+    _check(
+        "long gaps hold the earlier power instead of interpolating",
+        _close(held[0], 5.0)
+        and held[1] == 0.0
+        and _close(recovered[0], 4 * ENERGY_MAX_SAMPLE_GAP * 2 / 3600)
+        and gappy.gaps == 2,
+        results,
+    )
+    gappy.interrupt()
+    skipped = gappy.add(7200.0, 10.0)
+    resumed = gappy.add(7440.0, 10.0)  # 4 min at 10 kW
+    _check(
+        "interrupt skips ahead, integration resumes after it",
+        skipped == (0.0, 0.0) and _close(resumed[0], 10 * 4 / 60),
+        results,
+    )
+
+
+def _send(tracker, path, payload):
+    tracker.process_message(f"{PREFIX}/{path.replace('.', '/')}", payload)
+
+
+def _run_power(tracker, clock, path, power, minutes):
+    for _ in range(minutes):
+        clock.now += 60
+        _send(tracker, path, str(power))
+
+
+def _sessions(results):
+    clock = _Clock()
+    tracker = EnergySessionTracker(SimpleNamespace(), CONFIG, clock)
+    _SENT.clear()
+    tracker.async_create_sensors()
+    sensors = {
+        data["diagnostic_sensor"]._key: data["diagnostic_sensor"]
+        for signal, args in _SENT
+        for data in args[0]
+    }
+    sensor = sensors["charge"]
+    _check(
+        "sensors are TOTAL_INCREASING kWh energy sensors",
+        set(sensors) == {"charge", "drive", "drive_recovered"}
+        and sensor.device_class == SensorDeviceClass.ENERGY
+        and sensor.state_class == SensorStateClass.TOTAL_INCREASING
+        and sensor.native_unit_of_measurement == "kWh",
+        results,
+    )
+
+    _send(tracker, "v.c.charging", "no")
+    _run_power(tracker, clock, "v.c.power", 7, 10)
+    before = sensor.native_value
+    _send(tracker, "v.c.charging", "yes")
+    _SENT.clear()
+    _run_power(tracker, clock, "v.c.power", 7, 30)
+    session = sensor.native_value
+    signals = len(_SENT)
+    _send(tracker, "v.c.charging", "no")
+    _run_power(tracker, clock, "v.c.power", 7, 10)
+    after = sensor.native_value
+    _send(tracker, "v.c.charging", "yes")
+    _check(
+        "charge energy accumulates per session and restarts at zero",
+        before == 0
+        and _close(session, 3.5, 1e-3)
+        and signals == 30
+        and after == session
+        and sensor.native_value == 0
+        and sensor.extra_state_attributes == {"session_active": True},
+        results,
+    )
+
+    _send(tracker, "v.e.on", "no")
+    _send(tracker, "v.e.on", "yes")
+    _send(tracker, "v.b.power", "20")
+    _run_power(tracker, clock, "v.b.power", 20, 3)
+    _run_power(tracker, clock, "v.b.power", -12, 3)
+    _check(
+        "drive energy separates output from recovered energy",
+        # 20 kW for 3 min, then -12 kW: the first minute crosses zero
+        # 5/8 of the way through
+        _close(sensors["drive"].native_value, 1.0 + 20 * 0.625 / 120, 1e-3)
+        and _close(
+            sensors["drive_recovered"].native_value, 0.4 + 12 * 0.375 / 120, 1e-3
+        ),
+        results,
+    )
+
+    stateful = EnergySessionTracker(SimpleNamespace(), CONFIG, clock)
+    heard = []
+    stateful.add_session_listener(
+        lambda session, active: heard.append(
+            (session, active, stateful.get_energy("charge"))
+        )
+    )
+    _send(stateful, "v.c.state", "done")
+    _send(stateful, "v.c.state", "charging")
+    _run_power(stateful, clock, "v.c.power", 6, 10)
+    _send(stateful, "v.c.state", "timerwait")  # keeps the session
+    _send(stateful, "v.c.state", "stopped")
+    _send(stateful, "v.c.charging", "yes")
+    _check(
+        "v.c.state drives charge sessions; listeners hear starts and ends",
+        # ten samples a minute apart: nine minutes at 6 kW
+        heard == [("charge", True, 0.0), ("charge", False, 0.9), ("charge", True, 0.0)]
+        and stateful.charge_state == "stopped",
+        results,
+    )
+
+    flat = EnergySessionTracker(SimpleNamespace(), CONFIG, clock)
+    _send(flat, "v.c.charging", "yes")
+    _send(flat, "v.c.power", "7.2")
+    clock.now += 1800  # steady: OVMS publishes nothing
+    _send(flat, "v.c.power", "7.2")
+    flat_energy = flat.get_energy("charge")
+    flat.async_interrupt()  # disconnected
+    clock.now += 1800
+    _send(flat, "v.c.power", "7.2")
+    _check(
+        "flat charge keeps its energy; a disconnect is not carried over",
+        _close(flat_energy, 3.6, 1e-3) and flat.get_energy("charge") == flat_energy,
+        results,
+    )
+
+    offline = EnergySessionTracker(SimpleNamespace(), CONFIG, clock)
+    _send(offline, "v.c.charging", "yes")
+    _send(offline, "v.c.power", "7")
+    clock.now += 10 * 3600  # module offline for ten hours mid-charge
+    _send(offline, "v.c.power", "7")
+    _check(
+        "multi-hour silence holds the power for ENERGY_MAX_HELD_GAP only",
+        _close(offline.get_energy("charge"), 7 * ENERGY_MAX_HELD_GAP / 3600, 1e-3)
+        and offline.get_energy("charge") < 7,
+        results,
+    )
+
+    restarted = EnergySessionTracker(SimpleNamespace(), CONFIG, clock)
+    restarted.restore_energy("charge", 12.5)
+    _send(restarted, "v.c.charging", "yes")
+    _run_power(restarted, clock, "v.c.power", 6, 11)
+    restarted.restore_energy("charge", 1.0)
+    _check(
+        "restored counter continues after a restart mid-session",
+        _close(restarted.get_energy("charge"), 13.5, 1e-3),
+        results,
+    )
+
+
+def main():
+    results = []
+    _integrator(results)
+    _sessions(results)
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
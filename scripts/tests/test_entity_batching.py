@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Regression test for batched, per-platform entity creation.
+
+EntityFactory used to send one add-entities dispatcher message per entity on
+a signal every platform listened to; each platform filtered by entity_type
+and called async_add_entities once per entity. At startup with a few hundred
+topics that was over a thousand callback invocations and hundreds of add
+batches. Entities now go out on a per-platform signal as lists. This test
+drives the REAL TopicParser, EntityFactory and the sensor / binary_sensor
+platform setup and asserts:
+
+  * entities queued before the platforms load reach each platform as ONE
+    list, and each platform calls async_add_entities once;
+  * platforms only receive their own entity types;
+  * entities discovered live inside ENTITY_BATCH_WINDOW share one batch,
+    and a later discovery starts a new one;
+  * shutdown cancels a pending flush.
+
+Run standalone:  python3 scripts/tests/test_entity_batching.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import sys
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import custom_components.ovms.mqtt.entity_factory as ef_mod
+import custom_components.ovms.sensor as sensor_mod
+import custom_components.ovms.sensor.binary_sensor as binary_mod
+
+from custom_components.ovms.attribute_manager import AttributeManager
+from custom_components.ovms.const import ENTITY_BATCH_WINDOW
+from custom_components.ovms.mqtt.entity_factory import EntityFactory
+from custom_components.ovms.mqtt.entity_registry import EntityRegistry
+from custom_components.ovms.mqtt.topic_parser import TopicParser
+from custom_components.ovms.naming_service import EntityNamingService
+
+ENTRY_ID = "entry1"
+PREFIX = "ovms/user/leaf/metric"
+CONFIG = {
+    "vehicle_id": "leaf",
+    "mqtt_username": "user",
+    "topic_prefix": "ovms",
+    "client_id": "ha_ovms_abc123",
+    "config_entry_id": ENTRY_ID,
+}
+STARTUP_TOPICS = {
+    "v/b/soc": "81",
+    "v/b/range/est": "240",
+    "v/b/voltage": "360.5",
+    "v/b/current": "-3.2",
+    "v/e/locked": "yes",
+    "v/c/charging": "no",
+    "v/d/fl": "no",
+    "v/p/latitude": "59.91",
+    "v/p/longitude": "10.75",
+}
+
+# In-process replacement for the HA dispatcher transport.
+_BUS = {}
+_SIGNALS_SENT = []
+
+
+def _connect(_hass, signal, target):
+    _BUS.setdefault(signal, []).append(target)
+    return lambda: None
+
+
+def _send(_hass, signal, *args):
+    _SIGNALS_SENT.append(signal)
+    for target in list(_BUS.get(signal, [])):
+        target(*args)
+
+
+ef_mod.async_dispatcher_send = _send
+sensor_mod.async_dispatcher_connect = _connect
+binary_mod.async_dispatcher_connect = _connect
+
+
+class _FakeTimer:
+    def __init__(self, when, callback):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class _FakeLoop:
+    """Minimal call_later scheduler driven by an explicit clock."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.timers = []
+
+    def call_later(self, delay, callback, *args):
+        timer = _FakeTimer(self.now + delay, lambda: callback(*args))
+        self.timers.append(timer)
+        return timer
+
+    def advance(self, seconds):
+        self.now += seconds
+        for timer in [t for t in self.timers if t.when <= self.now]:
+            self.timers.remove(timer)
+            if not timer.cancelled:
+                timer.callback()
+
+
+class _FakeHass:
+    def __init__(self):
+        self.data = {}
+        self.loop = _FakeLoop()
+
+
+class _FakeEntry:
+    entry_id = ENTRY_ID
+
+    def async_on_unload(self, _func):
+        return None
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+async def _discover(factory, parser, topics):
+    for suffix, payload in topics.items():
+        topic = f"{PREFIX}/{suffix}"
+        parsed = parser.parse_topic(topic, payload)
+        await factory.async_create_entities(topic, payload, parsed)
+        for related in parser.get_related_entities(parsed):
+            await factory.async_create_entities(topic, payload, related)
+
+
+async def _run(results):
+    hass = _FakeHass()
+    registry = EntityRegistry()
+    factory = EntityFactory(
+        hass,
+        registry,
+        None,
+        CONFIG,
+        EntityNamingService(CONFIG),
+        AttributeManager(CONFIG),
+    )
+    parser = TopicParser(CONFIG, registry)
+
+    add_calls = {"sensor": [], "binary_sensor": []}
+    await sensor_mod.async_setup_entry(hass, _FakeEntry(), add_calls["sensor"].append)
+    await binary_mod.async_setup_entry(
+        hass, _FakeEntry(), add_calls["binary_sensor"].append
+    )
+
+    # Startup: everything is discovered before the platforms load
+    await _discover(factory, parser, STARTUP_TOPICS)
+    queued = factory.entity_queue.qsize()
+    await factory.async_process_queued_entities()
+
+    types = {registry.get_entity_type(uid) for uid in factory.created_entities}
+    _check(
+        "one signal per platform for the whole startup queue",
+        len(_SIGNALS_SENT) == len(types),
+        results,
+    )
+    _check(
+        "sensor platform adds its batch with one call",
+        len(add_calls["sensor"]) == 1,
+        results,
+    )
+    _check(
+        "binary sensor platform adds its batch with one call",
+        len(add_calls["binary_sensor"]) == 1,
+        results,
+    )
+    expected_sensors = len(registry.get_entities_by_type("sensor"))
+    expected_binary = len(registry.get_entities_by_type("binary_sensor"))
+    _check(
+        "every sensor in the batch",
+        len(add_calls["sensor"][0]) == expected_sensors,
+        results,
+    )
+    _check(
+        "platforms only receive their own type",
+        len(add_calls["binary_sensor"][0]) == expected_binary
+        and all(
+            type(entity).__name__ == "OVMSBinarySensor"
+            for entity in add_calls["binary_sensor"][0]
+        ),
+        results,
+    )
+    print(
+        f"startup: {queued} entities -> {len(_SIGNALS_SENT)} signals, "
+        f"{sum(len(calls) for calls in add_calls.values())} sensor/binary adds"
+    )
+
+    # Live discovery: entities inside one window share a batch
+    _SIGNALS_SENT.clear()
+    await _discover(factory, parser, {"v/b/temp": "21", "v/b/soh": "96"})
+    _check("nothing sent inside the window", not _SIGNALS_SENT, results)
+    hass.loop.advance(ENTITY_BATCH_WINDOW)
+    _check(
+        "live entities arrive together",
+        len(add_calls["sensor"]) == 2 and len(add_calls["sensor"][1]) == 2,
+        results,
+    )
+
+    await _discover(factory, parser, {"v/b/12v/voltage": "12.6"})
+    hass.loop.advance(ENTITY_BATCH_WINDOW)
+    _check("later discovery starts a new batch", len(add_calls["sensor"]) == 3, results)
+
+    # Shutdown cancels a pending flush
+    await _discover(factory, parser, {"v/b/power": "1.5"})
+    factory.async_shutdown()
+    hass.loop.advance(ENTITY_BATCH_WINDOW)
+    _check("shutdown cancels pending flush", len(add_calls["sensor"]) == 3, results)
+
+
+def main():
+    results = []
+    asyncio.run(_run(results))
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Regression test for direct entity update callbacks.
+
+Every entity update went through an f-string signal name and HA's
+dispatcher (signal lookup plus a job wrapper per target), and evaluated
+len(hass.data["ovms"]["dispatched_updates"]) just to decide whether to log.
+Entities now register their update callback with the entry's
+UpdateDispatcher when added. This test drives the REAL UpdateDispatcher,
+TopicParser, EntityFactory and OVMSSensor and asserts:
+
+  * an added sensor registers with its entry's dispatcher and updates are
+    direct calls, with no dispatcher signal sent;
+  * update listeners (staleness tracking) still see every update;
+  * removing the entity unregisters it, and later updates for it fall back
+    to the signal;
+  * entities outside a loaded entry still subscribe to the signal.
+
+Run standalone:  python3 scripts/tests/test_entity_callbacks.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import custom_components.ovms.mqtt.update_dispatcher as ud_mod
+import custom_components.ovms.utils as utils_mod
+
+from custom_components.ovms.attribute_manager import AttributeManager
+from custom_components.ovms.const import DOMAIN, SIGNAL_UPDATE_ENTITY
+from custom_components.ovms.mqtt.entity_factory import EntityFactory
+from custom_components.ovms.mqtt.entity_registry import EntityRegistry
+from custom_components.ovms.mqtt.topic_parser import TopicParser
+from custom_components.ovms.mqtt.update_dispatcher import UpdateDispatcher
+from custom_components.ovms.naming_service import EntityNamingService
+from custom_components.ovms.sensor.entities import OVMSSensor
+
+ENTRY_ID = "entry1"
+CONFIG = {
+    "vehicle_id": "leaf",
+    "mqtt_username": "user",
+    "topic_prefix": "ovms",
+    "client_id": "ha_ovms_abc123",
+    "config_entry_id": ENTRY_ID,
+}
+TOPIC = "ovms/user/leaf/metric/v/b/soc"
+
+SIGNALS = []
+CONNECTED = []
+
+
+def _send(_hass, signal, *args):
+    SIGNALS.append(signal)
+
+
+def _connect(_hass, signal, target):
+    CONNECTED.append(signal)
+    return lambda: None
+
+
+ud_mod.async_dispatcher_send = _send
+utils_mod.async_dispatcher_connect = _connect
+
+
+class _FakeHass:
+    def __init__(self):
+        self.data = {DOMAIN: {}}
+
+
+class _Sensor(OVMSSensor):
+    """Sensor recording its state writes instead of writing to HA."""
+
+    writes = 0
+
+    async def async_get_last_state(self):
+        return None
+
+    def async_write_ha_state(self):
+        self.writes += 1
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+async def _build(hass, dispatcher, registry):
+    factory = EntityFactory(
+        hass,
+        registry,
+        dispatcher,
+        CONFIG,
+        EntityNamingService(CONFIG),
+        AttributeManager(CONFIG),
+    )
+    parsed = TopicParser(CONFIG, registry).parse_topic(TOPIC, "80")
+    await factory.async_create_entities(TOPIC, "80", parsed)
+    data = factory.entity_queue.get_nowait()
+    sensor = _Sensor(
+        data["unique_id"],
+        data["name"],
+        data["topic"],
+        data["payload"],
+        data["device_info"],
+        data["attributes"],
+        data["friendly_name"],
+        None,
+        ENTRY_ID,
+        metric=data.get("metric"),
+    )
+    sensor.hass = hass
+    return sensor
+
+
+async def _run(results):
+    hass = _FakeHass()
+    registry = EntityRegistry()
+    dispatcher = UpdateDispatcher(hass, registry, AttributeManager(CONFIG), CONFIG)
+    seen = []
+    dispatcher.add_update_listener(seen.append)
+    hass.data[DOMAIN][ENTRY_ID] = {
+        "mqtt_client": SimpleNamespace(update_dispatcher=dispatcher)
+    }
+
+    sensor = await _build(hass, dispatcher, registry)
+    sensor.platform = SimpleNamespace(config_entry=SimpleNamespace(entry_id=ENTRY_ID))
+    await sensor.async_added_to_hass()
+    _check(
+        "added sensor registered with its entry's dispatcher",
+        sensor.unique_id in dispatcher._entity_callbacks and not CONNECTED,
+        results,
+    )
+
+    for value in ("81", "82", "83"):
+        dispatcher.dispatch_update(TOPIC, value)
+    _check(
+        "updates are direct calls without dispatcher signals",
+        sensor.native_value == 83 and sensor.writes == 3 and not SIGNALS,
+        results,
+    )
+    _check("update listeners still notified", seen == [sensor.unique_id] * 3, results)
+
+    # What HA runs for the entity's async_on_remove callbacks on removal
+    sensor._call_on_remove_callbacks()
+    dispatcher.dispatch_update(TOPIC, "84")
+    _check(
+        "removed sensor unregistered, later updates use the signal",
+        sensor.unique_id not in dispatcher._entity_callbacks
+        and sensor.native_value == 83
+        and SIGNALS == [f"{SIGNAL_UPDATE_ENTITY}_{sensor.unique_id}"],
+        results,
+    )
+
+    detached = await _build(hass, dispatcher, EntityRegistry())
+    await detached.async_added_to_hass()
+    _check(
+        "entity outside a loaded entry subscribes to the signal",
+        CONNECTED == [f"{SIGNAL_UPDATE_ENTITY}_{detached.unique_id}"],
+        results,
+    )
+
+
+def main():
+    results = []
+    asyncio.run(_run(results))
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Regression test for the fleet-level aggregate sensors.
+
+With one config entry per car, fleet questions ("cars plugged in", "cars
+below 20% SOC", "kWh charged today") meant templates over every vehicle's
+entities. FleetAggregator keeps running aggregates over the opted-in
+vehicles, updated in place from each client's message stream. This test
+drives the REAL aggregator with fake clients and asserts:
+
+  * the vehicle sets (charging, plugged in, low SOC) follow each vehicle
+    and only signal the sensors whose aggregate changed;
+  * average, min and max SOC are maintained incrementally, scanning the
+    members only when the vehicle holding an extreme moves away from it;
+  * energy charged today sums the v.c.kwh increases of charging vehicles,
+    across a counter reset, and restarts at midnight;
+  * removing a vehicle takes its values out of every aggregate, and the
+    sensors move to another member when their host entry goes away;
+  * the last member leaving drops the fleet;
+  * two entries with the same vehicle ID count as two vehicles, and
+    removing one leaves the other in the aggregates.
+
+Run standalone:  python3 scripts/tests/test_fleet_aggregates.py
+Exits non-zero on failure.
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import custom_components.ovms.fleet as fleet_mod
+
+from custom_components.ovms.const import (
+    FLEET_DATA_KEY,
+    SIGNAL_UPDATE_ENTITY,
+    get_add_entities_signal,
+)
+from custom_components.ovms.fleet import (
+    async_get_fleet_aggregator,
+    async_remove_fleet_member,
+)
+
+_SENT = []
+fleet_mod.async_dispatcher_send = lambda _hass, signal, *args: _SENT.append(
+    (signal, args)
+)
+
+_TIMERS = []
+
+
+def _fake_call_later(_hass, delay, action):
+    _TIMERS.append(action)
+    return lambda: _TIMERS.remove(action)
+
+
+fleet_mod.async_call_later = _fake_call_later
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _client(vehicle_id):
+    return SimpleNamespace(config={"vehicle_id": vehicle_id}, fleet_member=None)
+
+
+def _feed(client, metric, value):
+    client.fleet_member.process_message(
+        f"ovms/user/{client.config['vehicle_id']}/metric/{metric.replace('.', '/')}",
+        value,
+    )
+
+
+def _sensors(entry_id):
+    """Return the fleet sensors announced on an entry's sensor platform."""
+    add_signal = get_add_entities_signal(entry_id, "sensor")
+    return {
+        data["diagnostic_sensor"]._key: data["diagnostic_sensor"]
+        for signal, args in _SENT
+        if signal == add_signal
+        for data in args[0]
+    }
+
+
+def _signalled(sensors):
+    """Return the keys of the fleet sensors signalled since the last clear."""
+    by_signal = {
+        f"{SIGNAL_UPDATE_ENTITY}_{sensor.unique_id}": key
+        for key, sensor in sensors.items()
+    }
+    return sorted(by_signal[signal] for signal, _ in _SENT if signal in by_signal)
+
+
+def main():
+    results = []
+    hass = SimpleNamespace(data={})
+    fleet = async_get_fleet_aggregator(hass)
+    clients = {name: _client(name) for name in ("leaf", "zoe", "ioniq")}
+    for name, client in clients.items():
+        fleet.async_add_member(f"entry_{name}", client)
+    sensors = _sensors("entry_leaf")
+    _check(
+        "sensors created once, on the first member's entry",
+        len(sensors) == 6
+        and not _sensors("entry_zoe")
+        and sensors["vehicles"].native_value == 3
+        and sensors["vehicles"].device_info["name"] == "OVMS Fleet"
+        and len(_TIMERS) == 1,
+        results,
+    )
+
+    leaf, zoe, ioniq = clients["leaf"], clients["zoe"], clients["ioniq"]
+    _feed(leaf, "v.c.pilot", "yes")
+    _feed(zoe, "v.c.pilot", "yes")
+    _SENT.clear()
+    _feed(leaf, "v.c.charging", "yes")
+    _feed(leaf, "v.c.charging", "yes")  # repeated: no change
+    _feed(leaf, "v.b.12v.voltage", "12.6")  # not aggregated
+    _check(
+        "vehicle sets follow each vehicle, signalling only changes",
+        sensors["plugged_in"].native_value == 2
+        and sensors["plugged_in"].extra_state_attributes["vehicles"] == ["leaf", "zoe"]
+        and sensors["charging"].native_value == 1
+        and _signalled(sensors) == ["charging"],
+        results,
+    )
+
+    _feed(leaf, "v.b.soc", "50")
+    _feed(zoe, "v.b.soc", "15")
+    _feed(ioniq, "v.b.soc", "85")
+    _feed(leaf, "v.b.soc", "60")  # not an extreme: no scan
+    scans_before = fleet.rescans
+    _feed(zoe, "v.b.soc", "40")  # min holder moves up: scan
+    attributes = sensors["average_soc"].extra_state_attributes
+    _check(
+        "SOC average and extremes maintained incrementally",
+        sensors["average_soc"].native_value == 61.7
+        and scans_before == 0
+        and fleet.rescans == 1
+        and attributes["min_soc_vehicle"] == "zoe"
+        and attributes["min_soc"] == 40
+        and attributes["max_soc_vehicle"] == "ioniq"
+        and sensors["low_soc"].native_value == 0,
+        results,
+    )
+
+    _feed(leaf, "v.c.kwh", "12.0")  # first reading: no increase yet
+    _feed(leaf, "v.c.kwh", "14.5")
+    _feed(leaf, "v.c.kwh", "0.5")  # counter reset at the next charge
+    _feed(zoe, "v.c.kwh", "3.0")
+    _feed(zoe, "v.c.kwh", "9.0")  # zoe is not charging
+    today = sensors["charged_today"].native_value
+    _TIMERS.pop()(None)  # fired timers are not cancelled again
+    _check(
+        "energy charged today sums charging vehicles, reset at midnight",
+        today == 3.0
+        and sensors["charged_today"].native_value == 0
+        and len(_TIMERS) == 1,
+        results,
+    )
+
+    _feed(zoe, "v.b.soc", "10")
+    _SENT.clear()
+    async_remove_fleet_member(hass, "entry_zoe")
+    attributes = sensors["average_soc"].extra_state_attributes
+    _check(
+        "removed vehicle leaves every aggregate",
+        sensors["vehicles"].native_value == 2
+        and sensors["plugged_in"].native_value == 1
+        and sensors["low_soc"].native_value == 0
+        and sensors["average_soc"].native_value == 72.5
+        and attributes["min_soc_vehicle"] == "leaf"
+        and "average_soc" in _signalled(sensors),
+        results,
+    )
+
+    _SENT.clear()
+    async_remove_fleet_member(hass, "entry_leaf")
+    moved = _sensors("entry_ioniq")
+    hosted = moved and moved["charging"].native_value == 0
+    async_remove_fleet_member(hass, "entry_ioniq")
+    _check(
+        "sensors move to another member; the last member drops the fleet",
+        hosted and len(moved) == 6 and FLEET_DATA_KEY not in hass.data and not _TIMERS,
+        results,
+    )
+
+    # Two config entries for the same vehicle ID
+    hass = SimpleNamespace(data={})
+    fleet = async_get_fleet_aggregator(hass)
+    twins = {entry_id: _client("leaf") for entry_id in ("entry_a", "entry_b")}
+    for entry_id, client in twins.items():
+        fleet.async_add_member(entry_id, client)
+        _feed(client, "v.c.charging", "yes")
+        _feed(client, "v.b.soc", "10")
+    sensors = _sensors("entry_a")
+    both = (
+        sensors["charging"].native_value == 2 and sensors["low_soc"].native_value == 2
+    )
+    async_remove_fleet_member(hass, "entry_a")
+    sensors = _sensors("entry_b")
+    _check(
+        "entries sharing a vehicle ID counted separately",
+        both
+        and sensors["charging"].native_value == 1
+        and sensors["low_soc"].native_value == 1
+        and sensors["charging"].extra_state_attributes["vehicles"] == ["leaf"]
+        and sensors["average_soc"].extra_state_attributes["min_soc_vehicle"] == "leaf",
+        results,
+    )
+    async_remove_fleet_member(hass, "entry_b")
+
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Regression test for the ovms.profile ingest profiler.
+
+HA's profiler captures the whole process, which buries the integration's
+own cost. IngestProfiler switches cProfile on only inside the sections the
+MQTT client marks (message handling and deferred entity updates). This test
+drives the REAL IngestProfiler and OVMSMQTTClient._on_message_received and
+asserts:
+
+  * while idle, measure() and wrapped functions profile nothing;
+  * a run ends after M messages, well before its duration, and writes the
+    .prof file and the text summary to the config directory;
+  * only measured code appears in the profile, nested sections included;
+  * a run without messages ends after its duration and still reports;
+  * a second concurrent run is refused.
+
+Run standalone:  python3 scripts/tests/test_ingest_profiler.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import pstats
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.ovms.mqtt import OVMSMQTTClient
+from custom_components.ovms.profiler import IngestProfiler, ProfilerBusyError
+
+CONFIG = {"vehicle_id": "leaf", "client_id": "ha_ovms_abc123"}
+
+
+class _FakeHass:
+    def __init__(self, config_dir):
+        self.config = SimpleNamespace(path=lambda name: os.path.join(config_dir, name))
+
+    async def async_add_executor_job(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def ovms_ingest_work(payload):
+    """Stands in for the integration's per-message work."""
+    return sum(int(part) for part in payload.split(","))
+
+
+def unrelated_work():
+    """Work of other integrations running between OVMS messages."""
+    return sorted(range(200), reverse=True)
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _client(profiler):
+    """Minimal client state _on_message_received works on."""
+    return SimpleNamespace(
+        message_count=0,
+        profiler=profiler,
+        _route_by_topic=lambda topic, payload: False,
+        _record_vehicle_message=lambda topic, payload: ovms_ingest_work(payload) > 0,
+    )
+
+
+async def _feed(client, count, stop=None):
+    for _ in range(count):
+        if stop is not None and stop.is_set():
+            return
+        await OVMSMQTTClient._on_message_received(client, "t", "1,2,3")
+        unrelated_work()
+        await asyncio.sleep(0)
+
+
+async def _run(results, config_dir):
+    hass = _FakeHass(config_dir)
+    profiler = IngestProfiler(hass, CONFIG)
+    client = _client(profiler)
+
+    wrapped = profiler.wrap(ovms_ingest_work)
+    with profiler.measure(message=True):
+        pass
+    _check(
+        "idle: nothing measured, wrapped functions pass through",
+        not profiler.active and wrapped("4,5") == 9,
+        results,
+    )
+
+    started = time.monotonic()
+    run = asyncio.create_task(profiler.async_profile(30, 50, 10))
+    await asyncio.sleep(0)
+    feeder = asyncio.create_task(_feed(client, 500))
+    try:
+        await profiler.async_profile(1)
+        refused = False
+    except ProfilerBusyError:
+        refused = True
+    result = await run
+    elapsed = time.monotonic() - started
+    feeder.cancel()
+    _check("concurrent run refused", refused, results)
+    _check(
+        f"run ended after 50 messages ({elapsed:.2f}s of 30s)",
+        result["messages"] == 50 and elapsed < 5 and not profiler.active,
+        results,
+    )
+
+    stats = pstats.Stats(result["profile_path"])
+    names = {func[2] for func in stats.stats}
+    _check(
+        "only measured sections profiled",
+        "ovms_ingest_work" in names and "unrelated_work" not in names,
+        results,
+    )
+    with open(result["summary_path"], encoding="utf-8") as summary_file:
+        written = summary_file.read()
+    _check(
+        "summary written and returned",
+        written == result["summary"]
+        and "50 messages" in written
+        and "ovms_ingest_work" in written
+        and result["top_functions"]
+        and len(result["top_functions"]) <= 10,
+        results,
+    )
+
+    # Deferred updates (load shedder flush) run as their own sections, and
+    # a wrapped call inside a message section nests without error
+    nested = asyncio.create_task(profiler.async_profile(0.2))
+    await asyncio.sleep(0)
+    with profiler.measure(message=True):
+        wrapped("1,1")
+    wrapped("2,2")
+    quiet = await nested
+    _check(
+        "nested and deferred sections measured once each",
+        quiet["sections"] == 2 and quiet["messages"] == 1,
+        results,
+    )
+
+    empty = await profiler.async_profile(0.1)
+    _check(
+        "run without messages ends after its duration and reports",
+        empty["messages"] == 0
+        and os.path.exists(empty["profile_path"])
+        and empty["top_functions"] == [],
+        results,
+    )
+
+
+def main():
+    results = []
+    with tempfile.TemporaryDirectory() as config_dir:
+        asyncio.run(_run(results, config_dir))
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Regression test for priority-aware load shedding.
+
+Every metric update was dispatched to its entities the moment it arrived,
+so an OVMS burst landing on an already lagging Home Assistant loop (recorder
+purge, slow integration, small host) made the lag worse, with per-cell and
+network chatter competing equally with position and SOC. The LoadShedder
+now measures loop lag and holds back updates by priority class. This test
+drives the REAL LoadShedder on a real event loop, blocking the loop to
+create lag (with shortened timing constants), and asserts:
+
+  * topics are classed from their metric definitions: location, SOC,
+    charging state and locks are critical; diagnostics, network, per-cell
+    and vehicle-specific metrics are low;
+  * without lag everything is dispatched at once;
+  * under lag low-priority updates are conflated to their latest value and
+    held, and under severe lag normal ones are too, while critical updates
+    still pass;
+  * held updates are released once the lag drops (or after the maximum
+    delay), and shed/deferred counts are reported.
+
+Run standalone:  python3 scripts/tests/test_load_shedding.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import sys
+import time
+import types
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import custom_components.ovms.mqtt.load_shedder as ls_mod
+
+from custom_components.ovms.const import (
+    LOAD_PRIORITY_CRITICAL,
+    LOAD_PRIORITY_LOW,
+    LOAD_PRIORITY_NORMAL,
+)
+from custom_components.ovms.mqtt.load_shedder import LoadShedder
+
+BASE = "ovms/user/leaf"
+INTERVAL = 0.02
+ls_mod.LOAD_LAG_PROBE_INTERVAL = INTERVAL
+ls_mod._LEVEL_THRESHOLDS = (0.05, 0.2)
+
+SOC = f"{BASE}/metric/v/b/soc"
+LATITUDE = f"{BASE}/metric/v/p/latitude"
+SIGNAL = f"{BASE}/metric/m/net/sq"
+CELL_TEMP = f"{BASE}/metric/v/b/c/temp"
+RANGE = f"{BASE}/metric/v/b/range/est"
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+async def _lag(seconds):
+    """Block the loop, then let the probe observe it."""
+    await asyncio.sleep(0)
+    time.sleep(seconds)
+    await asyncio.sleep(INTERVAL * 2)
+
+
+async def _recover(shedder):
+    for _ in range(200):
+        if shedder.level == 0 and not shedder.get_status()["held_topics"]:
+            return
+        await asyncio.sleep(INTERVAL)
+
+
+async def _run(results):
+    hass = types.SimpleNamespace(loop=asyncio.get_running_loop())
+    dispatched = []
+    shedder = LoadShedder(
+        hass, BASE, lambda topic, payload: dispatched.append((topic, payload))
+    )
+
+    expected = {
+        SOC: LOAD_PRIORITY_CRITICAL,
+        LATITUDE: LOAD_PRIORITY_CRITICAL,
+        f"{BASE}/metric/v/c/state": LOAD_PRIORITY_CRITICAL,
+        f"{BASE}/metric/v/e/locked": LOAD_PRIORITY_CRITICAL,
+        SIGNAL: LOAD_PRIORITY_LOW,
+        CELL_TEMP: LOAD_PRIORITY_LOW,
+        f"{BASE}/metric/xnl/v/b/soh": LOAD_PRIORITY_LOW,
+        RANGE: LOAD_PRIORITY_NORMAL,
+        f"{BASE}/status": LOAD_PRIORITY_NORMAL,
+    }
+    _check(
+        "priority classes from metric definitions",
+        {topic: shedder.get_priority(topic) for topic in expected} == expected,
+        results,
+    )
+
+    shedder.start()
+    await asyncio.sleep(INTERVAL * 3)
+    for topic in (SOC, SIGNAL, RANGE):
+        shedder.dispatch(topic, "1")
+    _check(
+        "no lag: everything dispatched",
+        shedder.level == 0 and len(dispatched) == 3,
+        results,
+    )
+
+    # Moderate lag: low-priority held and conflated
+    await _lag(0.1)
+    _check("moderate lag detected", shedder.level == 1, results)
+    dispatched.clear()
+    for value in ("10", "11", "12"):
+        shedder.dispatch(SIGNAL, value)
+        shedder.dispatch(CELL_TEMP, value)
+        shedder.dispatch(SOC, value)
+        shedder.dispatch(RANGE, value)
+    topics = [topic for topic, _ in dispatched]
+    _check(
+        "critical and normal pass, low held",
+        topics.count(SOC) == 3 and topics.count(RANGE) == 3 and SIGNAL not in topics,
+        results,
+    )
+    status = shedder.get_status()
+    _check(
+        "held updates conflated per topic",
+        status["held_topics"] == 2 and status["deferred"] == 6 and status["shed"] == 4,
+        results,
+    )
+
+    # Severe lag: normal held too, critical still passes
+    await _lag(0.3)
+    _check("severe lag detected", shedder.level == 2, results)
+    dispatched.clear()
+    shedder.dispatch(RANGE, "200")
+    shedder.dispatch(LATITUDE, "59.9")
+    _check(
+        "severe lag holds normal, not location",
+        dispatched == [(LATITUDE, "59.9")],
+        results,
+    )
+
+    # Recovery releases the latest values
+    dispatched.clear()
+    await _recover(shedder)
+    _check(
+        "latest held values released after recovery",
+        shedder.level == 0
+        and sorted(dispatched)
+        == sorted([(SIGNAL, "12"), (CELL_TEMP, "12"), (RANGE, "200")]),
+        results,
+    )
+
+    # A held value superseded by a live one is dropped
+    shedder.level = 1
+    shedder.dispatch(SIGNAL, "1")
+    shedder.level = 0
+    dispatched.clear()
+    shedder.dispatch(SIGNAL, "2")
+    await asyncio.sleep(INTERVAL * 2)
+    _check(
+        "live update supersedes the held one",
+        dispatched == [(SIGNAL, "2")] and not shedder.get_status()["held_topics"],
+        results,
+    )
+
+    # Maximum delay under sustained pressure
+    shedder.level = 2
+    shedder.dispatch(RANGE, "201")
+    dispatched.clear()
+    shedder._flush(hass.loop.time() + ls_mod.LOAD_SHED_MAX_DELAY)
+    _check(
+        "held update released after the maximum delay",
+        dispatched == [(RANGE, "201")],
+        results,
+    )
+
+    status = shedder.get_status()
+    _check(
+        "diagnostics report counts",
+        status["pressure_events"] >= 2
+        and status["max_lag_ms"] >= 200
+        and status["deferred_by_priority"][LOAD_PRIORITY_LOW] >= 6,
+        results,
+    )
+    shedder.stop()
+    _check("stop cancels the probe", shedder._probe_handle is None, results)
+
+
+def main():
+    results = []
+    asyncio.run(_run(results))
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Regression test for the ovms.memory_report memory accounting.
+
+memory_accounting estimates what each vehicle's client retains, by
+subsystem and by entity, and traces the package's allocations with
+tracemalloc. This test runs REAL OVMSMQTTClient instances and platform
+entities through the load generator, then asserts:
+
+  * every vehicle reports the named subsystems (topic cache, entity
+    registry, entity factory, attributes, pending commands, staleness
+    cache) and its totals add up;
+  * vector-heavy metrics (cell values) are the top entities, with the
+    vector attribute named as their largest;
+  * an object shared by several owners is counted once, and growth of a
+    subsystem (a pending command) shows up in it;
+  * the allocation trace only covers this package, stops tracemalloc
+    again, and refuses a second concurrent trace.
+
+Run standalone:  python3 scripts/tests/test_memory_accounting.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import sys
+import tracemalloc
+
+# Make the repo root and the load generator importable when run directly.
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts", "loadgen"))
+
+import ovms_loadgen
+
+from custom_components.ovms.memory_accounting import (
+    MemoryTraceBusyError,
+    async_trace_allocations,
+    estimate_size,
+    measure_vehicle,
+    measure_vehicles,
+)
+from custom_components.ovms.mqtt.entity_registry import EntityRegistry
+
+SUBSYSTEMS = (
+    "topic_cache",
+    "entity_registry",
+    "entity_factory.created_entities",
+    "entity_factory.queue",
+    "entity_attributes",
+    "pending_commands",
+    "staleness_cache",
+)
+
+
+class _FakeHass:
+    async def async_add_executor_job(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+async def _register_entities(registry, stop):
+    """Package code allocating while the trace runs."""
+    index = 0
+    while not stop.is_set():
+        registry.register_entity(f"ovms/x/metric/v/b/{index}", f"uid_{index}", "sensor")
+        index += 1
+        await asyncio.sleep(0)
+
+
+async def _trace(results):
+    registry = EntityRegistry()
+    stop = asyncio.Event()
+    worker = asyncio.create_task(_register_entities(registry, stop))
+    trace = asyncio.create_task(async_trace_allocations(_FakeHass(), 0.5, 5))
+    await asyncio.sleep(0.05)
+    # Allocated outside the package while tracing, and kept alive
+    foreign = [str(index) * 50 for index in range(5000)]
+    try:
+        await async_trace_allocations(_FakeHass(), 0.1, 5)
+        refused = False
+    except MemoryTraceBusyError:
+        refused = True
+    report = await trace
+    stop.set()
+    await worker
+
+    _check("second concurrent trace refused", refused, results)
+    _check(
+        "trace covers package allocations only",
+        report["window"] == 0.5
+        and report["total_bytes"] > 0
+        and foreign
+        and all(
+            row["location"].startswith("ovms")
+            for row in report["top_lines"] + report["top_files"]
+        )
+        and report["top_files"][0]["location"]
+        == os.path.join("ovms", "mqtt", "entity_registry.py"),
+        results,
+    )
+    _check(
+        "tracemalloc stopped after the window",
+        not tracemalloc.is_tracing(),
+        results,
+    )
+
+
+def main():
+    results = []
+    options = ovms_loadgen.build_parser().parse_args(
+        ["--vehicles", "2", "--warmup", "1.5", "--duration", "0.5", "--cells", "96"]
+    )
+    load = ovms_loadgen.LoadTest(options)
+    report = asyncio.run(load.async_run())
+
+    memory = measure_vehicles(load.clients, 3)
+    vehicles = memory["vehicles"]
+    clients = {client.config["vehicle_id"]: client for client in load.clients}
+    _check(
+        "every vehicle reports the named subsystems",
+        len(vehicles) == 2
+        and all(
+            set(SUBSYSTEMS) <= set(vehicle["subsystems"])
+            and vehicle["subsystems"]["topic_cache"] > 0
+            and vehicle["subsystems"]["entity_registry"] > 0
+            and vehicle["subsystems"]["entity_attributes"] > 0
+            and vehicle["total_bytes"] == sum(vehicle["subsystems"].values())
+            and vehicle["entity_count"]
+            == len(clients[vehicle["vehicle_id"]].update_dispatcher.entities)
+            for vehicle in vehicles
+        )
+        and memory["total_bytes"] == sum(vehicle["total_bytes"] for vehicle in vehicles)
+        and report["memory"]["per_vehicle_bytes"] > 0,
+        results,
+    )
+
+    top = memory["top_entities"][0]
+    _check(
+        "cell vectors are the top entities",
+        "/v/b/c/" in top["topic"]
+        and next(iter(top["largest_attributes"])).endswith("_values")
+        and top["bytes"] >= top["attribute_bytes"] > 0,
+        results,
+    )
+
+    shared = {"values": list(range(100))}
+    seen = set()
+    first = estimate_size([shared], seen)
+    _check(
+        "shared objects counted once",
+        first > sys.getsizeof(shared["values"]) and estimate_size([shared], seen) < 100,
+        results,
+    )
+
+    client = load.clients[0]
+    before = measure_vehicle(client)["subsystems"]["pending_commands"]
+    client.command_handler.pending_commands["abc"] = {"command": "stat" * 256}
+    after = measure_vehicle(client)["subsystems"]["pending_commands"]
+    _check("pending command growth reported", after - before >= 1024, results)
+
+    asyncio.run(_trace(results))
+
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Regression test for the shared metric descriptor.
+
+A metric was resolved from its definitions again and again: by
+TopicParser.parse_topic (twice, once more in _should_be_binary_sensor), by
+sensor/factory.determine_sensor_type, by the binary sensor and switch
+constructors and by AttributeManager.prepare_attributes. TopicParser now
+resolves one immutable MetricDescriptor per topic and the creation payload
+carries it to the factory and every platform. This test drives the REAL
+TopicParser, EntityFactory and platform entities and asserts:
+
+  * descriptors are immutable, slotted and shared per definition;
+  * discovering a topic and building its sensor, binary sensor, switch and
+    lock performs one definition lookup per topic;
+  * entity properties and attributes match the metric definitions for every
+    common metric, with or without a carried descriptor;
+  * prepare_attributes gives the same attributes for a descriptor and for
+    the raw definition.
+
+Run standalone:  python3 scripts/tests/test_metric_descriptor.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import sys
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import custom_components.ovms.metrics.descriptor as descriptor_mod
+
+from custom_components.ovms.attribute_manager import AttributeManager
+from custom_components.ovms.metrics import (
+    METRIC_DEFINITIONS,
+    UNKNOWN_METRIC,
+    get_metric_descriptor,
+    resolve_metric,
+)
+from custom_components.ovms.mqtt.entity_factory import EntityFactory
+from custom_components.ovms.mqtt.entity_registry import EntityRegistry
+from custom_components.ovms.mqtt.topic_parser import TopicParser
+from custom_components.ovms.naming_service import EntityNamingService
+from custom_components.ovms.sensor.binary_sensor import OVMSBinarySensor
+from custom_components.ovms.sensor.entities import OVMSSensor
+from custom_components.ovms.sensor.factory import determine_sensor_type
+from custom_components.ovms.sensor.lock import OVMSLock
+from custom_components.ovms.sensor.switch import OVMSSwitch
+
+PREFIX = "ovms/user/leaf"
+CONFIG = {
+    "vehicle_id": "leaf",
+    "mqtt_username": "user",
+    "topic_prefix": "ovms",
+    "client_id": "ha_ovms_abc123",
+    "config_entry_id": "entry1",
+}
+TOPICS = {
+    f"{PREFIX}/metric/v/b/soc": "81",
+    f"{PREFIX}/metric/v/e/locked": "yes",
+    f"{PREFIX}/metric/v/c/charging": "no",
+    f"{PREFIX}/metric/v/b/12v/voltage": "12.6",
+}
+
+LOOKUPS = []
+
+
+def _counting(func):
+    def _lookup(*args):
+        LOOKUPS.append(func.__name__)
+        return func(*args)
+
+    return _lookup
+
+
+descriptor_mod.get_metric_by_path = _counting(descriptor_mod.get_metric_by_path)
+descriptor_mod.get_metric_by_pattern = _counting(descriptor_mod.get_metric_by_pattern)
+
+
+class _FakeHass:
+    def __init__(self):
+        self.data = {}
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _build(data):
+    args = (
+        data["unique_id"],
+        data["name"],
+        data["topic"],
+        data["payload"],
+        data["device_info"],
+        data["attributes"],
+    )
+    metric = data.get("metric")
+    if data["entity_type"] == "sensor":
+        return OVMSSensor(*args, data["friendly_name"], None, "entry1", metric=metric)
+    if data["entity_type"] == "binary_sensor":
+        return OVMSBinarySensor(*args, None, data["friendly_name"], metric=metric)
+    if data["entity_type"] == "switch":
+        return OVMSSwitch(
+            *args,
+            command_function=None,
+            friendly_name=data["friendly_name"],
+            switch_config=data.get("switch_config"),
+            metric=metric,
+        )
+    return OVMSLock(
+        *args, None, None, data["friendly_name"], lock_config=data["lock_config"]
+    )
+
+
+async def _discover_and_build():
+    registry = EntityRegistry()
+    factory = EntityFactory(
+        _FakeHass(),
+        registry,
+        None,
+        CONFIG,
+        EntityNamingService(CONFIG),
+        AttributeManager(CONFIG),
+    )
+    parser = TopicParser(CONFIG, registry)
+    for topic, payload in TOPICS.items():
+        parsed = parser.parse_topic(topic, payload)
+        await factory.async_create_entities(topic, payload, parsed)
+        for related in parser.get_related_entities(parsed):
+            await factory.async_create_entities(topic, payload, related)
+    entities = []
+    while not factory.entity_queue.empty():
+        entities.append(_build(factory.entity_queue.get_nowait()))
+    return entities
+
+
+def main():
+    results = []
+
+    soc = METRIC_DEFINITIONS["v.b.soc"]
+    descriptor = get_metric_descriptor(soc)
+    try:
+        descriptor.icon = "mdi:other"
+        immutable = False
+    except AttributeError:
+        immutable = True
+    _check(
+        "descriptor immutable and slotted",
+        immutable and not hasattr(descriptor, "__dict__"),
+        results,
+    )
+    _check(
+        "one descriptor per definition",
+        resolve_metric("v.b.soc", ["metric", "v", "b", "soc"]) is descriptor
+        and get_metric_descriptor(descriptor) is descriptor
+        and get_metric_descriptor(None) is UNKNOWN_METRIC
+        and not UNKNOWN_METRIC,
+        results,
+    )
+
+    LOOKUPS.clear()
+    entities = asyncio.run(_discover_and_build())
+    types = sorted(type(entity).__name__ for entity in entities)
+    _check(
+        "sensor, binary sensor, switch and lock built",
+        {"OVMSSensor", "OVMSBinarySensor", "OVMSSwitch", "OVMSLock"} <= set(types),
+        results,
+    )
+    _check(
+        f"one lookup per topic ({len(LOOKUPS)} for {len(TOPICS)} topics,"
+        f" {len(entities)} entities)",
+        LOOKUPS.count("get_metric_by_path") == len(TOPICS)
+        and "get_metric_by_pattern" not in LOOKUPS,
+        results,
+    )
+    by_topic = {
+        (entity._topic, type(entity).__name__): entity
+        for entity in entities
+        if hasattr(entity, "_topic")
+    }
+    sensor = by_topic[(f"{PREFIX}/metric/v/b/soc", "OVMSSensor")]
+    binary = by_topic[(f"{PREFIX}/metric/v/c/charging", "OVMSBinarySensor")]
+    charging = METRIC_DEFINITIONS["v.c.charging"]
+    _check(
+        "platforms apply the carried definition",
+        sensor.native_unit_of_measurement == soc["unit"]
+        and sensor.device_class == soc["device_class"]
+        and binary.device_class == charging["device_class"]
+        and binary.icon == charging.get("icon"),
+        results,
+    )
+
+    # Every common metric: carried descriptor and topic lookup agree with
+    # the definition
+    mismatched = []
+    for path, definition in METRIC_DEFINITIONS.items():
+        topic = f"{PREFIX}/metric/{path.replace('.', '/')}"
+        name = f"ovms_leaf_{path.replace('.', '_')}"
+        carried = determine_sensor_type(
+            name, topic, {}, resolve_metric(path, ["metric"] + path.split("."))
+        )
+        looked_up = determine_sensor_type(name, topic, {})
+        if carried != looked_up or (
+            carried["icon"] is not None
+            and carried["native_unit_of_measurement"] != definition.get("unit")
+        ):
+            mismatched.append(path)
+    _check(
+        f"sensor types match definitions ({len(METRIC_DEFINITIONS)} metrics)",
+        not mismatched,
+        results,
+    )
+    if mismatched:
+        print("  mismatched:", mismatched[:5])
+
+    manager = AttributeManager(CONFIG)
+    parts = ["metric", "v", "b", "soc"]
+    _check(
+        "attributes equal for descriptor and definition",
+        manager.prepare_attributes("t", "battery", parts, descriptor)
+        == manager.prepare_attributes("t", "battery", parts, soc)
+        and "name" not in manager.prepare_attributes("t", "battery", parts, soc),
+        results,
+    )
+
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
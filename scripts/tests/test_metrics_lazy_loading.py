@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Regression test for on-demand loading of vehicle metric definitions.
+
+Importing ``custom_components.ovms.metrics`` used to import every vehicle
+module (VW e-Up, Smart ForTwo, Smart ED, MG ZS-EV, Leaf, Twizy) and then run
+one list comprehension per category over the merged table, all inside Home
+Assistant's import path. Vehicle modules are now loaded the first time their
+prefix is seen. This test asserts:
+
+  * importing the metrics package imports no vehicle module, and measures
+    how long the import takes (in a fresh interpreter);
+  * the static registry in ``metrics.vehicles`` matches each module's
+    METRIC_PREFIX / VEHICLE_TYPE / VEHICLE_NAME;
+  * ``get_metric_by_path`` never imports a vehicle module itself (that
+    would block the event loop): a vehicle path resolves once the vehicle
+    is loaded, and topic-based prefix detection stops then;
+  * after loading everything, METRIC_DEFINITIONS, METRIC_CATEGORIES and
+    BINARY_METRICS equal what the old eager comprehensions produced.
+
+Run standalone:  python3 scripts/tests/test_metrics_lazy_loading.py
+Exits non-zero on failure.
+"""
+
+import importlib
+import json
+import os
+import subprocess
+import sys
+
+# Make the repo root importable when run directly from scripts/tests/.
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, REPO_ROOT)
+
+# Generous ceiling for importing the integration package (which pulls in the
+# metrics package) once Home Assistant itself is already imported.
+IMPORT_BUDGET_SECONDS = 1.0
+
+_TIMING_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+import homeassistant.components.sensor, homeassistant.components.binary_sensor
+import homeassistant.helpers.dispatcher
+prefix = "custom_components.ovms.metrics.vehicles."
+start = time.perf_counter()
+import custom_components.ovms.metrics as metrics
+lazy = time.perf_counter() - start
+before = [name for name in sys.modules if name.startswith(prefix)]
+start = time.perf_counter()
+for vehicle_prefix in metrics.VEHICLE_MODULES:
+    metrics.load_vehicle_metrics(vehicle_prefix)
+vehicles = time.perf_counter() - start
+after = [name for name in sys.modules if name.startswith(prefix)]
+print(json.dumps({{"lazy": lazy, "vehicles": vehicles, "before": before,
+                  "after": after}}))
+"""
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _measure_import():
+    """Import the integration in a fresh interpreter and time it.
+
+    Importing ``custom_components.ovms.metrics`` runs the package __init__
+    first, so this is the integration's own import cost as HA sees it.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", _TIMING_SCRIPT.format(root=REPO_ROOT)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    results = []
+
+    timing = _measure_import()
+    print(
+        f"integration import: {timing['lazy'] * 1000:.1f} ms, "
+        f"loading all vehicles afterwards: {timing['vehicles'] * 1000:.1f} ms"
+    )
+    _check(
+        "import stays within budget", timing["lazy"] < IMPORT_BUDGET_SECONDS, results
+    )
+
+    _check("import loads no vehicle module", not timing["before"], results)
+    _check(
+        "every vehicle module loads on demand",
+        len(timing["after"]) == 6,
+        results,
+    )
+
+    import custom_components.ovms.metrics as metrics
+    from custom_components.ovms.metrics import vehicles
+
+    for prefix, (module_name, vehicle_type, name) in vehicles.VEHICLE_MODULES.items():
+        module = importlib.import_module(
+            f"custom_components.ovms.metrics.vehicles.{module_name}"
+        )
+        _check(
+            f"registry matches {module_name}",
+            module.METRIC_PREFIX == prefix
+            and module.VEHICLE_TYPE == vehicle_type
+            and module.VEHICLE_NAME == name,
+            results,
+        )
+
+    # Lazy resolution through get_metric_by_path
+    from custom_components.ovms.metrics.vehicles.nissan_leaf import (
+        NISSAN_LEAF_METRICS,
+    )
+
+    leaf_path = next(iter(NISSAN_LEAF_METRICS))
+    _check(
+        "leaf topic detected as pending",
+        metrics.get_pending_vehicle_prefix(topic="ovms/u/leaf/metric/xnl/v/b/soh")
+        == "xnl.",
+        results,
+    )
+    _check(
+        "vehicle path does not resolve before its load",
+        metrics.get_metric_by_path(leaf_path) is None
+        and metrics.get_pending_vehicle_prefix(leaf_path) == "xnl.",
+        results,
+    )
+    _check(
+        "vehicle path resolves after its load",
+        metrics.load_vehicle_metrics("xnl.")
+        and metrics.get_metric_by_path(leaf_path) is NISSAN_LEAF_METRICS[leaf_path],
+        results,
+    )
+    _check(
+        "leaf no longer pending",
+        metrics.get_pending_vehicle_prefix(topic="ovms/u/leaf/metric/xnl/v/b/soh")
+        is None,
+        results,
+    )
+    _check(
+        "second load is a no-op",
+        metrics.load_vehicle_metrics("xnl.") is False,
+        results,
+    )
+
+    # Load the rest and compare with the eager tables
+    for prefix in vehicles.VEHICLE_MODULES:
+        metrics.load_vehicle_metrics(prefix)
+
+    expected = {}
+    for table in (
+        metrics.BATTERY_METRICS,
+        metrics.CHARGING_METRICS,
+        metrics.CLIMATE_METRICS,
+        metrics.DOOR_METRICS,
+        metrics.LOCATION_METRICS,
+        metrics.MOTOR_METRICS,
+        metrics.TRIP_METRICS,
+        metrics.DEVICE_METRICS,
+        metrics.DIAGNOSTIC_METRICS,
+        metrics.POWER_METRICS,
+        metrics.NETWORK_METRICS,
+        metrics.SYSTEM_METRICS,
+        metrics.TIRE_METRICS,
+    ):
+        expected.update(table)
+    for prefix in vehicles.VEHICLE_MODULES:
+        expected.update(vehicles.import_vehicle_metrics(prefix))
+
+    _check(
+        "definitions equal eager merge",
+        metrics.METRIC_DEFINITIONS == expected,
+        results,
+    )
+    _check(
+        "categories equal eager comprehensions",
+        all(
+            sorted(paths)
+            == sorted(k for k, v in expected.items() if v.get("category") == category)
+            for category, paths in metrics.METRIC_CATEGORIES.items()
+        ),
+        results,
+    )
+    eager_binary = {
+        k
+        for k, v in expected.items()
+        if v.get("device_class") in metrics.BINARY_DEVICE_CLASSES
+        or k.endswith((".on", ".charging", ".alarm", ".alert", ".locked", ".hvac"))
+    }
+    _check(
+        "binary metrics equal eager comprehension",
+        metrics.BINARY_METRICS == eager_binary,
+        results,
+    )
+
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
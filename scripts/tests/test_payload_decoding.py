@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Regression test for decoding each payload once per message.
+
+Every entity of a topic (e.g. a sensor, a switch and a lock on the same
+metric) ran json.loads on the same payload, and the sensor parsers, the
+boolean parsers and StateParser each split comma-separated values again.
+The UpdateDispatcher now decodes the payload once into a DecodedPayload
+shared by the topic's entities. This test drives the REAL UpdateDispatcher,
+EntityRegistry, OVMSSensor, OVMSSwitch and OVMSLock and asserts:
+
+  * payloads decode to the expected kind and value (numeric, boolean,
+    vector, JSON object, list, text);
+  * one dispatch to a sensor, a switch and a lock on one topic runs
+    json.loads once, where updating each entity with the raw payload
+    runs it three times;
+  * their states match what each entity computes from the raw payload;
+  * StateParser, now built on the sensor parsers, still averages vectors
+    and passes cell data through unchanged.
+
+Run standalone:  python3 scripts/tests/test_payload_decoding.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from custom_components.ovms.attribute_manager import AttributeManager
+from custom_components.ovms.const import DOMAIN
+from custom_components.ovms.mqtt.entity_registry import EntityRegistry
+from custom_components.ovms.mqtt.state_parser import StateParser
+from custom_components.ovms.mqtt.update_dispatcher import UpdateDispatcher
+from custom_components.ovms.payload import (
+    NOT_JSON,
+    PAYLOAD_BOOLEAN,
+    PAYLOAD_JSON,
+    PAYLOAD_LIST,
+    PAYLOAD_NUMERIC,
+    PAYLOAD_TEXT,
+    PAYLOAD_VECTOR,
+    decode_payload,
+)
+from custom_components.ovms.sensor.entities import OVMSSensor
+from custom_components.ovms.sensor.lock import OVMSLock
+from custom_components.ovms.sensor.switch import OVMSSwitch
+
+ENTRY_ID = "entry1"
+CONFIG = {
+    "vehicle_id": "leaf",
+    "mqtt_username": "user",
+    "topic_prefix": "ovms",
+    "client_id": "ha_ovms_abc123",
+    "config_entry_id": ENTRY_ID,
+}
+TOPIC = "ovms/user/leaf/metric/v/e/locked"
+PAYLOADS = ("yes", "no", '{"state": true, "since": 5}', "0", "1")
+
+KINDS = (
+    ("80", PAYLOAD_NUMERIC, 80),
+    ("-3.25", PAYLOAD_NUMERIC, -3.25),
+    ("true", PAYLOAD_BOOLEAN, True),
+    ("3.9,3.91, 3.92", PAYLOAD_VECTOR, (3.9, 3.91, 3.92)),
+    ('{"value": 21.5}', PAYLOAD_JSON, {"value": 21.5}),
+    ("[1, 2]", PAYLOAD_LIST, [1, 2]),
+    ("charging", PAYLOAD_TEXT, "charging"),
+    ("a,b", PAYLOAD_TEXT, "a,b"),
+)
+
+DECODES = []
+_json_loads = json.loads
+
+
+def _counting_loads(*args, **kwargs):
+    DECODES.append(args[0])
+    return _json_loads(*args, **kwargs)
+
+
+class _Recording:
+    """Mixin recording state writes instead of writing to HA."""
+
+    writes = 0
+
+    async def async_get_last_state(self):
+        return None
+
+    def async_write_ha_state(self):
+        self.writes += 1
+
+
+class _Sensor(_Recording, OVMSSensor):
+    pass
+
+
+class _Switch(_Recording, OVMSSwitch):
+    pass
+
+
+class _Lock(_Recording, OVMSLock):
+    pass
+
+
+async def _command(*_args, **_kwargs):
+    return {"success": True}
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _entities():
+    device_info = {"identifiers": {(DOMAIN, "leaf")}}
+    return (
+        _Sensor("leaf_locked_sensor", "locked", TOPIC, "no", device_info, {}),
+        _Switch("leaf_locked_switch", "locked", TOPIC, "no", device_info, {}, _command),
+        _Lock("leaf_locked_lock", "locked", TOPIC, "no", device_info, {}, _command),
+    )
+
+
+def _states(sensor, switch, lock):
+    return (sensor.native_value, switch.is_on, lock.is_locked)
+
+
+async def _attach(hass, entities, entry_id):
+    """Add entities to a loaded entry whose dispatcher has them on TOPIC."""
+    registry = EntityRegistry()
+    dispatcher = UpdateDispatcher(hass, registry, AttributeManager(CONFIG), CONFIG)
+    hass.data[DOMAIN][entry_id] = {
+        "mqtt_client": SimpleNamespace(update_dispatcher=dispatcher)
+    }
+    platform = SimpleNamespace(config_entry=SimpleNamespace(entry_id=entry_id))
+    for entity, entity_type in zip(entities, ("sensor", "switch", "lock")):
+        registry.register_entity(TOPIC, entity.unique_id, entity_type)
+        entity.hass = hass
+        entity.platform = platform
+        await entity.async_added_to_hass()
+    return dispatcher
+
+
+async def _run(results):
+    hass = SimpleNamespace(data={DOMAIN: {}})
+    entities = _entities()
+    dispatcher = await _attach(hass, entities, ENTRY_ID)
+
+    # The same entities, each updated from the raw payload
+    separate = _entities()
+    callbacks = (await _attach(hass, separate, "entry2"))._entity_callbacks
+
+    json.loads = _counting_loads
+    try:
+        counts = []
+        matches = []
+        for payload in PAYLOADS:
+            DECODES.clear()
+            dispatcher.dispatch_update(TOPIC, payload)
+            shared = len(DECODES)
+            for entity in separate:
+                callbacks[entity.unique_id](payload)
+            counts.append((shared, len(DECODES) - shared))
+            matches.append(_states(*entities) == _states(*separate))
+    finally:
+        json.loads = _json_loads
+
+    _check(
+        "all three entities updated on each dispatch",
+        all(entity.writes == len(PAYLOADS) for entity in entities),
+        results,
+    )
+    # "yes" is not JSON-shaped and never reaches json.loads
+    _check(
+        "json.loads runs once per dispatch instead of once per entity",
+        counts == [(0, 0)] + [(1, 3)] * (len(PAYLOADS) - 1),
+        results,
+    )
+    _check("shared decode gives the per-entity states", all(matches), results)
+    _check(
+        "states follow the JSON payload",
+        _states(*entities)[1:] == (True, True),
+        results,
+    )
+
+
+def main():
+    results = []
+
+    decoded = [decode_payload(raw) for raw, _, _ in KINDS]
+    _check(
+        "payloads decode to their kind and value",
+        all(
+            payload.kind == kind and payload.value == value
+            for payload, (_, kind, value) in zip(decoded, KINDS)
+        )
+        and decode_payload(decoded[0]) is decoded[0]
+        and decoded[3].json is NOT_JSON,
+        results,
+    )
+
+    asyncio.run(_run(results))
+
+    _check(
+        "StateParser averages vectors and passes cell data through",
+        StateParser.parse_value("1.5,2.5,3.5", None, None, "metric/v/c/power") == 2.5
+        and StateParser.parse_value(
+            decode_payload("3.9,3.91"), None, None, "ovms/x/metric/v/b/c/voltage"
+        )
+        == "3.9,3.91",
+        results,
+    )
+
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Regression test for the staged, prioritized metric resync.
+
+Connect and reconnect used to publish a single ``*`` metric request, so the
+module dumped every metric at once and loaded its cellular link, the broker
+and the event loop together. ResyncPlanner now requests metrics in priority
+stages. This test drives the REAL ResyncPlanner against a simulated module
+(with shortened pacing constants) and asserts:
+
+  * stages are requested in the configured order, one request per pattern;
+  * the next stage waits while the previous one is still arriving, and
+    for a reply that is slow to start, but not past the reply grace
+    period when nothing answers;
+  * a stage whose known topics all arrived recently is skipped, while a
+    stage with stale or unknown topics is requested;
+  * only one resync runs at a time, and cancel/failed requests stop it;
+  * the options-flow text form round-trips, and patterns an earlier one
+    covers are dropped (the default stages are already disjoint).
+
+Run standalone:  python3 scripts/tests/test_resync_planner.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import sys
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import custom_components.ovms.mqtt.resync_planner as rp_mod
+
+from custom_components.ovms.const import DEFAULT_RESYNC_PRIORITY
+from custom_components.ovms.mqtt.resync_planner import ResyncPlanner
+from custom_components.ovms.utils import (
+    format_resync_priority,
+    parse_resync_priority,
+)
+
+PREFIX = "ovms/user/leaf"
+INTERVAL = 0.01
+rp_mod.RESYNC_PACE_INTERVAL = INTERVAL
+rp_mod.RESYNC_STAGE_TIMEOUT = 20 * INTERVAL
+rp_mod.RESYNC_QUIET_MESSAGES = 2
+rp_mod.RESYNC_REPLY_GRACE = 6 * INTERVAL
+
+
+class _Module:
+    """Answers metric requests with a burst spread over a few intervals."""
+
+    def __init__(self, topic_cache, bursts=4, connected=True, delay=0):
+        self.topic_cache = topic_cache
+        self.bursts = bursts
+        self.delay = delay
+        self.connected = connected
+        self.message_count = 0
+        self.requests = []
+        self._tasks = []
+
+    async def request(self, pattern):
+        if not self.connected:
+            return False
+        self.requests.append((pattern, asyncio.get_running_loop().time()))
+        self._tasks.append(asyncio.ensure_future(self._answer(pattern)))
+        return True
+
+    async def _answer(self, pattern):
+        path = pattern.rstrip("*").replace(".", "/")
+        await asyncio.sleep(self.delay)
+        for index in range(self.bursts):
+            self.message_count += 10
+            self.topic_cache[f"{PREFIX}/metric/{path}burst{index}"] = {
+                "payload": "1",
+                "timestamp": asyncio.get_running_loop().time(),
+            }
+            await asyncio.sleep(INTERVAL)
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _planner(module, stages):
+    return ResyncPlanner(
+        {"resync_priority": stages},
+        PREFIX,
+        module.topic_cache,
+        module.request,
+        lambda: module.message_count,
+    )
+
+
+async def _run(results):
+    now = asyncio.get_running_loop().time()
+
+    # Order and pacing
+    module = _Module({})
+    planner = _planner(module, [["v.p.*", "v.b.soc"], ["v.c.*"], ["m.*"]])
+    await planner.async_resync()
+    patterns = [pattern for pattern, _ in module.requests]
+    _check(
+        "patterns requested in stage order",
+        patterns == ["v.p.*", "v.b.soc", "v.c.*", "m.*"],
+        results,
+    )
+    first_done = module.requests[1][1]
+    second = module.requests[2][1]
+    _check(
+        "next stage waits for the burst to drain",
+        second - first_done >= (module.bursts - 1) * INTERVAL,
+        results,
+    )
+
+    silent = _Module({}, bursts=0)
+    planner = _planner(silent, [["v.p.*"], ["v.c.*"]])
+    await planner.async_resync()
+    gap = silent.requests[1][1] - silent.requests[0][1]
+    _check(
+        "no answer: next stage after the reply grace period",
+        rp_mod.RESYNC_REPLY_GRACE <= gap < rp_mod.RESYNC_STAGE_TIMEOUT,
+        results,
+    )
+
+    slow = _Module({}, delay=3 * INTERVAL)
+    planner = _planner(slow, [["v.p.*"], ["v.c.*"]])
+    await planner.async_resync()
+    gap = slow.requests[1][1] - slow.requests[0][1]
+    _check(
+        "slow reply: next stage waits for the burst, not the first sample",
+        gap >= slow.delay + (slow.bursts - 1) * INTERVAL,
+        results,
+    )
+
+    # Freshness
+    cache = {
+        f"{PREFIX}/metric/v/c/state": {"payload": "done", "timestamp": now},
+        f"{PREFIX}/metric/v/c/mode": {"payload": "std", "timestamp": now},
+        f"{PREFIX}/metric/v/b/soc": {"payload": "80", "timestamp": now - 3600},
+        f"{PREFIX}/metric/v/p/latitude": {"payload": "59.9", "timestamp": now},
+    }
+    module = _Module(cache, bursts=1)
+    planner = _planner(module, [["v.b.soc"], ["v.c.*"], ["x*"]])
+    await planner.async_resync()
+    patterns = [pattern for pattern, _ in module.requests]
+    _check("stale stage requested", "v.b.soc" in patterns, results)
+    _check("fresh stage skipped", "v.c.*" not in patterns, results)
+    _check("stage with unknown topics requested", "x*" in patterns, results)
+    _check(
+        "last run reported",
+        planner.last_run["skipped"] == ["v.c.*"] and planner.last_run["completed"],
+        results,
+    )
+
+    # One at a time, cancel and failure
+    module = _Module({})
+    planner = _planner(module, [["v.p.*"], ["v.c.*"], ["m.*"]])
+    running = asyncio.ensure_future(planner.async_resync())
+    await asyncio.sleep(0)
+    _check("second resync refused", not await planner.async_resync(), results)
+    planner.cancel()
+    await running
+    _check(
+        "cancel stops after the current stage",
+        [pattern for pattern, _ in module.requests] == ["v.p.*"]
+        and not planner.last_run["completed"],
+        results,
+    )
+
+    offline = _Module({}, connected=False)
+    planner = _planner(offline, [["v.p.*"], ["v.c.*"]])
+    _check("failed request aborts", not await planner.async_resync(), results)
+
+    # Options-flow text form
+    text = format_resync_priority(DEFAULT_RESYNC_PRIORITY)
+    _check(
+        "text form round-trips",
+        parse_resync_priority(text) == DEFAULT_RESYNC_PRIORITY,
+        results,
+    )
+    _check(
+        "blank entries dropped, empty falls back to default",
+        parse_resync_priority(" v.p.* , ;; m.*,") == [["v.p.*"], ["m.*"]]
+        and parse_resync_priority(" ; ") == DEFAULT_RESYNC_PRIORITY,
+        results,
+    )
+    _check(
+        "patterns covered by an earlier pattern dropped, wildcards kept",
+        parse_resync_priority("v.p.*,v.b.soc; v.*,v.p.latitude; v.c.*,v.b.soc,x*")
+        == [["v.p.*", "v.b.soc"], ["v.*"], ["x*"]]
+        and parse_resync_priority("v.b.soc; v.b.*") == [["v.b.soc"], ["v.b.*"]],
+        results,
+    )
+
+
+def main():
+    results = []
+    asyncio.run(_run(results))
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""Regression test for event-driven entity staleness tracking.
+
+The staleness manager used to wake every 30 minutes and walk the whole
+entity registry, reading every entity's state, so its cost grew with the
+number of entities whether anything changed or not. Staleness is now fed
+by the UpdateDispatcher and kept in a min-heap of expiry deadlines. This
+test drives the REAL EntityStalenessManager and UpdateDispatcher (with a
+fake clock, timer and entity registry) and asserts:
+
+  * every dispatched update marks its entity as seen, without growing the
+    heap;
+  * entities fed by their own signals (staleness sensor, last trip/charge,
+    derived, session energy, fleet) are never seeded;
+  * only entities that crossed the threshold while unavailable/unknown (or
+    orphaned) are hidden: a quiet entity with a valid state, like a static
+    VIN, is re-armed instead, and registry entities never seen start their
+    countdown when seeded;
+  * the diagnostic count follows the stale set, and an entity that updates
+    again is shown again - also after a restart, since stale entities are
+    hidden by INTEGRATION - unless the user had hidden it themselves;
+  * with delete enabled, expired entities are removed and forgotten.
+
+Run standalone:  python3 scripts/tests/test_staleness_tracking.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import sys
+import types
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from homeassistant.helpers.entity_registry import RegistryEntryHider
+from homeassistant.util import dt as dt_util
+
+import custom_components.ovms.entity_staleness_manager as sm_mod
+
+from custom_components.ovms.const import (
+    CHARGE_UNIQUE_ID_MARKER,
+    DERIVED_UNIQUE_ID_MARKER,
+    ENERGY_UNIQUE_ID_MARKER,
+    FLEET_UNIQUE_ID_MARKER,
+    TRIP_UNIQUE_ID_MARKER,
+)
+from custom_components.ovms.entity_staleness_manager import EntityStalenessManager
+from custom_components.ovms.mqtt.update_dispatcher import UpdateDispatcher
+
+HOUR = 3600
+CONFIG = {
+    "client_id": "ha_ovms_abc123",
+    "config_entry_id": "entry1",
+    "vehicle_id": "leaf",
+    "entity_staleness_management": 2,
+    "delete_stale_history": False,
+}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.timers = []
+
+    def time(self):
+        return self.now
+
+    def call_later(self, _hass, delay, action):
+        timer = [self.now + delay, action]
+        self.timers.append(timer)
+
+        def _cancel():
+            if timer in self.timers:
+                self.timers.remove(timer)
+
+        return _cancel
+
+    def advance(self, seconds):
+        """Move the clock, firing timers that come due on the way."""
+        target = self.now + seconds
+        while True:
+            due = [timer for timer in self.timers if timer[0] <= target]
+            if not due:
+                break
+            timer = min(due, key=lambda item: item[0])
+            self.timers.remove(timer)
+            self.now = max(self.now, timer[0])
+            timer[1](None)
+        self.now = target
+
+
+class _Registry:
+    """Entity registry holding sensor entries keyed by entity_id."""
+
+    def __init__(self):
+        self.entries = {}
+        self.hidden_updates = 0
+
+    def add(self, unique_id, hidden_by=None):
+        entity_id = f"sensor.{unique_id}"
+        self.entries[entity_id] = types.SimpleNamespace(
+            entity_id=entity_id,
+            unique_id=unique_id,
+            platform="ovms",
+            name=None,
+            hidden_by=hidden_by,
+        )
+
+    def async_get_entity_id(self, domain, _platform, unique_id):
+        entity_id = f"{domain}.{unique_id}"
+        return entity_id if entity_id in self.entries else None
+
+    def async_get(self, entity_id):
+        return self.entries.get(entity_id)
+
+    def async_update_entity(self, entity_id, hidden_by=None):
+        self.hidden_updates += 1
+        self.entries[entity_id].hidden_by = hidden_by
+
+    def async_remove(self, entity_id):
+        del self.entries[entity_id]
+
+
+class _EntityRegistry:
+    """Minimal topic -> unique_id map used by UpdateDispatcher."""
+
+    relationship_types = {}
+
+    def __init__(self, topics):
+        self.topics = topics
+
+    def get_entities_for_topic(self, topic):
+        return self.topics.get(topic, [])
+
+    def get_related_entities(self, _unique_id):
+        return []
+
+
+class _States:
+    """State machine: entity_id -> (state, last_changed timestamp)."""
+
+    def __init__(self):
+        self.states = {}
+
+    def set(self, entity_id, state, changed):
+        self.states[entity_id] = types.SimpleNamespace(
+            state=state, last_changed=dt_util.utc_from_timestamp(changed)
+        )
+
+    def get(self, entity_id):
+        return self.states.get(entity_id)
+
+
+class _FakeHass:
+    def __init__(self, loop):
+        self.data = {}
+        self.loop = loop
+        self.tasks = []
+        self.states = _States()
+
+    def verify_event_loop_thread(self, _what):
+        return None
+
+    def async_create_task(self, coro):
+        task = self.loop.create_task(coro)
+        self.tasks.append(task)
+        return task
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+async def _settle(hass):
+    while hass.tasks:
+        await hass.tasks.pop(0)
+
+
+async def _run(results):
+    clock = _Clock()
+    registry = _Registry()
+    sm_mod.time = clock
+    sm_mod.async_call_later = clock.call_later
+    sm_mod.er = types.SimpleNamespace(
+        async_get=lambda _hass: registry,
+        async_entries_for_config_entry=lambda reg, _entry: list(reg.entries.values()),
+    )
+
+    hass = _FakeHass(asyncio.get_running_loop())
+    for unique_id in ("soc", "range", "vin", "cell_temp", "old_metric", "user_hidden"):
+        registry.add(unique_id)
+    registry.entries["sensor.user_hidden"].hidden_by = RegistryEntryHider.USER
+    registry.add("ovms_staleness_status_entry1")
+    non_topic = [
+        f"ovms_entry1_ovms_leaf_{marker}_value"
+        for marker in (
+            TRIP_UNIQUE_ID_MARKER,
+            CHARGE_UNIQUE_ID_MARKER,
+            DERIVED_UNIQUE_ID_MARKER,
+            ENERGY_UNIQUE_ID_MARKER,
+        )
+    ] + [f"ovms_{FLEET_UNIQUE_ID_MARKER}_vehicles"]
+    for unique_id in non_topic:
+        registry.add(unique_id)
+    # old_metric has no state: an orphan whose topic is no longer subscribed
+    for unique_id in ("soc", "range", "vin"):
+        hass.states.set(f"sensor.{unique_id}", "1", clock.now)
+    for unique_id in ("cell_temp", "user_hidden"):
+        hass.states.set(f"sensor.{unique_id}", "unavailable", clock.now)
+
+    manager = EntityStalenessManager(hass, dict(CONFIG))
+    dispatcher = UpdateDispatcher(
+        hass,
+        _EntityRegistry(
+            {
+                "m/soc": ["soc"],
+                "m/range": ["range"],
+                "m/cell_temp": ["cell_temp"],
+                "m/user_hidden": ["user_hidden"],
+            }
+        ),
+        None,
+    )
+    dispatcher.add_update_listener(manager.async_mark_seen)
+
+    for topic in ("m/soc", "m/range", "m/cell_temp", "m/user_hidden"):
+        dispatcher.dispatch_update(topic, "1")
+    clock.advance(sm_mod.STALENESS_SEED_DELAY)
+    _check(
+        "registry seeding skips the diagnostic and signal-fed sensors",
+        manager.get_staleness_info()["tracked_entities"] == 6
+        and not set(non_topic) & set(manager._last_seen),
+        results,
+    )
+
+    # soc and range keep updating; cell_temp and user_hidden go quiet
+    heap_size = len(manager._deadlines)
+    for _ in range(3 * 60):
+        clock.advance(60)
+        dispatcher.dispatch_update("m/soc", "80")
+        dispatcher.dispatch_update("m/range", "200")
+        await _settle(hass)
+    _check(
+        "heap does not grow per update", len(manager._deadlines) <= heap_size, results
+    )
+
+    hidden = {
+        entity.unique_id
+        for entity in registry.entries.values()
+        if entity.hidden_by == RegistryEntryHider.INTEGRATION
+    }
+    _check(
+        "only quiet unavailable or orphaned entities hidden",
+        hidden == {"cell_temp", "old_metric"}
+        and set(manager._stale) == {"cell_temp", "old_metric", "user_hidden"},
+        results,
+    )
+    info = manager.get_staleness_info()
+    _check("diagnostic count follows the stale set", info["count"] == 3, results)
+    _check(
+        "stale entities listed",
+        "sensor.cell_temp" in info["pending_entities"]
+        and "sensor.soc" not in info["pending_entities"],
+        results,
+    )
+
+    updates = registry.hidden_updates
+    clock.advance(HOUR)
+    await _settle(hass)
+    _check(
+        "no registry writes without changes",
+        registry.hidden_updates == updates,
+        results,
+    )
+
+    # Revival
+    dispatcher.dispatch_update("m/cell_temp", "21")
+    dispatcher.dispatch_update("m/user_hidden", "1")
+    _check(
+        "revived entity shown again",
+        registry.entries["sensor.cell_temp"].hidden_by is None,
+        results,
+    )
+    _check(
+        "user-hidden entity left hidden",
+        registry.entries["sensor.user_hidden"].hidden_by == RegistryEntryHider.USER,
+        results,
+    )
+    _check(
+        "count drops on revival", manager.get_staleness_info()["count"] == 1, results
+    )
+
+    # Restart: a new manager knows nothing of what the old one hid
+    restarted = EntityStalenessManager(hass, dict(CONFIG))
+    restarted_dispatcher = UpdateDispatcher(
+        hass,
+        _EntityRegistry(
+            {"m/old_metric": ["old_metric"], "m/user_hidden": ["user_hidden"]}
+        ),
+        None,
+    )
+    restarted_dispatcher.add_update_listener(restarted.async_mark_seen)
+    restarted_dispatcher.dispatch_update("m/old_metric", "1")
+    restarted_dispatcher.dispatch_update("m/user_hidden", "1")
+    _check(
+        "entity hidden before a restart shown again, user-hidden kept",
+        registry.entries["sensor.old_metric"].hidden_by is None
+        and registry.entries["sensor.user_hidden"].hidden_by == RegistryEntryHider.USER,
+        results,
+    )
+    await restarted.async_shutdown()
+    registry.entries["sensor.old_metric"].hidden_by = RegistryEntryHider.INTEGRATION
+
+    # Delete mode
+    manager.update_config(dict(CONFIG, delete_stale_history=True))
+    clock.advance(3 * HOUR)
+    await _settle(hass)
+    _check(
+        "expired unavailable entities removed in delete mode, valid ones kept",
+        set(registry.entries)
+        == {
+            "sensor.ovms_staleness_status_entry1",
+            *(f"sensor.{unique_id}" for unique_id in non_topic),
+            "sensor.soc",
+            "sensor.range",
+            "sensor.vin",
+        },
+        results,
+    )
+    _check(
+        "removed entities forgotten",
+        manager.get_staleness_info()["count"] == 0
+        and set(manager._last_seen) == {"soc", "range", "vin"},
+        results,
+    )
+
+    manager.update_config(dict(CONFIG, entity_staleness_management=None))
+    dispatcher.dispatch_update("m/soc", "80")
+    _check("disabled manager ignores updates", not manager._last_seen, results)
+    await manager.async_shutdown()
+    _check("shutdown cancels timers", not clock.timers, results)
+
+
+def main():
+    results = []
+    asyncio.run(_run(results))
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
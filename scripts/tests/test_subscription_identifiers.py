@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Regression test for MQTT v5 subscription identifier routing.
+
+Every message used to be routed by inspecting its topic string (response
+detection, the per-client filter), and when the structure-prefix and
+username-agnostic subscriptions overlapped the broker could deliver the
+same publish twice, which was processed twice. Subscriptions are now tagged
+with MQTT v5 Subscription Identifiers and ``no_local``. This test drives the
+REAL MQTTConnectionManager and OVMSMQTTClient ingest path and asserts:
+
+  * on a v5 broker each identifier gets its own SUBSCRIBE packet with
+    ``no_local`` set, on both subscription bases;
+  * a broker that reports no identifier support gets today's plain
+    subscription;
+  * deliveries are routed by identifier, and a copy delivered only for the
+    username-agnostic base of a structure-prefix topic is dropped;
+  * the client consumes responses and vehicle data by route, and falls back
+    to string routing without identifiers.
+
+Run standalone:  python3 scripts/tests/test_subscription_identifiers.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import types
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import paho.mqtt.client as mqtt
+
+import custom_components.ovms.mqtt.discovery_snapshot as ds_mod
+
+from custom_components.ovms.const import (
+    SUBSCRIPTION_ID_ALT_BASE_OFFSET,
+    SUBSCRIPTION_ROUTE_METRIC,
+    SUBSCRIPTION_ROUTE_RESPONSE,
+    SUBSCRIPTION_ROUTE_STATUS,
+    SUBSCRIPTION_ROUTE_TREE,
+)
+from custom_components.ovms.mqtt import OVMSMQTTClient
+from custom_components.ovms.mqtt.connection import MQTTConnectionManager
+
+BASE = "ovms/user/leaf"
+ALT = SUBSCRIPTION_ID_ALT_BASE_OFFSET
+CONFIG = {
+    "vehicle_id": "leaf",
+    "mqtt_username": "user",
+    "topic_prefix": "ovms",
+    "topic_structure": "{prefix}/{mqtt_username}/{vehicle_id}",
+    "client_id": "ha_ovms_abc123",
+    "config_entry_id": "entry1",
+    "qos": 1,
+}
+
+
+class _FakeStore:
+    """In-memory stand-in for homeassistant.helpers.storage.Store."""
+
+    async def async_load(self):
+        return None
+
+    def async_delay_save(self, _data_func, _delay):
+        return None
+
+
+ds_mod.Store = lambda _hass, _version, _key: _FakeStore()
+
+
+class _FakeClient:
+    def __init__(self):
+        self.packets = []
+        self.published = []
+
+    def subscribe(self, topics, properties=None):
+        identifier = properties.SubscriptionIdentifier[0] if properties else None
+        self.packets.append((identifier, topics))
+
+    def unsubscribe(self, topics):
+        return None
+
+    def publish(self, *args, **kwargs):
+        self.published.append(args)
+
+
+class _FakeHass:
+    def __init__(self, loop):
+        self.data = {}
+        self.loop = loop
+        config_dir = tempfile.mkdtemp()
+        self.config = types.SimpleNamespace(
+            config_dir=config_dir,
+            path=lambda *parts: os.path.join(config_dir, *parts),
+        )
+
+    async def async_add_executor_job(self, func, *args):
+        return func(*args)
+
+
+class _FakePlanner:
+    filters = ["status", "metric/#", "client/rr/response/#"]
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _message(topic, *identifiers):
+    msg = mqtt.MQTTMessage(topic=topic.encode())
+    msg.payload = b"1"
+    if identifiers:
+        msg.properties = mqtt.Properties(mqtt.PacketTypes.PUBLISH)
+        for identifier in identifiers:
+            msg.properties.SubscriptionIdentifier = identifier
+    return msg
+
+
+def _connack(available=None):
+    properties = mqtt.Properties(mqtt.PacketTypes.CONNACK)
+    if available is not None:
+        properties.SubscriptionIdentifierAvailable = available
+    return properties
+
+
+async def _connect(manager, properties):
+    manager.client = _FakeClient()
+    manager.subscriptions = set()
+    manager._on_connect_callback(manager.client, None, {}, 0, properties)
+    # Let the resubscribe scheduled from the paho thread run
+    for _ in range(3):
+        await asyncio.sleep(0)
+    return manager.client.packets
+
+
+async def _run(results):
+    hass = _FakeHass(asyncio.get_running_loop())
+    delivered = []
+
+    async def _on_message(topic, payload, route):
+        delivered.append((topic, route))
+
+    manager = MQTTConnectionManager(hass, CONFIG, _on_message, None)
+    manager.protocol = mqtt.MQTTv5
+
+    packets = await _connect(manager, _connack())
+    _check(
+        "v5 broker: identifiers enabled", manager.subscription_ids_available, results
+    )
+    _check(
+        "whole tree tagged per base",
+        sorted(identifier for identifier, _ in packets)
+        == [SUBSCRIPTION_ROUTE_TREE, SUBSCRIPTION_ROUTE_TREE + ALT],
+        results,
+    )
+    _check(
+        "no_local on every filter",
+        all(
+            options.noLocal and options.QoS == 1
+            for _, topics in packets
+            for _, options in topics
+        ),
+        results,
+    )
+
+    manager.subscription_planner = _FakePlanner()
+    packets = await _connect(manager, _connack())
+    by_id = {
+        identifier: [topic for topic, _ in topics] for identifier, topics in packets
+    }
+    _check(
+        "planned filters grouped by route",
+        by_id
+        == {
+            SUBSCRIPTION_ROUTE_STATUS: [f"{BASE}/status"],
+            SUBSCRIPTION_ROUTE_METRIC: [f"{BASE}/metric/#"],
+            SUBSCRIPTION_ROUTE_RESPONSE: [f"{BASE}/client/rr/response/#"],
+            SUBSCRIPTION_ROUTE_STATUS + ALT: ["ovms/+/leaf/status"],
+            SUBSCRIPTION_ROUTE_METRIC + ALT: ["ovms/+/leaf/metric/#"],
+            SUBSCRIPTION_ROUTE_RESPONSE + ALT: ["ovms/+/leaf/client/rr/response/#"],
+        },
+        results,
+    )
+
+    packets = await _connect(manager, _connack(available=0))
+    _check(
+        "broker without identifiers: one plain subscribe",
+        not manager.subscription_ids_available
+        and len(packets) == 1
+        and packets[0][0] is None
+        and all(qos == 1 for _, qos in packets[0][1]),
+        results,
+    )
+
+    # Delivery routing in the paho thread
+    manager.subscription_ids_available = True
+    manager._setup_callbacks()
+    on_message = manager.client.on_message
+    on_message(None, None, _message(f"{BASE}/metric/v/b/soc", 2, 2 + ALT))
+    on_message(None, None, _message(f"{BASE}/metric/v/b/soc", 2))
+    on_message(None, None, _message(f"{BASE}/metric/v/b/soc", 2 + ALT))
+    on_message(None, None, _message("ovms/other/leaf/metric/v/b/soc", 2 + ALT))
+    on_message(None, None, _message(f"{BASE}/client/rr/response/ha", 4))
+    on_message(None, None, _message(f"{BASE}/metric/v/b/range", 1, 2))
+    on_message(None, None, _message(f"{BASE}/metric/v/b/soh"))
+    for _ in range(3):
+        await asyncio.sleep(0)
+    _check(
+        "routes resolved from identifiers",
+        delivered
+        == [
+            (f"{BASE}/metric/v/b/soc", SUBSCRIPTION_ROUTE_METRIC),
+            (f"{BASE}/metric/v/b/soc", SUBSCRIPTION_ROUTE_METRIC),
+            ("ovms/other/leaf/metric/v/b/soc", SUBSCRIPTION_ROUTE_METRIC),
+            (f"{BASE}/client/rr/response/ha", SUBSCRIPTION_ROUTE_RESPONSE),
+            (f"{BASE}/metric/v/b/range", SUBSCRIPTION_ROUTE_METRIC),
+            (f"{BASE}/metric/v/b/soh", None),
+        ],
+        results,
+    )
+    _check("overlap copy dropped", manager.duplicate_deliveries == 1, results)
+
+    # Client ingest path
+    client = OVMSMQTTClient(hass, CONFIG)
+    responses = []
+    client.command_handler.process_response = lambda topic, payload: responses.append(
+        topic
+    )
+    await client._on_message_received(
+        f"{BASE}/client/rr/response/ha_ovms_abc123", "ok", SUBSCRIPTION_ROUTE_RESPONSE
+    )
+    await client._on_message_received(f"{BASE}/client/rr/response/x", "ok", None)
+    _check("responses handled by route and by string", len(responses) == 2, results)
+
+    await client._on_message_received(f"{BASE}/client/other_app/active", "1", None)
+    await client._on_message_received(
+        f"{BASE}/client/other_app/active", "1", SUBSCRIPTION_ROUTE_TREE
+    )
+    _check("per-client topics still dropped by string", not client.topic_cache, results)
+
+    await client._on_message_received(
+        f"{BASE}/status", "online", SUBSCRIPTION_ROUTE_STATUS
+    )
+    await client._on_message_received(
+        f"{BASE}/metric/v/b/soc", "80", SUBSCRIPTION_ROUTE_METRIC
+    )
+    _check(
+        "routed vehicle data processed",
+        {f"{BASE}/status", f"{BASE}/metric/v/b/soc"} <= set(client.topic_cache),
+        results,
+    )
+    await client.command_handler.async_shutdown()
+    client.entity_factory.async_shutdown()
+
+
+def main():
+    results = []
+    asyncio.run(_run(results))
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
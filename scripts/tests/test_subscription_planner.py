@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Regression test for pushing the topic blacklist into broker subscriptions.
+
+The connection manager used to subscribe to ``{structure_prefix}/#`` (plus the
+username-agnostic ``{prefix}/+/{vehicle_id}/#``) forever, so every blacklisted
+topic - events, notifications, other clients' state - was still delivered,
+decoded and cached before TopicParser dropped it. The SubscriptionPlanner
+now turns the discovered tree plus the blacklist into narrower filters. This
+test drives the REAL planner and MQTTConnectionManager subscription logic and
+asserts:
+
+  * fully blacklisted subtrees (event/, notify/) and other clients' client/
+    subtrees are not subscribed; our command responses are;
+  * every known, wanted topic is still matched by a planned filter, on both
+    subscription bases;
+  * a blacklisted subtree appearing under a ``#`` filter requests a re-plan,
+    and the re-plan splits that filter without losing sibling topics;
+  * applying a plan only sends the subscribe/unsubscribe difference;
+  * subtrees the plan has never seen (a new root, a new vehicle namespace
+    under a split node) are picked up by widening to the whole tree and
+    planning again.
+
+Run standalone:  python3 scripts/tests/test_subscription_planner.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import sys
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from paho.mqtt.client import topic_matches_sub
+
+from custom_components.ovms.const import SYSTEM_TOPIC_BLACKLIST
+from custom_components.ovms.mqtt.connection import MQTTConnectionManager
+from custom_components.ovms.mqtt.subscription_planner import SubscriptionPlanner
+
+BASE = "ovms/user/leaf"
+CONFIG = {
+    "vehicle_id": "leaf",
+    "mqtt_username": "user",
+    "topic_prefix": "ovms",
+    "topic_structure": "{prefix}/{mqtt_username}/{vehicle_id}",
+    "client_id": "ha_ovms_abc123",
+    "qos": 1,
+}
+WANTED = [
+    "status",
+    "metric/v/b/soc",
+    "metric/v/b/12v/voltage",
+    "metric/v/p/latitude",
+    "metric/v/e/gear",  # blacklisted leaf: still delivered, dropped by parser
+    "metric/m/net/provider",
+    "metric/xnl/v/b/soh",
+    "metric/s/v3/connected",
+]
+UNWANTED = [
+    "event",  # OVMS publishes the event name as the payload of this leaf
+    "event/system/modem/netwait",
+    "event/vehicle/aux/12v/blip",
+    "notify/info/charge/stopped",
+    "notify/alert/battery/12v",
+    "client/other_app/active",
+]
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _matches(filters, topic):
+    return any(topic_matches_sub(sub, topic) for sub in filters)
+
+
+class _FakeClient:
+    def __init__(self):
+        self.subscribed = []
+        self.unsubscribed = []
+
+    def subscribe(self, topics):
+        self.subscribed.append([topic for topic, _qos in topics])
+
+    def unsubscribe(self, topics):
+        self.unsubscribed.append(list(topics))
+
+
+class _FakeHass:
+    async def async_add_executor_job(self, func, *args):
+        return func(*args)
+
+
+def main():
+    results = []
+    planner = SubscriptionPlanner(BASE, "leaf", SYSTEM_TOPIC_BLACKLIST)
+
+    for topic in WANTED + UNWANTED:
+        planner.add_topic(f"{BASE}/{topic}")
+    # Same vehicle published under another username
+    planner.add_topic("ovms/otheruser/leaf/metric/v/b/range/est")
+
+    filters = planner.plan()
+    print(f"plan: {filters}")
+    _check(
+        "response subtree subscribed",
+        "client/rr/response/#" in filters,
+        results,
+    )
+    _check(
+        "all wanted topics still matched",
+        all(_matches(filters, topic) for topic in WANTED + ["metric/v/b/range/est"]),
+        results,
+    )
+    _check(
+        "blacklisted subtrees and other clients not matched",
+        not any(_matches(filters, topic) for topic in UNWANTED),
+        results,
+    )
+    _check("clean metric tree collapses to one filter", "metric/#" in filters, results)
+
+    # A blacklisted subtree appears below metric/#
+    replan = planner.add_topic(f"{BASE}/metric/xnl/log/can/frame")
+    _check("new blacklisted subtree requests re-plan", replan, results)
+    _check(
+        "ordinary new topic does not",
+        not planner.add_topic(f"{BASE}/metric/v/b/temp"),
+        results,
+    )
+    filters = planner.plan()
+    print(f"re-plan: {filters}")
+    _check(
+        "re-plan drops the new subtree",
+        not _matches(filters, "metric/xnl/log/can/frame"),
+        results,
+    )
+    _check(
+        "re-plan keeps siblings and future leaves",
+        all(_matches(filters, topic) for topic in WANTED)
+        and _matches(filters, "metric/xnl/v/b/new_metric")
+        and _matches(filters, "metric/v/b/temp"),
+        results,
+    )
+
+    # Connection manager: full tree first, then only the difference
+    manager = MQTTConnectionManager(
+        _FakeHass(), CONFIG, None, None, subscription_planner=None
+    )
+    manager.client = _FakeClient()
+    manager.connected = True
+    asyncio.run(manager.async_subscribe_topics())
+    _check(
+        "without a plan the whole vehicle tree is subscribed",
+        manager.client.subscribed == [[f"{BASE}/#", "ovms/+/leaf/#"]],
+        results,
+    )
+
+    manager.subscription_planner = planner
+    asyncio.run(manager.async_subscribe_topics(resubscribe=False))
+    _check(
+        "plan is anchored on both bases",
+        set(manager.client.subscribed[-1])
+        == {f"{base}/{f}" for base in (BASE, "ovms/+/leaf") for f in filters},
+        results,
+    )
+    _check(
+        "broad filters unsubscribed",
+        set(manager.client.unsubscribed[-1]) == {f"{BASE}/#", "ovms/+/leaf/#"},
+        results,
+    )
+
+    calls = len(manager.client.subscribed)
+    asyncio.run(manager.async_subscribe_topics(resubscribe=False))
+    _check(
+        "unchanged plan sends nothing",
+        len(manager.client.subscribed) == calls,
+        results,
+    )
+
+    # Subtrees that appear after planning
+    unseen = ["metric/xvu/v/b/soh", "config/vehicle/type"]
+    _check(
+        "unseen subtrees not covered by the plan",
+        not any(_matches(filters, topic) for topic in unseen),
+        results,
+    )
+    _check(
+        "widening drops the plan", planner.widen() and planner.filters is None, results
+    )
+    _check("widening twice is a no-op", not planner.widen(), results)
+    asyncio.run(manager.async_subscribe_topics(resubscribe=False))
+    _check(
+        "widened: whole vehicle tree subscribed again",
+        manager.client.subscribed[-1] == [f"{BASE}/#", "ovms/+/leaf/#"],
+        results,
+    )
+    for topic in unseen:
+        planner.add_topic(f"{BASE}/{topic}")
+    filters = planner.plan()
+    _check(
+        "re-plan after widening covers the new subtrees",
+        all(_matches(filters, topic) for topic in unseen + WANTED)
+        and not any(_matches(filters, topic) for topic in UNWANTED),
+        results,
+    )
+
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
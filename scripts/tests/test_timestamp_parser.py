@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Regression test for the per-topic timestamp parser.
+
+Timestamp sensors were parsed with dt_util.parse_datetime, then an inline
+(uncompiled) regex and strptime, and anything else, including the epoch
+seconds OVMS publishes for m.time.utc and v.p.gpstime, became
+dt_util.now(), a new state on every message. This test drives the REAL
+TimestampParser and parse_value and asserts:
+
+  * ISO, OVMS "YYYY-MM-DD HH:MM:SS TZ" and epoch payloads decode to the
+    same datetimes as before (ISO, OVMS) or to the actual time (epoch), and
+    ISO without an offset to local time rather than a naive datetime;
+  * the format is learned per topic and tried first from then on, and a
+    topic whose format changes is re-learned;
+  * identical payloads are served from the cache without decoding again;
+  * unparseable payloads and small relative numbers give None, never now;
+  * unloading a vehicle drops the formats learned for its topics only.
+
+Run standalone:  python3 scripts/tests/test_timestamp_parser.py
+Exits non-zero on failure.
+"""
+
+import os
+import sys
+from datetime import datetime, timezone
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.util import dt as dt_util
+
+import custom_components.ovms.sensor.timestamp_parser as ts_mod
+
+from custom_components.ovms.sensor.parsers import parse_value
+from custom_components.ovms.sensor.timestamp_parser import (
+    FORMAT_EPOCH,
+    FORMAT_ISO,
+    FORMAT_OVMS,
+    TIMESTAMP_PARSER,
+    TimestampParser,
+    forget_timestamp_topics,
+)
+
+TOPIC = "ovms/user/car/metric/m/time/utc"
+
+CALLS = []
+
+
+def _counting(fmt, decoder):
+    def _decoder(value):
+        CALLS.append(fmt)
+        return decoder(value)
+
+    return _decoder
+
+
+ts_mod._DECODERS = {
+    fmt: _counting(fmt, decoder) for fmt, decoder in ts_mod._DECODERS.items()
+}
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def main():
+    results = []
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Europe/Oslo"))
+    parser = TimestampParser()
+
+    ovms = parser.parse("2025-03-25 17:42:57 CET", "a")
+    _check(
+        "OVMS format decoded as local time, like before",
+        ovms == dt_util.as_local(datetime(2025, 3, 25, 17, 42, 57))
+        and ovms.tzinfo is not None
+        and parser.learned_format("a") == FORMAT_OVMS,
+        results,
+    )
+    iso = parser.parse("2025-03-25T16:42:57+00:00", "b")
+    _check(
+        "ISO decoded by dt_util like before",
+        iso == dt_util.parse_datetime("2025-03-25T16:42:57+00:00")
+        and parser.learned_format("b") == FORMAT_ISO,
+        results,
+    )
+    naive = parser.parse("2025-03-25 17:42:57", "c")
+    _check(
+        "ISO without an offset decoded as local time, never naive",
+        naive == dt_util.as_local(datetime(2025, 3, 25, 17, 42, 57))
+        and naive.tzinfo is not None
+        and parser.learned_format("c") == FORMAT_ISO,
+        results,
+    )
+    epoch = parser.parse("1700000000", TOPIC)
+    _check(
+        "epoch seconds decoded to the actual time",
+        epoch == datetime(2023, 11, 14, 22, 13, 20, tzinfo=timezone.utc)
+        and parser.learned_format(TOPIC) == FORMAT_EPOCH,
+        results,
+    )
+
+    CALLS.clear()
+    parser.parse("1700000060", TOPIC)
+    _check("learned format tried first", CALLS == [FORMAT_EPOCH], results)
+
+    CALLS.clear()
+    first = parser.parse("1700000060", TOPIC)
+    second = parser.parse("1700000060", TOPIC)
+    _check(
+        "identical payloads served from the cache",
+        not CALLS and first is second,
+        results,
+    )
+
+    parser.parse("2025-03-25 17:42:57 CET", TOPIC)
+    _check(
+        "changed format re-learned",
+        parser.learned_format(TOPIC) == FORMAT_OVMS,
+        results,
+    )
+
+    _check(
+        "garbage and relative seconds are not timestamps",
+        parser.parse("not a time", TOPIC) is None
+        and parser.parse("3600", "ovms/user/car/metric/v/c/timerstart") is None
+        and parser.parse("2025-13-45 99:00:00 CET", TOPIC) is None
+        and parser.parse("", TOPIC) is None,
+        results,
+    )
+    _check(
+        "parse_value gives None instead of now for bad timestamps",
+        parse_value("garbage", SensorDeviceClass.TIMESTAMP, topic=TOPIC) is None
+        and parse_value("1700000000", SensorDeviceClass.TIMESTAMP, topic=TOPIC)
+        == epoch,
+        results,
+    )
+
+    other = "ovms/user/car2/metric/m/time/utc"
+    parser.parse("1700000000", other)
+    parser.forget_topics("ovms/user/car")
+    TIMESTAMP_PARSER.parse("1700000000", TOPIC)
+    forget_timestamp_topics("ovms/user/car/")
+    _check(
+        "unloaded vehicle's topics forgotten, other vehicles' kept",
+        parser.learned_format(TOPIC) is None
+        and parser.learned_format(other) == FORMAT_EPOCH
+        and parser.learned_format("a") == FORMAT_OVMS
+        and TIMESTAMP_PARSER.learned_format(TOPIC) is None,
+        results,
+    )
+
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
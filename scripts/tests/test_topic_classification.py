@@ -23,8 +23,12 @@ import sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
+from custom_components.ovms.metrics import load_vehicle_metrics
 from custom_components.ovms.mqtt.topic_parser import TopicParser
 
+# The MQTT client loads a vehicle's definitions before its first topic
+load_vehicle_metrics("xse.")
+
 _CONFIG = {
     "vehicle_id": "veh",
     "topic_prefix": "ovms",
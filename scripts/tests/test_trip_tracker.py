@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Regression test for the streaming trip segmentation engine.
+
+TripTracker cuts the live metric stream into trips on v.e.on transitions and
+summarises each one from the running counters OVMS publishes (odometer, trip
+energy used/recovered, SOC, speed) plus the coalesced GPS fixes handed over
+by the UpdateDispatcher. This test drives the REAL TripTracker through two
+simulated drives and asserts:
+
+  * distance comes from the odometer, with a GPS haversine fallback;
+  * energy is used minus recovered, including the counter reset OVMS does
+    at ignition;
+  * short ignition cycles are discarded;
+  * the last-trip sensors only use state classes HA allows for their device
+    class, and the trip energy has none;
+  * completed trips are appended to the JSONL log and the query path returns
+    them newest first, honouring the limit;
+  * appends still running in the executor are written in order, and waited
+    for on query and on shutdown.
+
+Run standalone:  python3 scripts/tests/test_trip_tracker.py
+Exits non-zero on failure.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from homeassistant.components.sensor import DEVICE_CLASS_STATE_CLASSES
+
+import custom_components.ovms.trip_tracker as tt_mod
+
+from custom_components.ovms.trip_tracker import TripTracker, haversine_km
+
+PREFIX = "ovms/user/leaf/metric"
+CONFIG = {
+    "vehicle_id": "leaf",
+    "client_id": "ha_ovms_abc123",
+    "config_entry_id": "entry1",
+}
+
+_SENT = []
+tt_mod.async_dispatcher_send = lambda _hass, signal, *args: _SENT.append(args)
+
+
+class _FakeConfig:
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+
+class _FakeHass:
+    def __init__(self, root):
+        self.data = {}
+        self.config = _FakeConfig(root)
+
+    def async_add_executor_job(self, func, *args):
+        # A slow executor job, so appends are still pending after the close
+        def _slow_job():
+            time.sleep(0.05)
+            return func(*args)
+
+        return asyncio.get_running_loop().run_in_executor(None, _slow_job)
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _feed(tracker, metric, value):
+    tracker.process_message(f"{PREFIX}/{metric.replace('.', '/')}", value)
+
+
+async def _run(results):
+    with tempfile.TemporaryDirectory() as root:
+        tracker = TripTracker(_FakeHass(root), CONFIG)
+        await tracker.async_setup()
+        tracker.async_create_sensors()
+        _check("no trip loaded from empty log", tracker.last_trip is None, results)
+        _check(
+            "five last-trip sensors announced in one batch",
+            len(_SENT) == 1 and len(_SENT[0][0]) == 5,
+            results,
+        )
+        sensors = [data["diagnostic_sensor"] for data in _SENT[0][0]]
+        _check(
+            "state classes valid for their device classes, none for energy",
+            all(
+                sensor.state_class is None
+                or sensor.state_class in DEVICE_CLASS_STATE_CLASSES[sensor.device_class]
+                for sensor in sensors
+            )
+            and [s.state_class for s in sensors if s._key == "energy_kwh"] == [None],
+            results,
+        )
+
+        # Trip 1: odometer-based, energy counters reset at ignition
+        _feed(tracker, "v.p.odometer", "1000.0")
+        _feed(tracker, "v.b.energy.used", "5.0")
+        _feed(tracker, "v.b.energy.recd", "1.0")
+        _feed(tracker, "v.b.soc", "80")
+        tracker.process_location(59.0, 10.0)
+        _feed(tracker, "v.e.on", "yes")
+        _check("trip opened on ignition", tracker.current_trip is not None, results)
+        _feed(tracker, "v.b.energy.used", "0.5")  # firmware counter reset
+        _feed(tracker, "v.p.speed", "45")
+        _feed(tracker, "v.p.speed", "92.5")
+        _feed(tracker, "v.p.speed", "30")
+        tracker.process_location(59.1, 10.1)
+        _feed(tracker, "v.p.odometer", "1020.0")
+        _feed(tracker, "v.b.energy.used", "3.5")
+        _feed(tracker, "v.b.energy.recd", "1.5")
+        _feed(tracker, "v.b.soc", "72")
+        _feed(tracker, "v.e.on", "no")
+        await asyncio.sleep(0)
+
+        trip = tracker.last_trip or {}
+        _check("trip closed on ignition off", tracker.current_trip is None, results)
+        _check("odometer distance", trip.get("distance_km") == 20.0, results)
+        _check("distance source", trip.get("distance_source") == "odometer", results)
+        _check(
+            "energy = used (after reset) - recovered",
+            trip.get("energy_kwh") == 3.0,
+            results,
+        )
+        _check("Wh/km", trip.get("wh_per_km") == 150.0, results)
+        _check("max speed", trip.get("max_speed") == 92.5, results)
+        _check(
+            "start/end place",
+            trip.get("start_latitude") == 59.0 and trip.get("end_latitude") == 59.1,
+            results,
+        )
+        _check(
+            "soc start/end",
+            trip.get("soc_start") == 80 and trip.get("soc_end") == 72,
+            results,
+        )
+
+        # Short ignition cycle is discarded
+        _feed(tracker, "v.e.on", "1")
+        _feed(tracker, "v.p.odometer", "1020.05")
+        _feed(tracker, "v.e.on", "0")
+        _check("short cycle discarded", tracker.trip_count == 1, results)
+
+        # Trip 2: vehicle without odometer updates -> GPS fallback
+        tracker.odometer = None
+        _feed(tracker, "v.e.on", "true")
+        tracker.process_location(59.2, 10.2)
+        tracker.process_location(59.3, 10.2)
+        _feed(tracker, "v.e.on", "false")
+        await asyncio.sleep(0)
+
+        expected = haversine_km(59.1, 10.1, 59.2, 10.2) + haversine_km(
+            59.2, 10.2, 59.3, 10.2
+        )
+        trip = tracker.last_trip or {}
+        _check("GPS fallback source", trip.get("distance_source") == "gps", results)
+        _check(
+            "GPS fallback distance",
+            abs(trip.get("distance_km", 0) - round(expected, 2)) < 1e-9,
+            results,
+        )
+
+        # Persistence and query
+        trips = await tracker.async_query_trips(10)
+        _check("two trips persisted", len(trips) == 2, results)
+        _check(
+            "newest first",
+            trips and trips[0]["distance_source"] == "gps",
+            results,
+        )
+        _check("limit honoured", len(await tracker.async_query_trips(1)) == 1, results)
+
+        reloaded = TripTracker(_FakeHass(root), CONFIG)
+        await reloaded.async_setup()
+        _check(
+            "last trip reloaded from log",
+            reloaded.last_trip == tracker.last_trip,
+            results,
+        )
+
+        # Unrelated topics never reach a handler
+        tracker.process_message(f"{PREFIX}/v/b/12v/voltage", "12.6")
+        tracker.process_message("ovms/user/leaf/client/rr/response/1", "ok")
+        _check(
+            "irrelevant topics cached as no-op",
+            tracker._topic_handlers[f"{PREFIX}/v/b/12v/voltage"] is None,
+            results,
+        )
+
+        # Trip 3 closes right before unload: shutdown waits for its append
+        _feed(tracker, "v.p.odometer", "1030.0")
+        _feed(tracker, "v.e.on", "yes")
+        _feed(tracker, "v.p.odometer", "1040.0")
+        _feed(tracker, "v.e.on", "no")
+        await tracker.async_shutdown()
+        with open(tracker.log_path, encoding="utf-8") as log_file:
+            lines = log_file.read().splitlines()
+        _check(
+            "pending append written before shutdown returns",
+            len(lines) == 3 and '"distance_km":10.0' in lines[-1],
+            results,
+        )
+
+
+def main():
+    results = []
+    asyncio.run(_run(results))
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
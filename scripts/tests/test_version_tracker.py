@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Regression test for firmware version tracking.
+
+Every republish of a version metric looked the OVMS device up in the device
+registry (twice with the legacy-identifier fallback) and called
+async_update_device(sw_version=...), a registry write and save each time,
+even when the version had not changed. This test drives the REAL
+UpdateDispatcher and VersionTracker against a recording device registry and
+asserts:
+
+  * the module version is written once and republishing it writes nothing;
+  * a new version is written, and a version already in the registry (after
+    a restart) is not written again;
+  * the legacy vehicle_id identifier is still found;
+  * vehicle-specific versions (xvu, xrt, ...) never touch the device and
+    are recorded as attributes, changing only on a new value.
+
+Run standalone:  python3 scripts/tests/test_version_tracker.py
+Exits non-zero on failure.
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+# Make the repo root importable when run directly from scripts/tests/.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import custom_components.ovms.mqtt.update_dispatcher as ud_mod
+import custom_components.ovms.mqtt.version_tracker as vt_mod
+
+from custom_components.ovms.attribute_manager import AttributeManager
+from custom_components.ovms.const import DOMAIN
+from custom_components.ovms.mqtt.entity_registry import EntityRegistry
+from custom_components.ovms.mqtt.update_dispatcher import UpdateDispatcher
+from custom_components.ovms.utils import get_ovms_device_identifier
+
+CONFIG = {
+    "vehicle_id": "leaf",
+    "client_id": "ha_ovms_abc123",
+    "config_entry_id": "entry1",
+}
+PREFIX = "ovms/user/leaf/metric"
+MODULE_TOPIC = f"{PREFIX}/m/version"
+VEHICLE_TOPICS = (f"{PREFIX}/xvu/m/version", f"{PREFIX}/xrt/m/version")
+
+
+class _DeviceRegistry:
+    """Device registry recording lookups and writes."""
+
+    def __init__(self, identifier, sw_version=None):
+        self.device = SimpleNamespace(
+            id="device1", identifiers={(DOMAIN, identifier)}, sw_version=sw_version
+        )
+        self.lookups = 0
+        self.writes = []
+
+    def async_get(self, device_id):
+        self.lookups += 1
+        return self.device if device_id == self.device.id else None
+
+    def async_get_device(self, identifiers):
+        self.lookups += 1
+        return self.device if identifiers <= self.device.identifiers else None
+
+    def async_update_device(self, device_id, sw_version):
+        self.writes.append(sw_version)
+        self.device.sw_version = sw_version
+
+
+class _FakeHass:
+    def __init__(self):
+        self.data = {}
+
+
+def _check(name, cond, results):
+    results.append((name, bool(cond)))
+    print(f"{'PASS' if cond else 'FAIL'}: {name}")
+
+
+def _dispatcher(device_registry):
+    vt_mod.dr = SimpleNamespace(async_get=lambda _hass: device_registry)
+    registry = EntityRegistry()
+    for index, topic in enumerate((MODULE_TOPIC,) + VEHICLE_TOPICS):
+        registry.register_entity(topic, f"version_{index}", "sensor")
+    return UpdateDispatcher(_FakeHass(), registry, AttributeManager(CONFIG), CONFIG)
+
+
+def main():
+    results = []
+    ud_mod.async_dispatcher_send = lambda *_args: None
+    identifier = get_ovms_device_identifier(CONFIG["client_id"], CONFIG["vehicle_id"])
+
+    devices = _DeviceRegistry(identifier)
+    dispatcher = _dispatcher(devices)
+    for _ in range(50):
+        dispatcher.dispatch_update(MODULE_TOPIC, "3.3.004-32-g125e0841/ota_0/main")
+    _check(
+        f"republished version written once ({len(devices.writes)} writes,"
+        f" {devices.lookups} lookups)",
+        devices.writes == ["3.3.004-32-g125e0841/ota_0/main"] and devices.lookups <= 2,
+        results,
+    )
+    dispatcher.dispatch_update(MODULE_TOPIC, "3.3.005/ota_1/main")
+    _check(
+        "new version written",
+        devices.writes[-1] == "3.3.005/ota_1/main" and len(devices.writes) == 2,
+        results,
+    )
+
+    restarted = _DeviceRegistry(identifier, sw_version="3.3.005/ota_1/main")
+    dispatcher = _dispatcher(restarted)
+    dispatcher.dispatch_update(MODULE_TOPIC, "3.3.005/ota_1/main")
+    _check("version already in registry not rewritten", not restarted.writes, results)
+
+    legacy = _DeviceRegistry("leaf")
+    dispatcher = _dispatcher(legacy)
+    dispatcher.dispatch_update(MODULE_TOPIC, "3.3.005/ota_1/main")
+    dispatcher.dispatch_update(MODULE_TOPIC, "3.3.005/ota_1/main")
+    _check(
+        "legacy identifier found and written once",
+        legacy.writes == ["3.3.005/ota_1/main"],
+        results,
+    )
+
+    devices = _DeviceRegistry(identifier)
+    dispatcher = _dispatcher(devices)
+    tracker = dispatcher.version_tracker
+    changes = [tracker.process(VEHICLE_TOPICS[0], "1.2") for _ in range(3)]
+    changes.append(tracker.process(VEHICLE_TOPICS[0], "1.3"))
+    dispatcher.dispatch_update(VEHICLE_TOPICS[1], "V2.0")
+    _check(
+        "vehicle versions recorded as attributes, not written to the device",
+        not devices.writes
+        and devices.lookups == 0
+        and changes == [True, False, False, True]
+        and tracker.vehicle_versions
+        == {"xvu.m.version": "1.3", "xrt.m.version": "V2.0"},
+        results,
+    )
+
+    long_version = "v" * 300
+    tracker.process(MODULE_TOPIC, long_version)
+    _check(
+        "overlong version truncated before writing",
+        len(devices.writes[-1]) == vt_mod.VERSION_MAX_LENGTH
+        and tracker.get_status()["module_version"] == devices.writes[-1],
+        results,
+    )
+
+    failed = [name for name, ok in results if not ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -27,10 +27,13 @@ import custom_components.ovms.sensor.entities as entities_mod
 
 from custom_components.ovms.sensor.entities import OVMSSensor
 from custom_components.ovms.attribute_manager import AttributeManager
-from custom_components.ovms.metrics import get_metric_by_path
+from custom_components.ovms.metrics import get_metric_by_path, load_vehicle_metrics
 from custom_components.ovms.mqtt.topic_parser import TopicParser
 from custom_components.ovms.mqtt.entity_registry import EntityRegistry
 
+# The MQTT client loads a vehicle's definitions before its first topic
+load_vehicle_metrics("xvu.")
+
 DAYS_METRICS = [
     "xvu.b.time.total",
     "xvu.b.time.parked",